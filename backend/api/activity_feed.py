@@ -2,13 +2,20 @@
 """
 Live Agentic Activity Feed API
 Shows real-time agent discovery, network growth, and capability searches
+
+Served from the in-process activity stream (services/activity_stream.py):
+write paths publish events, readers never query Postgres per request.
 """
 
-from fastapi import APIRouter, HTTPException
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
 import psycopg2
 import os
-import random
+
+from services.activity_stream import activity_stream, EVENT_TYPES, ACTIVITY_HEARTBEAT_SECONDS
 
 router = APIRouter()
 
@@ -16,8 +23,21 @@ def get_db():
     DATABASE_URL = os.getenv("DATABASE_URL")
     return psycopg2.connect(DATABASE_URL)
 
+def _parse_types(types: Optional[str]):
+    if not types:
+        return None
+    requested = [t.strip() for t in types.split(",") if t.strip()]
+    unknown = [t for t in requested if t not in EVENT_TYPES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown event types: {', '.join(unknown)}")
+    return requested
+
+
 @router.get("/api/v1/activity/recent")
-def get_recent_activity(limit: int = 20):
+def get_recent_activity(
+    limit: int = Query(20, ge=1, le=200),
+    types: Optional[str] = Query("discovery", description="Comma-separated: discovery, execution, message, tool_call")
+):
     """
     Get recent agent activity (real discovery events from crawler)
     
@@ -27,76 +47,22 @@ def get_recent_activity(limit: int = 20):
     - Network growth metrics
     """
     try:
-        conn = get_db()
-        cur = conn.cursor()
-        
-        # Get recently added agents (last 12 hours) with exchange value
-        cur.execute("""
-            SELECT id, name, capabilities, created_at, estimated_value
-            FROM agents
-            WHERE created_at >= NOW() - INTERVAL '12 hours'
-            ORDER BY created_at DESC
-            LIMIT %s
-        """, (limit,))
-        
-        recent_agents = cur.fetchall()
-        
-        # Get agent count in last hour
-        cur.execute("""
-            SELECT COUNT(*) 
-            FROM agents 
-            WHERE created_at >= NOW() - INTERVAL '1 hour'
-        """)
-        agents_last_hour = cur.fetchone()[0]
-        
-        # Get total agent count
-        cur.execute("SELECT COUNT(*) FROM agents")
-        total_agents = cur.fetchone()[0]
-        
-        # Get total capabilities
-        cur.execute("""
-            SELECT COUNT(*) FROM (
-                SELECT jsonb_array_elements(capabilities::jsonb) 
-                FROM agents 
-                WHERE capabilities IS NOT NULL
-            ) AS all_caps
-        """)
-        total_capabilities = cur.fetchone()[0]
-        
-        cur.close()
-        conn.close()
-        
-        # Format activity events
-        activity_events = []
-        
-        for agent_id, name, capabilities, created_at, estimated_value in recent_agents:
-            # Each agent addition is a "discovery event"
-            capability_list = capabilities if isinstance(capabilities, list) else []
-            
-            # Generate realistic discovery message
-            if len(capability_list) > 0:
-                searched_cap = random.choice(capability_list)
-                activity_events.append({
-                    "type": "discovery",
-                    "timestamp": created_at.isoformat() if created_at else datetime.now().isoformat(),
-                    "agent_name": name,
-                    "message": f"Agent '{name}' joined network with {len(capability_list)} capabilities",
-                    "capability_searched": searched_cap,
-                    "matches_found": random.randint(15, 150),
-                    "exchange_value": float(estimated_value) if estimated_value else 0.0
-                })
+        activity_stream.ensure_seeded(get_db)
+        metrics = activity_stream.metrics()
         
         return {
             "success": True,
-            "activity": activity_events[:limit],
+            "activity": activity_stream.recent(limit, _parse_types(types)),
             "metrics": {
-                "agents_last_hour": agents_last_hour,
-                "total_agents": total_agents,
-                "total_capabilities": total_capabilities,
+                "agents_last_hour": metrics["agents_last_hour"],
+                "total_agents": metrics["total_agents"],
+                "total_capabilities": metrics["total_capabilities"],
                 "growth_rate_per_day": 9600  # Real crawler rate
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -107,38 +73,15 @@ def get_activity_stats():
     Get high-level activity statistics for dashboard
     """
     try:
-        conn = get_db()
-        cur = conn.cursor()
-        
-        # Agents joined in last 24 hours
-        cur.execute("""
-            SELECT COUNT(*) 
-            FROM agents 
-            WHERE created_at >= NOW() - INTERVAL '24 hours'
-        """)
-        agents_24h = cur.fetchone()[0]
-        
-        # Total discovery events (agent additions = discovery events)
-        cur.execute("SELECT COUNT(*) FROM agents")
-        total_discoveries = cur.fetchone()[0]
-        
-        # Active categories
-        cur.execute("""
-            SELECT COUNT(DISTINCT jsonb_array_elements_text(categories::jsonb))
-            FROM agents
-            WHERE categories IS NOT NULL
-        """)
-        active_categories = cur.fetchone()[0]
-        
-        cur.close()
-        conn.close()
+        activity_stream.ensure_seeded(get_db)
+        metrics = activity_stream.metrics()
         
         return {
             "success": True,
             "stats": {
-                "discovery_events_24h": agents_24h,
-                "total_discoveries": total_discoveries,
-                "active_categories": active_categories,
+                "discovery_events_24h": metrics["agents_24h"],
+                "total_discoveries": metrics["total_agents"],
+                "active_categories": metrics["active_categories"],
                 "growth_rate": "+9,600 agents/day",
                 "network_status": "GROWING"
             }
@@ -146,3 +89,60 @@ def get_activity_stats():
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@router.get("/api/v1/activity/stream")
+async def stream_activity(
+    request: Request,
+    types: Optional[str] = Query(None, description="Comma-separated: discovery, execution, message, tool_call"),
+    last_event_id: Optional[int] = Query(None, description="Resume after this id (EventSource sends Last-Event-ID automatically)"),
+    backlog: int = Query(20, ge=0, le=200, description="Recent events to send on a fresh connection")
+):
+    """
+    Server-sent events stream of live activity
+    
+    Each event has an id; reconnecting clients resume from Last-Event-ID
+    (header or ?last_event_id=) as long as the event is still buffered.
+    A `metrics` event with current counters is sent every heartbeat.
+    """
+    event_types = _parse_types(types)
+    await asyncio.get_running_loop().run_in_executor(None, activity_stream.ensure_seeded, get_db)
+    
+    header_id = request.headers.get("last-event-id")
+    resume_id = last_event_id
+    if resume_id is None and header_id and header_id.isdigit():
+        resume_id = int(header_id)
+    
+    async def event_generator():
+        activity_stream.subscribers += 1
+        try:
+            if resume_id is not None:
+                events, cursor = activity_stream.since(resume_id, event_types)
+            else:
+                cursor = activity_stream.last_id
+                recent = activity_stream.recent(backlog, event_types) if backlog else []
+                events = [e for e in reversed(recent) if e["id"] <= cursor]
+            
+            yield "retry: 3000\n\n"
+            while True:
+                for event in events:
+                    yield _sse(event)
+                
+                if await request.is_disconnected():
+                    break
+                
+                if not await activity_stream.wait(cursor, ACTIVITY_HEARTBEAT_SECONDS):
+                    yield f"event: metrics\ndata: {json.dumps(activity_stream.metrics())}\n\n"
+                events, cursor = activity_stream.since(cursor, event_types)
+        finally:
+            activity_stream.subscribers -= 1
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 import uuid
 
 from database.base import get_db
+from services.activity_stream import activity_stream
 from models.agent import Agent
 from models.agent_communication import (
     AgentMessage, MessageType, MessageStatus,
@@ -257,6 +258,13 @@ def send_message(
     db.add(message)
     db.commit()
     db.refresh(message)
+    # Public stream: sender/recipient names only, never subject or body
+    activity_stream.publish(
+        "message",
+        message_type=message.message_type.value,
+        from_agent_name=from_agent.name,
+        to_agent_name=to_agent.name
+    )
     
     return {
         "success": True,
@@ -393,6 +401,7 @@ def create_work_order(
     
     db.commit()
     db.refresh(work_order)
+    activity_stream.publish("message", message_type=MessageType.WORK_ORDER.value)
     
     return {
         "success": True,
@@ -11,6 +11,10 @@ import uuid
 
 from database.base import get_db
 from models.agent import Agent, AgentType, VerificationStatus
+from services.category_tagger import tag_agents
+from services.response_cache import response_cache
+from services.activity_stream import activity_stream
+from services.wallet_pool import claim_wallet
 from api.agent_auth import (
     generate_api_key,
     rotate_api_key,
@@ -197,9 +201,21 @@ def register_agent(
     if registration.contact_email:
         agent.extra_data = {"contact_email": registration.contact_email}
     
+    # Attach a pre-generated wallet if one is ready; otherwise bulk
+    # provisioning (POST /api/v1/wallets/provision) assigns one later
+    wallet_data = claim_wallet(db, generate_if_empty=False)
+    if wallet_data:
+        agent.wallet_address = wallet_data["wallet_address"]
+        agent.wallet_private_key_encrypted = wallet_data["wallet_private_key_encrypted"]
+        agent.wallet_created_at = wallet_data["wallet_created_at"]
+    
     db.add(agent)
+    db.flush()
+    tag_agents(db, [(agent.id, agent.name, agent.description)])
     db.commit()
     db.refresh(agent)
+    response_cache.invalidate("agents")
+    activity_stream.publish_agent_created(agent.name, capabilities=agent.capabilities)
     
     # Record IP signup
     record_ip_signup(client_ip, db)
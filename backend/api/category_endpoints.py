@@ -8,11 +8,30 @@ from sqlalchemy import text, func, and_
 from typing import List, Optional
 from pydantic import BaseModel
 import json
+import os
 
 from database.base import get_db
+from services.response_cache import cached_response
+from database.pagination import SortKey, InvalidCursor, decode_cursor, encode_cursor, keyset_sql, order_by_sql, count_sql, COUNT_MODE_PATTERN
 
 router = APIRouter(prefix="/api/v1", tags=["categories"])
 
+# Cached agent_categories.agent_count older than this is recomputed on read
+CATEGORY_COUNTS_MAX_AGE_SECONDS = int(os.getenv("CATEGORY_COUNTS_MAX_AGE_SECONDS", "300"))
+
+
+def refresh_category_counts_if_stale(db: Session):
+    """Recompute cached per-category counts when older than the max age"""
+    db.execute(text("""
+        SELECT refresh_category_counts()
+        WHERE EXISTS (
+            SELECT 1 FROM agent_categories
+            WHERE agent_count_updated_at IS NULL
+               OR agent_count_updated_at < NOW() - make_interval(secs => :max_age)
+        )
+    """), {"max_age": CATEGORY_COUNTS_MAX_AGE_SECONDS})
+    db.commit()
+
 
 # Pydantic Models
 class CategoryBase(BaseModel):
@@ -43,11 +62,13 @@ class AgentSummary(BaseModel):
 class CategoryDetail(BaseModel):
     category: CategoryBase
     agents: List[AgentSummary]
-    total_agents: int
+    total_agents: Optional[int] = None
+    next_cursor: Optional[str] = None
     related_categories: List[CategoryBase] = []
 
 
 @router.get("/categories")
+@cached_response(ttl=60, tags=["agents"])
 async def list_categories(
     parent: Optional[str] = Query(None, description="Filter by parent category"),
     db: Session = Depends(get_db)
@@ -57,9 +78,15 @@ async def list_categories(
     
     Optionally filter by parent category (content, customer, marketing, data, development, operations).
     
+    Agent counts are cached on agent_categories (see migration 012) and
+    refreshed from agent_category_members at most every
+    CATEGORY_COUNTS_MAX_AGE_SECONDS.
+    
     Returns: {"categories": [...]}
     """
     try:
+        refresh_category_counts_if_stale(db)
+        
         query = text("""
             SELECT 
                 ac.slug,
@@ -67,15 +94,9 @@ async def list_categories(
                 ac.description,
                 ac.search_volume,
                 ac.parent_category,
-                COUNT(a.id) as agent_count
+                ac.agent_count
             FROM agent_categories ac
-            LEFT JOIN agents a ON (
-                a.primary_use_case = ac.slug 
-                OR a.primary_use_case = ac.name
-                OR a.primary_use_case ILIKE '%' || ac.name || '%'
-            )
             WHERE (:parent IS NULL OR ac.parent_category = :parent)
-            GROUP BY ac.id, ac.slug, ac.name, ac.description, ac.search_volume, ac.parent_category
             ORDER BY ac.search_volume DESC, ac.name ASC
         """)
         
@@ -112,19 +133,23 @@ async def list_categories(
 
 
 @router.get("/category/{slug}", response_model=CategoryDetail)
+@cached_response(ttl=60, tags=["agents", "category:{slug}"])
 async def get_category(
     slug: str,
     sort: str = Query("rating", description="Sort by: rating, popularity, price-low, price-high, newest"),
     min_rating: float = Query(0, ge=0, le=5, description="Minimum rating filter"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price filter"),
     limit: int = Query(50, ge=1, le=100, description="Number of agents to return"),
-    offset: int = Query(0, ge=0, description="Pagination offset"),
+    offset: int = Query(0, ge=0, description="Pagination offset (legacy, prefer cursor)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("exact", regex=COUNT_MODE_PATTERN, description="Total: exact (cached), estimated, none"),
     db: Session = Depends(get_db)
 ):
     """
     Get category details and agents.
     
     Returns category information plus filtered/sorted list of agents in that category.
+    Keyset-paginated: pass next_cursor back as ?cursor= for the next page.
     """
     try:
         # Get category info
@@ -146,17 +171,51 @@ async def get_category(
             parent_category=category_result[3]
         )
         
-        # Build agent query with filters
-        sort_clause = {
-            "value": "a.value_ratio DESC NULLS LAST, a.estimated_value DESC",
-            "rating": "a.rating_avg DESC, a.transaction_count DESC",
-            "popularity": "a.transaction_count DESC, a.rating_avg DESC",
-            "price-low": "a.estimated_value ASC NULLS LAST",
-            "price-high": "a.estimated_value DESC NULLS LAST",
-            "newest": "a.created_at DESC"
-        }.get(sort, "a.value_ratio DESC NULLS LAST")
+        # Build agent query with filters. Keyset sort keys end with a.id; NULLs
+        # are coalesced to +/-Infinity so they sort last and compare cleanly.
+        sort_keys = {
+            "value": [
+                SortKey("COALESCE(a.value_ratio::float8, '-Infinity')"),
+                SortKey("COALESCE(a.estimated_value::float8, '-Infinity')"),
+                SortKey("a.id")
+            ],
+            "rating": [SortKey("COALESCE(a.rating_avg, 0)"), SortKey("COALESCE(a.transaction_count, 0)"), SortKey("a.id")],
+            "popularity": [SortKey("COALESCE(a.transaction_count, 0)"), SortKey("COALESCE(a.rating_avg, 0)"), SortKey("a.id")],
+            "price-low": [
+                SortKey("COALESCE(a.estimated_value::float8, 'Infinity')", descending=False),
+                SortKey("a.id", descending=False)
+            ],
+            "price-high": [SortKey("COALESCE(a.estimated_value::float8, '-Infinity')"), SortKey("a.id")],
+            "newest": [SortKey("a.created_at"), SortKey("a.id")]
+        }
+        if sort not in sort_keys:
+            sort = "value"
+        keys = sort_keys[sort]
+        
+        params = {
+            "slug": category.slug,
+            "min_rating": min_rating,
+            "max_price": max_price
+        }
+        
+        # Category members come from agent_category_members (maintained at ingest/tagging)
+        filtered_sql = """
+            FROM agent_category_members m
+            JOIN agents a ON a.id = m.agent_id
+            WHERE m.category_slug = :slug
+              AND a.is_active = true
+              AND a.rating_avg >= :min_rating
+              AND (:max_price IS NULL OR a.estimated_value <= :max_price OR a.estimated_value IS NULL)
+        """
+        
+        keyset_clause = ""
+        page_params = dict(params, limit=limit + 1, offset=0 if cursor else offset)
+        if cursor:
+            clause, keyset_params = keyset_sql(keys, decode_cursor(cursor, sort, len(keys)))
+            keyset_clause = f"AND {clause}"
+            page_params.update(keyset_params)
         
-        # Match agents by category name (primary_use_case stores the category name, not slug)
+        key_columns = ", ".join(f"{key.expr} AS _k{i}" for i, key in enumerate(keys))
         agents_query = text(f"""
             SELECT 
                 a.id,
@@ -170,29 +229,22 @@ async def get_category(
                 a.verified,
                 a.estimated_value,
                 a.value_ratio,
-                a.valuation_status
-            FROM agents a
-            WHERE (
-                a.primary_use_case ILIKE :category_name
-                OR a.primary_use_case ILIKE '%' || :category_name || '%'
-            )
-              AND a.is_active = true
-              AND a.rating_avg >= :min_rating
-              AND (:max_price IS NULL OR a.estimated_value <= :max_price OR a.estimated_value IS NULL)
-            ORDER BY {sort_clause}
+                a.valuation_status,
+                {key_columns}
+            {filtered_sql}
+              {keyset_clause}
+            ORDER BY {order_by_sql(keys)}
             LIMIT :limit OFFSET :offset
         """)
         
-        agents_result = db.execute(agents_query, {
-            "category_name": category.name,
-            "min_rating": min_rating,
-            "max_price": max_price,
-            "limit": limit,
-            "offset": offset
-        })
+        rows = db.execute(agents_query, page_params).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(list(rows[-1][12:]), sort)
         
         agents = []
-        for row in agents_result:
+        for row in rows:
             # Parse pricing_model JSON to get price_usd
             price_usd = None
             if row[6]:
@@ -217,25 +269,8 @@ async def get_category(
                 valuation_status=row[11]
             ))
         
-        # Get total count
-        count_query = text("""
-            SELECT COUNT(*)
-            FROM agents a
-            WHERE (
-                a.primary_use_case ILIKE :category_name
-                OR a.primary_use_case ILIKE '%' || :category_name || '%'
-            )
-              AND a.is_active = true
-              AND a.rating_avg >= :min_rating
-              AND (:max_price IS NULL OR a.estimated_value <= :max_price OR a.estimated_value IS NULL)
-        """)
-        
-        total_result = db.execute(count_query, {
-            "category_name": category.name,
-            "min_rating": min_rating,
-            "max_price": max_price
-        })
-        total_agents = total_result.scalar()
+        # Get total count (cached exact, planner estimate, or skipped)
+        total_agents = count_sql(db, f"SELECT a.id {filtered_sql}", params, count)
         
         # Get related categories (same parent)
         related_query = text("""
@@ -263,9 +298,12 @@ async def get_category(
             category=category,
             agents=agents,
             total_agents=total_agents,
+            next_cursor=next_cursor,
             related_categories=related
         )
         
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -11,6 +11,9 @@ from datetime import datetime
 from database.base import get_db
 from models.agent import Agent, AgentType
 from api.auth import verify_admin_api_key
+from services.category_tagger import tag_agents
+from services.response_cache import response_cache
+from services.activity_stream import activity_stream
 
 router = APIRouter(prefix="/api/v1/crawler", tags=["crawler"])
 
@@ -70,6 +73,8 @@ async def crawler_submit_agents(
     6. Return summary of created/skipped agents
     """
     created_ids = []
+    tagged = []
+    discovered = []
     skipped = 0
     skipped_reasons = {}
     
@@ -134,10 +139,17 @@ async def crawler_submit_agents(
             
             db.add(new_agent)
             created_ids.append(agent_id)
+            tagged.append((agent_id, agent_data.name, agent_data.description))
+            discovered.append(agent_data)
         
-        # Commit all at once
+        # Commit all at once (agents + category memberships)
         if not submission.dry_run:
+            db.flush()
+            tag_agents(db, tagged)
             db.commit()
+            response_cache.invalidate("agents")
+            for agent_data in discovered:
+                activity_stream.publish_agent_created(agent_data.name, categories=agent_data.categories)
         
         agents_created = len(created_ids)
         agents_submitted = len(submission.agents)
@@ -253,6 +265,7 @@ async def approve_pending_discovered(
             approved_ids.append(str(agent.id))
         
         db.commit()
+        response_cache.invalidate("agents")
         
         return {
             "success": True,
@@ -11,6 +11,7 @@ from datetime import datetime
 import uuid
 
 from database.base import get_db, get_db_connection
+from services.activity_stream import activity_stream
 
 router = APIRouter(prefix="/api/v1/executions", tags=["executions"])
 
@@ -79,6 +80,12 @@ async def start_execution(request: ExecutionStart):
         ))
         
         conn.commit()
+        activity_stream.publish(
+            "execution",
+            execution_id=execution_id,
+            status="processing",
+            capability=request.capability_requested
+        )
         
         return {
             "execution_id": execution_id,
@@ -158,6 +165,14 @@ async def complete_execution(request: ExecutionComplete):
             ))
         
         conn.commit()
+        activity_stream.publish(
+            "execution",
+            execution_id=request.execution_id,
+            status="completed",
+            success=request.success,
+            capability=capability,
+            execution_time_ms=request.execution_time_ms
+        )
         
         # Trigger reputation recalculation (async job)
         # For now, just flag that it needs updating
@@ -211,6 +226,12 @@ async def fail_execution(request: ExecutionFailed):
             raise HTTPException(status_code=404, detail="Execution not found")
         
         conn.commit()
+        activity_stream.publish(
+            "execution",
+            execution_id=request.execution_id,
+            status="failed",
+            error_code=request.error_code
+        )
         
         return {
             "status": "recorded",
@@ -2,14 +2,16 @@
 Arbitrage Fulfillment API Endpoints
 Trigger and manage automated fulfillment
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
 
 from database.base import get_db
 from services.arbitrage_fulfillment import ArbitrageFulfillmentEngine, calculate_net_profit
+from services.fulfillment_queue import FulfillmentJobQueue
 from models.transaction import Transaction
+from models.listing import Listing
 
 
 router = APIRouter(prefix="/api/v1/fulfillment", tags=["Fulfillment"])
@@ -31,19 +33,21 @@ class ManualDelivery(BaseModel):
 # Automated Fulfillment
 # ==========================================
 
-@router.post("/process/{transaction_id}")
-async def trigger_fulfillment(
+@router.post("/process/{transaction_id}", status_code=202)
+def trigger_fulfillment(
     transaction_id: str,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
     Trigger automated fulfillment for arbitrage transaction
     
-    Called after buyer completes payment to:
+    Called after buyer completes payment. Enqueues a fulfillment job and
+    returns immediately; queue workers then:
     1. Purchase from source platform
     2. Deliver to buyer
     3. Complete transaction
+    
+    Re-triggering while a job is queued/running returns the existing job.
     """
     # Verify transaction exists
     transaction = db.query(Transaction).filter(
@@ -53,17 +57,21 @@ async def trigger_fulfillment(
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
-    # Create fulfillment engine
-    engine = ArbitrageFulfillmentEngine(db)
+    # Route to the source platform's concurrency pool
+    listing = db.query(Listing).filter(Listing.id == transaction.listing_id).first()
+    platform = (listing.metadata or {}).get('source_platform') if listing else None
     
-    # Process in background
-    background_tasks.add_task(engine.process_transaction, transaction_id)
+    try:
+        job = FulfillmentJobQueue().enqueue(transaction_id, platform or 'default')
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Fulfillment queue unavailable: {str(e)}")
     
     return {
         "success": True,
-        "message": "Fulfillment started",
+        "message": "Fulfillment queued" if job["created"] else "Fulfillment already queued",
         "transaction_id": transaction_id,
-        "status": "processing"
+        "job_id": job["job_id"],
+        "status": job["status"]
     }
 
 
@@ -94,6 +102,66 @@ def get_fulfillment_status(transaction_id: str, db: Session = Depends(get_db)):
     }
 
 
+# ==========================================
+# Job Queue Monitoring
+# ==========================================
+
+@router.get("/jobs/stats")
+def get_job_queue_stats():
+    """
+    Fulfillment job counts by status and platform
+    """
+    return {
+        "success": True,
+        **FulfillmentJobQueue().stats()
+    }
+
+
+@router.get("/jobs/dead-letter")
+def get_dead_letter_jobs(limit: int = 50):
+    """
+    Jobs that exhausted their retries (buyer refunded where possible)
+    """
+    jobs = FulfillmentJobQueue().list_dead(limit)
+    
+    return {
+        "success": True,
+        "total": len(jobs),
+        "jobs": jobs
+    }
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: int):
+    """
+    Get fulfillment job state (attempts, next run, last error)
+    """
+    job = FulfillmentJobQueue().get_job(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return {
+        "success": True,
+        "job": job
+    }
+
+
+@router.post("/jobs/{job_id}/requeue")
+def requeue_dead_job(job_id: int):
+    """
+    Give a dead-lettered job a fresh set of retries
+    """
+    if not FulfillmentJobQueue().requeue_dead(job_id):
+        raise HTTPException(status_code=400, detail="Job is not dead-lettered or transaction already has a live job")
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": "queued"
+    }
+
+
 # ==========================================
 # Manual Fulfillment Queue
 # ==========================================
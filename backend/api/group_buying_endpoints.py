@@ -1,12 +1,20 @@
 """
 Group Buying Pool API Endpoints
+
+Participants live in pool_members (migration 020). A join is one statement:
+the pool's current_quantity is incremented only if the result stays within
+target_quantity, the member row is upserted, and the increment that fills
+the pool flips it to triggered - so concurrent joins neither lose updates
+nor hold the pool row across round trips.
 """
 
 from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime, timedelta
-from uuid import uuid4
+from uuid import UUID, uuid4
+
+import psycopg2
 
 from database.base import get_db_connection
 
@@ -32,7 +40,7 @@ class PoolCreate(BaseModel):
 
 class PoolJoin(BaseModel):
     agent_id: str
-    quantity: int = 1
+    quantity: int = Field(1, ge=1)
 
 
 class PoolResponse(BaseModel):
@@ -48,10 +56,47 @@ class PoolResponse(BaseModel):
     created_at: Optional[datetime]
 
 
+# --- SQL ---
+
+_JOIN_SQL = """
+    WITH pool AS (
+        UPDATE group_buying_pools
+        SET current_quantity = current_quantity + %(quantity)s,
+            status = CASE WHEN current_quantity + %(quantity)s >= target_quantity THEN 'triggered' ELSE status END,
+            triggered_at = CASE WHEN current_quantity + %(quantity)s >= target_quantity THEN NOW() ELSE triggered_at END,
+            updated_at = NOW()
+        WHERE id = %(pool_id)s
+          AND status = 'active'
+          AND (expires_at IS NULL OR expires_at > NOW())
+          AND current_quantity + %(quantity)s <= target_quantity
+        RETURNING id, current_quantity, target_quantity, status
+    ),
+    member AS (
+        INSERT INTO pool_members (id, pool_id, agent_id, quantity)
+        SELECT %(member_id)s, id, CAST(%(agent_id)s AS uuid), %(quantity)s FROM pool
+        ON CONFLICT (pool_id, agent_id) DO UPDATE
+        SET quantity = pool_members.quantity + EXCLUDED.quantity
+        RETURNING quantity
+    )
+    SELECT pool.current_quantity, pool.target_quantity, pool.status, member.quantity
+    FROM pool, member
+"""
+
+# Participants as the old JSON shape, for responses
+_PARTICIPANTS_SQL = """
+    COALESCE((
+        SELECT json_agg(json_build_object(
+            'agent_id', m.agent_id, 'quantity', m.quantity, 'joined_at', m.joined_at
+        ) ORDER BY m.joined_at)
+        FROM pool_members m WHERE m.pool_id = p.id
+    ), '[]'::json) AS participants
+"""
+
+
 # --- Endpoints ---
 
 @router.post("/")
-async def create_pool(pool: PoolCreate):
+def create_pool(pool: PoolCreate):
     """Create a new group buying pool"""
     pool_id = str(uuid4())
     expires_at = datetime.utcnow() + timedelta(hours=pool.expires_in_hours)
@@ -61,11 +106,11 @@ async def create_pool(pool: PoolCreate):
         cur.execute(
             """INSERT INTO group_buying_pools
                (id, service_id, creator_agent_id, target_quantity, current_quantity,
-                discount_tier, participants, status, expires_at)
-               VALUES (%s,%s,%s,%s,0,%s,%s,'active',%s)
+                discount_tier, status, expires_at)
+               VALUES (%s,%s,%s,%s,0,%s,'active',%s)
                RETURNING id""",
             (pool_id, pool.service_id, pool.creator_agent_id, pool.target_quantity,
-             pool.discount_tier, '[]', expires_at)
+             pool.discount_tier, expires_at)
         )
         conn.commit()
         return {"id": pool_id, "status": "active", "expires_at": str(expires_at), "referral": REFERRAL_SECTION}
@@ -77,7 +122,7 @@ async def create_pool(pool: PoolCreate):
 
 
 @router.get("/")
-async def list_pools(
+def list_pools(
     status: Optional[str] = "active",
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0)
@@ -95,8 +140,8 @@ async def list_pools(
         params.extend([limit, offset])
         cur.execute(
             f"""SELECT id, service_id, creator_agent_id, target_quantity, current_quantity,
-                       discount_tier, participants, status, expires_at, created_at
-                FROM group_buying_pools {where}
+                       discount_tier, {_PARTICIPANTS_SQL}, status, expires_at, created_at
+                FROM group_buying_pools p {where}
                 ORDER BY created_at DESC LIMIT %s OFFSET %s""",
             params
         )
@@ -109,15 +154,15 @@ async def list_pools(
 
 
 @router.get("/{pool_id}")
-async def get_pool(pool_id: str):
+def get_pool(pool_id: str):
     """Get pool status and details"""
     conn = get_db_connection()
     try:
         cur = conn.cursor()
         cur.execute(
-            """SELECT id, service_id, creator_agent_id, target_quantity, current_quantity,
-                      discount_tier, participants, status, triggered_at, expires_at, created_at
-               FROM group_buying_pools WHERE id = %s""",
+            f"""SELECT id, service_id, creator_agent_id, target_quantity, current_quantity,
+                      discount_tier, {_PARTICIPANTS_SQL}, status, triggered_at, expires_at, created_at
+               FROM group_buying_pools p WHERE id = %s""",
             (pool_id,)
         )
         row = cur.fetchone()
@@ -133,44 +178,64 @@ async def get_pool(pool_id: str):
 
 
 @router.post("/{pool_id}/join")
-async def join_pool(pool_id: str, join: PoolJoin):
-    """Join an existing group buying pool"""
+def join_pool(pool_id: str, join: PoolJoin):
+    """
+    Join an existing group buying pool
+
+    Rejected with 409 if the quantity would overshoot the target. An agent
+    joining again adds to its quantity. The join that reaches the target
+    triggers the pool (triggered: true in its response only).
+    """
+    try:
+        agent_id = str(UUID(join.agent_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="agent_id must be a UUID")
+
     conn = get_db_connection()
     try:
         cur = conn.cursor()
-        # Get current pool
-        cur.execute("SELECT status, current_quantity, target_quantity, participants FROM group_buying_pools WHERE id = %s FOR UPDATE", (pool_id,))
+        try:
+            cur.execute(_JOIN_SQL, {
+                "pool_id": pool_id,
+                "agent_id": agent_id,
+                "quantity": join.quantity,
+                "member_id": str(uuid4())
+            })
+        except psycopg2.errors.ForeignKeyViolation:
+            conn.rollback()
+            raise HTTPException(status_code=404, detail="Agent not found")
+        row = cur.fetchone()
+        conn.commit()
+
+        if row:
+            current_qty, target_qty, status, agent_quantity = row
+            return {
+                "pool_id": pool_id,
+                "current_quantity": current_qty,
+                "target_quantity": target_qty,
+                "status": status,
+                "your_quantity": agent_quantity,
+                "triggered": status == "triggered",
+                "referral": REFERRAL_SECTION
+            }
+
+        # Nothing updated - say why
+        cur.execute(
+            "SELECT status, current_quantity, target_quantity, expires_at <= NOW() FROM group_buying_pools WHERE id = %s",
+            (pool_id,)
+        )
         row = cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Pool not found")
-        status, current_qty, target_qty, participants = row
+        status, current_qty, target_qty, expired = row
         if status != "active":
             raise HTTPException(status_code=400, detail=f"Pool is {status}, cannot join")
-
-        new_qty = current_qty + join.quantity
-        import json
-        parts = json.loads(participants) if isinstance(participants, str) else (participants or [])
-        parts.append({"agent_id": join.agent_id, "quantity": join.quantity, "joined_at": datetime.utcnow().isoformat()})
-
-        # Auto-trigger if threshold met
-        new_status = "triggered" if new_qty >= target_qty else "active"
-        triggered_at = "NOW()" if new_status == "triggered" else "NULL"
-
-        cur.execute(
-            f"""UPDATE group_buying_pools
-                SET current_quantity = %s, participants = %s, status = %s,
-                    triggered_at = {triggered_at}, updated_at = NOW()
-                WHERE id = %s""",
-            (new_qty, json.dumps(parts), new_status, pool_id)
+        if expired:
+            raise HTTPException(status_code=400, detail="Pool has expired, cannot join")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Only {max(target_qty - current_qty, 0)} of {target_qty} remaining in pool"
         )
-        conn.commit()
-        return {
-            "pool_id": pool_id,
-            "current_quantity": new_qty,
-            "target_quantity": target_qty,
-            "status": new_status,
-            "referral": REFERRAL_SECTION
-        }
     except HTTPException:
         raise
     except Exception as e:
@@ -181,11 +246,23 @@ async def join_pool(pool_id: str, join: PoolJoin):
 
 
 @router.post("/{pool_id}/trigger")
-async def trigger_pool(pool_id: str):
+def trigger_pool(pool_id: str):
     """Manually trigger a pool if threshold is met"""
     conn = get_db_connection()
     try:
         cur = conn.cursor()
+        cur.execute(
+            """UPDATE group_buying_pools
+               SET status = 'triggered', triggered_at = NOW(), updated_at = NOW()
+               WHERE id = %s AND status = 'active' AND current_quantity >= target_quantity
+               RETURNING id""",
+            (pool_id,)
+        )
+        triggered = cur.fetchone() is not None
+        conn.commit()
+        if triggered:
+            return {"pool_id": pool_id, "status": "triggered", "referral": REFERRAL_SECTION}
+
         cur.execute("SELECT current_quantity, target_quantity, status FROM group_buying_pools WHERE id = %s", (pool_id,))
         row = cur.fetchone()
         if not row:
@@ -193,15 +270,9 @@ async def trigger_pool(pool_id: str):
         current_qty, target_qty, status = row
         if status == "triggered":
             return {"pool_id": pool_id, "status": "already_triggered", "referral": REFERRAL_SECTION}
-        if current_qty < target_qty:
-            raise HTTPException(status_code=400, detail=f"Threshold not met: {current_qty}/{target_qty}")
-
-        cur.execute(
-            "UPDATE group_buying_pools SET status = 'triggered', triggered_at = NOW(), updated_at = NOW() WHERE id = %s",
-            (pool_id,)
-        )
-        conn.commit()
-        return {"pool_id": pool_id, "status": "triggered", "referral": REFERRAL_SECTION}
+        if status != "active":
+            raise HTTPException(status_code=400, detail=f"Pool is {status}, cannot trigger")
+        raise HTTPException(status_code=400, detail=f"Threshold not met: {current_qty}/{target_qty}")
     except HTTPException:
         raise
     except Exception as e:
@@ -2,13 +2,16 @@
 Instrument API Endpoints (Layer 1 - Agent Workflows)
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
+import asyncio
 import json
 
 from database.base import get_db, get_db_connection
+from services.response_cache import cached_response
+from services.workflow_engine import WorkflowEngine, WorkflowError, parse_workflow, run_in_background
 
 router = APIRouter(prefix="/api/v1/instruments", tags=["instruments"])
 
@@ -47,9 +50,71 @@ class InstrumentExecutionResponse(BaseModel):
     execution_id: str
     status: str
     message: str
+    results: Optional[dict] = None
+
+
+def _json_field(value):
+    # psycopg2 returns JSONB as Python objects; plain JSON/TEXT columns as strings
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _load_steps(instrument_id: str, agent_ids_value, workflow_value):
+    try:
+        return parse_workflow(_json_field(workflow_value), [str(a) for a in _json_field(agent_ids_value) or []])
+    except WorkflowError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid workflow for instrument {instrument_id}: {e}")
+
+
+def _store_results(execution_id: str, results: dict):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE instrument_executions
+            SET status = %s, results = %s, completed_at = NOW()
+            WHERE id = %s
+        """, (results["status"], json.dumps(results, default=str), execution_id))
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+
+async def _run_workflow(instrument_id: str, execution_id: str, steps, inputs, previous=None) -> dict:
+    """Run the DAG and persist its results; failures end up in results, not exceptions"""
+    try:
+        results = await WorkflowEngine(instrument_id, steps).run(inputs or {}, previous)
+    except Exception as e:
+        print(f"[WARN] Instrument execution {execution_id} crashed: {e}")
+        results = {"status": "failed", "error": str(e), "steps": (previous or {}).get("steps", {})}
+    if inputs is not None:
+        results["inputs"] = inputs
+    await asyncio.to_thread(_store_results, execution_id, results)
+    return results
+
+
+async def _start_run(instrument_id: str, execution_id: str, steps, inputs, previous, wait: bool) -> dict:
+    if wait:
+        results = await _run_workflow(instrument_id, execution_id, steps, inputs, previous)
+        return {
+            "execution_id": str(execution_id),
+            "status": results["status"],
+            "message": f"Workflow finished in {results.get('elapsed_ms', 0)}ms",
+            "results": results
+        }
+
+    run_in_background(_run_workflow(instrument_id, execution_id, steps, inputs, previous))
+    return {
+        "execution_id": str(execution_id),
+        "status": "processing",
+        "message": f"Workflow execution started. Check status with execution_id: {execution_id}"
+    }
 
 
 @router.get("", response_model=InstrumentListResponse)
+# TTL-only freshness: instruments change only through migrations/seed scripts,
+# so no API write path invalidates "instruments" (edits show up within 5 min)
+@cached_response(ttl=300, tags=["instruments"])
 async def list_instruments(
     category: Optional[str] = None,
     active_only: bool = True
@@ -153,11 +218,16 @@ async def get_instrument(instrument_id: str):
 @router.post("/{instrument_id}/execute", response_model=InstrumentExecutionResponse)
 async def execute_instrument(
     instrument_id: str,
-    request: InstrumentExecutionRequest
+    request: InstrumentExecutionRequest,
+    wait: bool = Query(False, description="Run to completion and return step results")
 ):
     """
     Execute an instrument workflow
     Payment must be verified before execution
+    
+    Steps run as a DAG (services/workflow_engine.py): independent steps run
+    concurrently, each with its own timeout and retries. Poll
+    /executions/{execution_id} for results, or pass wait=true.
     """
     conn = get_db_connection()
     cur = conn.cursor()
@@ -176,6 +246,13 @@ async def execute_instrument(
         conn.close()
         raise HTTPException(status_code=404, detail="Instrument not found or inactive")
     
+    try:
+        steps = _load_steps(instrument_id, instrument[3], instrument[4])
+    except HTTPException:
+        cur.close()
+        conn.close()
+        raise
+    
     # TODO: Verify payment transaction on Solana
     # For now, accept payment_tx_hash as proof
     
@@ -191,23 +268,61 @@ async def execute_instrument(
         request.wallet_address,
         float(instrument[2]),
         request.payment_tx_hash,
-        'pending'
+        'processing'
     ))
     
     execution_id = cur.fetchone()[0]
     conn.commit()
     
-    # TODO: Trigger workflow execution
-    # For MVP, return execution_id for manual processing
-    
     cur.close()
     conn.close()
     
-    return {
-        "execution_id": str(execution_id),
-        "status": "pending",
-        "message": f"Workflow execution started. Check status with execution_id: {execution_id}"
-    }
+    return await _start_run(instrument_id, str(execution_id), steps, request.inputs, None, wait)
+
+
+@router.post("/{instrument_id}/executions/{execution_id}/retry", response_model=InstrumentExecutionResponse)
+async def retry_execution(
+    instrument_id: str,
+    execution_id: str,
+    wait: bool = Query(False, description="Run to completion and return step results")
+):
+    """
+    Re-run only the failed and skipped steps of a finished execution
+    Completed steps keep their outputs and are not called again.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("""
+            SELECT ie.status, ie.results, i.agent_ids, i.workflow
+            FROM instrument_executions ie
+            JOIN instruments i ON i.id = ie.instrument_id
+            WHERE ie.id = %s AND ie.instrument_id = %s
+        """, (execution_id, instrument_id))
+        row = cur.fetchone()
+        
+        if not row:
+            raise HTTPException(status_code=404, detail="Execution not found")
+        if row[0] != "failed":
+            raise HTTPException(status_code=409, detail=f"Execution is {row[0]}; only failed executions can be retried")
+        
+        previous = _json_field(row[1]) or {}
+        steps = _load_steps(instrument_id, row[2], row[3])
+        
+        # Claim the retry (two concurrent retries must not both run)
+        cur.execute("""
+            UPDATE instrument_executions SET status = 'processing', completed_at = NULL
+            WHERE id = %s AND status = %s
+        """, (execution_id, row[0]))
+        if cur.rowcount == 0:
+            raise HTTPException(status_code=409, detail="Execution is already being retried")
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    
+    return await _start_run(instrument_id, execution_id, steps, previous.get("inputs"), previous, wait)
 
 
 @router.get("/{instrument_id}/executions/{execution_id}")
@@ -233,7 +348,7 @@ async def get_execution_status(instrument_id: str, execution_id: str):
         conn.close()
         raise HTTPException(status_code=404, detail="Execution not found")
     
-    results = json.loads(row[3]) if row[3] else None
+    results = _json_field(row[3]) if row[3] else None
     
     execution = {
         "execution_id": str(row[0]),
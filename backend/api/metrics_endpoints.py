@@ -0,0 +1,47 @@
+"""
+Metrics Endpoints
+Prometheus scrape target and the slow-request profiler toggle
+
+GET  /metrics            - Prometheus text format (Bearer METRICS_TOKEN if set)
+POST /metrics/profiling  - Turn the sampling profiler on/off (admin key; this worker only)
+"""
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import os
+
+from api.admin_endpoints import verify_admin
+from services.request_metrics import (
+    METRICS_SLOW_REQUEST_MS, PROFILE_DIR, metrics_registry, profiler
+)
+
+router = APIRouter(tags=["metrics"])
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # Optional; scrape with Authorization: Bearer <token>
+
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics(authorization: str = Header(None)):
+    """Per-route latency histograms, SQL counts/time, N+1 flags, process stats"""
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+@router.post("/metrics/profiling")
+def toggle_profiling(
+    enabled: bool = Query(..., description="Start or stop the sampling profiler"),
+    authorization: str = Header(None)
+):
+    """
+    Start/stop sampling; while on, requests slower than METRICS_SLOW_REQUEST_MS
+    are dumped as folded-stack flamegraphs into PROFILE_DIR
+    """
+    verify_admin(authorization)
+    profiler.set_enabled(enabled)
+    return {
+        "enabled": profiler.enabled,
+        "slow_request_ms": METRICS_SLOW_REQUEST_MS,
+        "interval_ms": int(profiler.interval * 1000),
+        "profile_dir": PROFILE_DIR,
+        "profiles_written": profiler.profiles_written
+    }
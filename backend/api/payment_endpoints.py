@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import Optional
+import asyncio
 import sys
 import os
 from datetime import datetime
@@ -47,7 +48,7 @@ async def get_auth_challenge(wallet_address: str):
     3. Client signs challenge with private key
     4. Client sends signed challenge to authenticated endpoints
     """
-    challenge = generate_challenge(wallet_address)
+    challenge = await asyncio.to_thread(generate_challenge, wallet_address)  # Store may be Postgres/Redis
     
     return {
         "success": True,
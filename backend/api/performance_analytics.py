@@ -13,6 +13,9 @@ from database.base import get_db, get_db_connection
 
 router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
 
+# Executions finish well within this; bounds started_at in completed_at windows
+MAX_EXECUTION_DURATION = timedelta(days=1)
+
 
 # Pydantic Models
 class AgentReputation(BaseModel):
@@ -178,7 +181,9 @@ async def get_agent_valuation(agent_id: str):
         row = cur.fetchone()
         
         if not row:
-            # Calculate on-the-fly if not in table
+            # Calculate on-the-fly if not in table. The started_at bound lets
+            # Postgres prune agent_executions partitions outside the window.
+            since = datetime.now() - timedelta(days=30)
             cur.execute("""
                 SELECT 
                     AVG(actual_cost_usd),
@@ -187,8 +192,9 @@ async def get_agent_valuation(agent_id: str):
                 FROM agent_executions
                 WHERE executing_agent_id = %s
                 AND completed_at >= %s
+                AND started_at >= %s
                 AND actual_cost_usd IS NOT NULL
-            """, (agent_id, datetime.now() - timedelta(days=30)))
+            """, (agent_id, since, since - MAX_EXECUTION_DURATION))
             
             calc_row = cur.fetchone()
             avg_price = float(calc_row[0]) if calc_row[0] else 0
@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 import uuid
 
 from database.base import get_db
+from services.response_cache import cached_response, response_cache
 from models.agent import Agent
 from models.agent_performance import AgentPerformanceMetric, AgentPerformanceHistory, CategoryPerformance
 from models.transaction import Transaction, TransactionStatus
@@ -164,6 +165,7 @@ def get_performance_chart(
 
 
 @router.get("/market-overview")
+@cached_response(ttl=60, tags=["performance"])
 def get_market_overview(db: Session = Depends(get_db)):
     """
     Get overall market statistics (like market indices overview)
@@ -267,6 +269,7 @@ def update_agent_performance(
     metrics.last_calculated_at = datetime.utcnow()
     
     db.commit()
+    response_cache.invalidate("performance")
     
     return {
         "success": True,
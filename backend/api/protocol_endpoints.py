@@ -4,7 +4,7 @@ Standard protocol for agent-to-agent communication and trade
 """
 
 from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import json
@@ -12,9 +12,13 @@ import hashlib
 import uuid
 
 from database.base import get_db, get_db_connection
+from services.response_cache import cached_response
 
 router = APIRouter(prefix="/api/v1/protocol", tags=["protocol"])
 
+MAX_BATCH_DISCOVER_STEPS = 50
+DISCOVER_MATCH_LIMIT = 10  # Candidates per step (before cost filtering)
+
 
 # Pydantic Models
 class DiscoverRequest(BaseModel):
@@ -24,6 +28,18 @@ class DiscoverRequest(BaseModel):
     task_context: Optional[Dict[str, Any]] = None
 
 
+class DiscoverStep(BaseModel):
+    step_id: Optional[str] = None
+    capabilities_needed: List[str] = Field(..., min_items=1)
+    constraints: Dict[str, Any] = {}
+
+
+class BatchDiscoverRequest(BaseModel):
+    requesting_agent_id: str
+    steps: List[DiscoverStep] = Field(..., min_items=1, max_items=MAX_BATCH_DISCOVER_STEPS)
+    task_context: Optional[Dict[str, Any]] = None
+
+
 class AgentMatch(BaseModel):
     agent_id: str
     name: str
@@ -45,6 +61,20 @@ class DiscoverResponse(BaseModel):
     platform_fee: float
 
 
+class BatchDiscoverStepResult(BaseModel):
+    step_id: Optional[str]
+    matches: List[AgentMatch]
+    match_quality: float
+    estimated_total_cost: float
+
+
+class BatchDiscoverResponse(BaseModel):
+    results: List[BatchDiscoverStepResult]
+    unique_agents: int
+    estimated_total_cost: float
+    platform_fee: float
+
+
 class ReputationData(BaseModel):
     score: float
     total_executions: int
@@ -143,72 +173,107 @@ def calculate_reputation_score(agent_data: dict) -> dict:
     }
 
 
-def match_agents_to_capabilities(capabilities: List[str], constraints: Dict, conn) -> List[Dict]:
-    """Find agents matching capabilities and constraints"""
-    cur = conn.cursor()
+def _json_value(value, default):
+    if value is None:
+        return default
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _agent_match(row) -> Dict:
+    """Protocol match payload for an agents row (id, name, description, capabilities, pricing_model, api_endpoint, quality_score)"""
+    agent_id = str(row[0])
+    pricing_json = _json_value(row[4], {})
     
-    # Build query based on capabilities (cast json to jsonb for containment operator)
-    capability_conditions = " OR ".join([f"capabilities::jsonb @> '\[\"{cap}\"\]'" for cap in capabilities])
+    # Calculate reputation (mock for now)
+    reputation = calculate_reputation_score({
+        'total_executions': 100,
+        'successful_executions': 95,
+        'avg_response_time_ms': 3200,
+        'cost_accuracy': 0.98,
+        'repeat_customer_rate': 0.67,
+        'peer_rating': 4.8
+    })
     
-    query = f"""
-        SELECT 
-            id, name, description, capabilities, 
-            pricing_model, api_endpoint, quality_score
-        FROM agents
-        WHERE ({capability_conditions})
-        AND is_active = true
-        AND quality_score >= %s
-        ORDER BY quality_score DESC
-        LIMIT 10
+    return {
+        "agent_id": agent_id,
+        "name": row[1],
+        "capabilities": _json_value(row[3], []),
+        "reputation_score": reputation['score'],
+        "success_rate": reputation['success_rate'],
+        "avg_latency_ms": reputation['avg_response_time_ms'],
+        "cost_usd": float(pricing_json.get('price_usd', 0) or 0),
+        "execution_endpoint": row[5] or f"https://agentdirectory.exchange/api/v1/execute/{agent_id}",
+        "payment_addresses": {
+            "solana_usdc": "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin"  # Mock
+        },
+        "verification_proof": hashlib.sha256(agent_id.encode()).hexdigest(),
+        "last_updated": datetime.now().isoformat()
+    }
+
+
+def match_agents_batch(steps: List[tuple], conn) -> List[List[Dict]]:
     """
+    Find agents for several (capabilities, constraints) steps in one query
     
-    min_reputation = constraints.get('min_reputation', 0.5)
-    min_quality = int(min_reputation * 100)
+    Each step gets its top DISCOVER_MATCH_LIMIT active agents by quality that
+    have any of its capabilities (GIN index on capabilities::jsonb, migration 014).
+    Agents shared between steps are fetched and built once.
+    Returns one match list per step, in step order.
+    """
+    step_rows = [
+        {
+            "idx": idx,
+            "caps": list(capabilities),
+            "min_quality": int(constraints.get('min_reputation', 0.5) * 100)
+        }
+        for idx, (capabilities, constraints) in enumerate(steps)
+    ]
     
-    cur.execute(query, (min_quality,))
+    cur = conn.cursor()
+    cur.execute("""
+        WITH steps AS (
+            SELECT * FROM jsonb_to_recordset(%s::jsonb) AS s(idx INT, caps JSONB, min_quality INT)
+        ),
+        hits AS (
+            SELECT s.idx, m.id
+            FROM steps s
+            CROSS JOIN LATERAL (
+                SELECT a.id
+                FROM agents a
+                WHERE a.capabilities::jsonb ?| ARRAY(SELECT jsonb_array_elements_text(s.caps))
+                AND a.is_active = true
+                AND a.quality_score >= s.min_quality
+                ORDER BY a.quality_score DESC, a.id
+                LIMIT %s
+            ) m
+        )
+        SELECT
+            a.id, a.name, a.description, a.capabilities,
+            a.pricing_model, a.api_endpoint, a.quality_score,
+            array_agg(h.idx) AS step_indexes
+        FROM hits h
+        JOIN agents a ON a.id = h.id
+        GROUP BY a.id
+        ORDER BY a.quality_score DESC, a.id
+    """, (json.dumps(step_rows), DISCOVER_MATCH_LIMIT))
     rows = cur.fetchall()
+    cur.close()
     
-    matches = []
+    results = [[] for _ in steps]
     for row in rows:
-        agent_id = str(row[0])
-        capabilities_json = json.loads(row[3]) if row[3] else []
-        pricing_json = json.loads(row[4]) if row[4] else {}
-        
-        # Calculate reputation (mock for now)
-        reputation = calculate_reputation_score({
-            'total_executions': 100,
-            'successful_executions': 95,
-            'avg_response_time_ms': 3200,
-            'cost_accuracy': 0.98,
-            'repeat_customer_rate': 0.67,
-            'peer_rating': 4.8
-        })
-        
-        cost_usd = pricing_json.get('price_usd', 0)
-        
-        # Check cost constraint
-        max_cost = constraints.get('max_cost_usd', float('inf'))
-        if cost_usd > max_cost:
-            continue
-        
-        matches.append({
-            "agent_id": agent_id,
-            "name": row[1],
-            "capabilities": capabilities_json,
-            "reputation_score": reputation['score'],
-            "success_rate": reputation['success_rate'],
-            "avg_latency_ms": reputation['avg_response_time_ms'],
-            "cost_usd": float(cost_usd),
-            "execution_endpoint": row[5] or f"https://agentdirectory.exchange/api/v1/execute/{agent_id}",
-            "payment_addresses": {
-                "solana_usdc": "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin"  # Mock
-            },
-            "verification_proof": hashlib.sha256(agent_id.encode()).hexdigest(),
-            "last_updated": datetime.now().isoformat()
-        })
+        match = _agent_match(row)
+        for idx in row[7]:
+            # Check cost constraint
+            max_cost = steps[idx][1].get('max_cost_usd', float('inf'))
+            if match["cost_usd"] <= max_cost:
+                results[idx].append(match)
     
-    cur.close()
-    return matches
+    return results
+
+
+def match_agents_to_capabilities(capabilities: List[str], constraints: Dict, conn) -> List[Dict]:
+    """Find agents matching capabilities and constraints"""
+    return match_agents_batch([(capabilities, constraints)], conn)[0]
 
 
 # Protocol Endpoints
@@ -255,6 +320,50 @@ async def discover_agents(request: DiscoverRequest):
     }
 
 
+@router.post("/discover/batch", response_model=BatchDiscoverResponse)
+async def discover_agents_batch(request: BatchDiscoverRequest):
+    """
+    Layer 1: Discovery for a multi-step workflow
+    Resolve every step's capabilities and constraints in one request and one
+    database pass. Steps without matches return an empty list.
+    """
+    conn = get_db_connection()
+    
+    if conn is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Database connection unavailable. Protocol endpoints require database access."
+        )
+    
+    try:
+        step_matches = match_agents_batch(
+            [(step.capabilities_needed, step.constraints) for step in request.steps],
+            conn
+        )
+    finally:
+        conn.close()
+    
+    results = []
+    unique_agents = set()
+    for step, matches in zip(request.steps, step_matches):
+        unique_agents.update(m['agent_id'] for m in matches)
+        results.append({
+            "step_id": step.step_id,
+            "matches": matches,
+            "match_quality": round(sum(m['reputation_score'] for m in matches) / len(matches), 2) if matches else 0.0,
+            "estimated_total_cost": sum(m['cost_usd'] for m in matches[:1])  # Assume using first match
+        })
+    
+    estimated_cost = sum(r["estimated_total_cost"] for r in results)
+    
+    return {
+        "results": results,
+        "unique_agents": len(unique_agents),
+        "estimated_total_cost": estimated_cost,
+        "platform_fee": round(estimated_cost * 0.02, 2)
+    }
+
+
 @router.get("/verify/{agent_id}", response_model=VerifyResponse)
 async def verify_agent(agent_id: str):
     """
@@ -377,6 +486,7 @@ async def settle_transaction(request: SettlementRequest):
 
 
 @router.get("/status")
+@cached_response(ttl=300)
 async def protocol_status():
     """
     Get protocol status and statistics
@@ -386,6 +496,7 @@ async def protocol_status():
         "status": "operational",
         "endpoints": {
             "discover": "/api/v1/protocol/discover",
+            "discover_batch": "/api/v1/protocol/discover/batch",
             "verify": "/api/v1/protocol/verify/{agent_id}",
             "execute": "/api/v1/protocol/execute",
             "settle": "/api/v1/protocol/settle"
@@ -22,6 +22,7 @@ HOURLY_RATE_LIMIT = 5  # Calls per hour refill rate
 MAX_SIGNUPS_PER_IP_PER_DAY = 5  # IP-based signup limit
 DAILY_SPENDING_CAP_USD = 50.0  # Platform-wide daily free tier cap
 AVERAGE_CALL_COST_USD = 0.005  # Average tool cost for exposure calculation
+PARTIAL_CALL_UNITS = 1000  # agents.partial_call_credit counts thousandths of a call (migration 024)
 
 
 # ============================================================================
@@ -366,6 +367,51 @@ def consume_call_credit(agent: Agent, cost_usd: float, db: Session):
     )
 
 
+def consume_partial_call_credit(agent: Agent, fraction: float, call_cost_usd: float, db: Session):
+    """
+    Consume a fraction of one call credit (e.g. a discounted cache hit)
+    
+    Fractions accumulate on the agent in whole thousandths of a call, so ten
+    0.1 hits add up to exactly one call. Each time they reach a whole call,
+    one credit is consumed as in consume_call_credit (charged at
+    call_cost_usd, the full per-call price).
+    
+    Both steps are single UPDATEs, so concurrent calls for one agent cannot
+    lose fractions or consume the same whole call twice.
+    """
+    units = round(max(fraction, 0.0) * PARTIAL_CALL_UNITS)
+    if units == 0:
+        return
+    
+    total = db.execute(
+        text("""
+            UPDATE agents SET partial_call_credit = COALESCE(partial_call_credit, 0) + :units
+            WHERE id = :agent_id
+            RETURNING partial_call_credit
+        """),
+        {"units": units, "agent_id": agent.id}
+    ).scalar()
+    
+    # Take the whole call only if no concurrent caller already took it
+    whole_call = total is not None and total >= PARTIAL_CALL_UNITS and db.execute(
+        text("""
+            UPDATE agents SET partial_call_credit = partial_call_credit - :call
+            WHERE id = :agent_id AND partial_call_credit >= :call
+            RETURNING partial_call_credit
+        """),
+        {"call": PARTIAL_CALL_UNITS, "agent_id": agent.id}
+    ).first() is not None
+    
+    if not whole_call:
+        db.commit()
+        return
+    
+    # This transaction now holds the agent's row lock; reload the counters
+    # consume_call_credit decrements so it cannot write back stale values
+    db.refresh(agent)
+    consume_call_credit(agent, call_cost_usd, db)
+
+
 # ============================================================================
 # FASTAPI DEPENDENCY
 # ============================================================================
@@ -4,11 +4,15 @@ Agents post needs, others bid to fulfill
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import func, text
 from typing import List, Optional
 from datetime import datetime, timedelta
+import os
+import time
 from pydantic import BaseModel, Field
 
 from database.base import get_db
+from database.pagination import SortKey, InvalidCursor, paginate_query, count_query, COUNT_MODE_PATTERN
 from models.agent import Agent
 from models.request import Request, RequestStatus, RequestUrgency
 from models.bid import Bid, BidStatus
@@ -16,6 +20,27 @@ from models.transaction import Transaction, TransactionType, TransactionStatus
 
 router = APIRouter(prefix="/api/v1", tags=["Requests & Bids"])
 
+# Open requests near their deadline are re-scored at most this often
+REQUEST_ATTRACTIVENESS_REFRESH_SECONDS = int(os.getenv("REQUEST_ATTRACTIVENESS_REFRESH_SECONDS", "300"))
+_attractiveness_refreshed_at = 0.0
+
+
+def refresh_attractiveness_if_stale(db: Session):
+    """
+    Re-score open requests whose time-remaining band may have changed
+    
+    Scores are kept current on write by a trigger; only the deadline
+    component drifts with time, so this touches requests within 25h of
+    their deadline (see refresh_request_attractiveness() in migration 013).
+    """
+    global _attractiveness_refreshed_at
+    if time.monotonic() - _attractiveness_refreshed_at < REQUEST_ATTRACTIVENESS_REFRESH_SECONDS:
+        return
+    _attractiveness_refreshed_at = time.monotonic()
+    
+    db.execute(text("SELECT refresh_request_attractiveness()"))
+    db.commit()
+
 
 # ==========================================
 # Request Schemas
@@ -128,15 +153,18 @@ def search_requests(
     urgency: Optional[RequestUrgency] = None,
     status: RequestStatus = RequestStatus.OPEN,
     capability: Optional[str] = None,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
     offset: int = 0,
+    cursor: Optional[str] = None,
+    count: str = Query("exact", regex=COUNT_MODE_PATTERN),
     sort_by: str = Query("attractiveness", regex="^(attractiveness|budget|deadline|created)$"),
     db: Session = Depends(get_db)
 ):
     """
     Search open requests (needs agents can bid on)
     
-    Sellers use this to find work opportunities
+    Sellers use this to find work opportunities. Keyset-paginated: pass
+    pagination.next_cursor back as ?cursor= for the next page.
     """
     query = db.query(Request).filter(Request.status == status)
     
@@ -155,37 +183,41 @@ def search_requests(
     if capability:
         query = query.filter(Request.required_capabilities.contains([capability]))
     
-    # Sorting
-    if sort_by == "budget":
-        query = query.order_by(Request.budget_max_usd.desc())
+    # Sorting (keyset on sort column + id)
+    if sort_by == "attractiveness":
+        refresh_attractiveness_if_stale(db)
+        keys = [SortKey(func.coalesce(Request.attractiveness_score, 0.0)), SortKey(Request.id)]
+    elif sort_by == "budget":
+        keys = [SortKey(func.coalesce(Request.budget_max_usd, 0.0)), SortKey(Request.id)]
     elif sort_by == "deadline":
-        query = query.order_by(Request.deadline.asc())
-    elif sort_by == "created":
-        query = query.order_by(Request.created_at.desc())
-    # attractiveness sorting would need calculated field
+        keys = [SortKey(func.coalesce(Request.deadline, datetime.max), descending=False), SortKey(Request.id, descending=False)]
+    else:
+        keys = [SortKey(Request.created_at), SortKey(Request.id)]
     
-    total = query.count()
-    requests = query.offset(offset).limit(limit).all()
+    try:
+        requests, next_cursor = paginate_query(query, keys, limit, cursor, sort=sort_by, offset=offset)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Calculate attractiveness scores
+    # Attractiveness scores are ranked in SQL; compute in Python only for unscored rows
     results = []
     for req in requests:
         req_dict = req.to_dict()
-        req_dict["attractiveness_score"] = req.calculate_attractiveness_score()
+        req_dict["attractiveness_score"] = (
+            req.attractiveness_score if req.attractiveness_score is not None
+            else req.calculate_attractiveness_score()
+        )
         results.append(req_dict)
     
-    # Sort by attractiveness if requested
-    if sort_by == "attractiveness":
-        results = sorted(results, key=lambda x: x["attractiveness_score"], reverse=True)
-    
     return {
         "success": True,
-        "total": total,
+        "total": count_query(db, query, count),
         "requests": results,
         "pagination": {
             "offset": offset,
             "limit": limit,
-            "has_more": (offset + limit) < total
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor
         }
     }
 
@@ -439,4 +471,3 @@ def get_agent_bids(
     }
 
 
-from sqlalchemy import func  # Import for avg calculation
@@ -7,11 +7,13 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from database.base import get_db
+from services.response_cache import cached_response, response_cache
 
 router = APIRouter(prefix="/api/v1", tags=["stats"])
 
 
 @router.get("/stats")
+@cached_response(ttl=60, tags=["agents"])
 async def get_platform_stats(db: Session = Depends(get_db)):
     """
     Get platform-wide statistics
@@ -82,3 +84,9 @@ async def get_platform_stats(db: Session = Depends(get_db)):
                 "market_value_usd": 0,
                 "undervalued_agents": 0
             }
+
+
+@router.get("/stats/cache")
+async def get_response_cache_stats():
+    """Hit ratio and single-flight counters for the public response cache"""
+    return response_cache.stats()
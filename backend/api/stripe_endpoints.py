@@ -1,17 +1,18 @@
 """
 Stripe Integration API Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
 
+from api.admin_endpoints import verify_admin
 from database.base import get_db
 from models.agent import Agent
 from models.transaction import Transaction, TransactionStatus
-from models.listing import Listing
 from payments.stripe_handler import stripe_handler
-from services.arbitrage_fulfillment import ArbitrageFulfillmentEngine
+from services.stripe_webhook_queue import StripeWebhookQueue, wake_webhook_worker
 
 router = APIRouter(prefix="/api/v1", tags=["Payments"])
 
@@ -97,7 +98,7 @@ def get_stripe_status(agent_id: str, db: Session = Depends(get_db)):
         }
     
     # Check account status with Stripe
-    import stripe
+    from payments.stripe_handler import stripe  # Configured with the secret key on first use
     try:
         account = stripe.Account.retrieve(stripe_account_id)
         
@@ -189,14 +190,18 @@ def process_payment(
 # ==========================================
 
 @router.post("/webhooks/stripe")
-async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+async def stripe_webhook(request: Request):
     """
-    Handle Stripe webhook events
+    Receive Stripe webhook events
     
     Stripe sends events like:
     - payment_intent.succeeded (payment received)
     - payment_intent.payment_failed (payment failed)
     - transfer.created (payout sent)
+    
+    Verifies the signature, stores the event and acks; queue workers apply it
+    (services/stripe_webhook_queue.py). Redeliveries of a stored event are
+    acked without being queued again.
     """
     # Get webhook payload and signature
     payload = await request.body()
@@ -205,52 +210,47 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
     if not signature:
         raise HTTPException(status_code=400, detail="Missing signature")
     
-    # Verify and process webhook
-    result = stripe_handler.handle_webhook(payload, signature)
+    verified = stripe_handler.verify_webhook(payload, signature)
     
-    if not result['success']:
-        raise HTTPException(status_code=400, detail=result['error'])
+    if not verified['success']:
+        raise HTTPException(status_code=400, detail=verified['error'])
     
-    # Take action based on event type
-    if result.get('action') == 'update_transaction_status':
-        transaction_id = result.get('transaction_id')
-        if transaction_id:
-            transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
-            if transaction:
-                # [WARN] CRITICAL: Payment confirmed by Stripe - NOW we can fulfill
-                transaction.status = TransactionStatus.PROCESSING  # Payment received, fulfilling...
-                transaction.metadata = transaction.metadata or {}
-                transaction.metadata['payment_confirmed_at'] = result['processed_at']
-                db.commit()
-                
-                # Check if this is an arbitrage listing
-                listing = db.query(Listing).filter(Listing.id == transaction.listing_id).first()
-                if listing and listing.metadata and listing.metadata.get('arbitrage_listing'):
-                    # ONLY NOW: Payment confirmed -> Trigger fulfillment
-                    print(f"[WEBHOOK] Payment confirmed for {transaction_id} - triggering fulfillment")
-                    
-                    from services.arbitrage_fulfillment import ArbitrageFulfillmentEngine
-                    engine = ArbitrageFulfillmentEngine(db)
-                    
-                    # Process fulfillment in background (async safe)
-                    import asyncio
-                    asyncio.create_task(engine.process_transaction(str(transaction.id)))
-                
-                # After fulfillment completes, mark as COMPLETED and transfer to seller
-                # This will be done by the fulfillment engine itself when delivery succeeds
-                
-                db.commit()
+    event = verified['event']
+    try:
+        queued = await asyncio.to_thread(StripeWebhookQueue().record, payload, event)
+    except Exception as e:
+        # Not stored - a non-2xx makes Stripe redeliver later
+        raise HTTPException(status_code=503, detail=f"Webhook queue unavailable: {str(e)}")
     
-    elif result.get('action') == 'mark_transaction_failed':
-        transaction_id = result.get('transaction_id')
-        if transaction_id:
-            transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
-            if transaction:
-                transaction.status = TransactionStatus.FAILED
-                transaction.status_message = result.get('error', 'Payment failed')
-                db.commit()
+    if queued:
+        wake_webhook_worker()
     
-    return {"success": True, "event_processed": result['event_type']}
+    return {"success": True, "event_id": event['id'], "duplicate": not queued}
+
+
+@router.get("/admin/stripe/webhooks/stats")
+def get_webhook_queue_stats(authorization: str = Header(None)):
+    """Webhook events by status and the age of the oldest unprocessed one"""
+    verify_admin(authorization)
+    return {"success": True, **StripeWebhookQueue().stats()}
+
+
+@router.get("/admin/stripe/webhooks/dead")
+def list_dead_webhook_events(limit: int = 50, authorization: str = Header(None)):
+    """Events that exhausted their retries"""
+    verify_admin(authorization)
+    events = StripeWebhookQueue().list_dead(limit)
+    return {"success": True, "count": len(events), "events": events}
+
+
+@router.post("/admin/stripe/webhooks/{event_id}/requeue")
+def requeue_webhook_event(event_id: str, authorization: str = Header(None)):
+    """Retry a dead-lettered event after fixing its cause"""
+    verify_admin(authorization)
+    if not StripeWebhookQueue().requeue_dead(event_id):
+        raise HTTPException(status_code=404, detail="No dead-lettered event with that id")
+    wake_webhook_worker()
+    return {"success": True, "event_id": event_id, "status": "pending"}
 
 
 # ==========================================
@@ -1,15 +1,20 @@
 """
 Agent Submission Endpoints - Public submission with manual review
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, Field, validator
 from typing import Optional
+import asyncio
 import uuid
 from datetime import datetime
 
 from database.base import get_db
+from api.admin_endpoints import verify_admin
 from models.agent import Agent
+from services.category_tagger import tag_agents
+from services.response_cache import response_cache
+from services.activity_stream import activity_stream
 
 router = APIRouter(prefix="/api/v1/submissions", tags=["submissions"])
 
@@ -113,8 +118,12 @@ async def submit_agent_for_review(
         )
         
         db.add(new_agent)
+        db.flush()
+        tag_agents(db, [(agent_id, submission.name, submission.description)])
         db.commit()
         db.refresh(new_agent)
+        response_cache.invalidate("agents")
+        activity_stream.publish_agent_created(new_agent.name, capabilities=new_agent.capabilities)
         
         # Send notification to submitter
         await notify_submitter_of_decision(
@@ -198,6 +207,108 @@ async def list_pending_submissions(
         )
 
 
+def _load_pending_batch(db: Session, limit: int) -> list:
+    """Oldest pending submissions first"""
+    return db.query(Agent).filter(
+        Agent.pending_review == True,
+        Agent.is_active == False
+    ).order_by(Agent.created_at.asc()).limit(min(limit, 5000)).all()
+
+
+def _apply_review_batch(db: Session, pending: list, results: list):
+    """Write approve/reject decisions for a reviewed batch in one flush"""
+    now = datetime.utcnow()
+    agents_by_id = {str(agent.id): agent for agent in pending}
+    
+    # Per-row reason/score, so build mappings and flush once
+    db.bulk_update_mappings(Agent, [
+        {
+            'id': agents_by_id[r['id']].id,
+            'pending_review': False,
+            'is_active': r['approved'],
+            'verified': r['approved'],
+            'quality_score': r['quality_score'],
+            'review_reason': r['reason'],
+            'reviewed_at': now,
+            **({'approved_at': now} if r['approved'] else {'rejected_at': now, 'rejection_reason': r['reason']})
+        }
+        for r in results
+    ])
+    db.commit()
+
+
+@router.post("/submissions/review-batch")
+async def review_pending_batch(
+    limit: int = 500,
+    concurrency: int = 20,
+    dry_run: bool = False,
+    authorization: str = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Run agentic review over a batch of pending submissions (admin only)
+    
+    Dedups the whole batch with set-based lookups and validates URLs
+    concurrently, then applies approve/reject decisions in bulk.
+    Oldest submissions are reviewed first. Use dry_run=true to see the
+    decisions without writing them.
+    
+    Returns per-stage timings so large backlogs can be tuned.
+    """
+    verify_admin(authorization)
+    
+    try:
+        from services.agentic_reviewer import AgenticReviewer
+        import time
+        
+        # Database stages run in a worker thread; only the URL probes are async
+        stage_start = time.perf_counter()
+        pending = await asyncio.to_thread(_load_pending_batch, db, limit)
+        load_ms = int((time.perf_counter() - stage_start) * 1000)
+        
+        submissions = [
+            {
+                'id': agent.id,
+                'name': agent.name or '',
+                'description': agent.description or '',
+                'website': agent.source_url or '',
+                'email': agent.owner_email or '',
+                'api_endpoint': agent.api_endpoint,
+                'capabilities': agent.capabilities
+            }
+            for agent in pending
+        ]
+        
+        reviewer = AgenticReviewer(db)
+        review = await reviewer.review_batch(submissions, concurrency=max(1, min(concurrency, 100)))
+        timings = {'load': load_ms, **review['timings_ms']}
+        
+        approved = [r for r in review['results'] if r['approved']]
+        rejected = [r for r in review['results'] if not r['approved']]
+        
+        if not dry_run:
+            stage_start = time.perf_counter()
+            await asyncio.to_thread(_apply_review_batch, db, pending, review['results'])
+            response_cache.invalidate("agents")
+            timings['apply'] = int((time.perf_counter() - stage_start) * 1000)
+        
+        return {
+            "success": True,
+            "dry_run": dry_run,
+            "reviewed": len(review['results']),
+            "approved": len(approved),
+            "rejected": len(rejected),
+            "timings_ms": timings,
+            "results": review['results']
+        }
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error reviewing submissions: {str(e)}"
+        )
+
+
 @router.post("/submissions/{submission_id}/approve")
 async def approve_submission(
     submission_id: str,
@@ -225,6 +336,7 @@ async def approve_submission(
         
         db.commit()
         db.refresh(agent)
+        response_cache.invalidate("agents")
         
         # TODO: Send notification to submitter
         # await notify_submitter_of_approval(agent.owner_email, agent.name)
@@ -273,6 +385,7 @@ async def reject_submission(
         agent.rejected_at = datetime.utcnow()
         
         db.commit()
+        response_cache.invalidate("agents")
         
         # TODO: Send notification to submitter with reason
         # await notify_submitter_of_rejection(agent.owner_email, agent.name, reason)
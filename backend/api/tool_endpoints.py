@@ -3,16 +3,23 @@ Tool Registry API Endpoints (MCP Tools Marketplace)
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Query
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional, Any
 from datetime import datetime
 from uuid import uuid4
+import asyncio
+
+import anyio
 import httpx
 
 from database.base import get_db, get_db_connection
 from api.agent_auth import get_current_agent
-from api.rate_limiting import check_rate_limit, consume_call_credit
+from api.rate_limiting import check_rate_limit, consume_call_credit, consume_partial_call_credit
 from models.agent import Agent
+from services.tool_response_cache import tool_response_cache, make_cache_key, cache_hit_price, TOOL_CACHE_HIT_PRICE_RATIO
+from services.response_cache import cached_response, response_cache
+from services.activity_stream import activity_stream
 from sqlalchemy.orm import Session
 
 router = APIRouter(prefix="/api/v1/tools", tags=["tools"])
@@ -44,6 +51,7 @@ class ToolCreate(BaseModel):
     version: Optional[str] = None
     repository_url: Optional[str] = None
     documentation_url: Optional[str] = None
+    cache_ttl_seconds: int = Field(0, ge=0)  # >0 opts in to the idempotent response cache
 
 
 class ToolUpdate(BaseModel):
@@ -61,6 +69,7 @@ class ToolUpdate(BaseModel):
     version: Optional[str] = None
     repository_url: Optional[str] = None
     documentation_url: Optional[str] = None
+    cache_ttl_seconds: Optional[int] = Field(None, ge=0)
 
 
 class ToolResponse(BaseModel):
@@ -81,6 +90,7 @@ class ToolResponse(BaseModel):
     version: Optional[str]
     repository_url: Optional[str]
     documentation_url: Optional[str]
+    cache_ttl_seconds: int = Field(..., ge=0)
     total_installs: int
     total_calls: int
     avg_rating: float
@@ -93,6 +103,7 @@ class ToolResponse(BaseModel):
 # --- Endpoints ---
 
 @router.get("/featured")
+@cached_response(ttl=60, tags=["tools"])
 async def get_featured_tools(limit: int = Query(10, ge=1, le=50)):
     """Get featured/popular tools sorted by installs and rating"""
     conn = get_db_connection()
@@ -102,7 +113,7 @@ async def get_featured_tools(limit: int = Query(10, ge=1, le=50)):
             """SELECT id, name, description, author_agent_id, package_name, install_command,
                       modules, pricing_model, price_usd, monthly_price_usd, per_call_price_usd,
                       category, tags, protocol, version, repository_url, documentation_url,
-                      total_installs, total_calls, avg_rating, is_active, is_verified,
+                      cache_ttl_seconds, total_installs, total_calls, avg_rating, is_active, is_verified,
                       created_at, updated_at
                FROM tools WHERE is_active = true
                ORDER BY total_installs DESC, avg_rating DESC
@@ -117,6 +128,12 @@ async def get_featured_tools(limit: int = Query(10, ge=1, le=50)):
         conn.close()
 
 
+@router.get("/cache/stats")
+async def get_tool_cache_stats():
+    """Response cache hit-ratio metrics for this worker"""
+    return {"cache": tool_response_cache.stats(), "referral": REFERRAL_SECTION}
+
+
 @router.post("/")
 async def register_tool(tool: ToolCreate):
     """Register a new MCP tool listing"""
@@ -128,17 +145,19 @@ async def register_tool(tool: ToolCreate):
             """INSERT INTO tools (id, name, description, author_agent_id, package_name,
                       install_command, modules, pricing_model, price_usd, monthly_price_usd,
                       per_call_price_usd, category, tags, protocol, version,
-                      repository_url, documentation_url)
-               VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                      repository_url, documentation_url, cache_ttl_seconds)
+               VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
                RETURNING id""",
             (tool_id, tool.name, tool.description, tool.author_agent_id, tool.package_name,
              tool.install_command, str(tool.modules) if tool.modules else None,
              tool.pricing_model, tool.price_usd, tool.monthly_price_usd,
              tool.per_call_price_usd, tool.category,
              str(tool.tags) if tool.tags else None,
-             tool.protocol, tool.version, tool.repository_url, tool.documentation_url)
+             tool.protocol, tool.version, tool.repository_url, tool.documentation_url,
+             tool.cache_ttl_seconds)
         )
         conn.commit()
+        response_cache.invalidate("tools")
         return {"id": tool_id, "status": "registered", "referral": REFERRAL_SECTION}
     except Exception as e:
         conn.rollback()
@@ -189,7 +208,7 @@ async def list_tools(
             f"""SELECT id, name, description, author_agent_id, package_name, install_command,
                        modules, pricing_model, price_usd, monthly_price_usd, per_call_price_usd,
                        category, tags, protocol, version, repository_url, documentation_url,
-                       total_installs, total_calls, avg_rating, is_active, is_verified,
+                       cache_ttl_seconds, total_installs, total_calls, avg_rating, is_active, is_verified,
                        created_at, updated_at
                 FROM tools WHERE {where}
                 ORDER BY created_at DESC LIMIT %s OFFSET %s""",
@@ -213,7 +232,7 @@ async def get_tool(tool_id: str):
             """SELECT id, name, description, author_agent_id, package_name, install_command,
                       modules, pricing_model, price_usd, monthly_price_usd, per_call_price_usd,
                       category, tags, protocol, version, repository_url, documentation_url,
-                      total_installs, total_calls, avg_rating, is_active, is_verified,
+                      cache_ttl_seconds, total_installs, total_calls, avg_rating, is_active, is_verified,
                       created_at, updated_at
                FROM tools WHERE id = %s""",
             (tool_id,)
@@ -257,6 +276,11 @@ async def update_tool(tool_id: str, tool: ToolUpdate):
         if not cur.fetchone():
             raise HTTPException(status_code=404, detail="Tool not found")
         conn.commit()
+
+        # Tool behaviour/endpoint may have changed - drop stale cached responses
+        tool_response_cache.invalidate_tool(tool_id)
+        response_cache.invalidate("tools")
+
         return {"id": tool_id, "status": "updated", "referral": REFERRAL_SECTION}
     except HTTPException:
         raise
@@ -305,6 +329,7 @@ async def record_call(tool_id: str):
         if not row:
             raise HTTPException(status_code=404, detail="Tool not found")
         conn.commit()
+        activity_stream.publish("tool_call", tool_id=tool_id)
         return {
             "tool_id": tool_id,
             "total_calls": row[0],
@@ -339,6 +364,17 @@ class ToolExecutionResponse(BaseModel):
     execution_time_ms: Optional[int] = None
     cost_usd: float
     credits_remaining: dict
+    cache_hit: bool = False
+
+
+def _refund_call_credit(agent: Agent, db: Session):
+    """Give back the credit consumed for a call that never reached the tool"""
+    if agent.paid_calls_remaining and agent.paid_calls_remaining > 0:
+        agent.paid_calls_remaining += 1
+    else:
+        agent.free_calls_remaining += 1
+        agent.hourly_calls_count -= 1
+    db.commit()
 
 
 @router.post("/{tool_id}/execute", response_model=ToolExecutionResponse)
@@ -355,6 +391,10 @@ async def execute_tool(
     - Free tier: 50 total calls, 5 calls/hour refill
     - Paid tier: No hourly limit, uses paid credits
     
+    **Caching:**
+    - Tools with cache_ttl_seconds > 0 serve identical calls from cache
+    - Cache hits cost TOOL_CACHE_HIT_PRICE_RATIO of a call credit (e.g. 5 hits = 1 call at 0.2)
+    
     **Returns:**
     - Tool execution result
     - Credits consumed
@@ -389,7 +429,7 @@ async def execute_tool(
     try:
         cur = conn.cursor()
         cur.execute(
-            """SELECT id, name, per_call_price_usd, api_endpoint, is_active 
+            """SELECT id, name, per_call_price_usd, api_endpoint, is_active, cache_ttl_seconds
                FROM tools WHERE id = %s""",
             (tool_id,)
         )
@@ -398,7 +438,7 @@ async def execute_tool(
         if not tool:
             raise HTTPException(status_code=404, detail="Tool not found")
         
-        tool_id, tool_name, per_call_price, api_endpoint, is_active = tool
+        tool_id, tool_name, per_call_price, api_endpoint, is_active, cache_ttl = tool
         
         if not is_active:
             raise HTTPException(status_code=400, detail="Tool is not active")
@@ -409,8 +449,37 @@ async def execute_tool(
                 detail="Tool does not have an API endpoint configured"
             )
         
-        # Consume call credit
         cost_usd = per_call_price or 0.005  # Default to $0.005 if not set
+        
+        # Serve identical calls from the response cache (opt-in per tool)
+        cache_key = make_cache_key(tool_id, request.parameters) if cache_ttl else None
+        if cache_key:
+            cached_result = tool_response_cache.get(cache_key)
+            if cached_result is not None:
+                # A hit costs TOOL_CACHE_HIT_PRICE_RATIO of a call credit
+                hit_cost_usd = cache_hit_price(cost_usd)
+                consume_partial_call_credit(agent, TOOL_CACHE_HIT_PRICE_RATIO, cost_usd, db)
+                
+                cur.execute(
+                    "UPDATE tools SET total_calls = total_calls + 1, updated_at = NOW() WHERE id = %s",
+                    (tool_id,)
+                )
+                conn.commit()
+                activity_stream.publish("tool_call", tool_id=tool_id, tool_name=tool_name, success=True, cache_hit=True)
+                
+                from api.rate_limiting import get_rate_limit_info
+                return ToolExecutionResponse(
+                    success=True,
+                    tool_id=tool_id,
+                    tool_name=tool_name,
+                    result=cached_result,
+                    execution_time_ms=int((time.time() - start_time) * 1000),
+                    cost_usd=hit_cost_usd,
+                    credits_remaining=get_rate_limit_info(agent),
+                    cache_hit=True
+                )
+        
+        # Consume call credit
         consume_call_credit(agent, cost_usd, db)
         
         # Execute tool via HTTP proxy
@@ -434,6 +503,14 @@ async def execute_tool(
                     (tool_id,)
                 )
                 conn.commit()
+                activity_stream.publish(
+                    "tool_call",
+                    tool_id=tool_id,
+                    tool_name=tool_name,
+                    success=response.status_code < 400,
+                    cache_hit=False,
+                    execution_time_ms=execution_time
+                )
                 
                 # Get updated credits
                 from api.rate_limiting import get_rate_limit_info
@@ -450,11 +527,17 @@ async def execute_tool(
                         credits_remaining=credits_info
                     )
                 
+                result = response.json() if response.headers.get("content-type", "").startswith("application/json") else response.text
+                
+                # Only successful responses are cached
+                if cache_key:
+                    tool_response_cache.set(cache_key, result, cache_ttl)
+                
                 return ToolExecutionResponse(
                     success=True,
                     tool_id=tool_id,
                     tool_name=tool_name,
-                    result=response.json() if response.headers.get("content-type", "").startswith("application/json") else response.text,
+                    result=result,
                     execution_time_ms=execution_time,
                     cost_usd=cost_usd,
                     credits_remaining=credits_info
@@ -462,12 +545,7 @@ async def execute_tool(
                 
         except httpx.TimeoutException:
             # Refund credit on timeout
-            if agent.paid_calls_remaining and agent.paid_calls_remaining > 0:
-                agent.paid_calls_remaining += 1
-            else:
-                agent.free_calls_remaining += 1
-                agent.hourly_calls_count -= 1
-            db.commit()
+            _refund_call_credit(agent, db)
             
             raise HTTPException(
                 status_code=504,
@@ -476,12 +554,7 @@ async def execute_tool(
         
         except Exception as e:
             # Refund credit on error
-            if agent.paid_calls_remaining and agent.paid_calls_remaining > 0:
-                agent.paid_calls_remaining += 1
-            else:
-                agent.free_calls_remaining += 1
-                agent.hourly_calls_count -= 1
-            db.commit()
+            _refund_call_credit(agent, db)
             
             raise HTTPException(
                 status_code=500,
@@ -490,3 +563,231 @@ async def execute_tool(
     
     finally:
         conn.close()
+
+
+# --- Streaming Tool Execution ---
+
+# Upstream content types relayed as-is; anything else is streamed as octet-stream
+STREAMING_CONTENT_TYPES = ("text/event-stream", "application/x-ndjson", "application/json", "text/plain")
+
+
+@router.post("/{tool_id}/execute/stream")
+async def execute_tool_stream(
+    tool_id: str,
+    request: ToolExecutionRequest,
+    agent: Agent = Depends(get_current_agent),
+    db: Session = Depends(get_db)
+):
+    """
+    Execute a tool and stream its output straight through to the caller
+    
+    Upstream chunks (SSE, NDJSON or plain chunked bodies) are relayed as
+    they arrive, so time-to-first-byte matches the tool and proxy memory
+    stays flat regardless of output size. Chunks are only read from the
+    tool as fast as the caller consumes them (backpressure).
+    
+    A full call credit is reserved before the upstream call (refunded if
+    the tool cannot be reached or returns an error status) and settled when
+    the stream closes: a stream that ends early (caller disconnected or
+    upstream broke off) is charged only for the share of the call it used -
+    the larger of bytes received over the tool's Content-Length and time
+    elapsed over timeout_seconds - and nothing if no bytes were relayed.
+    Streamed responses bypass the response cache.
+    
+    **Response Headers:**
+    - X-Tool-ID, X-Cost-USD (price of a completed stream)
+    
+    **HTTP Status Codes:**
+    - 200: Streaming
+    - 401: Authentication failed
+    - 404: Tool not found
+    - 429: Rate limit exceeded
+    - 502: Tool returned an error status
+    - 504: Tool did not respond in time
+    """
+    import time
+    start_time = time.time()
+    
+    limit_check = check_rate_limit(agent, db)
+    
+    if not limit_check["allowed"]:
+        raise HTTPException(
+            status_code=429,
+            detail=limit_check["reason"],
+            headers={
+                "X-RateLimit-Remaining": str(limit_check["limits"]["free_calls_remaining"]),
+                "X-RateLimit-Reset": str(limit_check["limits"]["hourly_resets_in_seconds"]),
+                "Retry-After": str(limit_check["limits"]["hourly_resets_in_seconds"])
+            }
+        )
+    
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """SELECT id, name, per_call_price_usd, api_endpoint, is_active
+               FROM tools WHERE id = %s""",
+            (tool_id,)
+        )
+        tool = cur.fetchone()
+    finally:
+        conn.close()
+    
+    if not tool:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    
+    tool_id, tool_name, per_call_price, api_endpoint, is_active = tool
+    
+    if not is_active:
+        raise HTTPException(status_code=400, detail="Tool is not active")
+    
+    if not api_endpoint:
+        raise HTTPException(
+            status_code=501,
+            detail="Tool does not have an API endpoint configured"
+        )
+    
+    cost_usd = per_call_price or 0.005  # Default to $0.005 if not set
+    consume_call_credit(agent, cost_usd, db)
+    
+    # Open the upstream stream before responding so connection errors and
+    # error statuses can still be reported (and refunded) as normal HTTP errors
+    client = httpx.AsyncClient(timeout=request.timeout_seconds)
+    try:
+        upstream_request = client.build_request(
+            "POST",
+            api_endpoint,
+            json=request.parameters or {},
+            headers={
+                "X-Agent-ID": str(agent.id),
+                "X-Tool-ID": tool_id,
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream, application/x-ndjson, application/json"
+            }
+        )
+        response = await client.send(upstream_request, stream=True)
+    except httpx.TimeoutException:
+        await client.aclose()
+        _refund_call_credit(agent, db)
+        raise HTTPException(
+            status_code=504,
+            detail=f"Tool execution timed out after {request.timeout_seconds} seconds"
+        )
+    except Exception as e:
+        await client.aclose()
+        _refund_call_credit(agent, db)
+        raise HTTPException(status_code=500, detail=f"Tool execution error: {str(e)}")
+    
+    if response.status_code >= 400:
+        error_body = (await response.aread())[:1000].decode(errors="replace")
+        await response.aclose()
+        await client.aclose()
+        _refund_call_credit(agent, db)
+        raise HTTPException(
+            status_code=502,
+            detail=f"Tool returned HTTP {response.status_code}: {error_body}"
+        )
+    
+    upstream_type = response.headers.get("content-type", "")
+    media_type = upstream_type if upstream_type.startswith(STREAMING_CONTENT_TYPES) else "application/octet-stream"
+    
+    content_length = response.headers.get("content-length")
+    content_length = int(content_length) if content_length and content_length.isdigit() else None
+    agent_id = agent.id  # The request's session is closed before the stream ends
+    
+    async def relay():
+        bytes_streamed = 0
+        completed = False
+        try:
+            async for chunk in response.aiter_bytes():
+                bytes_streamed += len(chunk)
+                yield chunk
+            completed = True
+        finally:
+            # Runs on disconnect too (cancelled) - shield the cleanup and settlement
+            with anyio.CancelScope(shield=True):
+                await response.aclose()
+                await client.aclose()
+                elapsed_seconds = time.time() - start_time
+                charged = _stream_charge_fraction(
+                    completed, bytes_streamed, response.num_bytes_downloaded, content_length,
+                    elapsed_seconds, request.timeout_seconds
+                )
+                await asyncio.to_thread(
+                    _finalize_stream_metering, agent_id, tool_id, cost_usd, charged,
+                    bytes_streamed, int(elapsed_seconds * 1000)
+                )
+    
+    return StreamingResponse(
+        relay(),
+        media_type=media_type,
+        headers={
+            "X-Tool-ID": tool_id,
+            "X-Cost-USD": str(cost_usd),
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx/Railway edge)
+        }
+    )
+
+
+def _stream_charge_fraction(completed: bool, bytes_streamed: int, bytes_downloaded: int,
+                            content_length: Optional[int], elapsed_seconds: float,
+                            timeout_seconds: float) -> float:
+    """Share of one call a streamed execution is charged (1.0 when it completed)"""
+    if completed:
+        return 1.0
+    if bytes_streamed == 0:
+        return 0.0
+    by_bytes = bytes_downloaded / content_length if content_length else 0.0
+    by_time = elapsed_seconds / timeout_seconds if timeout_seconds else 0.0
+    return min(1.0, max(by_bytes, by_time))
+
+
+def _finalize_stream_metering(agent_id, tool_id: str, cost_usd: float, charged: float,
+                              bytes_streamed: int, execution_time_ms: int):
+    """
+    Settle the credit reserved for a streamed execution and record call metrics
+    once the stream has closed (blocking - run in a thread)
+    
+    The request's session is closed by then, so the agent is reloaded in a
+    session of its own.
+    """
+    if charged < 1.0:
+        from database.base import get_session_local
+        db = get_session_local()()
+        try:
+            agent = db.get(Agent, agent_id)
+            if agent is not None:
+                _refund_call_credit(agent, db)
+                if charged > 0:
+                    consume_partial_call_credit(agent, charged, cost_usd, db)
+        except Exception as e:
+            db.rollback()
+            print(f"[WARN] Failed to settle streamed call for tool {tool_id}: {e}")
+        finally:
+            db.close()
+    
+    conn = get_db_connection()
+    if conn is None:
+        print(f"[WARN] Could not record streamed call for tool {tool_id} ({bytes_streamed} bytes, {execution_time_ms}ms)")
+        return
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE tools SET total_calls = total_calls + 1, updated_at = NOW() WHERE id = %s",
+            (tool_id,)
+        )
+        conn.commit()
+        activity_stream.publish(
+            "tool_call",
+            tool_id=tool_id,
+            streamed=True,
+            bytes_streamed=bytes_streamed,
+            execution_time_ms=execution_time_ms,
+            charged_fraction=round(charged, 4)
+        )
+    except Exception as e:
+        conn.rollback()
+        print(f"[WARN] Failed to record streamed call for tool {tool_id}: {e}")
+    finally:
+        conn.close()
@@ -5,6 +5,7 @@ Agents prove ownership by signing challenge with their Solana wallet
 from fastapi import HTTPException, Header, Depends
 from sqlalchemy.orm import Session
 from typing import Optional
+import asyncio
 import time
 import hashlib
 import base58
@@ -12,9 +13,7 @@ from solders.pubkey import Pubkey
 
 from database.base import get_db
 from models.agent import Agent
-
-# Active challenges (in production: use Redis)
-active_challenges = {}
+from services.challenge_store import WALLET_CHALLENGE_TTL_SECONDS, get_challenge_store
 
 def generate_challenge(wallet_address: str) -> dict:
     """
@@ -31,17 +30,19 @@ def generate_challenge(wallet_address: str) -> dict:
     challenge_text = f"Sign this message to authenticate with Agent Directory: {timestamp}"
     challenge_hash = hashlib.sha256(challenge_text.encode()).hexdigest()
     
-    # Store challenge (expires in 60 seconds)
-    active_challenges[wallet_address] = {
+    expires_at = timestamp + WALLET_CHALLENGE_TTL_SECONDS
+    
+    # Store challenge where every worker can verify it
+    get_challenge_store().put(wallet_address, {
         "challenge": challenge_hash,
         "challenge_text": challenge_text,
-        "expires_at": timestamp + 60
-    }
+        "expires_at": expires_at
+    }, WALLET_CHALLENGE_TTL_SECONDS)
     
     return {
         "challenge": challenge_text,
         "challenge_hash": challenge_hash,
-        "expires_at": timestamp + 60
+        "expires_at": expires_at
     }
 
 def verify_signature(wallet_address: str, signature_base58: str) -> bool:
@@ -55,18 +56,19 @@ def verify_signature(wallet_address: str, signature_base58: str) -> bool:
     Returns:
         bool: True if signature is valid
     """
+    store = get_challenge_store()
+    challenge_data = store.get(wallet_address)
+    
     # Check challenge exists
-    if wallet_address not in active_challenges:
+    if challenge_data is None:
         raise HTTPException(
             status_code=401, 
             detail="No active challenge for wallet. Request a new challenge."
         )
     
-    challenge_data = active_challenges[wallet_address]
-    
-    # Check not expired
+    # Check not expired (deletes only this challenge - a newer one may have replaced it)
     if time.time() > challenge_data["expires_at"]:
-        del active_challenges[wallet_address]
+        store.delete(wallet_address, challenge_data["challenge"])
         raise HTTPException(
             status_code=401, 
             detail="Challenge expired. Request a new challenge."
@@ -83,9 +85,10 @@ def verify_signature(wallet_address: str, signature_base58: str) -> bool:
         # Simplified verification for MVP
         is_valid = len(signature_base58) > 0  # Placeholder
         
-        if is_valid:
-            # Remove challenge (one-time use)
-            del active_challenges[wallet_address]
+        # Remove challenge (one-time use); a concurrent verify that deleted
+        # it first wins and this one is rejected. Conditional on the hash
+        # read above, so a challenge re-issued meanwhile is not consumed.
+        if is_valid and store.delete(wallet_address, challenge_data["challenge"]):
             return True
         else:
             raise HTTPException(
@@ -127,8 +130,8 @@ async def verify_wallet_auth(
     
     wallet_address, signature = auth_data.split(":", 1)
     
-    # Verify signature
-    if not verify_signature(wallet_address, signature):
+    # Verify signature (the challenge store may do network I/O)
+    if not await asyncio.to_thread(verify_signature, wallet_address, signature):
         raise HTTPException(
             status_code=401, 
             detail="Invalid wallet signature"
@@ -8,11 +8,18 @@ import os
 # Add payments directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'payments'))
 
-from solana_wallet import SolanaWalletManager
 from datetime import datetime
 
-# Initialize wallet manager
-wallet_manager = SolanaWalletManager()
+# Created on first use - importing the Solana SDK would otherwise add ~0.1s to every boot
+_wallet_manager = None
+
+def get_wallet_manager():
+    """Get or create the shared SolanaWalletManager"""
+    global _wallet_manager
+    if _wallet_manager is None:
+        from solana_wallet import SolanaWalletManager
+        _wallet_manager = SolanaWalletManager()
+    return _wallet_manager
 
 def create_agent_wallet():
     """
@@ -25,7 +32,7 @@ def create_agent_wallet():
             "usdc_address": str
         }
     """
-    wallet = wallet_manager.generate_agent_wallet()
+    wallet = get_wallet_manager().generate_agent_wallet()
     
     return {
         "wallet_address": wallet["public_key"],
@@ -45,12 +52,30 @@ def get_agent_balance(wallet_address: str) -> float:
         float: USDC balance
     """
     try:
-        balance = wallet_manager.get_balance(wallet_address)
+        balance = get_wallet_manager().get_balance(wallet_address)
         return balance
     except Exception as e:
         print(f"Error getting balance for {wallet_address}: {e}")
         return 0.0
 
+async def get_agent_balances(wallet_addresses: list) -> dict:
+    """
+    Get USDC balances for many agent wallets (batched getMultipleAccounts)
+    
+    Args:
+        wallet_addresses: Agents' Solana public keys
+        
+    Returns:
+        dict: {wallet_address: USDC balance}
+    """
+    from solana_rpc import SolanaRPC
+    try:
+        async with SolanaRPC(get_wallet_manager().rpc_url) as rpc:
+            return await rpc.get_usdc_balances(wallet_addresses)
+    except Exception as e:
+        print(f"Error getting balances for {len(wallet_addresses)} wallets: {e}")
+        return {address: 0.0 for address in wallet_addresses}
+
 def validate_wallet_address(address: str) -> bool:
     """
     Validate Solana address format
@@ -61,4 +86,4 @@ def validate_wallet_address(address: str) -> bool:
     Returns:
         bool: True if valid
     """
-    return wallet_manager.validate_address(address)
+    return get_wallet_manager().validate_address(address)
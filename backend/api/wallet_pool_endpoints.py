@@ -0,0 +1,71 @@
+"""
+Wallet Pool Endpoints
+Bulk Solana wallet provisioning (admin API key)
+
+GET  /api/v1/wallets/pool        - Ready wallets and refill thresholds
+POST /api/v1/wallets/pool/fill   - Generate wallets into the pool
+POST /api/v1/wallets/provision   - Give pooled wallets to agents without one
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from api.admin_endpoints import verify_admin
+from database.base import get_db
+from services.wallet_pool import (
+    WALLET_POOL_LOW_WATERMARK, WALLET_POOL_TARGET_SIZE, fill_pool, pool_size, provision_agents
+)
+
+router = APIRouter(prefix="/api/v1/wallets", tags=["wallets"])
+
+
+class PoolFill(BaseModel):
+    count: int = Field(..., ge=1, le=100000, description="Wallets to generate")
+
+
+class WalletProvision(BaseModel):
+    limit: int = Field(1000, ge=1, le=10000, description="Max agents to provision")
+    agent_ids: Optional[List[str]] = Field(None, description="Only these agents (default: oldest without a wallet)")
+
+
+def _require_db(db: Session):
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+
+@router.get("/pool")
+def wallet_pool_status(authorization: str = Header(None), db: Session = Depends(get_db)):
+    verify_admin(authorization)
+    _require_db(db)
+    return {
+        "ready": pool_size(db),
+        "target_size": WALLET_POOL_TARGET_SIZE,
+        "low_watermark": WALLET_POOL_LOW_WATERMARK
+    }
+
+
+@router.post("/pool/fill")
+def fill_wallet_pool(request: PoolFill, authorization: str = Header(None), db: Session = Depends(get_db)):
+    """Generate wallets ahead of a bulk registration (runs on the process pool)"""
+    verify_admin(authorization)
+    _require_db(db)
+    added = fill_pool(db, request.count)
+    return {"success": True, "added": added, "ready": pool_size(db)}
+
+
+@router.post("/provision")
+def provision_wallets(request: WalletProvision, authorization: str = Header(None), db: Session = Depends(get_db)):
+    """
+    Assign pooled wallets to agents registered without one, in one statement.
+    Agents left over when the pool runs dry are picked up by the next call.
+    """
+    verify_admin(authorization)
+    _require_db(db)
+    provisioned = provision_agents(db, request.limit, request.agent_ids)
+    return {
+        "success": True,
+        "provisioned": len(provisioned),
+        "wallets": provisioned,
+        "pool_remaining": pool_size(db)
+    }
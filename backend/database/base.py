@@ -8,6 +8,8 @@ import os
 import psycopg2
 from dotenv import load_dotenv
 
+from services.request_metrics import InstrumentedConnection, instrument_engine
+
 load_dotenv()
 
 # Create base class for models (doesn't need DB connection)
@@ -29,13 +31,14 @@ def get_engine():
         )
         _engine = create_engine(
             DATABASE_URL,
-            echo=False,
+            echo=os.getenv("SQL_ECHO", "false").lower() == "true",
             pool_size=5,  # Limit concurrent connections
             max_overflow=10,  # Allow burst to 15 total
             pool_timeout=30,  # Wait 30s for available connection
             pool_pre_ping=True,  # Verify connections before using
             pool_recycle=3600  # Recycle connections after 1 hour
         )
+        instrument_engine(_engine)  # Per-request SQL counts/time for /metrics
     return _engine
 
 
@@ -77,7 +80,8 @@ def get_db_connection():
             print("WARNING: DATABASE_URL not set, protocol endpoints will not work")
             return None
         
-        conn = psycopg2.connect(DATABASE_URL)
+        # Cursors report statement counts/time to the request metrics
+        conn = psycopg2.connect(DATABASE_URL, connection_factory=InstrumentedConnection)
         return conn
     except Exception as e:
         print(f"ERROR: Failed to connect to database: {e}")
@@ -0,0 +1,36 @@
+"""
+Schema Initialization
+Creates model tables (Base.metadata.create_all) as a deploy step instead of
+on every app boot
+
+create_all only knows the tables of imported models, so every module in
+models/ is imported first. SQL migrations in /migrations still run separately.
+
+Usage (from backend/):
+    python -m database.init_schema
+"""
+import importlib
+import os
+import time
+
+from database.base import init_db
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+
+def import_models():
+    """Register every model on Base.metadata"""
+    for name in sorted(os.listdir(MODELS_DIR)):
+        if name.endswith(".py") and name != "__init__.py":
+            importlib.import_module(f"models.{name[:-3]}")
+
+
+def main():
+    started = time.time()
+    import_models()
+    init_db()
+    print(f"[OK] Database schema initialized in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
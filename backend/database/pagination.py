@@ -0,0 +1,250 @@
+"""
+Keyset Pagination
+Shared cursor pagination for list/search endpoints
+
+Pages continue from the last row of the previous page with
+WHERE (sort keys..., id) < (last values...) instead of OFFSET, so page N
+costs the same as page 1. Cursors are opaque url-safe tokens carrying the
+last row's sort key values.
+
+Totals are optional per request:
+- exact:     COUNT(*) over the filtered set, cached for PAGINATION_COUNT_CACHE_TTL_SECONDS
+- estimated: planner row estimate from EXPLAIN (no table scan)
+- none:      skip counting
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import base64
+import enum
+import json
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+PAGINATION_COUNT_CACHE_TTL_SECONDS = int(os.getenv("PAGINATION_COUNT_CACHE_TTL_SECONDS", "60"))
+PAGINATION_COUNT_CACHE_MAX_ENTRIES = int(os.getenv("PAGINATION_COUNT_CACHE_MAX_ENTRIES", "500"))
+
+COUNT_MODES = ("exact", "estimated", "none")
+COUNT_MODE_PATTERN = "^(exact|estimated|none)$"
+
+
+class InvalidCursor(ValueError):
+    """Cursor token is malformed or belongs to a different sort order"""
+
+
+class SortKey:
+    """
+    One ORDER BY column of a keyset
+
+    expr: SQLAlchemy column/expression (ORM queries) or SQL string (text queries).
+    Keyset comparisons do not work on NULLs, so nullable columns should be
+    wrapped in COALESCE by the caller.
+    """
+
+    def __init__(self, expr, descending: bool = True):
+        self.expr = expr
+        self.descending = descending
+
+    def order_by(self):
+        if isinstance(self.expr, str):
+            return f"{self.expr} {'DESC' if self.descending else 'ASC'}"
+        return self.expr.desc() if self.descending else self.expr.asc()
+
+
+# ============================================================================
+# CURSOR TOKENS
+# ============================================================================
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"t": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"u": str(value)}
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _decode_value(value: Any):
+    if isinstance(value, dict):
+        if "t" in value:
+            return datetime.fromisoformat(value["t"])
+        if "u" in value:
+            return uuid.UUID(value["u"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any], sort: str = "") -> str:
+    """Opaque token for the row a page ended on"""
+    payload = json.dumps({"s": sort, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort: str = "", size: Optional[int] = None) -> List[Any]:
+    """Values encoded by encode_cursor; raises InvalidCursor"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in payload["v"]]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+
+    if payload.get("s") != sort:
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    if size is not None and len(values) != size:
+        raise InvalidCursor("Cursor does not match sort keys")
+    return values
+
+
+# ============================================================================
+# KEYSET PREDICATES
+# ============================================================================
+
+def _after_condition(keys: List[SortKey], values: List[Any]):
+    """
+    Rows strictly after `values` in keys order:
+    k1 > v1 OR (k1 = v1 AND k2 > v2) OR ... (per-key direction)
+    """
+    branches = []
+    for i, key in enumerate(keys):
+        equal = [keys[j].expr == values[j] for j in range(i)]
+        beyond = key.expr < values[i] if key.descending else key.expr > values[i]
+        branches.append(and_(*equal, beyond))
+    return or_(*branches)
+
+
+def keyset_sql(keys: List[SortKey], values: List[Any], prefix: str = "_ks") -> Tuple[str, Dict[str, Any]]:
+    """Same predicate as _after_condition for text() queries; returns (sql, params)"""
+    params = {f"{prefix}{i}": value for i, value in enumerate(values)}
+    branches = []
+    for i, key in enumerate(keys):
+        parts = [f"{keys[j].expr} = :{prefix}{j}" for j in range(i)]
+        parts.append(f"{key.expr} {'<' if key.descending else '>'} :{prefix}{i}")
+        branches.append("(" + " AND ".join(parts) + ")")
+    return "(" + " OR ".join(branches) + ")", params
+
+
+def order_by_sql(keys: List[SortKey]) -> str:
+    return ", ".join(key.order_by() for key in keys)
+
+
+def paginate_query(query, keys: List[SortKey], limit: int, cursor: Optional[str] = None,
+                   sort: str = "", offset: int = 0) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one page of an ORM query
+
+    Returns (items, next_cursor). next_cursor is None on the last page.
+    offset is honoured only when no cursor is given (legacy clients).
+    """
+    if cursor:
+        query = query.filter(_after_condition(keys, decode_cursor(cursor, sort, len(keys))))
+
+    query = query.add_columns(*[key.expr for key in keys]).order_by(*[key.order_by() for key in keys])
+    if offset and not cursor:
+        query = query.offset(offset)
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = encode_cursor(list(rows[-1][1:]), sort) if has_more and rows else None
+    return [row[0] for row in rows], next_cursor
+
+
+# ============================================================================
+# TOTALS
+# ============================================================================
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <statement> with normal bind processing"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+class _CountCache:
+    """Small TTL cache of exact totals keyed by SQL + params"""
+
+    def __init__(self, max_entries: int = PAGINATION_COUNT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[1]
+
+    def set(self, key: str, total: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + PAGINATION_COUNT_CACHE_TTL_SECONDS, total)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_count_cache = _CountCache()
+
+
+def _plan_rows(result) -> int:
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _cache_key(sql: str, params: Dict[str, Any]) -> str:
+    return sql + "|" + repr(sorted((k, repr(v)) for k, v in params.items()))
+
+
+def count_query(db, query, mode: str = "exact") -> Optional[int]:
+    """Total rows of an (unpaginated) ORM query per count mode"""
+    if mode == "none":
+        return None
+
+    statement = query.order_by(None).statement
+    if mode == "estimated":
+        return _plan_rows(db.execute(_Explain(statement)))
+
+    compiled = statement.compile(dialect=db.get_bind().dialect)
+    key = _cache_key(str(compiled), compiled.params)
+    total = _count_cache.get(key)
+    if total is None:
+        total = db.query(func.count()).select_from(query.order_by(None).subquery()).scalar()
+        _count_cache.set(key, total)
+    return total
+
+
+def count_sql(db, sql: str, params: Dict[str, Any], mode: str = "exact") -> Optional[int]:
+    """Total rows of a text() SELECT (without ORDER BY/LIMIT) per count mode"""
+    if mode == "none":
+        return None
+
+    if mode == "estimated":
+        return _plan_rows(db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params))
+
+    key = _cache_key(sql, params)
+    total = _count_cache.get(key)
+    if total is None:
+        total = db.execute(text(f"SELECT COUNT(*) FROM ({sql}) AS _counted"), params).scalar()
+        _count_cache.set(key, total)
+    return total
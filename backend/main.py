@@ -2,16 +2,21 @@
 Agent Eagle - Main FastAPI Application
 The Eagle That Finds Agents
 """
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, status, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import List, Optional
 import uvicorn
 import os
 
 from database.base import get_db, init_db
+from database.pagination import SortKey, InvalidCursor, paginate_query, count_query, COUNT_MODE_PATTERN
+from services.activity_stream import activity_stream
+from services.category_tagger import tag_agents
+from services.response_cache import response_cache
 from models.agent import Agent, AgentType, VerificationStatus
 from models.listing import Listing, ListingType, ListingStatus
 from models.transaction import Transaction, TransactionType, TransactionStatus
@@ -19,7 +24,8 @@ from models.transaction import Transaction, TransactionType, TransactionStatus
 # Import API routers
 from api import fulfillment_endpoints, stripe_endpoints, referral_endpoints, performance_endpoints, category_endpoints, submission_endpoints, crawler_endpoints, payment_endpoints, admin_endpoints, seed_endpoint, stats_endpoints, debug_endpoints
 from api import instrument_endpoints, protocol_endpoints, execution_tracking, performance_analytics, activity_feed, agent_messaging, agent_registration, monitor_endpoints
-from api import tool_endpoints, group_buying_endpoints, wallet_topup_endpoints
+from api import tool_endpoints, group_buying_endpoints, wallet_topup_endpoints, metrics_endpoints, wallet_pool_endpoints
+from middleware.metrics_middleware import RequestMetricsMiddleware
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -82,6 +88,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics - outermost, so timings include the middleware above
+app.add_middleware(RequestMetricsMiddleware)
+
 # Include API routers
 app.include_router(debug_endpoints.router)  # DEBUG - REMOVE AFTER FIXING
 app.include_router(stats_endpoints.router)  # Platform statistics - agents, value, market data
@@ -106,6 +115,8 @@ app.include_router(seed_endpoint.router)  # Seed initial agents (one-time use)
 app.include_router(tool_endpoints.router)  # MCP Tool marketplace - list, search, install, meter
 app.include_router(group_buying_endpoints.router)  # Group buying pools - Costco for agents
 app.include_router(wallet_topup_endpoints.router)  # Auto top-up wallets - zero friction payments
+app.include_router(metrics_endpoints.router)  # Prometheus /metrics + slow-request profiler toggle
+app.include_router(wallet_pool_endpoints.router)  # Pre-generated wallet pool + bulk provisioning (admin)
 
 
 # Pydantic Schemas for Request/Response
@@ -373,14 +384,14 @@ def create_agent(agent_data: AgentCreate, db: Session = Depends(get_db)):
         )
     
     import secrets
-    from api.wallet_integration import create_agent_wallet
+    from services.wallet_pool import claim_wallet
     
     # Generate API key
     api_key = f"eagle_{secrets.token_urlsafe(32)}"
     
-    # Generate Solana wallet
+    # Claim a pre-generated Solana wallet (generated inline only if the pool is empty)
     try:
-        wallet_data = create_agent_wallet()
+        wallet_data = claim_wallet(db)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -405,8 +416,12 @@ def create_agent(agent_data: AgentCreate, db: Session = Depends(get_db)):
     )
     
     db.add(agent)
+    db.flush()
+    tag_agents(db, [(agent.id, agent.name, agent.description)])
     db.commit()
     db.refresh(agent)
+    response_cache.invalidate("agents")
+    activity_stream.publish_agent_created(agent.name, capabilities=agent.capabilities)
     
     response = agent.to_dict()
     response["api_key"] = api_key  # Only return on creation
@@ -423,18 +438,32 @@ def create_agent(agent_data: AgentCreate, db: Session = Depends(get_db)):
 
 
 @app.get("/api/v1/agents")
-def list_agents(limit: int = 50, offset: int = 0, db: Session = Depends(get_db)):
-    """List agents for ticker and browsing"""
+def list_agents(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    count: str = Query("exact", regex=COUNT_MODE_PATTERN),
+    db: Session = Depends(get_db)
+):
+    """
+    List agents for ticker and browsing
+    
+    Pass next_cursor back as ?cursor= for the next page (offset is legacy).
+    count=estimated|none avoids the exact COUNT(*).
+    """
     try:
-        query = db.query(Agent).filter(Agent.is_active == True).order_by(Agent.created_at.desc())
-        total = query.count()
-        agents = query.offset(offset).limit(limit).all()
+        query = db.query(Agent).filter(Agent.is_active == True)
+        keys = [SortKey(Agent.created_at), SortKey(Agent.id)]
+        agents, next_cursor = paginate_query(query, keys, limit, cursor, sort="newest", offset=offset)
         
         return {
             "success": True,
-            "total": total,
-            "agents": [{"name": a.name, "source_url": a.source_url, "quality_score": a.quality_score} for a in agents]
+            "total": count_query(db, query, count),
+            "agents": [{"name": a.name, "source_url": a.source_url, "quality_score": a.quality_score} for a in agents],
+            "next_cursor": next_cursor
         }
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         return {"success": False, "agents": []}
 
@@ -458,14 +487,17 @@ def search_agents(
     min_rating: Optional[float] = None,
     max_price: Optional[float] = None,
     agent_type: Optional[AgentType] = None,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
     offset: int = 0,
+    cursor: Optional[str] = None,
+    count: str = Query("exact", regex=COUNT_MODE_PATTERN),
     db: Session = Depends(get_db)
 ):
     """
     Search agents by criteria
     
-    Returns list of agents matching filters
+    Returns list of agents matching filters. Keyset-paginated: pass
+    pagination.next_cursor back as ?cursor= for the next page.
     """
     query = db.query(Agent).filter(Agent.is_active == True)
     
@@ -478,19 +510,25 @@ def search_agents(
     if capability:
         query = query.filter(Agent.capabilities.contains([capability]))
     
-    query = query.order_by(Agent.rating_avg.desc(), Agent.transaction_count.desc())
-    
-    total = query.count()
-    agents = query.offset(offset).limit(limit).all()
+    keys = [
+        SortKey(func.coalesce(Agent.rating_avg, 0.0)),
+        SortKey(func.coalesce(Agent.transaction_count, 0)),
+        SortKey(Agent.id)
+    ]
+    try:
+        agents, next_cursor = paginate_query(query, keys, limit, cursor, sort="rating", offset=offset)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "success": True,
-        "total": total,
+        "total": count_query(db, query, count),
         "agents": [agent.to_dict() for agent in agents],
         "pagination": {
             "offset": offset,
             "limit": limit,
-            "has_more": (offset + limit) < total
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor
         }
     }
 
@@ -558,12 +596,16 @@ def search_listings(
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     min_quality: Optional[int] = None,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
     offset: int = 0,
+    cursor: Optional[str] = None,
+    count: str = Query("exact", regex=COUNT_MODE_PATTERN),
     db: Session = Depends(get_db)
 ):
     """
     Search listings by criteria
+    
+    Keyset-paginated: pass pagination.next_cursor back as ?cursor=.
     """
     query = db.query(Listing).filter(Listing.status == ListingStatus.ACTIVE)
     
@@ -582,19 +624,25 @@ def search_listings(
     if min_quality:
         query = query.filter(Listing.quality_score >= min_quality)
     
-    query = query.order_by(Listing.rating_avg.desc(), Listing.purchase_count.desc())
-    
-    total = query.count()
-    listings = query.offset(offset).limit(limit).all()
+    keys = [
+        SortKey(func.coalesce(Listing.rating_avg, 0.0)),
+        SortKey(func.coalesce(Listing.purchase_count, 0)),
+        SortKey(Listing.id)
+    ]
+    try:
+        listings, next_cursor = paginate_query(query, keys, limit, cursor, sort="rating", offset=offset)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "success": True,
-        "total": total,
+        "total": count_query(db, query, count),
         "listings": [listing.to_dict() for listing in listings],
         "pagination": {
             "offset": offset,
             "limit": limit,
-            "has_more": (offset + limit) < total
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor
         }
     }
 
@@ -678,20 +726,61 @@ def get_transaction(transaction_id: str, db: Session = Depends(get_db)):
 # Startup Event
 # ==========================================
 
+# Schema creation runs as a deploy step (python -m database.init_schema, see
+# railway.json); set true for local development without that step
+DB_CREATE_SCHEMA_ON_STARTUP = os.getenv("DB_CREATE_SCHEMA_ON_STARTUP", "false").lower() == "true"
+
+
 @app.on_event("startup")
 def startup_event():
-    """Initialize database on startup"""
-    try:
-        init_db()
-        print("[OK] Database initialized")
-    except Exception as e:
-        print(f"[WARN] Database not available: {e}")
-        print("   API will start anyway - add PostgreSQL database in Railway to enable full functionality")
+    """Initialize database on startup (only with DB_CREATE_SCHEMA_ON_STARTUP=true)"""
+    if DB_CREATE_SCHEMA_ON_STARTUP:
+        try:
+            init_db()
+            print("[OK] Database initialized")
+        except Exception as e:
+            print(f"[WARN] Database not available: {e}")
+            print("   API will start anyway - add PostgreSQL database in Railway to enable full functionality")
     
     print("[OK] Agent Directory API running")
     print("[EAGLE] The Global Agent Stock Exchange")
 
 
+@app.on_event("startup")
+async def start_background_workers():
+    """Start in-process fulfillment and webhook workers, partition maintenance, wallet pool filler and expiry scheduler (each can be disabled)"""
+    from services.expiry_scheduler import start_expiry_scheduler
+    from services.fulfillment_queue import start_app_worker
+    from services.partition_manager import start_partition_maintenance
+    from services.stripe_webhook_queue import start_webhook_worker
+    from services.wallet_pool import start_wallet_pool_filler
+    if start_app_worker():
+        print("[OK] Fulfillment queue worker started")
+    if start_webhook_worker():
+        print("[OK] Stripe webhook worker started")
+    if start_partition_maintenance():
+        print("[OK] Partition maintenance scheduled")
+    if start_wallet_pool_filler():
+        print("[OK] Wallet pool filler scheduled")
+    if start_expiry_scheduler():
+        print("[OK] Expiry scheduler started")
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    """Drain in-flight fulfillment jobs and webhook events, then stop the periodic tasks before exit"""
+    from services.expiry_scheduler import stop_expiry_scheduler
+    from services.fulfillment_queue import stop_app_worker
+    from services.partition_manager import stop_partition_maintenance
+    from services.stripe_webhook_queue import stop_webhook_worker
+    from services.wallet_pool import stop_wallet_pool_filler
+    await stop_app_worker()
+    await stop_webhook_worker()
+    await stop_partition_maintenance()
+    await stop_wallet_pool_filler()
+    await stop_expiry_scheduler()
+
+
 # ==========================================
 # Run Server
 # ==========================================
@@ -0,0 +1,55 @@
+"""
+Request Metrics Middleware
+Times every HTTP request and attributes its SQL to the matched route.
+
+Pure ASGI (not BaseHTTPMiddleware) so latency covers the whole response
+body, streamed responses pass through untouched, and the RequestStats
+context variable is visible to endpoints, dependencies and threadpool calls.
+"""
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from services.request_metrics import (
+    METRICS_ENABLED, UNMATCHED_ROUTE, RequestStats, current_request, observe_request
+)
+
+
+class RequestMetricsMiddleware:
+    """Records latency, status and SQL counts per route; adds a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        started_monotonic = time.monotonic()
+        token = current_request.set(stats)
+        response = {"status": 500, "streaming": False}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                headers = MutableHeaders(scope=message)
+                response["streaming"] = headers.get("content-type", "").startswith("text/event-stream")
+                headers.append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            # The router stores the matched route on the scope; label by its template
+            route = scope.get("route")
+            observe_request(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                response["status"],
+                stats,
+                started_monotonic,
+                streaming=response["streaming"]
+            )
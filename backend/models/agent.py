@@ -111,6 +111,14 @@ class Agent(Base):
     signup_ip_address = Column(String(45))  # IPv6 max length
     daily_spending_exposure = Column(Float, default=0.0)
     paid_calls_remaining = Column(Integer, default=0)
+    partial_call_credit = Column(Integer, default=0)  # Thousandths of a call owed (migrations 022, 024)
+    
+    # Solana wallet (migration 003)
+    wallet_address = Column(String(44))  # Public key; idx_agents_wallet_address
+    wallet_private_key_encrypted = Column(Text)
+    wallet_created_at = Column(DateTime)
+    usdc_balance = Column(Float, default=0.0)  # Cached balance
+    last_balance_check = Column(DateTime)
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
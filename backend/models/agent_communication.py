@@ -28,6 +28,7 @@ class MessageStatus(str, enum.Enum):
     ACCEPTED = "accepted"  # Agent accepted work order
     REJECTED = "rejected"  # Agent rejected work order
     COMPLETED = "completed"  # Work order completed
+    EXPIRED = "expired"  # Work order passed its deadline (services/expiry_scheduler.py)
 
 
 class AgentMessage(Base):
@@ -72,6 +72,7 @@ class Request(Base):
     # Metrics
     view_count = Column(Integer, default=0)
     bid_count = Column(Integer, default=0)
+    attractiveness_score = Column(Float)  # Maintained in SQL (migration 013), used for ranking
     
     # Privacy
     is_public = Column(Boolean, default=True)  # False = invite-only
@@ -119,6 +120,8 @@ class Request(Base):
         """
         Score for sellers: how attractive is this request to bid on?
         Higher = more attractive
+        
+        Mirrored by request_attractiveness() in migration 013 - keep in sync.
         """
         score = 0
         
@@ -1,7 +1,8 @@
 """
 MCP Tool Listing Model
 """
-from sqlalchemy import Column, String, Text, Float, Integer, Boolean, JSON, DateTime
+from sqlalchemy import Column, String, Text, Float, Integer, Boolean, JSON, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from database.base import Base
 
@@ -26,6 +27,7 @@ class Tool(Base):
     version = Column(String(50), nullable=True)
     repository_url = Column(String(500), nullable=True)
     documentation_url = Column(String(500), nullable=True)
+    cache_ttl_seconds = Column(Integer, nullable=False, default=0)  # 0 = response caching disabled
     total_installs = Column(Integer, nullable=False, default=0)
     total_calls = Column(Integer, nullable=False, default=0)
     avg_rating = Column(Float, nullable=False, default=0.0)
@@ -44,9 +46,21 @@ class GroupBuyingPool(Base):
     target_quantity = Column(Integer, nullable=False)
     current_quantity = Column(Integer, nullable=False, default=0)
     discount_tier = Column(String(50), nullable=False)  # e.g. "10%", "20%", "30%"
-    participants = Column(JSON, nullable=True, default=[])
+    participants = Column(JSON, nullable=True, default=[])  # Legacy; participants live in pool_members (migration 020)
     status = Column(String(50), nullable=False, default="active")  # active/triggered/expired/cancelled
     triggered_at = Column(DateTime(timezone=True), nullable=True)
     expires_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class PoolMember(Base):
+    """One agent's stake in a pool; GroupBuyingPool.current_quantity is the sum of quantity"""
+    __tablename__ = "pool_members"
+    __table_args__ = (UniqueConstraint("pool_id", "agent_id"),)
+
+    id = Column(String, primary_key=True)
+    pool_id = Column(String, ForeignKey("group_buying_pools.id"), nullable=False)
+    agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id"), nullable=False)
+    quantity = Column(Integer, default=1)
+    joined_at = Column(DateTime(timezone=True), server_default=func.now())
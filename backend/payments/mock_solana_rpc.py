@@ -0,0 +1,181 @@
+"""
+Mock Solana RPC Server
+Local stand-in for a Solana JSON-RPC node, for exercising solana_rpc.py
+without a cluster
+
+Serves getMultipleAccounts, getTokenAccountBalance, getLatestBlockhash,
+sendTransaction (signature and blockhash checked, USDC transfer_checked
+instructions applied) and getSignatureStatuses.
+
+- Every token account has a deterministic balance, except ~10% that do not
+  exist; transfers to those are rejected like a failed preflight
+- MOCK_SOLANA_LATENCY_MS adds per-request latency (public RPC is ~50-150ms)
+- MOCK_SOLANA_RATE_LIMIT caps requests per second (HTTP 429 beyond it)
+- GET /stats reports calls per method
+
+Run:
+    cd backend/payments && uvicorn mock_solana_rpc:app --port 8899
+"""
+
+from collections import Counter, deque
+import asyncio
+import base64
+import hashlib
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from solders.hash import Hash
+from solders.transaction import Transaction
+
+MOCK_SOLANA_LATENCY_MS = float(os.getenv("MOCK_SOLANA_LATENCY_MS", "0"))
+MOCK_SOLANA_RATE_LIMIT = float(os.getenv("MOCK_SOLANA_RATE_LIMIT", "0"))  # Requests per second; 0 = unlimited
+SLOT_SECONDS = 0.4
+BLOCKHASH_VALID_SLOTS = 150
+TRANSFER_CHECKED = 12  # SPL token instruction index
+
+app = FastAPI(title="Mock Solana RPC")
+
+calls = Counter()
+balances = {}  # token account -> base units, once touched by a transfer
+signatures = {}  # signature -> slot
+recent_requests = deque()
+
+
+def current_slot() -> int:
+    return int(time.time() / SLOT_SECONDS)
+
+
+def blockhash_for(slot: int) -> Hash:
+    return Hash(hashlib.sha256(f"mock-slot-{slot}".encode()).digest())
+
+
+def token_account_exists(address: str) -> bool:
+    return hashlib.sha256(address.encode()).digest()[0] % 10 != 0
+
+
+def token_balance(address: str) -> int:
+    if address not in balances:
+        digest = hashlib.sha256(address.encode()).digest()
+        balances[address] = int.from_bytes(digest[1:5], "little") % 1_000_000_000
+    return balances[address]
+
+
+def token_account_data(address: str) -> bytes:
+    """SPL token account layout: mint, owner, amount (u64 LE), ... (165 bytes)"""
+    data = bytearray(165)
+    data[64:72] = token_balance(address).to_bytes(8, "little")
+    return bytes(data)
+
+
+def rpc_error(request_id, code: int, message: str):
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def handle(method: str, params: list):
+    """Result for one call; raises ValueError(code, message) for RPC errors"""
+    slot = current_slot()
+    context = {"slot": slot}
+
+    if method == "getMultipleAccounts":
+        return {"context": context, "value": [
+            {"data": [base64.b64encode(token_account_data(address)).decode(), "base64"],
+             "executable": False, "lamports": 2039280, "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+             "rentEpoch": 0}
+            if token_account_exists(address) else None
+            for address in params[0]
+        ]}
+
+    if method == "getTokenAccountBalance":
+        if not token_account_exists(params[0]):
+            raise ValueError(-32602, "Invalid param: could not find account")
+        amount = token_balance(params[0])
+        return {"context": context, "value": {
+            "amount": str(amount), "decimals": 6, "uiAmount": amount / 1e6, "uiAmountString": str(amount / 1e6)
+        }}
+
+    if method == "getLatestBlockhash":
+        return {"context": context, "value": {
+            "blockhash": str(blockhash_for(slot)), "lastValidBlockHeight": slot + BLOCKHASH_VALID_SLOTS
+        }}
+
+    if method == "sendTransaction":
+        transaction = Transaction.from_bytes(base64.b64decode(params[0]))
+        try:
+            transaction.verify()
+        except Exception:
+            raise ValueError(-32003, "Transaction signature verification failure")
+        message = transaction.message
+        recent = {blockhash_for(s) for s in range(slot - BLOCKHASH_VALID_SLOTS, slot + 1)}
+        if message.recent_blockhash not in recent:
+            raise ValueError(-32002, "Transaction simulation failed: Blockhash not found")
+
+        transfers = []
+        for instruction in message.instructions:
+            data = bytes(instruction.data)
+            if data and data[0] == TRANSFER_CHECKED:
+                accounts = [str(message.account_keys[i]) for i in bytes(instruction.accounts)]
+                transfers.append((accounts[0], accounts[2], int.from_bytes(data[1:9], "little")))
+        for source, dest, amount in transfers:
+            if not token_account_exists(dest):
+                raise ValueError(-32002, f"Transaction simulation failed: account {dest} not found")
+        for source, dest, amount in transfers:
+            balances[source] = token_balance(source) - amount
+            balances[dest] = token_balance(dest) + amount
+
+        signature = str(transaction.signatures[0])
+        signatures[signature] = slot
+        return signature
+
+    if method == "getSignatureStatuses":
+        return {"context": context, "value": [
+            {"slot": signatures[sig], "confirmations": None, "err": None, "confirmationStatus": "confirmed"}
+            if sig in signatures else None
+            for sig in params[0]
+        ]}
+
+    raise ValueError(-32601, f"Method not found: {method}")
+
+
+@app.post("/")
+async def json_rpc(request: Request):
+    if MOCK_SOLANA_RATE_LIMIT > 0:
+        now = time.monotonic()
+        while recent_requests and now - recent_requests[0] > 1:
+            recent_requests.popleft()
+        if len(recent_requests) >= MOCK_SOLANA_RATE_LIMIT:
+            calls["429"] += 1
+            return JSONResponse({"error": "Too many requests"}, status_code=429, headers={"Retry-After": "1"})
+        recent_requests.append(now)
+
+    if MOCK_SOLANA_LATENCY_MS:
+        await asyncio.sleep(MOCK_SOLANA_LATENCY_MS / 1000)
+
+    body = await request.json()
+    requests = body if isinstance(body, list) else [body]
+    responses = []
+    for rpc_request in requests:
+        calls[rpc_request["method"]] += 1
+        try:
+            result = handle(rpc_request["method"], rpc_request.get("params", []))
+            responses.append({"jsonrpc": "2.0", "id": rpc_request.get("id"), "result": result})
+        except ValueError as e:
+            responses.append(rpc_error(rpc_request.get("id"), *e.args))
+    return responses if isinstance(body, list) else responses[0]
+
+
+@app.get("/stats")
+async def stats():
+    return {"calls": dict(calls), "transactions": len(signatures)}
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    calls.clear()
+    return {"reset": True}
+
+
+@app.get("/health")
+async def health():
+    return {"status": "healthy"}
@@ -11,6 +11,7 @@ try:
     from solders.system_program import transfer, TransferParams
     from solders.message import Message
     from solders.hash import Hash
+    from solana_rpc import payment_instructions, run_sync, usdc_token_account
 except ImportError as e:
     import warnings
     warnings.warn(f"Solana SDK not installed: {e}. Payment features will be unavailable.")
@@ -37,6 +38,7 @@ class SolanaPaymentProcessor:
     """Process USDC payments on Solana"""
     
     def __init__(self, treasury_keypair: Keypair = None, rpc_url=SOLANA_RPC_URL):
+        self.rpc_url = rpc_url
         self.client = Client(rpc_url)
         self.treasury = treasury_keypair
         self.usdc_mint = Pubkey.from_string(USDC_MINT)
@@ -48,7 +50,8 @@ class SolanaPaymentProcessor:
         Args:
             to_address: Recipient Solana wallet address
             amount_usdc: Amount in USDC (e.g., 0.47 for 47 cents)
-            memo: Optional transaction memo
+            memo: Optional text, recorded on-chain with a nonce that keeps
+                  repeated equal payouts distinct
             
         Returns:
             str: Transaction signature
@@ -57,48 +60,12 @@ class SolanaPaymentProcessor:
             raise ValueError("Treasury keypair not initialized")
         
         try:
-            # Convert USDC to base units (6 decimals)
-            amount_base = int(amount_usdc * 1_000_000)
+            # Blockhash comes from the shared short-TTL cache, not a fetch per transfer
+            async def send(rpc):
+                instructions = payment_instructions(self.treasury.pubkey(), to_address, amount_usdc, memo)
+                return await rpc.send_transfers(self.treasury, instructions)
             
-            # Get token accounts
-            treasury_pubkey = self.treasury.pubkey()
-            to_pubkey = Pubkey.from_string(to_address)
-            
-            treasury_usdc = get_associated_token_address(treasury_pubkey, self.usdc_mint)
-            recipient_usdc = get_associated_token_address(to_pubkey, self.usdc_mint)
-            
-            # Build transfer instruction
-            transfer_instruction = transfer_checked(
-                TransferCheckedParams(
-                    program_id=TOKEN_PROGRAM_ID,
-                    source=treasury_usdc,
-                    mint=self.usdc_mint,
-                    dest=recipient_usdc,
-                    owner=treasury_pubkey,
-                    amount=amount_base,
-                    decimals=USDC_DECIMALS,
-                )
-            )
-            
-            # Get recent blockhash
-            recent_blockhash = self.client.get_latest_blockhash().value.blockhash
-            
-            # Build transaction
-            transaction = Transaction()
-            transaction.recent_blockhash = recent_blockhash
-            transaction.fee_payer = treasury_pubkey
-            transaction.add(transfer_instruction)
-            
-            # Sign and send
-            transaction.sign(self.treasury)
-            
-            response = self.client.send_transaction(
-                transaction,
-                self.treasury,
-                opts={"skip_preflight": False, "preflight_commitment": "confirmed"}
-            )
-            
-            signature = response.value
+            signature = run_sync(send, self.rpc_url)
             
             print(f"[PAYMENT] Sent ${amount_usdc:.2f} USDC to {to_address[:8]}...")
             print(f"[TX] https://solscan.io/tx/{signature}")
@@ -115,8 +82,7 @@ class SolanaPaymentProcessor:
             return 0.0
         
         try:
-            treasury_pubkey = self.treasury.pubkey()
-            treasury_usdc = get_associated_token_address(treasury_pubkey, self.usdc_mint)
+            treasury_usdc = usdc_token_account(str(self.treasury.pubkey()))
             
             response = self.client.get_token_account_balance(treasury_usdc)
             
@@ -163,26 +129,22 @@ class SolanaPaymentProcessor:
         """
         Send multiple USDC payments in batch
         
+        Transfers are packed into as few transactions as fit (up to
+        SOLANA_MAX_TRANSFERS_PER_TX each) and sent concurrently within the
+        RPC rate limit. Payments packed together share a signature.
+        
         Args:
-            payments: List of {"to": address, "amount": usdc_amount} dicts
+            payments: List of {"to": address, "amount": usdc_amount, "memo": optional text} dicts
             
         Returns:
-            list: Transaction signatures
+            list: Transaction signatures (None for failed payments)
         """
-        signatures = []
-        
-        for payment in payments:
-            try:
-                sig = self.send_usdc(
-                    to_address=payment["to"],
-                    amount_usdc=payment["amount"],
-                    memo=payment.get("memo")
-                )
-                signatures.append(sig)
-            except Exception as e:
-                print(f"[ERROR] Batch payment failed: {e}")
-                signatures.append(None)
+        if not self.treasury:
+            raise ValueError("Treasury keypair not initialized")
         
+        signatures = run_sync(lambda rpc: rpc.send_usdc_batch(self.treasury, payments), self.rpc_url)
+        sent = sum(1 for sig in signatures if sig)
+        print(f"[PAYMENT] Batch sent {sent}/{len(payments)} payments in {len(set(filter(None, signatures)))} transactions")
         return signatures
 
 
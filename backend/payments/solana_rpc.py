@@ -0,0 +1,356 @@
+"""
+Solana RPC Access Layer
+Batched, cached and rate-limited JSON-RPC for balance reads and USDC payouts
+
+- get_usdc_balances(): one getMultipleAccounts call per 100 wallets (the RPC
+  limit), chunks fetched concurrently; token amounts are decoded from the
+  raw account data
+- get_latest_blockhash(): cached for SOLANA_BLOCKHASH_TTL_SECONDS (a blockhash
+  stays valid for ~150 slots, about a minute); concurrent callers share one fetch
+- send_usdc_batch(): skips recipients without a USDC account (checked in
+  one batched read), packs as many transfer_checked instructions into each
+  transaction as fit in a 1232-byte packet and sends the transactions
+  concurrently. A transaction the node rejects is retried one transfer per
+  transaction, so one bad recipient does not hold up the rest of its batch.
+- Every payment carries a memo with a random nonce: with a cached blockhash,
+  two equal payouts (same payer, recipient and amount) would otherwise build
+  byte-identical transactions with one signature, and only one would land
+- Every request goes through a concurrency limit and a token-bucket rate
+  limit; HTTP 429 responses are retried with backoff
+
+Async code uses SolanaRPC directly:
+    async with SolanaRPC() as rpc:
+        balances = await rpc.get_usdc_balances(wallet_addresses)
+
+Sync code (scripts, threadpool workers) uses run_sync(). mock_solana_rpc.py
+is a local stand-in RPC server that serves all of these calls.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import base64
+import functools
+import itertools
+import os
+import secrets
+import time
+
+import httpx
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction
+from spl.memo.constants import MEMO_PROGRAM_ID
+from spl.memo.instructions import MemoParams, create_memo
+from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.instructions import TransferCheckedParams, get_associated_token_address, transfer_checked
+
+
+# ============================================================================
+# RPC CONFIGURATION
+# ============================================================================
+
+SOLANA_RPC_URL = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+USDC_DECIMALS = 6
+
+SOLANA_RPC_MAX_CONCURRENCY = int(os.getenv("SOLANA_RPC_MAX_CONCURRENCY", "8"))
+SOLANA_RPC_REQUESTS_PER_SECOND = float(os.getenv("SOLANA_RPC_REQUESTS_PER_SECOND", "10"))  # Public mainnet: 100 per 10s per IP
+SOLANA_RPC_TIMEOUT_SECONDS = float(os.getenv("SOLANA_RPC_TIMEOUT_SECONDS", "30"))
+SOLANA_RPC_MAX_RETRIES = int(os.getenv("SOLANA_RPC_MAX_RETRIES", "3"))  # On HTTP 429
+SOLANA_BLOCKHASH_TTL_SECONDS = float(os.getenv("SOLANA_BLOCKHASH_TTL_SECONDS", "20"))
+SOLANA_MAX_TRANSFERS_PER_TX = int(os.getenv("SOLANA_MAX_TRANSFERS_PER_TX", "20"))
+
+MAX_ACCOUNTS_PER_CALL = 100  # getMultipleAccounts limit
+MAX_SIGNATURES_PER_CALL = 256  # getSignatureStatuses limit
+PACKET_DATA_SIZE = 1232  # Largest serialized transaction a node accepts
+TOKEN_AMOUNT_OFFSET = 64  # SPL token account: mint (32) + owner (32), then amount (u64 LE)
+MAX_MEMO_TEXT_LENGTH = 100  # Caller text kept in a payment memo (the nonce is added after it)
+
+# rpc url -> (blockhash, monotonic time fetched); shared by every SolanaRPC in the process
+_blockhash_cache: Dict[str, Tuple[Hash, float]] = {}
+
+
+class SolanaRPCError(Exception):
+    """JSON-RPC error response: the node received the request and rejected it"""
+
+    def __init__(self, method: str, error: dict):
+        self.code = error.get("code")
+        super().__init__(f"{method}: {error.get('message', error)}")
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second on average, bursts up to `rate`"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@functools.lru_cache(maxsize=100000)
+def usdc_token_account(wallet_address: str) -> Pubkey:
+    """Associated USDC token account of a wallet (a PDA derivation, so cached)"""
+    return get_associated_token_address(Pubkey.from_string(wallet_address), Pubkey.from_string(USDC_MINT))
+
+
+class SolanaRPC:
+    """Async JSON-RPC client; open with `async with` (owns an httpx.AsyncClient)"""
+
+    def __init__(
+        self,
+        rpc_url: str = SOLANA_RPC_URL,
+        max_concurrency: int = SOLANA_RPC_MAX_CONCURRENCY,
+        requests_per_second: float = SOLANA_RPC_REQUESTS_PER_SECOND,
+        blockhash_ttl: float = SOLANA_BLOCKHASH_TTL_SECONDS
+    ):
+        self.rpc_url = rpc_url
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.blockhash_ttl = blockhash_ttl
+        self.requests = 0
+        self.retries = 0
+        self._ids = itertools.count(1)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self):
+        # Loop-bound primitives are created here, inside the caller's event loop
+        self._client = httpx.AsyncClient(
+            timeout=SOLANA_RPC_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=self.max_concurrency)
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._limiter = RateLimiter(self.requests_per_second)
+        self._blockhash_lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+
+    async def call(self, method: str, params: Optional[list] = None):
+        """One JSON-RPC request; returns its result or raises SolanaRPCError"""
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []}
+        for attempt in range(SOLANA_RPC_MAX_RETRIES + 1):
+            async with self._semaphore:
+                await self._limiter.acquire()
+                response = await self._client.post(self.rpc_url, json=payload)
+            self.requests += 1
+            if response.status_code == 429 and attempt < SOLANA_RPC_MAX_RETRIES:
+                self.retries += 1
+                retry_after = float(response.headers.get("retry-after") or 0)
+                await asyncio.sleep(max(retry_after, 0.5 * 2 ** attempt))
+                continue
+            response.raise_for_status()
+            body = response.json()
+            if "error" in body:
+                raise SolanaRPCError(method, body["error"])
+            return body["result"]
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def get_multiple_accounts(self, addresses: Sequence[str]) -> List[Optional[bytes]]:
+        """Raw data of each account (None if it does not exist), in order"""
+        chunks = [addresses[i:i + MAX_ACCOUNTS_PER_CALL] for i in range(0, len(addresses), MAX_ACCOUNTS_PER_CALL)]
+        results = await asyncio.gather(*(
+            self.call("getMultipleAccounts", [list(chunk), {"encoding": "base64", "commitment": "confirmed"}])
+            for chunk in chunks
+        ))
+        accounts = []
+        for result in results:
+            for account in result["value"]:
+                accounts.append(base64.b64decode(account["data"][0]) if account else None)
+        return accounts
+
+    async def get_usdc_balances(self, wallet_addresses: Sequence[str]) -> Dict[str, float]:
+        """{wallet: USDC balance}; wallets without a USDC account read 0.0"""
+        token_accounts = [str(usdc_token_account(address)) for address in wallet_addresses]
+        balances = {}
+        for address, data in zip(wallet_addresses, await self.get_multiple_accounts(token_accounts)):
+            if data and len(data) >= TOKEN_AMOUNT_OFFSET + 8:
+                amount = int.from_bytes(data[TOKEN_AMOUNT_OFFSET:TOKEN_AMOUNT_OFFSET + 8], "little")
+                balances[address] = amount / 10 ** USDC_DECIMALS
+            else:
+                balances[address] = 0.0
+        return balances
+
+    async def get_latest_blockhash(self) -> Hash:
+        """Recent blockhash, reused for blockhash_ttl seconds"""
+        cached = _blockhash_cache.get(self.rpc_url)
+        if cached and time.monotonic() - cached[1] < self.blockhash_ttl:
+            return cached[0]
+        async with self._blockhash_lock:
+            cached = _blockhash_cache.get(self.rpc_url)
+            if cached and time.monotonic() - cached[1] < self.blockhash_ttl:
+                return cached[0]
+            result = await self.call("getLatestBlockhash", [{"commitment": "confirmed"}])
+            blockhash = Hash.from_string(result["value"]["blockhash"])
+            _blockhash_cache[self.rpc_url] = (blockhash, time.monotonic())
+            return blockhash
+
+    def invalidate_blockhash(self):
+        _blockhash_cache.pop(self.rpc_url, None)
+
+    async def get_signature_statuses(self, signatures: Sequence[str]) -> List[Optional[dict]]:
+        chunks = [signatures[i:i + MAX_SIGNATURES_PER_CALL] for i in range(0, len(signatures), MAX_SIGNATURES_PER_CALL)]
+        results = await asyncio.gather(*(
+            self.call("getSignatureStatuses", [list(chunk), {"searchTransactionHistory": False}])
+            for chunk in chunks
+        ))
+        return [status for result in results for status in result["value"]]
+
+    # ------------------------------------------------------------------
+    # Payouts
+    # ------------------------------------------------------------------
+
+    async def send_transaction(self, transaction: Transaction) -> str:
+        encoded = base64.b64encode(bytes(transaction)).decode()
+        return await self.call("sendTransaction", [
+            encoded, {"encoding": "base64", "skipPreflight": False, "preflightCommitment": "confirmed"}
+        ])
+
+    async def send_transfers(self, payer: Keypair, instructions: list) -> str:
+        for attempt in range(2):
+            blockhash = await self.get_latest_blockhash()
+            message = Message.new_with_blockhash(instructions, payer.pubkey(), blockhash)
+            try:
+                return await self.send_transaction(Transaction([payer], message, blockhash))
+            except SolanaRPCError as e:
+                # Cached blockhash expired on the node: refetch once
+                if attempt == 0 and "blockhash not found" in str(e).lower():
+                    self.invalidate_blockhash()
+                    continue
+                raise
+
+    async def send_usdc_batch(
+        self,
+        treasury: Keypair,
+        payments: Sequence[dict],
+        max_transfers_per_tx: int = SOLANA_MAX_TRANSFERS_PER_TX
+    ) -> List[Optional[str]]:
+        """
+        Send USDC from treasury to each {"to": address, "amount": usdc_amount}
+        (optional "memo": text recorded with the payment)
+
+        Returns the transaction signature of each payment, in order
+        (None where it failed). Payments packed together share a signature.
+        """
+        # Recipients without a USDC account would fail their whole transaction;
+        # find them up front (one call per 100 recipients) and skip them
+        recipient_accounts = await self.get_multiple_accounts(
+            [str(usdc_token_account(payment["to"])) for payment in payments]
+        )
+        payable = []
+        for index, account in enumerate(recipient_accounts):
+            if account is None:
+                print(f"[ERROR] Payment to {payments[index]['to'][:8]}... skipped: no USDC token account")
+            else:
+                payable.append(index)
+
+        instructions = {
+            index: payment_instructions(
+                treasury.pubkey(), payments[index]["to"], payments[index]["amount"], payments[index].get("memo")
+            )
+            for index in payable
+        }
+        groups = [
+            [payable[i] for i in group]
+            for group in pack_instructions(treasury.pubkey(), [instructions[i] for i in payable], max_transfers_per_tx)
+        ]
+
+        async def send_group(indexes: List[int]) -> Dict[int, Optional[str]]:
+            try:
+                signature = await self.send_transfers(treasury, [ix for i in indexes for ix in instructions[i]])
+                return {i: signature for i in indexes}
+            except SolanaRPCError as e:
+                # Rejected before landing, so resending is safe
+                if len(indexes) == 1:
+                    print(f"[ERROR] Payment to {payments[indexes[0]]['to'][:8]}... failed: {e}")
+                    return {indexes[0]: None}
+                print(f"[WARN] Batch of {len(indexes)} transfers rejected ({e}); sending individually")
+                singles = await asyncio.gather(*(send_group([i]) for i in indexes))
+                return {i: sig for result in singles for i, sig in result.items()}
+            except Exception as e:
+                # Transport errors: the transaction may have landed, so never resend
+                print(f"[ERROR] Batch of {len(indexes)} transfers failed: {e}")
+                return {i: None for i in indexes}
+
+        signatures: Dict[int, Optional[str]] = {}
+        for result in await asyncio.gather(*(send_group(group) for group in groups)):
+            signatures.update(result)
+        return [signatures.get(i) for i in range(len(payments))]
+
+
+def usdc_transfer_instruction(treasury: Pubkey, to_address: str, amount_usdc: float):
+    """transfer_checked of amount_usdc from the treasury's USDC account to to_address's"""
+    return transfer_checked(TransferCheckedParams(
+        program_id=TOKEN_PROGRAM_ID,
+        source=usdc_token_account(str(treasury)),
+        mint=Pubkey.from_string(USDC_MINT),
+        dest=usdc_token_account(to_address),
+        owner=treasury,
+        amount=int(round(amount_usdc * 10 ** USDC_DECIMALS)),
+        decimals=USDC_DECIMALS,
+    ))
+
+
+def payment_memo_instruction(payer: Pubkey, memo: Optional[str] = None):
+    """Memo signed by the payer: caller text (if any) plus a random nonce unique to this payment"""
+    nonce = secrets.token_hex(8)
+    text = f"{memo[:MAX_MEMO_TEXT_LENGTH]} #{nonce}" if memo else f"#{nonce}"
+    return create_memo(MemoParams(program_id=MEMO_PROGRAM_ID, signer=payer, message=text.encode()))
+
+
+def payment_instructions(treasury: Pubkey, to_address: str, amount_usdc: float, memo: Optional[str] = None) -> list:
+    """One payment: its transfer plus its nonce memo, so no two payments build identical transactions"""
+    return [usdc_transfer_instruction(treasury, to_address, amount_usdc), payment_memo_instruction(treasury, memo)]
+
+
+def pack_instructions(payer: Pubkey, instructions: list, max_per_tx: int = SOLANA_MAX_TRANSFERS_PER_TX) -> List[List[int]]:
+    """
+    Greedily group item indexes into transactions under PACKET_DATA_SIZE
+
+    An item is one instruction or a list of instructions that must share a
+    transaction (a payment's transfer and memo); max_per_tx counts items.
+    """
+    items = [item if isinstance(item, list) else [item] for item in instructions]
+    groups, current = [], []
+    for index, item in enumerate(items):
+        candidate = [ix for i in current for ix in items[i]] + item
+        message = Message.new_with_blockhash(candidate, payer, Hash.default())
+        if current and (len(current) >= max_per_tx or len(bytes(Transaction.new_unsigned(message))) > PACKET_DATA_SIZE):
+            groups.append(current)
+            current = []
+        current.append(index)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def run_sync(operation, rpc_url: str = SOLANA_RPC_URL):
+    """
+    Run `await operation(rpc)` from sync code, e.g.
+        run_sync(lambda rpc: rpc.get_usdc_balances(addresses))
+    Not for use inside a running event loop: await SolanaRPC there instead.
+    """
+    async def main():
+        async with SolanaRPC(rpc_url) as rpc:
+            return await operation(rpc)
+    return asyncio.run(main())
@@ -12,6 +12,8 @@ import json
 from cryptography.fernet import Fernet
 import os
 
+from solana_rpc import run_sync
+
 # Solana Configuration
 SOLANA_RPC_URL = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
 USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"  # USDC on Solana mainnet
@@ -21,6 +23,7 @@ class SolanaWalletManager:
     """Manages Solana wallets for agents and treasury"""
     
     def __init__(self, rpc_url=SOLANA_RPC_URL):
+        self.rpc_url = rpc_url
         self.client = Client(rpc_url)
         self.usdc_mint = Pubkey.from_string(USDC_MINT)
         
@@ -98,6 +101,25 @@ class SolanaWalletManager:
             print(f"[ERROR] Failed to get balance: {e}")
             return 0.0
     
+    def get_balances(self, wallet_addresses: list):
+        """
+        Get USDC balances for many wallets at once
+        
+        One getMultipleAccounts call per 100 wallets instead of one RPC per
+        wallet. Sync; from async code use SolanaRPC.get_usdc_balances.
+        
+        Args:
+            wallet_addresses: Solana wallet public keys
+            
+        Returns:
+            dict: {wallet_address: USDC balance}
+        """
+        try:
+            return run_sync(lambda rpc: rpc.get_usdc_balances(list(wallet_addresses)), self.rpc_url)
+        except Exception as e:
+            print(f"[ERROR] Failed to get balances: {e}")
+            return {address: 0.0 for address in wallet_addresses}
+    
     def decrypt_private_key(self, encrypted_key: str):
         """
         Decrypt agent private key for signing transactions
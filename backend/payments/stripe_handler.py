@@ -2,7 +2,6 @@
 Stripe Payment Integration for Agent Exchange
 Handles payments, commission splits, and payouts
 """
-import stripe
 import os
 from typing import Dict, Optional
 from datetime import datetime
@@ -10,18 +9,38 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# Initialize Stripe
-stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
 STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET')
 
 
+class _LazyStripe:
+    """
+    Stands in for the stripe module until first use
+
+    The SDK takes ~0.3s to import, which every app boot paid even though
+    only payment requests need it. Attribute access imports and configures it.
+    """
+
+    _module = None
+
+    def __getattr__(self, name):
+        if _LazyStripe._module is None:
+            import stripe as module
+            module.api_key = STRIPE_SECRET_KEY
+            _LazyStripe._module = module
+        return getattr(_LazyStripe._module, name)
+
+
+stripe = _LazyStripe()
+
+
 class StripePaymentHandler:
     """
     Handles all Stripe payment operations for Agent Exchange
     """
     
     def __init__(self):
-        self.api_key = stripe.api_key
+        self.api_key = STRIPE_SECRET_KEY
     
     def create_payment_intent(
         self,
@@ -308,55 +327,21 @@ class StripePaymentHandler:
                 'error': str(e)
             }
     
-    def handle_webhook(self, payload: bytes, signature: str) -> Dict:
+    def verify_webhook(self, payload: bytes, signature: str) -> Dict:
         """
-        Handle Stripe webhook events
-        
-        Critical events:
-        - payment_intent.succeeded: Payment received
-        - payment_intent.payment_failed: Payment failed
-        - transfer.created: Payout to seller started
-        - transfer.failed: Payout failed
+        Check the Stripe-Signature header and parse the event
+
+        Pure CPU (no API call), so webhook intake can do it before acking.
         """
         try:
             event = stripe.Webhook.construct_event(
                 payload, signature, STRIPE_WEBHOOK_SECRET
             )
-            
-            event_type = event['type']
-            event_data = event['data']['object']
-            
-            result = {
+            return {
                 'success': True,
-                'event_type': event_type,
-                'event_id': event['id'],
-                'processed_at': datetime.utcnow().isoformat()
+                'event': event
             }
             
-            # Handle different event types
-            if event_type == 'payment_intent.succeeded':
-                result['action'] = 'update_transaction_status'
-                result['transaction_id'] = event_data.get('metadata', {}).get('transaction_id')
-                result['status'] = 'payment_received'
-                result['amount'] = event_data['amount'] / 100
-            
-            elif event_type == 'payment_intent.payment_failed':
-                result['action'] = 'mark_transaction_failed'
-                result['transaction_id'] = event_data.get('metadata', {}).get('transaction_id')
-                result['error'] = event_data.get('last_payment_error', {}).get('message')
-            
-            elif event_type == 'transfer.created':
-                result['action'] = 'log_transfer'
-                result['transfer_id'] = event_data['id']
-                result['amount'] = event_data['amount'] / 100
-            
-            elif event_type == 'transfer.failed':
-                result['action'] = 'handle_transfer_failure'
-                result['transfer_id'] = event_data['id']
-                result['error'] = event_data.get('failure_message')
-            
-            return result
-            
         except stripe.error.SignatureVerificationError as e:
             return {
                 'success': False,
@@ -368,6 +353,68 @@ class StripePaymentHandler:
                 'error': str(e)
             }
     
+    def interpret_event(self, event: Dict) -> Dict:
+        """
+        Map a verified Stripe event to the action it requires
+        
+        Critical events:
+        - payment_intent.succeeded: Payment received
+        - payment_intent.payment_failed: Payment failed
+        - transfer.created: Payout to seller started
+        - transfer.failed: Payout failed
+        """
+        event_type = event['type']
+        event_data = event['data']['object']
+        
+        result = {
+            'success': True,
+            'event_type': event_type,
+            'event_id': event['id'],
+            'processed_at': datetime.utcnow().isoformat()
+        }
+        
+        # Handle different event types
+        if event_type == 'payment_intent.succeeded':
+            result['action'] = 'update_transaction_status'
+            result['transaction_id'] = (event_data.get('metadata') or {}).get('transaction_id')
+            result['status'] = 'payment_received'
+            result['amount'] = event_data['amount'] / 100
+        
+        elif event_type == 'payment_intent.payment_failed':
+            result['action'] = 'mark_transaction_failed'
+            result['transaction_id'] = (event_data.get('metadata') or {}).get('transaction_id')
+            result['error'] = (event_data.get('last_payment_error') or {}).get('message')
+        
+        elif event_type == 'transfer.created':
+            result['action'] = 'log_transfer'
+            result['transfer_id'] = event_data['id']
+            result['amount'] = event_data['amount'] / 100
+        
+        elif event_type == 'transfer.failed':
+            result['action'] = 'handle_transfer_failure'
+            result['transfer_id'] = event_data['id']
+            result['error'] = event_data.get('failure_message')
+        
+        return result
+    
+    def handle_webhook(self, payload: bytes, signature: str) -> Dict:
+        """
+        Verify a webhook and map it to an action in one step
+        
+        The /webhooks/stripe endpoint verifies and queues instead
+        (services/stripe_webhook_queue.py); this is for direct callers.
+        """
+        verified = self.verify_webhook(payload, signature)
+        if not verified['success']:
+            return verified
+        try:
+            return self.interpret_event(verified['event'])
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
     def get_balance(self) -> Dict:
         """
         Get platform Stripe balance
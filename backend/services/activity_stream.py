@@ -0,0 +1,263 @@
+"""
+Activity Stream
+In-process event bus behind /api/v1/activity (recent, stats, SSE stream)
+
+Write paths publish events (agent discovered, execution started/finished,
+message sent, tool called) into a bounded ring buffer; readers are served
+from the buffer and from counters maintained on publish, so any number of
+viewers adds no database load. Counters are seeded from Postgres once and
+re-seeded every ACTIVITY_RESEED_SECONDS to correct drift from other workers.
+"""
+
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import os
+import random
+import threading
+import time
+
+
+# ============================================================================
+# STREAM CONFIGURATION
+# ============================================================================
+
+ACTIVITY_BUFFER_SIZE = int(os.getenv("ACTIVITY_BUFFER_SIZE", "1000"))  # Events kept for /recent and resume
+ACTIVITY_RESEED_SECONDS = int(os.getenv("ACTIVITY_RESEED_SECONDS", "3600"))  # Re-read counters from Postgres
+ACTIVITY_HEARTBEAT_SECONDS = int(os.getenv("ACTIVITY_HEARTBEAT_SECONDS", "15"))  # SSE keep-alive + metrics push
+
+EVENT_TYPES = ("discovery", "execution", "message", "tool_call")
+
+
+def _discovery_payload(name: str, capabilities, created_at: datetime, estimated_value) -> Dict:
+    """Discovery event in the shape the homepage activity feed renders"""
+    capability_list = capabilities if isinstance(capabilities, list) else []
+    return {
+        "timestamp": created_at.isoformat(),
+        "agent_name": name,
+        "message": f"Agent '{name}' joined network with {len(capability_list)} capabilities",
+        "capability_searched": random.choice(capability_list) if capability_list else None,
+        "matches_found": random.randint(15, 150),
+        "exchange_value": float(estimated_value) if estimated_value else 0.0
+    }
+
+
+class ActivityStream:
+    """
+    Ring buffer of events with monotonically increasing ids
+
+    publish() is thread-safe (sync endpoints run in the threadpool) and wakes
+    SSE subscribers on the event loop via call_soon_threadsafe.
+    """
+
+    def __init__(self, max_events: int = ACTIVITY_BUFFER_SIZE):
+        self._events: deque = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        # Ids start at the boot time in ms so they keep increasing across restarts
+        self._last_id = int(time.time() * 1000)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.subscribers = 0
+
+        # Counters (seeded from Postgres, then maintained on publish)
+        self._seeded_at = 0.0
+        self._seed_lock = threading.Lock()
+        self.total_agents = 0
+        self.total_capabilities = 0
+        self.category_counts: Counter = Counter()
+        self._agent_times: deque = deque()  # created_at of agents in the last 24h
+        self.event_counts: Counter = Counter()
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def publish(self, event_type: str, **payload) -> Dict:
+        """Append an event and wake subscribers; returns the stored event"""
+        with self._lock:
+            self._last_id += 1
+            event = {
+                "id": self._last_id,
+                "type": event_type,
+                "timestamp": payload.pop("timestamp", None) or datetime.utcnow().isoformat(),
+                **payload
+            }
+            self._events.append(event)
+            self.event_counts[event_type] += 1
+
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._notify)
+        return event
+
+    def _notify(self):
+        # Runs on the event loop: release current waiters, arm a fresh event
+        if self._wakeup is not None:
+            self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    def publish_agent_created(self, name: str, capabilities=None, categories=None,
+                              estimated_value=None, created_at: Optional[datetime] = None):
+        """Agent joined the network (crawler, submission, registration)"""
+        capability_list = capabilities if isinstance(capabilities, list) else []
+        created_at = created_at or datetime.utcnow()
+
+        with self._lock:
+            self.total_agents += 1
+            self.total_capabilities += len(capability_list)
+            if isinstance(categories, list):
+                self.category_counts.update(categories)
+            self._agent_times.append(created_at)
+
+        self.publish("discovery", **_discovery_payload(name, capability_list, created_at, estimated_value))
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def since(self, last_id: int = 0, types: Optional[Iterable[str]] = None) -> Tuple[List[Dict], int]:
+        """
+        Buffered events after last_id (oldest first) and the id to resume from
+
+        The resume id covers filtered-out events too, so a subscriber to one
+        type does not keep waking up for others.
+        """
+        types = set(types) if types else None
+        with self._lock:
+            if last_id >= self._last_id:
+                # Caught up, or an id from another process lifetime/worker
+                return [], self._last_id
+            events = [e for e in self._events
+                      if e["id"] > last_id and (types is None or e["type"] in types)]
+            return events, self._last_id
+
+    def recent(self, limit: int, types: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Newest events first"""
+        types = set(types) if types else None
+        result = []
+        with self._lock:
+            for event in reversed(self._events):
+                if types is None or event["type"] in types:
+                    result.append(event)
+                    if len(result) >= limit:
+                        break
+        return result
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def agents_since(self, window: timedelta) -> int:
+        now = datetime.utcnow()
+        cutoff = now - window
+        with self._lock:
+            while self._agent_times and self._agent_times[0] < now - timedelta(hours=24):
+                self._agent_times.popleft()
+            return sum(1 for t in self._agent_times if t >= cutoff)
+
+    def metrics(self) -> Dict:
+        return {
+            "agents_last_hour": self.agents_since(timedelta(hours=1)),
+            "agents_24h": self.agents_since(timedelta(hours=24)),
+            "total_agents": self.total_agents,
+            "total_capabilities": self.total_capabilities,
+            "active_categories": len(self.category_counts),
+            "events": dict(self.event_counts),
+            "subscribers": self.subscribers,
+            "last_event_id": self._last_id
+        }
+
+    async def wait(self, after_id: int, timeout: float) -> bool:
+        """Wait until an event newer than after_id exists (True) or timeout (False)"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._last_id > after_id:
+            return True
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # ------------------------------------------------------------------
+    # Seeding
+    # ------------------------------------------------------------------
+
+    def ensure_seeded(self, connect):
+        """
+        Load counters and recent discoveries from Postgres if never loaded
+        or older than ACTIVITY_RESEED_SECONDS. connect() returns a psycopg2
+        connection. Only one thread seeds; others keep serving current values.
+        """
+        if time.monotonic() - self._seeded_at < ACTIVITY_RESEED_SECONDS:
+            return
+        if not self._seed_lock.acquire(blocking=self._seeded_at == 0):
+            return
+        try:
+            if time.monotonic() - self._seeded_at < ACTIVITY_RESEED_SECONDS:
+                return
+            self._seed(connect)
+            self._seeded_at = time.monotonic()
+        finally:
+            self._seed_lock.release()
+
+    def _seed(self, connect):
+        conn = connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(CASE WHEN jsonb_typeof(capabilities::jsonb) = 'array'
+                                      THEN jsonb_array_length(capabilities::jsonb) END), 0)
+                FROM agents
+            """)
+            total_agents, total_capabilities = cur.fetchone()
+
+            cur.execute("""
+                SELECT category, COUNT(*)
+                FROM agents, jsonb_array_elements_text(categories::jsonb) AS category
+                WHERE categories IS NOT NULL AND jsonb_typeof(categories::jsonb) = 'array'
+                GROUP BY category
+            """)
+            category_counts = Counter(dict(cur.fetchall()))
+
+            cur.execute("""
+                SELECT created_at FROM agents
+                WHERE created_at >= NOW() - INTERVAL '24 hours'
+                ORDER BY created_at
+            """)
+            agent_times = deque(row[0] for row in cur.fetchall())
+
+            recent_agents = []
+            if self._seeded_at == 0:
+                cur.execute("""
+                    SELECT name, capabilities, created_at, estimated_value
+                    FROM agents
+                    WHERE created_at >= NOW() - INTERVAL '12 hours'
+                    ORDER BY created_at DESC
+                    LIMIT %s
+                """, (self._events.maxlen,))
+                recent_agents = cur.fetchall()
+            cur.close()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.total_agents = total_agents
+            self.total_capabilities = int(total_capabilities)
+            self.category_counts = category_counts
+            self._agent_times = agent_times
+
+        # First seed: backfill the buffer so /recent is populated after a restart
+        for name, capabilities, created_at, estimated_value in reversed(recent_agents):
+            self.publish("discovery", **_discovery_payload(
+                name, capabilities, created_at or datetime.utcnow(), estimated_value
+            ))
+
+
+# Process-wide stream shared by publishers and /activity readers
+activity_stream = ActivityStream()
@@ -5,11 +5,15 @@ Agentic Agent Submission Reviewer
 """
 
 import re
+import time
+import asyncio
 import requests
+import httpx
 from datetime import datetime, timedelta
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from urllib.parse import urlparse
-import hashlib
+
+from services.keyword_matcher import KeywordMatcher
 
 
 class AgenticReviewer:
@@ -37,6 +41,9 @@ class AgenticReviewer:
         'limited time offer', 'act now', 'free money'
     ]
     
+    # Substring semantics (like the old per-keyword loop) so "casinos" still counts
+    _spam_matcher = KeywordMatcher({kw: [kw] for kw in SPAM_KEYWORDS}, word_boundaries=False)
+    
     # Trusted domains for auto-approval
     TRUSTED_DOMAINS = [
         'github.com', 'huggingface.co', 'openai.com',
@@ -44,6 +51,11 @@ class AgenticReviewer:
         'modal.com', 'together.ai', 'fireworks.ai'
     ]
     
+    # Batch review settings
+    BATCH_URL_CONCURRENCY = 20  # Parallel HEAD requests
+    BATCH_URL_TIMEOUT = 5
+    BATCH_IN_CHUNK_SIZE = 1000  # Max values per IN (...) lookup
+    
     def __init__(self, db_session):
         self.db = db_session
     
@@ -55,17 +67,36 @@ class AgenticReviewer:
             (should_approve: bool, reason: str, quality_score: int)
         """
         name = submission_data.get('name', '')
-        description = submission_data.get('description', '')
         website = submission_data.get('website', '')
         email = submission_data.get('email', '')
-        api_endpoint = submission_data.get('api_endpoint')
         
-        quality_score = 70  # Base score
-        rejection_reasons = []
-        approval_points = []
+        # 1-2, 6-7. Rate limits, email, spam, duplicates
+        rejection = self._precheck(
+            submission_data,
+            self._check_rate_limits(email, submitter_ip),
+            self._check_duplicates(name, website, email)
+        )
+        if rejection:
+            return rejection
+        
+        # 3-5, 8. Quality scoring
+        return self._score_submission(submission_data, self._validate_url(website))
+    
+    def _precheck(self, submission_data: dict, rate_result: Tuple[bool, str],
+                  duplicate_result: Tuple[bool, str]) -> Optional[Tuple[bool, str, int]]:
+        """
+        Hard rejections that need no network access
+        
+        Returns the (False, reason, 0) decision, or None if the submission
+        should go on to quality scoring.
+        """
+        name = submission_data.get('name', '')
+        description = submission_data.get('description', '')
+        website = submission_data.get('website', '')
+        email = submission_data.get('email', '')
         
         # 1. Rate limiting checks
-        rate_check, rate_reason = self._check_rate_limits(email, submitter_ip)
+        rate_check, rate_reason = rate_result
         if not rate_check:
             return False, f"Rate limit exceeded: {rate_reason}", 0
         
@@ -74,6 +105,30 @@ class AgenticReviewer:
         if not email_valid:
             return False, f"Invalid email: {email_reason}", 0
         
+        # 6. Spam content detection
+        spam_detected, spam_reason = self._detect_spam(name, description, website)
+        if spam_detected:
+            return False, f"Spam detected: {spam_reason}", 0
+        
+        # 7. Duplicate detection
+        duplicate, dup_reason = duplicate_result
+        if duplicate:
+            return False, f"Duplicate submission: {dup_reason}", 0
+        
+        return None
+    
+    def _score_submission(self, submission_data: dict, url_result: Tuple[int, str]) -> Tuple[bool, str, int]:
+        """
+        Quality score + final decision for a submission that passed _precheck
+        """
+        name = submission_data.get('name', '')
+        description = submission_data.get('description', '')
+        api_endpoint = submission_data.get('api_endpoint')
+        
+        quality_score = 70  # Base score
+        rejection_reasons = []
+        approval_points = []
+        
         # 3. Name validation
         name_valid, name_reason = self._validate_name(name)
         if not name_valid:
@@ -91,23 +146,13 @@ class AgenticReviewer:
             approval_points.append(desc_feedback)
         
         # 5. URL validation and trust check
-        url_score, url_feedback = self._validate_url(website)
+        url_score, url_feedback = url_result
         quality_score += url_score
         if url_score < 0:
             rejection_reasons.append(url_feedback)
         else:
             approval_points.append(url_feedback)
         
-        # 6. Spam content detection
-        spam_detected, spam_reason = self._detect_spam(name, description, website)
-        if spam_detected:
-            return False, f"Spam detected: {spam_reason}", 0
-        
-        # 7. Duplicate detection
-        duplicate, dup_reason = self._check_duplicates(name, website, email)
-        if duplicate:
-            return False, f"Duplicate submission: {dup_reason}", 0
-        
         # 8. API endpoint validation (if provided)
         if api_endpoint:
             api_score, api_feedback = self._validate_api_endpoint(api_endpoint)
@@ -225,49 +270,79 @@ class AgenticReviewer:
     
     def _validate_url(self, url: str) -> Tuple[int, str]:
         """Validate and score URL"""
+        score, result = self._check_url_format(url)
+        if result is not None:
+            return result
+        
+        # Try to verify URL is reachable (HEAD request with timeout)
+        try:
+            response = requests.head(url, timeout=5, allow_redirects=True)
+            return self._score_url_probe(score, response.status_code)
+        except:
+            # URL not reachable, but don't fail for this
+            return self._score_url_probe(score, None)
+    
+    async def _validate_url_async(self, url: str, client: httpx.AsyncClient,
+                                  semaphore: asyncio.Semaphore) -> Tuple[int, str]:
+        """Same scoring as _validate_url, probing on a shared async client"""
+        score, result = self._check_url_format(url)
+        if result is not None:
+            return result
+        
+        async with semaphore:
+            try:
+                response = await client.head(url, follow_redirects=True)
+                return self._score_url_probe(score, response.status_code)
+            except Exception:
+                return self._score_url_probe(score, None)
+    
+    def _check_url_format(self, url: str) -> Tuple[int, Optional[Tuple[int, str]]]:
+        """
+        Offline part of URL validation
+        
+        Returns (partial_score, final_result). final_result is set when no
+        reachability probe is needed (invalid format or trusted domain).
+        """
         score = 0
         
         try:
             parsed = urlparse(url)
             
             if not parsed.scheme or not parsed.netloc:
-                return -30, "Invalid URL format"
+                return score, (-30, "Invalid URL format")
             
             # Check if domain is trusted
             domain = parsed.netloc.lower()
             for trusted in self.TRUSTED_DOMAINS:
                 if trusted in domain:
                     score += 20
-                    return score, f"Trusted domain: {trusted}"
+                    return score, (score, f"Trusted domain: {trusted}")
             
             # Check for proper TLD
             if domain.endswith(('.com', '.org', '.io', '.ai', '.dev', '.co')):
                 score += 5
-            
-            # Try to verify URL is reachable (HEAD request with timeout)
-            try:
-                response = requests.head(url, timeout=5, allow_redirects=True)
-                if response.status_code < 400:
-                    score += 10
-                    return score, "URL is reachable"
-                else:
-                    return -10, f"URL returned {response.status_code}"
-            except:
-                # URL not reachable, but don't fail for this
-                return 0, "URL format OK (not verified)"
         
         except Exception as e:
-            return -20, f"URL validation error: {str(e)[:50]}"
+            return score, (-20, f"URL validation error: {str(e)[:50]}")
         
-        return score, "URL validated"
+        return score, None
+    
+    def _score_url_probe(self, score: int, status_code: Optional[int]) -> Tuple[int, str]:
+        """Score a reachability probe (status_code None = unreachable)"""
+        if status_code is None:
+            # URL not reachable, but don't fail for this
+            return 0, "URL format OK (not verified)"
+        if status_code < 400:
+            return score + 10, "URL is reachable"
+        return -10, f"URL returned {status_code}"
     
     def _detect_spam(self, name: str, description: str, url: str) -> Tuple[bool, str]:
         """Detect spam content"""
         combined_text = f"{name} {description} {url}".lower()
         
-        for keyword in self.SPAM_KEYWORDS:
-            if keyword.lower() in combined_text:
-                return True, f"Spam keyword detected: '{keyword}'"
+        keyword = self._spam_matcher.first(combined_text)
+        if keyword:
+            return True, f"Spam keyword detected: '{keyword}'"
         
         # Check for excessive links in description
         link_count = description.lower().count('http://') + description.lower().count('https://')
@@ -283,10 +358,11 @@ class AgenticReviewer:
     def _check_duplicates(self, name: str, url: str, email: str) -> Tuple[bool, str]:
         """Check for duplicate submissions"""
         from models.agent import Agent
+        from sqlalchemy import func
         
-        # Check for exact name match
+        # Check for exact name match (case-insensitive, same key as review_batch)
         existing_name = self.db.query(Agent).filter(
-            Agent.name.ilike(name)
+            func.lower(Agent.name) == name.strip().lower()
         ).first()
         
         if existing_name:
@@ -300,16 +376,6 @@ class AgenticReviewer:
         if existing_url:
             return True, f"Agent with URL '{url}' already exists"
         
-        # Check for very similar names (Levenshtein distance would be better)
-        name_hash = hashlib.md5(name.lower().strip().encode()).hexdigest()
-        similar = self.db.query(Agent).filter(
-            Agent.name.ilike(f"%{name[:10]}%")
-        ).first()
-        
-        if similar and similar.name.lower().strip() != name.lower().strip():
-            # Similar name exists, but allow if sufficiently different
-            pass
-        
         return False, ""
     
     def _validate_api_endpoint(self, api_endpoint: str) -> Tuple[int, str]:
@@ -336,3 +402,160 @@ class AgenticReviewer:
             return 0, "API endpoint validation skipped"
         
         return score, "API endpoint OK"
+    
+    # ==========================================
+    # Batch Review
+    # ==========================================
+    
+    async def review_batch(self, submissions: List[dict],
+                           concurrency: int = BATCH_URL_CONCURRENCY) -> Dict:
+        """
+        Review many submissions in one pass
+        
+        Same decisions as review_submission, but:
+        - Rate limits and duplicates come from a few set-based queries
+          instead of several single-row queries per submission
+        - Duplicates within the batch are caught (first submission wins)
+        - URLs are probed concurrently (bounded by `concurrency`), and only
+          for submissions that survive the offline checks
+        
+        Submissions may carry an 'id' (already stored in agents, e.g. pending
+        review) - those rows are excluded from their own duplicate/rate checks.
+        Submissions are processed in list order.
+        
+        Returns:
+            {"results": [{"id", "name", "approved", "reason", "quality_score"}],
+             "timings_ms": {stage: ms}}
+        """
+        timings = {}
+        
+        # Index queries are blocking ORM calls - keep them off the event loop
+        stage_start = time.perf_counter()
+        batch_ids = {str(s['id']) for s in submissions if s.get('id')}
+        email_counts = await asyncio.to_thread(
+            self._load_recent_email_counts, {s.get('email', '') for s in submissions}, batch_ids
+        )
+        timings['rate_limit_index'] = self._elapsed_ms(stage_start)
+        
+        stage_start = time.perf_counter()
+        existing_names, existing_urls = await asyncio.to_thread(
+            self._load_duplicate_index, submissions, batch_ids
+        )
+        timings['duplicate_index'] = self._elapsed_ms(stage_start)
+        
+        # Offline checks - in order, so earlier batch entries count toward
+        # rate limits and duplicates of later ones
+        stage_start = time.perf_counter()
+        decisions: List[Optional[Tuple[bool, str, int]]] = []
+        for submission in submissions:
+            name = submission.get('name', '')
+            email = submission.get('email', '')
+            website = submission.get('website', '')
+            name_key = name.strip().lower()
+            
+            submitted = email_counts.get(email, 0)
+            if submitted >= self.MAX_SUBMISSIONS_PER_EMAIL_PER_DAY:
+                rate_result = (False, f"{submitted} submissions in 24 hours (max {self.MAX_SUBMISSIONS_PER_EMAIL_PER_DAY})")
+            else:
+                rate_result = (True, "Rate limit OK")
+            
+            if name_key in existing_names:
+                duplicate_result = (True, f"Agent with name '{name}' already exists")
+            elif website and website in existing_urls:
+                duplicate_result = (True, f"Agent with URL '{website}' already exists")
+            else:
+                duplicate_result = (False, "")
+            
+            rejection = self._precheck(submission, rate_result, duplicate_result)
+            decisions.append(rejection)
+            
+            # Later entries see this one as existing
+            email_counts[email] = submitted + 1
+            if rejection is None:
+                existing_names.add(name_key)
+                if website:
+                    existing_urls.add(website)
+        timings['offline_checks'] = self._elapsed_ms(stage_start)
+        
+        # Concurrent URL probes for the survivors
+        stage_start = time.perf_counter()
+        pending = [i for i, d in enumerate(decisions) if d is None]
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        async with httpx.AsyncClient(
+            timeout=self.BATCH_URL_TIMEOUT,
+            limits=httpx.Limits(max_connections=max(1, concurrency))
+        ) as client:
+            url_results = await asyncio.gather(*[
+                self._validate_url_async(submissions[i].get('website', ''), client, semaphore)
+                for i in pending
+            ])
+        timings['url_validation'] = self._elapsed_ms(stage_start)
+        
+        stage_start = time.perf_counter()
+        for i, url_result in zip(pending, url_results):
+            decisions[i] = self._score_submission(submissions[i], url_result)
+        timings['scoring'] = self._elapsed_ms(stage_start)
+        
+        results = []
+        for submission, (approved, reason, quality_score) in zip(submissions, decisions):
+            results.append({
+                'id': str(submission['id']) if submission.get('id') else None,
+                'name': submission.get('name', ''),
+                'approved': approved,
+                'reason': reason,
+                'quality_score': quality_score
+            })
+        
+        return {'results': results, 'timings_ms': timings}
+    
+    def _load_recent_email_counts(self, emails: set, exclude_ids: set) -> Dict[str, int]:
+        """Web-form submissions per email in the last 24h (one query per chunk)"""
+        from models.agent import Agent
+        
+        one_day_ago = datetime.utcnow() - timedelta(days=1)
+        counts: Dict[str, int] = {}
+        
+        for chunk in self._chunks([e for e in emails if e]):
+            rows = self.db.query(Agent.id, Agent.owner_email).filter(
+                Agent.owner_email.in_(chunk),
+                Agent.created_at >= one_day_ago,
+                Agent.submission_source == 'web_form'
+            ).all()
+            for agent_id, email in rows:
+                if str(agent_id) not in exclude_ids:
+                    counts[email] = counts.get(email, 0) + 1
+        
+        return counts
+    
+    def _load_duplicate_index(self, submissions: List[dict], exclude_ids: set) -> Tuple[set, set]:
+        """Lower-cased names and source URLs of existing agents that collide with the batch"""
+        from models.agent import Agent
+        from sqlalchemy import func
+        
+        names = list({s.get('name', '').strip().lower() for s in submissions if s.get('name')})
+        urls = list({s.get('website') for s in submissions if s.get('website')})
+        
+        existing_names = set()
+        existing_urls = set()
+        
+        for chunk in self._chunks(names):
+            rows = self.db.query(Agent.id, func.lower(Agent.name)).filter(
+                func.lower(Agent.name).in_(chunk)
+            ).all()
+            existing_names.update(n for agent_id, n in rows if str(agent_id) not in exclude_ids)
+        
+        for chunk in self._chunks(urls):
+            rows = self.db.query(Agent.id, Agent.source_url).filter(
+                Agent.source_url.in_(chunk)
+            ).all()
+            existing_urls.update(u for agent_id, u in rows if str(agent_id) not in exclude_ids)
+        
+        return existing_names, existing_urls
+    
+    def _chunks(self, values: list):
+        for i in range(0, len(values), self.BATCH_IN_CHUNK_SIZE):
+            yield values[i:i + self.BATCH_IN_CHUNK_SIZE]
+    
+    @staticmethod
+    def _elapsed_ms(start: float) -> int:
+        return int((time.perf_counter() - start) * 1000)
@@ -1,8 +1,11 @@
 """
 Automated Arbitrage Fulfillment System
 Auto-purchase from source platforms and forward to buyers
+
+Runs inside fulfillment queue workers (services/fulfillment_queue.py), never
+inline in an API request.
 """
-import requests
+import httpx
 import json
 import os
 from typing import Dict, Optional, List
@@ -11,6 +14,7 @@ from enum import Enum
 import asyncio
 from urllib.parse import urlparse, urljoin
 
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from models.transaction import Transaction, TransactionStatus
 from models.listing import Listing
@@ -20,7 +24,9 @@ from payments.stripe_handler import stripe_handler
 class FulfillmentStatus(str, Enum):
     """Fulfillment status stages"""
     PENDING = "pending"
+    QUEUED = "queued"
     PURCHASING = "purchasing"
+    RETRYING = "retrying"
     PURCHASED = "purchased"
     DELIVERING = "delivering"
     DELIVERED = "delivered"
@@ -40,17 +46,16 @@ class ArbitrageFulfillmentEngine:
     5. Profit retained
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, http_client: Optional[httpx.AsyncClient] = None):
         self.db = db
         
+        # Shared async HTTP client (owned by the queue worker); one-off client if not given
+        self.http_client = http_client
+        
         # Platform API credentials
         self.rapidapi_key = os.getenv('RAPIDAPI_KEY')
         self.huggingface_token = os.getenv('HUGGINGFACE_TOKEN')
         
-        # Manual fulfillment tracking
-        self.manual_queue_file = 'data/manual_fulfillment_queue.jsonl'
-        self.fulfillment_log_file = 'data/fulfillment_log.jsonl'
-        
         # Platform handlers
         self.handlers = {
             'rapidapi': self.fulfill_rapidapi,
@@ -65,9 +70,13 @@ class ArbitrageFulfillmentEngine:
     # Main Fulfillment Flow
     # ==========================================
     
-    async def process_transaction(self, transaction_id: str) -> Dict:
+    async def process_transaction(self, transaction_id: str, allow_retry: bool = False) -> Dict:
         """
         Main entry point - process arbitrage transaction
+        
+        With allow_retry=True, transient failures (timeouts, 5xx, 429) return
+        {'retry': True} without refunding so the queue can try again later.
+        The final attempt runs with allow_retry=False and refunds on failure.
         """
         print(f"\n{'='*50}")
         print(f"Processing Arbitrage Transaction: {transaction_id}")
@@ -134,11 +143,15 @@ class ArbitrageFulfillmentEngine:
                 print(f"\n[OK] Transaction {transaction_id} completed successfully")
                 
                 return result
+            elif allow_retry and result.get('retry'):
+                return self.mark_for_retry(transaction, result)
             else:
                 # Handle failure
                 return await self.handle_fulfillment_failure(transaction, result)
         
         except Exception as e:
+            if allow_retry:
+                return self.mark_for_retry(transaction, {'success': False, 'error': str(e), 'retry': True})
             return await self.handle_fulfillment_failure(
                 transaction,
                 {'success': False, 'error': str(e)}
@@ -178,9 +191,9 @@ class ArbitrageFulfillmentEngine:
         
         try:
             if api_method.upper() == 'POST':
-                response = requests.post(api_endpoint, json=buyer_input, headers=headers, timeout=30)
+                response = await self.http_request('POST', api_endpoint, json=buyer_input, headers=headers, timeout=30)
             else:
-                response = requests.get(api_endpoint, params=buyer_input, headers=headers, timeout=30)
+                response = await self.http_request('GET', api_endpoint, params=buyer_input, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 result_data = response.json()
@@ -201,13 +214,14 @@ class ArbitrageFulfillmentEngine:
                 return {
                     'success': False,
                     'error': f'RapidAPI error: {response.status_code}',
-                    'details': response.text
+                    'details': response.text,
+                    'retry': is_retryable_status(response.status_code)
                 }
         
-        except requests.exceptions.Timeout:
-            return {'success': False, 'error': 'RapidAPI call timeout'}
+        except httpx.TimeoutException:
+            return {'success': False, 'error': 'RapidAPI call timeout', 'retry': True}
         except Exception as e:
-            return {'success': False, 'error': f'RapidAPI exception: {str(e)}'}
+            return {'success': False, 'error': f'RapidAPI exception: {str(e)}', 'retry': True}
     
     async def fulfill_huggingface(self, transaction: Transaction, listing: Listing) -> Dict:
         """
@@ -232,7 +246,7 @@ class ArbitrageFulfillmentEngine:
             # HF Spaces expect data wrapped in 'data' array
             payload = {'data': [buyer_input]}
             
-            response = requests.post(api_url, json=payload, headers=headers, timeout=60)
+            response = await self.http_request('POST', api_url, json=payload, headers=headers, timeout=60)
             
             if response.status_code == 200:
                 result_data = response.json()
@@ -251,11 +265,12 @@ class ArbitrageFulfillmentEngine:
             else:
                 return {
                     'success': False,
-                    'error': f'Hugging Face error: {response.status_code}'
+                    'error': f'Hugging Face error: {response.status_code}',
+                    'retry': is_retryable_status(response.status_code)
                 }
         
         except Exception as e:
-            return {'success': False, 'error': f'HF exception: {str(e)}'}
+            return {'success': False, 'error': f'HF exception: {str(e)}', 'retry': True}
     
     async def fulfill_github(self, transaction: Transaction, listing: Listing) -> Dict:
         """
@@ -295,7 +310,7 @@ class ArbitrageFulfillmentEngine:
             return await self.fulfill_manual(transaction, listing)
         
         try:
-            response = requests.post(api_endpoint, json=buyer_input, timeout=30)
+            response = await self.http_request('POST', api_endpoint, json=buyer_input, timeout=30)
             
             if response.status_code == 200:
                 return {
@@ -352,18 +367,30 @@ class ArbitrageFulfillmentEngine:
             'instructions': self.generate_manual_instructions(listing)
         }
         
-        # Save to manual queue
-        os.makedirs('data', exist_ok=True)
-        with open(self.manual_queue_file, 'a') as f:
-            f.write(json.dumps(manual_task) + '\n')
+        # Save to manual queue (idempotent - a retried job does not duplicate the task)
+        self.db.execute(
+            text("""
+                INSERT INTO manual_fulfillment_tasks (
+                    transaction_id, buyer_agent_id, listing_id, service_name,
+                    source_platform, source_url, source_price, buyer_paid,
+                    buyer_input, instructions, status
+                )
+                VALUES (
+                    :transaction_id, :buyer_agent_id, :listing_id, :service_name,
+                    :source_platform, :source_url, :source_price, :buyer_paid,
+                    CAST(:buyer_input AS JSONB), :instructions, :status
+                )
+                ON CONFLICT (transaction_id) DO NOTHING
+            """),
+            {**manual_task, 'buyer_input': json.dumps(manual_task['buyer_input'])}
+        )
         
         # Update transaction
         transaction.metadata['fulfillment_status'] = 'pending_manual'
         transaction.metadata['manual_task_queued_at'] = datetime.utcnow().isoformat()
         self.db.commit()
         
-        print(f"[OK] Task queued for manual fulfillment")
-        print(f"Queue: {self.manual_queue_file}\n")
+        print(f"[OK] Task queued for manual fulfillment\n")
         
         return {
             'success': True,
@@ -435,6 +462,21 @@ DO NOT exceed budget of ${price:.2f}
     # Error Handling
     # ==========================================
     
+    def mark_for_retry(self, transaction: Transaction, error_result: Dict) -> Dict:
+        """
+        Record a transient failure - the queue worker will retry with backoff
+        """
+        print(f"\n[RETRY] Fulfillment attempt failed: {error_result.get('error')}\n")
+        
+        transaction.metadata['fulfillment_status'] = FulfillmentStatus.RETRYING
+        transaction.metadata['last_fulfillment_error'] = error_result.get('error')
+        transaction.metadata['last_attempt_at'] = datetime.utcnow().isoformat()
+        self.db.commit()
+        
+        self.log_fulfillment(str(transaction.id), 'retrying', error_result)
+        
+        return {**error_result, 'success': False, 'retry': True}
+    
     async def handle_fulfillment_failure(self, transaction: Transaction, error_result: Dict) -> Dict:
         """
         Handle fulfillment failure - potentially refund buyer
@@ -452,7 +494,7 @@ DO NOT exceed budget of ${price:.2f}
             
             # Refund via Stripe
             try:
-                import stripe
+                from payments.stripe_handler import stripe
                 refund = stripe.Refund.create(
                     payment_intent=transaction.stripe_payment_intent_id,
                     reason='failed_fulfillment'
@@ -484,6 +526,16 @@ DO NOT exceed budget of ${price:.2f}
     # Helpers
     # ==========================================
     
+    async def http_request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Non-blocking HTTP call on the worker's shared client
+        """
+        if self.http_client is not None:
+            return await self.http_client.request(method, url, **kwargs)
+        
+        async with httpx.AsyncClient() as client:
+            return await client.request(method, url, **kwargs)
+    
     def construct_hf_api_url(self, space_url: str) -> str:
         """
         Convert Hugging Face Space URL to API endpoint
@@ -504,16 +556,18 @@ DO NOT exceed budget of ${price:.2f}
         """
         Log fulfillment event for analytics
         """
-        log_entry = {
-            'transaction_id': transaction_id,
-            'timestamp': datetime.utcnow().isoformat(),
-            'status': status,
-            'details': details
-        }
-        
-        os.makedirs('data', exist_ok=True)
-        with open(self.fulfillment_log_file, 'a') as f:
-            f.write(json.dumps(log_entry) + '\n')
+        self.db.execute(
+            text("""
+                INSERT INTO fulfillment_log (transaction_id, status, details)
+                VALUES (:transaction_id, :status, CAST(:details AS JSONB))
+            """),
+            {
+                'transaction_id': transaction_id,
+                'status': status,
+                'details': json.dumps(details, default=str)
+            }
+        )
+        self.db.commit()
     
     # ==========================================
     # Manual Queue Management
@@ -523,16 +577,22 @@ DO NOT exceed budget of ${price:.2f}
         """
         Get all pending manual fulfillment tasks
         """
-        if not os.path.exists(self.manual_queue_file):
-            return []
+        rows = self.db.execute(
+            text("""
+                SELECT transaction_id, buyer_agent_id, listing_id, service_name,
+                       source_platform, source_url, source_price, buyer_paid,
+                       buyer_input, instructions, status, created_at
+                FROM manual_fulfillment_tasks
+                WHERE status = 'pending_human_action'
+                ORDER BY created_at
+            """)
+        ).mappings().all()
         
         tasks = []
-        with open(self.manual_queue_file, 'r') as f:
-            for line in f:
-                if line.strip():
-                    task = json.loads(line)
-                    if task.get('status') == 'pending_human_action':
-                        tasks.append(task)
+        for row in rows:
+            task = dict(row)
+            task['created_at'] = task['created_at'].isoformat() if task['created_at'] else None
+            tasks.append(task)
         
         return tasks
     
@@ -554,32 +614,35 @@ DO NOT exceed budget of ${price:.2f}
         transaction.metadata['delivery'] = delivery_data
         self.db.commit()
         
-        # Remove from queue (rewrite file without this task)
-        self.remove_from_manual_queue(transaction_id)
+        # Remove from queue
+        self.remove_from_manual_queue(transaction_id, delivery_data)
         
         # Log success
         self.log_fulfillment(transaction_id, 'manual_complete', delivery_data)
         
         return {'success': True, 'completed': True}
     
-    def remove_from_manual_queue(self, transaction_id: str):
-        """
-        Remove task from manual queue
-        """
-        if not os.path.exists(self.manual_queue_file):
-            return
-        
-        tasks = []
-        with open(self.manual_queue_file, 'r') as f:
-            for line in f:
-                if line.strip():
-                    task = json.loads(line)
-                    if task.get('transaction_id') != transaction_id:
-                        tasks.append(task)
-        
-        with open(self.manual_queue_file, 'w') as f:
-            for task in tasks:
-                f.write(json.dumps(task) + '\n')
+    def remove_from_manual_queue(self, transaction_id: str, delivery_data: Optional[Dict] = None):
+        """
+        Remove task from manual queue (kept as completed for history)
+        """
+        self.db.execute(
+            text("""
+                UPDATE manual_fulfillment_tasks
+                SET status = 'completed', delivery = CAST(:delivery AS JSONB), completed_at = NOW()
+                WHERE transaction_id = :transaction_id AND status = 'pending_human_action'
+            """),
+            {
+                'transaction_id': transaction_id,
+                'delivery': json.dumps(delivery_data, default=str) if delivery_data else None
+            }
+        )
+        self.db.commit()
+
+
+def is_retryable_status(status_code: int) -> bool:
+    """Rate limits and server errors are worth retrying; other 4xx are not"""
+    return status_code == 429 or status_code >= 500
 
 
 # ==========================================
@@ -0,0 +1,226 @@
+"""
+Category Tagger
+Assigns primary_use_case and use_case_tags from agent name/description
+
+Used by the auto-tagging batch job (auto_tag_agents.py) and at ingest time.
+Both paths also maintain agent_category_members (migration 012), which the
+category pages read instead of matching primary_use_case with ILIKE.
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from services.keyword_matcher import KeywordMatcher
+
+
+# Category keyword mapping (from TOP_100_AGENT_SEARCH_TERMS.md)
+CATEGORY_KEYWORDS = {
+    'agents-for-customer-support': ['customer support', 'support ticket', 'helpdesk', 'customer service', 'help desk'],
+    'agents-for-coding': ['code', 'coding', 'programming', 'developer', 'development', 'software engineer'],
+    'agents-for-lead-generation': ['lead generation', 'lead gen', 'prospecting', 'sales leads', 'lead qualify'],
+    'agents-for-content-writing': ['content writing', 'content creator', 'blog writing', 'article writing', 'writer'],
+    'agents-for-data-analysis': ['data analysis', 'data analytics', 'data scientist', 'analytics', 'analyze data'],
+    'agents-for-workflow-automation': ['workflow automation', 'process automation', 'automate workflow', 'business automation'],
+    'agents-for-social-media-posts': ['social media', 'social post', 'instagram', 'twitter', 'facebook', 'tiktok'],
+    'agents-for-email-marketing': ['email marketing', 'email campaign', 'marketing email', 'newsletter'],
+    'agents-for-blog-writing': ['blog', 'blogger', 'blog post', 'blog article'],
+    'agents-for-live-chat': ['live chat', 'chat support', 'real-time chat', 'chatbot'],
+    'agents-for-market-research': ['market research', 'market analysis', 'competitive intelligence', 'market insight'],
+    'agents-for-copywriting': ['copywriting', 'copywriter', 'sales copy', 'ad copy', 'marketing copy'],
+    'agents-for-sales-automation': ['sales automation', 'sales workflow', 'automate sales', 'sales process'],
+    'agents-for-web-scraping': ['web scraping', 'scraping', 'data scraping', 'web crawler', 'scraper'],
+    'agents-for-chatbot': ['chatbot', 'chat bot', 'conversational ai', 'chat assistant'],
+    'agents-for-virtual-assistant': ['virtual assistant', 'va', 'personal assistant', 'executive assistant'],
+    'agents-for-marketing-automation': ['marketing automation', 'automate marketing', 'marketing workflow'],
+    'agents-for-seo-content': ['seo', 'search engine optimization', 'seo content', 'seo writing', 'organic search'],
+    'agents-for-research': ['research', 'researcher', 'research assistant', 'data gathering'],
+    'agents-for-testing': ['testing', 'qa', 'quality assurance', 'test automation', 'software testing'],
+    'agents-for-task-management': ['task management', 'task manager', 'to-do', 'task tracking'],
+    'agents-for-image-generation': ['image generation', 'generate image', 'image creator', 'ai art', 'image ai'],
+    'agents-for-competitive-analysis': ['competitive analysis', 'competitor research', 'competition analysis'],
+    'agents-for-helpdesk': ['helpdesk', 'help desk', 'support desk', 'ticket system'],
+    'agents-for-debugging': ['debugging', 'debug', 'bug fixing', 'troubleshooting'],
+    'agents-for-scheduling': ['scheduling', 'calendar', 'appointment', 'meeting scheduler'],
+    'agents-for-email-copywriting': ['email copy', 'email writing', 'email template'],
+    'agents-for-graphic-design': ['graphic design', 'designer', 'visual design', 'graphics'],
+    'agents-for-project-management': ['project management', 'project manager', 'pm', 'project tracking'],
+    'agents-for-cold-outreach': ['cold outreach', 'cold email', 'cold calling', 'outbound sales'],
+    'agents-for-product-descriptions': ['product description', 'product copy', 'ecommerce copy'],
+    'agents-for-video-editing': ['video editing', 'video editor', 'video production', 'video post-production'],
+    'agents-for-ad-copy': ['ad copy', 'advertising', 'ppc', 'google ads', 'facebook ads'],
+    'agents-for-data-entry': ['data entry', 'data input', 'data processing'],
+    'agents-for-video-scripts': ['video script', 'script writing', 'screenplay', 'storyboard'],
+    'agents-for-python-coding': ['python', 'python developer', 'python programming', 'python code'],
+    'agents-for-financial-analysis': ['financial analysis', 'finance', 'financial data', 'fintech'],
+    'agents-for-linkedin-posts': ['linkedin post', 'linkedin content', 'linkedin'],
+    'agents-for-linkedin-outreach': ['linkedin outreach', 'linkedin prospecting', 'linkedin sales'],
+    'agents-for-meeting-notes': ['meeting notes', 'note taking', 'meeting summary', 'transcription'],
+    'agents-for-photo-editing': ['photo editing', 'photo editor', 'image editing', 'photoshop'],
+    'agents-for-technical-writing': ['technical writing', 'technical documentation', 'technical writer'],
+    'agents-for-javascript-coding': ['javascript', 'js', 'typescript', 'react', 'node.js'],
+    'agents-for-code-review': ['code review', 'code audit', 'peer review', 'code quality'],
+    'agents-for-bookkeeping': ['bookkeeping', 'accounting', 'quickbooks', 'financial records'],
+}
+
+# Compiled once per process - one regex pass per agent instead of one
+# substring search per keyword
+_category_matcher = KeywordMatcher(CATEGORY_KEYWORDS, word_boundaries=True)
+
+
+def find_matching_categories(agent_name: Optional[str], agent_description: Optional[str]) -> Tuple[Optional[str], List[str]]:
+    """
+    Find all matching categories based on keywords in name/description
+    Returns: (primary_use_case, [use_case_tags])
+    """
+    matches = _category_matcher.match(f"{agent_name or ''} {agent_description or ''}")
+    
+    if not matches:
+        return None, []
+    
+    # Primary = first match (mapping order), tags = all matches
+    return matches[0], matches
+
+
+# Rebuild memberships for a set of agents from their use_case_tags; only slugs
+# present in agent_categories become members (FK)
+_MEMBERSHIP_DELETE_SQL = "DELETE FROM agent_category_members WHERE agent_id = {id_expr}"
+_MEMBERSHIP_INSERT_SQL = """
+    INSERT INTO agent_category_members (category_slug, agent_id, is_primary)
+    SELECT ac.slug, a.id, ac.slug = a.primary_use_case
+    FROM agents a
+    JOIN agent_categories ac ON ac.slug = ANY(a.use_case_tags)
+    WHERE a.id = {id_expr}
+    ON CONFLICT DO NOTHING
+"""
+
+REFRESH_COUNTS_SQL = "SELECT refresh_category_counts()"
+
+
+def tag_agents(db, agents: Iterable[Tuple[str, Optional[str], Optional[str]]]) -> int:
+    """
+    Tag newly ingested agents inside an ORM session (caller commits)
+    
+    Sets primary_use_case/use_case_tags and rewrites category memberships.
+    Cached category counts are refreshed lazily by the categories endpoint.
+    
+    Args:
+        db: SQLAlchemy session; agents must already be flushed/committed
+        agents: (agent_id, name, description) tuples
+    
+    Returns:
+        Number of agents that matched at least one category
+    """
+    params = []
+    for agent_id, name, description in agents:
+        primary, tags = find_matching_categories(name, description)
+        if primary:
+            params.append({"agent_id": str(agent_id), "primary": primary, "tags": tags})
+    
+    if not params:
+        return 0
+    
+    db.execute(text("""
+        UPDATE agents
+        SET primary_use_case = :primary, use_case_tags = :tags
+        WHERE id = :agent_id
+    """), params)
+    db.execute(text(_MEMBERSHIP_DELETE_SQL.format(id_expr=":agent_id")), params)
+    db.execute(text(_MEMBERSHIP_INSERT_SQL.format(id_expr=":agent_id")), params)
+    return len(params)
+
+
+def tag_agents_streaming(conn, where_sql: str = "TRUE", batch_size: int = 1000,
+                         progress=None) -> dict:
+    """
+    Tag agents as a streaming batch job over a raw psycopg2 connection
+    
+    Reads agents through a server-side cursor (flat memory for any table
+    size), matches each batch in-process, and writes only rows whose tags
+    changed with one UPDATE ... FROM (VALUES ...) per batch.
+    
+    Args:
+        conn: psycopg2 connection (committed per batch)
+        where_sql: trusted SQL filter on agents (e.g. "status = 'VERIFIED'")
+        batch_size: rows per fetch/update
+        progress: optional callback(stats_dict) after each batch
+    
+    Returns:
+        {"scanned", "tagged", "updated", "unmatched"}
+    """
+    from psycopg2.extras import execute_values
+    
+    stats = {"scanned": 0, "tagged": 0, "updated": 0, "unmatched": 0}
+    
+    # agents.id is VARCHAR in some deployments and UUID in others
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+            WHERE attrelid = 'agents'::regclass AND attname = 'id'
+        """)
+        id_type = cur.fetchone()[0]
+    
+    read_cur = conn.cursor(name="auto_tag_agents_stream", withhold=True)
+    read_cur.itersize = batch_size
+    read_cur.execute(f"""
+        SELECT id, name, description, primary_use_case, use_case_tags
+        FROM agents
+        WHERE {where_sql}
+        ORDER BY id
+    """)
+    
+    try:
+        while True:
+            rows = read_cur.fetchmany(batch_size)
+            if not rows:
+                break
+            
+            updates = []
+            for agent_id, name, description, existing_primary, existing_tags in rows:
+                stats["scanned"] += 1
+                primary, tags = find_matching_categories(name, description)
+                if not primary:
+                    stats["unmatched"] += 1
+                    continue
+                stats["tagged"] += 1
+                if primary != existing_primary or list(existing_tags or []) != tags:
+                    updates.append((str(agent_id), primary, tags))
+            
+            if updates:
+                with conn.cursor() as write_cur:
+                    execute_values(
+                        write_cur,
+                        f"""
+                        UPDATE agents AS a
+                        SET primary_use_case = v.primary_use_case,
+                            use_case_tags = v.use_case_tags
+                        FROM (VALUES %s) AS v(id, primary_use_case, use_case_tags)
+                        WHERE a.id = v.id::{id_type}
+                        """,
+                        updates,
+                        template="(%s, %s, %s::text[])",
+                        page_size=batch_size
+                    )
+                    changed_ids = [(agent_id,) for agent_id, _, _ in updates]
+                    for sql in (_MEMBERSHIP_DELETE_SQL, _MEMBERSHIP_INSERT_SQL):
+                        execute_values(
+                            write_cur,
+                            sql.format(id_expr=f"ANY(ARRAY[%s]::{id_type}[])"),
+                            changed_ids,
+                            template="%s",
+                            page_size=batch_size
+                        )
+                conn.commit()
+                stats["updated"] += len(updates)
+            
+            if progress:
+                progress(dict(stats))
+    finally:
+        read_cur.close()
+        conn.commit()
+    
+    with conn.cursor() as cur:
+        cur.execute(REFRESH_COUNTS_SQL)
+    conn.commit()
+    
+    return stats
@@ -0,0 +1,238 @@
+"""
+Challenge Store
+Pending wallet-auth challenges, shared by every worker that can verify them
+
+Backends (WALLET_CHALLENGE_BACKEND):
+- memory: per-process dict + expiry heap; a background thread sweeps
+  expired entries and the store is capped at WALLET_CHALLENGE_MAX_ENTRIES.
+  Only correct with a single worker.
+- postgres: UNLOGGED table wallet_auth_challenges (migration 017); any
+  worker can verify a challenge another issued. Expired rows are swept
+  in the background.
+- redis: keys with a TTL (uses REDIS_URL); Redis expires them itself
+
+Every backend has the same interface:
+    put(wallet_address, entry, ttl)   - entry: {"challenge", "challenge_text", "expires_at"}
+    get(wallet_address) -> entry | None
+    delete(wallet_address, challenge) -> bool
+                                      - True for exactly one concurrent caller (single use);
+                                        only removes the entry if it still holds that
+                                        challenge hash, so a re-issued one survives
+    sweep() -> int                    - expired entries removed
+    size() -> int                     - -1 when not tracked
+"""
+
+from typing import Dict, Optional
+import heapq
+import json
+import os
+import threading
+import time
+
+
+# ============================================================================
+# CHALLENGE STORE CONFIGURATION
+# ============================================================================
+
+WALLET_CHALLENGE_BACKEND = os.getenv("WALLET_CHALLENGE_BACKEND", "memory")  # memory | postgres | redis
+WALLET_CHALLENGE_TTL_SECONDS = int(os.getenv("WALLET_CHALLENGE_TTL_SECONDS", "60"))
+WALLET_CHALLENGE_MAX_ENTRIES = int(os.getenv("WALLET_CHALLENGE_MAX_ENTRIES", "100000"))  # memory backend bound
+WALLET_CHALLENGE_SWEEP_INTERVAL_SECONDS = float(os.getenv("WALLET_CHALLENGE_SWEEP_INTERVAL_SECONDS", "30"))
+WALLET_CHALLENGE_KEY_PREFIX = os.getenv("WALLET_CHALLENGE_KEY_PREFIX", "wac:")
+REDIS_URL = os.getenv("REDIS_URL")
+
+
+class MemoryChallengeStore:
+    """Per-process store; a min-heap of expiry times makes each sweep O(expired · log n)"""
+
+    def __init__(self, max_entries: int = WALLET_CHALLENGE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: Dict[str, dict] = {}
+        self._expiry_heap = []  # (expires_at, wallet_address); stale after re-issue
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def put(self, wallet_address: str, entry: dict, ttl: int):
+        with self._lock:
+            self._entries[wallet_address] = entry
+            heapq.heappush(self._expiry_heap, (entry["expires_at"], wallet_address))
+            self._sweep_locked(time.time())
+            # Still full of live challenges: drop the ones closest to expiring
+            while len(self._entries) > self.max_entries:
+                self._pop_soonest_locked()
+                self.evictions += 1
+            # Re-issued challenges leave stale heap items behind; rebuild when they dominate
+            if len(self._expiry_heap) > 2 * len(self._entries) + 1024:
+                self._expiry_heap = [(e["expires_at"], w) for w, e in self._entries.items()]
+                heapq.heapify(self._expiry_heap)
+
+    def get(self, wallet_address: str) -> Optional[dict]:
+        with self._lock:
+            return self._entries.get(wallet_address)
+
+    def delete(self, wallet_address: str, challenge: Optional[str] = None) -> bool:
+        with self._lock:
+            entry = self._entries.get(wallet_address)
+            if entry is None or (challenge is not None and entry["challenge"] != challenge):
+                return False
+            del self._entries[wallet_address]
+            return True
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep_locked(time.time())
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def _sweep_locked(self, now: float) -> int:
+        removed = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            if self._pop_soonest_locked():
+                removed += 1
+        return removed
+
+    def _pop_soonest_locked(self) -> bool:
+        """Pop the earliest heap item; True if it removed a live entry"""
+        expires_at, wallet_address = heapq.heappop(self._expiry_heap)
+        entry = self._entries.get(wallet_address)
+        if entry is not None and entry["expires_at"] == expires_at:
+            del self._entries[wallet_address]
+            return True
+        return False
+
+
+class PostgresChallengeStore:
+    """UNLOGGED table: no WAL, lost on a crash, which only costs a new challenge"""
+
+    def __init__(self):
+        self.evictions = 0
+
+    def _execute(self, sql: str, params: dict):
+        from sqlalchemy import text
+        from database.base import get_engine
+        with get_engine().begin() as conn:
+            return conn.execute(text(sql), params)
+
+    def put(self, wallet_address: str, entry: dict, ttl: int):
+        self._execute("""
+            INSERT INTO wallet_auth_challenges (wallet_address, challenge_hash, challenge_text, expires_at)
+            VALUES (:wallet, :challenge, :challenge_text, :expires_at)
+            ON CONFLICT (wallet_address) DO UPDATE SET
+                challenge_hash = EXCLUDED.challenge_hash,
+                challenge_text = EXCLUDED.challenge_text,
+                expires_at = EXCLUDED.expires_at
+        """, {
+            "wallet": wallet_address,
+            "challenge": entry["challenge"],
+            "challenge_text": entry["challenge_text"],
+            "expires_at": entry["expires_at"]
+        })
+
+    def get(self, wallet_address: str) -> Optional[dict]:
+        row = self._execute("""
+            SELECT challenge_hash, challenge_text, expires_at
+            FROM wallet_auth_challenges
+            WHERE wallet_address = :wallet
+        """, {"wallet": wallet_address}).fetchone()
+        if row is None:
+            return None
+        return {"challenge": row[0], "challenge_text": row[1], "expires_at": row[2]}
+
+    def delete(self, wallet_address: str, challenge: Optional[str] = None) -> bool:
+        sql = "DELETE FROM wallet_auth_challenges WHERE wallet_address = :wallet"
+        if challenge is not None:
+            sql += " AND challenge_hash = :challenge"
+        result = self._execute(sql, {"wallet": wallet_address, "challenge": challenge})
+        return result.rowcount > 0
+
+    def sweep(self) -> int:
+        result = self._execute(
+            "DELETE FROM wallet_auth_challenges WHERE expires_at <= :now",
+            {"now": int(time.time())}
+        )
+        return result.rowcount
+
+    def size(self) -> int:
+        return -1  # Not tracked for the shared backend
+
+
+class RedisChallengeStore:
+    """Keys expire in Redis; nothing to sweep"""
+
+    # Compare-and-delete in one server-side step: DEL only if the key still holds this challenge
+    _DELETE_IF_CHALLENGE = """
+        local value = redis.call('GET', KEYS[1])
+        if value and cjson.decode(value)['challenge'] == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, url: str):
+        import redis  # Optional dependency, only needed for WALLET_CHALLENGE_BACKEND=redis
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._delete_if_challenge = self._redis.register_script(self._DELETE_IF_CHALLENGE)
+        self.evictions = 0
+
+    def put(self, wallet_address: str, entry: dict, ttl: int):
+        self._redis.set(WALLET_CHALLENGE_KEY_PREFIX + wallet_address, json.dumps(entry), ex=ttl)
+
+    def get(self, wallet_address: str) -> Optional[dict]:
+        value = self._redis.get(WALLET_CHALLENGE_KEY_PREFIX + wallet_address)
+        return json.loads(value) if value else None
+
+    def delete(self, wallet_address: str, challenge: Optional[str] = None) -> bool:
+        key = WALLET_CHALLENGE_KEY_PREFIX + wallet_address
+        if challenge is None:
+            return self._redis.delete(key) > 0
+        return self._delete_if_challenge(keys=[key], args=[challenge]) > 0
+
+    def sweep(self) -> int:
+        return 0
+
+    def size(self) -> int:
+        return -1
+
+
+def _make_store():
+    if WALLET_CHALLENGE_BACKEND == "postgres":
+        return PostgresChallengeStore()
+    if WALLET_CHALLENGE_BACKEND == "redis" and REDIS_URL:
+        try:
+            return RedisChallengeStore(REDIS_URL)
+        except ImportError:
+            print("[WARN] redis package not installed - wallet challenges falling back to memory")
+    return MemoryChallengeStore()
+
+
+# ============================================================================
+# PROCESS-WIDE STORE + BACKGROUND SWEEP
+# ============================================================================
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _sweep_forever(store):
+    while True:
+        time.sleep(WALLET_CHALLENGE_SWEEP_INTERVAL_SECONDS)
+        try:
+            store.sweep()
+        except Exception as e:
+            print(f"[WARN] Wallet challenge sweep failed: {e}")
+
+
+def get_challenge_store():
+    """The configured store; its sweeper thread starts with it"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = _make_store()
+                if WALLET_CHALLENGE_SWEEP_INTERVAL_SECONDS > 0 and not isinstance(store, RedisChallengeStore):
+                    threading.Thread(
+                        target=_sweep_forever, args=(store,), name="wallet-challenge-sweeper", daemon=True
+                    ).start()
+                _store = store
+    return _store
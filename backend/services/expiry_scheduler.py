@@ -0,0 +1,284 @@
+"""
+Expiry Scheduler
+Moves pools, requests and work orders past their deadlines to their terminal
+status in bulk, so listings filtered on live statuses never read dead rows
+
+Sweeps (each walks a partial deadline index from migration 021):
+- pools_triggered:  active pools at or above target -> triggered
+- pools_expired:    active pools past expires_at -> expired
+- requests_expired: open requests past expires_at (else deadline + 24h) ->
+  expired, and their submitted bids -> expired
+- work_orders_expired: pending or accepted work orders past deadline_at ->
+  expired; accepted ones give the worker's active job slot back
+
+Each sweep is a bulk UPDATE over batches of EXPIRY_SWEEP_BATCH_SIZE rows
+(FOR UPDATE SKIP LOCKED, so a row being joined or accepted right now is left
+for the next run).
+
+Leader election: every API worker runs the loop, but only the one holding
+the session advisory lock EXPIRY_LOCK_ID sweeps. The lock lives on the
+leader's connection, so it is released as soon as that worker exits or its
+connection drops, and another worker takes over on its next tick.
+
+CLI (one sweep, if no other worker holds the lock):
+    python -m services.expiry_scheduler
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+import asyncio
+import os
+import threading
+
+from database.base import get_db_connection
+
+
+# ============================================================================
+# SCHEDULER CONFIGURATION
+# ============================================================================
+
+EXPIRY_SWEEP_INTERVAL_SECONDS = int(os.getenv("EXPIRY_SWEEP_INTERVAL_SECONDS", "30"))  # 0 disables
+EXPIRY_SWEEP_BATCH_SIZE = int(os.getenv("EXPIRY_SWEEP_BATCH_SIZE", "1000"))
+
+EXPIRY_LOCK_ID = 0x65787079  # pg_try_advisory_lock key shared by every worker
+
+# Requests, bids and work orders store naive UTC timestamps (datetime.utcnow),
+# so they are compared against %(now_utc)s; pools use timestamptz and NOW().
+SWEEPS = {
+    "pools_triggered": """
+        WITH due AS (
+            SELECT id FROM group_buying_pools
+            WHERE status = 'active' AND current_quantity >= target_quantity
+            LIMIT %(batch)s
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE group_buying_pools p
+        SET status = 'triggered', triggered_at = NOW(), updated_at = NOW()
+        FROM due WHERE p.id = due.id
+        RETURNING p.id
+    """,
+    "pools_expired": """
+        WITH due AS (
+            SELECT id FROM group_buying_pools
+            WHERE status = 'active' AND expires_at <= NOW()
+            ORDER BY expires_at
+            LIMIT %(batch)s
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE group_buying_pools p
+        SET status = 'expired', updated_at = NOW()
+        FROM due WHERE p.id = due.id
+        RETURNING p.id
+    """,
+    "requests_expired": """
+        WITH due AS (
+            SELECT id FROM requests
+            WHERE status = 'OPEN'
+              AND COALESCE(expires_at, deadline + INTERVAL '24 hours') <= %(now_utc)s
+            ORDER BY COALESCE(expires_at, deadline + INTERVAL '24 hours')
+            LIMIT %(batch)s
+            FOR UPDATE SKIP LOCKED
+        ),
+        expired AS (
+            UPDATE requests r
+            SET status = 'EXPIRED', updated_at = %(now_utc)s
+            FROM due WHERE r.id = due.id
+            RETURNING r.id
+        ),
+        expired_bids AS (
+            UPDATE bids b
+            SET status = 'EXPIRED', updated_at = %(now_utc)s
+            FROM expired WHERE b.request_id = expired.id AND b.status = 'SUBMITTED'
+        )
+        SELECT id FROM expired
+    """,
+    "work_orders_expired": """
+        WITH due AS (
+            SELECT id, worker_agent_id, status = 'ACCEPTED' AS was_accepted FROM work_orders
+            WHERE status IN ('PENDING', 'ACCEPTED') AND deadline_at <= %(now_utc)s
+            ORDER BY deadline_at
+            LIMIT %(batch)s
+            FOR UPDATE SKIP LOCKED
+        ),
+        expired AS (
+            UPDATE work_orders w
+            SET status = 'EXPIRED', updated_at = %(now_utc)s
+            FROM due WHERE w.id = due.id
+            RETURNING w.id
+        ),
+        released AS (
+            UPDATE agent_presence p
+            SET current_active_jobs = GREATEST(p.current_active_jobs - jobs.n, 0), updated_at = %(now_utc)s
+            FROM (
+                SELECT worker_agent_id, COUNT(*) AS n FROM due WHERE was_accepted GROUP BY worker_agent_id
+            ) jobs
+            WHERE p.agent_id = jobs.worker_agent_id
+        )
+        SELECT id FROM expired
+    """
+}
+
+
+def run_sweeps(conn) -> Dict[str, int]:
+    """
+    Run every sweep to completion on conn (one commit per batch).
+    Returns rows moved per sweep. Caller must hold the leader lock.
+    """
+    counts = {}
+    for name, sql in SWEEPS.items():
+        counts[name] = 0
+        try:
+            while True:
+                with conn.cursor() as cur:
+                    cur.execute(sql, {"batch": EXPIRY_SWEEP_BATCH_SIZE, "now_utc": datetime.utcnow()})
+                    moved = cur.rowcount
+                conn.commit()
+                counts[name] += moved
+                if moved < EXPIRY_SWEEP_BATCH_SIZE:
+                    break
+        except Exception as e:
+            # A missing table or column (migration not applied) skips one sweep, not all
+            conn.rollback()
+            print(f"[WARN] Expiry sweep {name} failed: {e}")
+    return counts
+
+
+# ============================================================================
+# LEADER ELECTION
+# ============================================================================
+
+class LeaderLease:
+    """
+    Session advisory lock on a dedicated connection
+
+    acquire() returns True while this process is leader; leadership ends
+    when release() is called or the connection is lost (Postgres drops the
+    lock with the session).
+    """
+
+    def __init__(self, lock_id: int = EXPIRY_LOCK_ID):
+        self.lock_id = lock_id
+        self.conn = None
+        self.in_use = threading.Lock()  # Held across a sweep so release() waits for it
+
+    def acquire(self) -> bool:
+        if self.conn is not None:
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                self.conn.commit()
+                return True
+            except Exception:
+                self._close()  # Connection lost - so is the lock
+
+        conn = get_db_connection()
+        if conn is None:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s)", (self.lock_id,))
+                locked = cur.fetchone()[0]
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        if not locked:
+            conn.close()
+            return False
+        self.conn = conn
+        return True
+
+    def release(self):
+        with self.in_use:
+            if self.conn is not None:
+                self._unlock()
+
+    def _unlock(self):
+        try:
+            self.conn.rollback()
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (self.lock_id,))
+            self.conn.commit()
+        except Exception:
+            pass
+        self._close()
+
+    def _close(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        self.conn = None
+
+
+def sweep_if_leader(lease: LeaderLease) -> Optional[Dict[str, int]]:
+    """Run the sweeps if this process is (or becomes) leader; None otherwise"""
+    with lease.in_use:
+        if not lease.acquire():
+            return None
+        return run_sweeps(lease.conn)
+
+
+# ============================================================================
+# IN-APP SCHEDULER
+# ============================================================================
+
+_scheduler_task: Optional[asyncio.Task] = None
+_lease: Optional[LeaderLease] = None
+
+
+async def _scheduler_loop():
+    leader = False
+    failing = False
+    while True:
+        try:
+            counts = await asyncio.to_thread(sweep_if_leader, _lease)
+            if (counts is not None) != leader:
+                leader = counts is not None
+                print(f"[OK] Expiry scheduler {'is leader' if leader else 'lost leadership'}")
+            moved = {name: n for name, n in (counts or {}).items() if n}
+            if moved:
+                print(f"[OK] Expiry sweep: {moved}")
+            failing = False
+        except Exception as e:
+            if not failing:  # Log once per outage, not every interval
+                print(f"[WARN] Expiry scheduler failed: {e}")
+            failing = True
+        await asyncio.sleep(EXPIRY_SWEEP_INTERVAL_SECONDS)
+
+
+def start_expiry_scheduler() -> Optional[asyncio.Task]:
+    """Sweep now and every interval on the leader (EXPIRY_SWEEP_INTERVAL_SECONDS=0 disables)"""
+    global _scheduler_task, _lease
+    if EXPIRY_SWEEP_INTERVAL_SECONDS <= 0 or _scheduler_task is not None:
+        return _scheduler_task
+    _lease = LeaderLease()
+    _scheduler_task = asyncio.create_task(_scheduler_loop())
+    return _scheduler_task
+
+
+async def stop_expiry_scheduler():
+    """Stop sweeping and hand leadership to another worker"""
+    global _scheduler_task, _lease
+    if _scheduler_task is None:
+        return
+    _scheduler_task.cancel()
+    try:
+        await _scheduler_task
+    except asyncio.CancelledError:
+        pass
+    _scheduler_task = None
+    await asyncio.to_thread(_lease.release)
+    _lease = None
+
+
+if __name__ == "__main__":
+    lease = LeaderLease()
+    try:
+        counts = sweep_if_leader(lease)
+    finally:
+        lease.release()
+    if counts is None:
+        print("[WARN] Another worker is the expiry leader (or the database is unavailable)")
+    else:
+        print(f"[OK] Expiry sweep: {counts}")
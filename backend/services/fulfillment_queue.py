@@ -0,0 +1,451 @@
+"""
+Fulfillment Job Queue
+Postgres-backed durable queue for arbitrage fulfillment
+
+Flow:
+1. API enqueues a job (returns immediately - never blocks on source platforms)
+2. Workers claim due jobs with FOR UPDATE SKIP LOCKED
+3. Job runs ArbitrageFulfillmentEngine on a shared async HTTP client
+4. Failures retry with exponential backoff; exhausted jobs are dead-lettered
+
+Run standalone workers (scale throughput by adding processes):
+    python -m services.fulfillment_queue
+"""
+
+from typing import Dict, List, Optional
+import asyncio
+import json
+import os
+import random
+import socket
+import threading
+
+import httpx
+
+from database.base import get_db_connection, get_session_local
+
+
+# ============================================================================
+# QUEUE CONFIGURATION
+# ============================================================================
+
+FULFILLMENT_MAX_ATTEMPTS = int(os.getenv("FULFILLMENT_MAX_ATTEMPTS", "5"))
+FULFILLMENT_BACKOFF_BASE_SECONDS = int(os.getenv("FULFILLMENT_BACKOFF_BASE_SECONDS", "30"))
+FULFILLMENT_BACKOFF_MAX_SECONDS = int(os.getenv("FULFILLMENT_BACKOFF_MAX_SECONDS", "3600"))
+FULFILLMENT_LOCK_TIMEOUT_SECONDS = int(os.getenv("FULFILLMENT_LOCK_TIMEOUT_SECONDS", "600"))  # Reclaim jobs from crashed workers
+FULFILLMENT_POLL_INTERVAL_SECONDS = float(os.getenv("FULFILLMENT_POLL_INTERVAL_SECONDS", "2"))
+
+FULFILLMENT_CLAIM_LOCK_ID = 0x66756c66  # pg_advisory_xact_lock key serializing claims across workers
+FULFILLMENT_WORKER_CONCURRENCY = int(os.getenv("FULFILLMENT_WORKER_CONCURRENCY", "4"))
+
+# Max jobs running at once per source platform, across all workers
+PLATFORM_CONCURRENCY_LIMITS = {
+    "rapidapi": 10,
+    "huggingface": 4,
+    "github": 20,
+    "fiverr": 20,  # Manual queueing only - cheap
+    "upwork": 20,
+    "default": 5
+}
+
+
+class JobStatus:
+    """Fulfillment job lifecycle"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    DEAD = "dead"
+
+
+def backoff_seconds(attempts: int) -> int:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped"""
+    delay = FULFILLMENT_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1))
+    delay = min(delay, FULFILLMENT_BACKOFF_MAX_SECONDS)
+    return int(delay * random.uniform(0.8, 1.2))
+
+
+class FulfillmentJobQueue:
+    """
+    Queue operations over the fulfillment_jobs table
+
+    All methods are synchronous psycopg2 calls (like the protocol endpoints);
+    the async worker runs them in a thread so the event loop is never blocked.
+    """
+
+    def _connect(self):
+        conn = get_db_connection()
+        if conn is None:
+            raise RuntimeError("Database not available")
+        return conn
+
+    def enqueue(self, transaction_id: str, platform: str = "default",
+                max_attempts: int = FULFILLMENT_MAX_ATTEMPTS) -> Dict:
+        """
+        Enqueue fulfillment for a transaction
+
+        Idempotent: if a queued/running job already exists for the
+        transaction, that job is returned instead of creating a duplicate.
+        """
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO fulfillment_jobs (transaction_id, platform, max_attempts)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (transaction_id) WHERE status IN ('queued', 'running')
+                DO NOTHING
+                RETURNING id, status
+            """, (transaction_id, platform or "default", max_attempts))
+            row = cur.fetchone()
+            created = row is not None
+
+            if not row:
+                cur.execute("""
+                    SELECT id, status FROM fulfillment_jobs
+                    WHERE transaction_id = %s AND status IN ('queued', 'running')
+                """, (transaction_id,))
+                row = cur.fetchone()
+
+            conn.commit()
+            return {"job_id": row[0], "status": row[1], "created": created}
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[Dict]:
+        """
+        Claim up to `limit` due jobs for this worker
+
+        Never lets a platform exceed its concurrency limit: claims are
+        serialized by a transaction advisory lock, so each one sees the
+        running counts committed by the previous claim, and jobs picked in
+        the same claim count against the limit too. Running jobs whose lock
+        is older than FULFILLMENT_LOCK_TIMEOUT_SECONDS (crashed worker)
+        become claimable again.
+        """
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (FULFILLMENT_CLAIM_LOCK_ID,))
+            cur.execute("""
+                WITH running AS (
+                    SELECT platform, COUNT(*) AS n
+                    FROM fulfillment_jobs
+                    WHERE status = 'running'
+                      AND locked_at > NOW() - make_interval(secs => %(lock_timeout)s)
+                    GROUP BY platform
+                ),
+                due AS (
+                    SELECT j.id, j.platform, j.run_after,
+                           COALESCE(r.n, 0) AS running,
+                           COALESCE((%(limits)s::jsonb ->> j.platform)::int, %(default_limit)s) AS cap
+                    FROM fulfillment_jobs j
+                    LEFT JOIN running r ON r.platform = j.platform
+                    WHERE (
+                        (j.status = 'queued' AND j.run_after <= NOW())
+                        OR (j.status = 'running' AND j.locked_at <= NOW() - make_interval(secs => %(lock_timeout)s))
+                    )
+                    AND COALESCE(r.n, 0) < COALESCE((%(limits)s::jsonb ->> j.platform)::int, %(default_limit)s)
+                    ORDER BY j.run_after, j.id
+                    LIMIT %(scan_limit)s
+                    FOR UPDATE OF j SKIP LOCKED
+                ),
+                picked AS (
+                    SELECT id FROM (
+                        SELECT id, run_after, running, cap,
+                               row_number() OVER (PARTITION BY platform ORDER BY run_after, id) AS nth
+                        FROM due
+                    ) ranked
+                    WHERE running + nth <= cap
+                    ORDER BY run_after, id
+                    LIMIT %(limit)s
+                )
+                UPDATE fulfillment_jobs j
+                SET status = 'running',
+                    attempts = j.attempts + 1,
+                    locked_by = %(worker_id)s,
+                    locked_at = NOW(),
+                    updated_at = NOW()
+                FROM picked
+                WHERE j.id = picked.id
+                RETURNING j.id, j.transaction_id, j.platform, j.attempts, j.max_attempts
+            """, {
+                "lock_timeout": FULFILLMENT_LOCK_TIMEOUT_SECONDS,
+                "limits": json.dumps(PLATFORM_CONCURRENCY_LIMITS),
+                "default_limit": PLATFORM_CONCURRENCY_LIMITS["default"],
+                "scan_limit": limit * 4,  # Room to skip past jobs of platforms this claim fills up
+                "limit": limit,
+                "worker_id": worker_id
+            })
+            rows = cur.fetchall()
+            conn.commit()
+            return [
+                {"job_id": r[0], "transaction_id": r[1], "platform": r[2], "attempts": r[3], "max_attempts": r[4]}
+                for r in rows
+            ]
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: int, result: Dict):
+        """Mark job succeeded"""
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE fulfillment_jobs
+                SET status = 'succeeded', result = %s, last_error = NULL,
+                    locked_by = NULL, completed_at = NOW(), updated_at = NOW()
+                WHERE id = %s
+            """, (json.dumps(result, default=str), job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def retry_later(self, job_id: int, attempts: int, error: str):
+        """Release job back to the queue with exponential backoff"""
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE fulfillment_jobs
+                SET status = 'queued', last_error = %s, locked_by = NULL, locked_at = NULL,
+                    run_after = NOW() + make_interval(secs => %s), updated_at = NOW()
+                WHERE id = %s
+            """, (error, backoff_seconds(attempts), job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def dead_letter(self, job_id: int, error: str, result: Optional[Dict] = None):
+        """Move job to the dead-letter state (no further retries)"""
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE fulfillment_jobs
+                SET status = 'dead', last_error = %s, result = %s,
+                    locked_by = NULL, completed_at = NOW(), updated_at = NOW()
+                WHERE id = %s
+            """, (error, json.dumps(result, default=str) if result else None, job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def requeue_dead(self, job_id: int) -> bool:
+        """Give a dead-lettered job a fresh set of attempts"""
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE fulfillment_jobs
+                SET status = 'queued', attempts = 0, run_after = NOW(),
+                    completed_at = NULL, updated_at = NOW()
+                WHERE id = %s AND status = 'dead'
+                RETURNING id
+            """, (job_id,))
+            row = cur.fetchone()
+            conn.commit()
+            return row is not None
+        except Exception:
+            # Unique live-job index: another job for this transaction is already queued
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT id, transaction_id, platform, status, attempts, max_attempts,
+                       run_after, locked_by, last_error, result, created_at, completed_at
+                FROM fulfillment_jobs WHERE id = %s
+            """, (job_id,))
+            row = cur.fetchone()
+            if not row:
+                return None
+            cols = [desc[0] for desc in cur.description]
+            return dict(zip(cols, row))
+        finally:
+            conn.close()
+
+    def list_dead(self, limit: int = 50) -> List[Dict]:
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT id, transaction_id, platform, attempts, last_error, updated_at
+                FROM fulfillment_jobs WHERE status = 'dead'
+                ORDER BY updated_at DESC LIMIT %s
+            """, (limit,))
+            cols = [desc[0] for desc in cur.description]
+            return [dict(zip(cols, row)) for row in cur.fetchall()]
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        """Job counts by status and platform"""
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT status, platform, COUNT(*)
+                FROM fulfillment_jobs
+                GROUP BY status, platform
+            """)
+            by_status = {}
+            by_platform = {}
+            for status, platform, n in cur.fetchall():
+                by_status[status] = by_status.get(status, 0) + n
+                by_platform.setdefault(platform, {})[status] = n
+            return {"by_status": by_status, "by_platform": by_platform}
+        finally:
+            conn.close()
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+class FulfillmentWorker:
+    """
+    Async worker that drains the fulfillment queue
+
+    Runs `concurrency` jobs at a time on one shared httpx.AsyncClient.
+    Start several workers (processes or app instances) to scale throughput.
+    """
+
+    def __init__(self, concurrency: int = FULFILLMENT_WORKER_CONCURRENCY):
+        self.concurrency = max(1, concurrency)
+        self.queue = FulfillmentJobQueue()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._stopping = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._in_flight = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def stop(self):
+        """Safe to call from any thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        else:
+            self._stopping.set()
+
+    async def run(self):
+        """Claim and run jobs until stop() is called"""
+        self._loop = asyncio.get_running_loop()
+        print(f"[FULFILLMENT] Worker {self.worker_id} started (concurrency={self.concurrency})")
+
+        async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=self.concurrency * 2)) as client:
+            claim_failing = False
+            while not self._stopping.is_set():
+                free_slots = self.concurrency - len(self._in_flight)
+                jobs = []
+                if free_slots > 0:
+                    try:
+                        jobs = await asyncio.to_thread(self.queue.claim, self.worker_id, free_slots)
+                        claim_failing = False
+                    except Exception as e:
+                        if not claim_failing:  # Log once per outage, not every poll
+                            print(f"[FULFILLMENT] Claim failed: {e}")
+                        claim_failing = True
+
+                for job in jobs:
+                    await self._slots.acquire()
+                    task = asyncio.create_task(self._run_job(job, client))
+                    self._in_flight.add(task)
+                    task.add_done_callback(self._in_flight.discard)
+
+                if not jobs:
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=FULFILLMENT_POLL_INTERVAL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+
+            # Let in-flight jobs finish; unfinished ones are reclaimed after the lock timeout
+            if self._in_flight:
+                await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        print(f"[FULFILLMENT] Worker {self.worker_id} stopped")
+
+    async def _run_job(self, job: Dict, client: httpx.AsyncClient):
+        from services.arbitrage_fulfillment import ArbitrageFulfillmentEngine
+
+        final_attempt = job["attempts"] >= job["max_attempts"]
+        db = get_session_local()()
+        try:
+            engine = ArbitrageFulfillmentEngine(db, http_client=client)
+            result = await engine.process_transaction(job["transaction_id"], allow_retry=not final_attempt)
+
+            if result.get("success") or result.get("action") == "skip":
+                await asyncio.to_thread(self.queue.complete, job["job_id"], result)
+            elif final_attempt or not result.get("retry"):
+                await asyncio.to_thread(self.queue.dead_letter, job["job_id"], str(result.get("error")), result)
+            else:
+                await asyncio.to_thread(self.queue.retry_later, job["job_id"], job["attempts"], str(result.get("error")))
+
+        except Exception as e:
+            print(f"[FULFILLMENT] Job {job['job_id']} crashed: {e}")
+            try:
+                if final_attempt:
+                    await asyncio.to_thread(self.queue.dead_letter, job["job_id"], str(e))
+                else:
+                    await asyncio.to_thread(self.queue.retry_later, job["job_id"], job["attempts"], str(e))
+            except Exception as e2:
+                print(f"[FULFILLMENT] Could not release job {job['job_id']}: {e2}")
+        finally:
+            db.close()
+            self._slots.release()
+
+
+# ============================================================================
+# IN-APP WORKER LIFECYCLE
+# ============================================================================
+
+_app_worker: Optional[FulfillmentWorker] = None
+_app_worker_thread: Optional[threading.Thread] = None
+
+
+def start_app_worker() -> Optional[FulfillmentWorker]:
+    """
+    Start a worker inside the API process (FULFILLMENT_WORKER_CONCURRENCY=0 disables)
+
+    The engine mixes async HTTP with sync SQLAlchemy calls, so the worker
+    gets its own thread and event loop: its DB round trips never block the
+    loop serving API requests.
+    """
+    global _app_worker, _app_worker_thread
+    if FULFILLMENT_WORKER_CONCURRENCY <= 0 or _app_worker is not None:
+        return _app_worker
+
+    _app_worker = FulfillmentWorker()
+    _app_worker_thread = threading.Thread(
+        target=asyncio.run, args=(_app_worker.run(),), name="fulfillment-worker", daemon=True
+    )
+    _app_worker_thread.start()
+    return _app_worker
+
+
+async def stop_app_worker():
+    """Stop claiming and wait for in-flight jobs to finish"""
+    global _app_worker, _app_worker_thread
+    if _app_worker is None:
+        return
+    _app_worker.stop()
+    await asyncio.to_thread(_app_worker_thread.join)
+    _app_worker = None
+    _app_worker_thread = None
+
+
+if __name__ == "__main__":
+    worker = FulfillmentWorker()
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
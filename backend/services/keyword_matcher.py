@@ -0,0 +1,109 @@
+"""
+Compiled Multi-Keyword Matcher
+Shared by spam detection (AgenticReviewer) and category auto-tagging
+
+All keywords are compiled into one trie-shaped regex, so a text is scanned
+once no matter how many keywords/labels there are (instead of one substring
+search per keyword).
+"""
+
+import re
+from typing import Dict, Iterable, List, Set
+
+
+class KeywordMatcher:
+    """
+    Match many keywords against text in a single pass
+
+    keywords: {label: [keyword, ...]} - a label matches if any of its
+    keywords occurs in the text. Labels are returned in mapping order.
+
+    word_boundaries=True only matches whole words/phrases ("va" does not
+    match "evaluate"); False keeps plain substring semantics.
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]], word_boundaries: bool = True):
+        self.word_boundaries = word_boundaries
+        self.label_order = {label: i for i, label in enumerate(keywords)}
+
+        # keyword -> labels
+        self._labels: Dict[str, List[str]] = {}
+        for label, words in keywords.items():
+            for word in words:
+                word = word.lower().strip()
+                if word:
+                    self._labels.setdefault(word, []).append(label)
+
+        # keyword -> shorter keywords that necessarily match wherever it does
+        self._implied = {word: self._prefix_keywords(word) for word in self._labels}
+
+        pattern = _trie_pattern(sorted(self._labels))
+        if word_boundaries:
+            pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+        # Zero-width lookahead so every start position is tried (overlapping matches)
+        self._regex = re.compile(rf"(?=({pattern}))") if self._labels else None
+
+    def _prefix_keywords(self, word: str) -> List[str]:
+        implied = []
+        for i in range(1, len(word)):
+            prefix = word[:i]
+            if prefix not in self._labels:
+                continue
+            # Under word boundaries the prefix only matches if it ends a word
+            if self.word_boundaries and (word[i].isalnum() or word[i] == "_"):
+                continue
+            implied.append(prefix)
+        return implied
+
+    def find_keywords(self, text: str) -> Set[str]:
+        """All keywords occurring in text"""
+        if not text or self._regex is None:
+            return set()
+
+        found = set()
+        for match in self._regex.finditer(text.lower()):
+            word = match.group(1)
+            if word not in found:
+                found.add(word)
+                found.update(self._implied[word])
+        return found
+
+    def match(self, text: str) -> List[str]:
+        """Labels with at least one keyword in text, in mapping order"""
+        labels = set()
+        for word in self.find_keywords(text):
+            labels.update(self._labels[word])
+        return sorted(labels, key=self.label_order.__getitem__)
+
+    def first(self, text: str):
+        """First matching label (mapping order) or None"""
+        labels = self.match(text)
+        return labels[0] if labels else None
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Build a regex from a trie of words, e.g. [code, code review, coding]
+    -> cod(?:e(?:\\ review)?|ing)
+
+    Alternatives share prefixes, so matching cost per position is bounded
+    by keyword length rather than keyword count. Greedy optional groups
+    make the longest keyword win at each position.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        if "" in node:
+            # Word may end here or continue
+            return "(?:" + "|".join(branches) + ")?"
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
@@ -0,0 +1,316 @@
+"""
+Partition Manager
+Maintenance for the monthly-partitioned time-series tables (migration 016)
+
+- ensure_partitions(): creates each table's partitions PARTITION_MONTHS_AHEAD
+  months ahead, so inserts never hit a month without a partition
+- archive_expired(): months older than a table's retention are detached,
+  streamed to PARTITION_ARCHIVE_DIR as gzipped CSV (COPY), row-count
+  verified, recorded in manifest.jsonl, then dropped
+- The API process runs both every PARTITION_MAINTENANCE_INTERVAL_SECONDS;
+  an advisory lock keeps concurrent workers from running them twice
+
+Retention is off (0 months) by default. Archiving also needs
+PARTITION_ARCHIVE_DIR set explicitly to persistent storage (container disks
+are ephemeral, and a partition is dropped once archived); while it is unset,
+expired months stay in the database. Archived executions also drop out of
+all-time stats computed from agent_executions.
+
+Restore an archived month:
+    CREATE TABLE agent_executions_p202401 (LIKE agent_executions);
+    \\copy agent_executions_p202401 FROM PROGRAM 'gunzip -c agent_executions_p202401.csv.gz' CSV HEADER
+    ALTER TABLE agent_executions ATTACH PARTITION agent_executions_p202401
+        FOR VALUES FROM ('2024-01-01') TO ('2024-02-01');
+
+CLI:
+    python -m services.partition_manager status
+    python -m services.partition_manager ensure
+    python -m services.partition_manager archive
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+from database.base import get_db_connection
+
+
+# ============================================================================
+# PARTITION CONFIGURATION
+# ============================================================================
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "21600"))  # 0 disables
+PARTITION_ARCHIVE_DIR = os.getenv("PARTITION_ARCHIVE_DIR", "")  # No default: archiving is off until set
+
+# Table -> (partition key, months kept in the database; 0 keeps everything)
+PARTITIONED_TABLES = {
+    "agent_executions": ("started_at", int(os.getenv("EXECUTIONS_RETENTION_MONTHS", "0"))),
+    "agent_messages": ("created_at", int(os.getenv("MESSAGES_RETENTION_MONTHS", "0"))),
+    "agent_reputation_history": ("recorded_at", int(os.getenv("REPUTATION_HISTORY_RETENTION_MONTHS", "0"))),
+    "agent_performance_history": ("snapshot_at", int(os.getenv("PERFORMANCE_HISTORY_RETENTION_MONTHS", "0"))),
+}
+
+PARTITION_LOCK_ID = 0x70617274  # pg_try_advisory_lock key shared by every worker
+
+_PARTITION_NAME = re.compile(r"^(?P<table>.+)_p(?P<year>\d{4})(?P<month>\d{2})$")
+
+
+# ============================================================================
+# PARTITION CATALOG
+# ============================================================================
+
+def is_partitioned(cur, table: str) -> bool:
+    cur.execute("""
+        SELECT 1 FROM pg_partitioned_table
+        WHERE partrelid = to_regclass(%s)
+    """, (table,))
+    return cur.fetchone() is not None
+
+
+def list_partitions(cur, table: str) -> List[Dict]:
+    """
+    Monthly partitions of table, oldest first. Includes detached
+    <table>_pYYYYMM tables left behind by an interrupted archive.
+    """
+    cur.execute("""
+        SELECT c.relname,
+               i.inhparent IS NOT NULL AS attached,
+               c.reltuples::bigint,
+               pg_total_relation_size(c.oid)
+        FROM pg_class c
+        LEFT JOIN pg_inherits i ON i.inhrelid = c.oid AND i.inhparent = to_regclass(%s)
+        WHERE c.relkind = 'r'
+          AND c.relnamespace = current_schema()::regnamespace
+          AND c.relname ~ ('^' || %s || '_p[0-9]{6}$')
+        ORDER BY c.relname
+    """, (table, table))
+
+    partitions = []
+    for name, attached, estimated_rows, size_bytes in cur.fetchall():
+        match = _PARTITION_NAME.match(name)
+        partitions.append({
+            "name": name,
+            "month": date(int(match.group("year")), int(match.group("month")), 1),
+            "attached": attached,
+            "estimated_rows": max(estimated_rows, 0),
+            "size_bytes": size_bytes
+        })
+    return partitions
+
+
+def retention_cutoff(retention_months: int, today: Optional[date] = None) -> date:
+    """First month kept: partitions for earlier months are archived"""
+    today = today or date.today()
+    months = today.year * 12 + today.month - 1 - retention_months
+    return date(months // 12, months % 12 + 1, 1)
+
+
+# ============================================================================
+# MAINTENANCE
+# ============================================================================
+
+def ensure_partitions(conn, months_ahead: int = PARTITION_MONTHS_AHEAD) -> Dict[str, int]:
+    """Create missing partitions from this month to months_ahead; {table: created}"""
+    created = {}
+    with conn.cursor() as cur:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(cur, table):
+                continue
+            cur.execute(
+                "SELECT ensure_monthly_partitions(%s, NOW()::timestamp, (NOW() + make_interval(months => %s))::timestamp)",
+                (table, months_ahead)
+            )
+            created[table] = cur.fetchone()[0]
+    conn.commit()
+    return created
+
+
+def archive_partition(conn, table: str, partition: Dict, archive_dir: str = PARTITION_ARCHIVE_DIR) -> Dict:
+    """
+    Detach partition, write it to <archive_dir>/<table>/<partition>.csv.gz,
+    verify the row count and drop it. Safe to rerun after a failure at any step.
+    """
+    if not archive_dir:
+        raise ValueError("PARTITION_ARCHIVE_DIR is not set")
+    name = partition["name"]
+    with conn.cursor() as cur:
+        if partition["attached"]:
+            cur.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+            conn.commit()
+
+        cur.execute(f'SELECT COUNT(*) FROM "{name}"')
+        row_count = cur.fetchone()[0]
+
+        table_dir = os.path.join(archive_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+        path = os.path.join(table_dir, f"{name}.csv.gz")
+        partial_path = path + ".partial"
+        with open(partial_path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                cur.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', f)
+            raw.flush()
+            os.fsync(raw.fileno())
+        copied = cur.rowcount
+        if copied >= 0 and copied != row_count:
+            os.remove(partial_path)
+            raise RuntimeError(f"{name}: COPY wrote {copied} rows, table has {row_count}")
+        os.replace(partial_path, path)
+
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(block)
+        entry = {
+            "table": table,
+            "partition": name,
+            "month": partition["month"].isoformat(),
+            "rows": row_count,
+            "file": os.path.relpath(path, archive_dir),
+            "bytes": os.path.getsize(path),
+            "sha256": sha256.hexdigest(),
+            "archived_at": datetime.utcnow().isoformat()
+        }
+        with open(os.path.join(archive_dir, "manifest.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+        cur.execute(f'DROP TABLE "{name}"')
+        conn.commit()
+    return entry
+
+
+def archive_expired(conn, today: Optional[date] = None, archive_dir: str = PARTITION_ARCHIVE_DIR) -> List[Dict]:
+    """Archive every partition past its table's retention, plus leftover detached ones"""
+    if not archive_dir:
+        print("[WARN] PARTITION_ARCHIVE_DIR not set; expired partitions kept (set it to persistent storage to archive)")
+        return []
+    archived = []
+    with conn.cursor() as cur:
+        candidates = []
+        for table, (_, retention_months) in PARTITIONED_TABLES.items():
+            if not is_partitioned(cur, table):
+                continue
+            cutoff = retention_cutoff(retention_months, today) if retention_months > 0 else None
+            for partition in list_partitions(cur, table):
+                # Detached ones were already half-way through an archive
+                if not partition["attached"] or (cutoff and partition["month"] < cutoff):
+                    candidates.append((table, partition))
+
+    for table, partition in candidates:
+        try:
+            entry = archive_partition(conn, table, partition, archive_dir)
+            print(f"[OK] Archived {entry['partition']} ({entry['rows']} rows, {entry['bytes']} bytes)")
+            archived.append(entry)
+        except Exception as e:
+            conn.rollback()
+            print(f"[WARN] Archiving {partition['name']} failed: {e}")
+    return archived
+
+
+def run_maintenance(archive: bool = True) -> Optional[Dict]:
+    """
+    ensure_partitions (+ archive_expired) under the advisory lock.
+    Returns None if the database is unavailable or another worker holds the lock.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (PARTITION_LOCK_ID,))
+            locked = cur.fetchone()[0]
+        conn.commit()
+        if not locked:
+            return None
+        try:
+            result = {"created": ensure_partitions(conn), "archived": []}
+            if archive and any(retention for _, retention in PARTITIONED_TABLES.values()):
+                result["archived"] = archive_expired(conn)
+            return result
+        finally:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (PARTITION_LOCK_ID,))
+            conn.commit()
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# IN-APP MAINTENANCE TASK
+# ============================================================================
+
+_maintenance_task: Optional[asyncio.Task] = None
+
+
+async def _maintenance_loop():
+    while True:
+        try:
+            result = await asyncio.to_thread(run_maintenance)
+            if result and any(result["created"].values()):
+                print(f"[OK] Partitions created: {result['created']}")
+        except Exception as e:
+            print(f"[WARN] Partition maintenance failed: {e}")
+        await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+
+def start_partition_maintenance() -> Optional[asyncio.Task]:
+    """Run maintenance now and every interval (PARTITION_MAINTENANCE_INTERVAL_SECONDS=0 disables)"""
+    global _maintenance_task
+    if PARTITION_MAINTENANCE_INTERVAL_SECONDS <= 0 or _maintenance_task is not None:
+        return _maintenance_task
+    _maintenance_task = asyncio.create_task(_maintenance_loop())
+    return _maintenance_task
+
+
+async def stop_partition_maintenance():
+    global _maintenance_task
+    if _maintenance_task is None:
+        return
+    _maintenance_task.cancel()
+    try:
+        await _maintenance_task
+    except asyncio.CancelledError:
+        pass
+    _maintenance_task = None
+
+
+def print_status(conn):
+    with conn.cursor() as cur:
+        for table, (column, retention_months) in PARTITIONED_TABLES.items():
+            if not is_partitioned(cur, table):
+                print(f"{table}: not partitioned (apply migration 016)")
+                continue
+            retention = f"{retention_months} months" if retention_months else "keep all"
+            print(f"{table} by {column}, retention {retention}")
+            for partition in list_partitions(cur, table):
+                state = "" if partition["attached"] else "  DETACHED"
+                print(f"  {partition['name']:<44}{partition['estimated_rows']:>12,} rows"
+                      f"{partition['size_bytes'] / 1048576:>10.1f} MB{state}")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command not in ("status", "ensure", "archive"):
+        sys.exit("usage: python -m services.partition_manager [status|ensure|archive]")
+
+    connection = get_db_connection()
+    if connection is None:
+        sys.exit("[WARN] DATABASE_URL not set or database unreachable")
+    try:
+        if command == "status":
+            print_status(connection)
+        elif command == "ensure":
+            print(f"[OK] Partitions created: {ensure_partitions(connection)}")
+        elif not PARTITION_ARCHIVE_DIR:
+            sys.exit("[WARN] Set PARTITION_ARCHIVE_DIR to persistent storage before archiving")
+        else:
+            print(f"[OK] Archived {len(archive_expired(connection))} partitions to {PARTITION_ARCHIVE_DIR}")
+    finally:
+        connection.close()
@@ -0,0 +1,331 @@
+"""
+Request Metrics
+Per-request timing, SQL statement counts and slow-request profiling
+
+- RequestMetricsMiddleware (middleware/metrics_middleware.py) opens a
+  RequestStats for every HTTP request and observes it when the response ends
+- SQL is counted at the driver: SQLAlchemy engine events (instrument_engine)
+  and an instrumented psycopg2 connection class used by get_db_connection
+- A request that runs the same statement METRICS_N_PLUS_ONE_THRESHOLD times
+  is flagged as a likely N+1
+- Everything is exported in Prometheus text format on GET /metrics
+- With PROFILE_SLOW_REQUESTS=true a sampling profiler snapshots every thread
+  stack each PROFILE_INTERVAL_MS; requests slower than METRICS_SLOW_REQUEST_MS
+  get their window dumped as a folded-stack flamegraph (speedscope.app,
+  flamegraph.pl) into PROFILE_DIR
+"""
+
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional
+import os
+import re
+import sys
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+from prometheus_client import CollectorRegistry, Counter as PromCounter, Histogram, REGISTRY
+
+
+# ============================================================================
+# METRICS CONFIGURATION
+# ============================================================================
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "10"))  # Same statement N times per request
+METRICS_SLOW_REQUEST_MS = int(os.getenv("METRICS_SLOW_REQUEST_MS", "1000"))  # Logged (and profiled if enabled)
+PROFILE_SLOW_REQUESTS = os.getenv("PROFILE_SLOW_REQUESTS", "false").lower() == "true"
+PROFILE_INTERVAL_MS = int(os.getenv("PROFILE_INTERVAL_MS", "10"))  # Sampling period
+PROFILE_WINDOW_SECONDS = int(os.getenv("PROFILE_WINDOW_SECONDS", "60"))  # Samples kept (longest dumpable request)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/agent-eagle-profiles")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+# Bound label cardinality: requests that match no route share one label
+UNMATCHED_ROUTE = "unmatched"
+
+
+# ============================================================================
+# PROMETHEUS METRICS
+# ============================================================================
+
+REQUESTS = PromCounter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements per HTTP request", ["route"],
+    buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request", ["route"],
+    buckets=LATENCY_BUCKETS
+)
+N_PLUS_ONE = PromCounter(
+    "http_request_n_plus_one_total", "Requests repeating one statement past the N+1 threshold", ["route"]
+)
+DB_STATEMENTS = PromCounter(
+    "db_statements_total", "SQL statements executed", ["origin"]
+)
+DB_STATEMENT_TIME = PromCounter(
+    "db_statement_seconds_total", "Time spent executing SQL", ["origin"]
+)
+PROFILES_WRITTEN = PromCounter(
+    "request_profiles_written_total", "Slow-request flamegraphs written"
+)
+
+
+def metrics_registry():
+    """Registry to expose; aggregates all workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+# ============================================================================
+# PER-REQUEST STATS
+# ============================================================================
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement) -> str:
+    """Statement shape for N+1 detection: literals collapsed, whitespace squeezed"""
+    if isinstance(statement, bytes):
+        statement = statement.decode("utf-8", "replace")
+    return _WHITESPACE.sub(" ", _LITERALS.sub("?", str(statement))).strip()
+
+
+class RequestStats:
+    """SQL counters for one request; queries may run on threadpool threads"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement, elapsed: float):
+        shape = normalize_statement(statement)
+        with self._lock:
+            self.queries += 1
+            self.db_seconds += elapsed
+            self.statements[shape] += 1
+
+    def repeated_statement(self):
+        """(statement, count) of the most repeated statement past the N+1 threshold, else None"""
+        with self._lock:
+            if not self.statements:
+                return None
+            statement, count = self.statements.most_common(1)[0]
+        return (statement, count) if count >= METRICS_N_PLUS_ONE_THRESHOLD else None
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (shown in browser devtools)"""
+        total_ms = (time.perf_counter() - self.started) * 1000
+        return f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries", app;dur={total_ms:.1f}'
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def record_query(statement, elapsed: float):
+    """Attribute one executed statement to the current request (if any)"""
+    stats = current_request.get()
+    origin = "request" if stats is not None else "background"
+    DB_STATEMENTS.labels(origin).inc()
+    DB_STATEMENT_TIME.labels(origin).inc(elapsed)
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+# ============================================================================
+# DRIVER HOOKS
+# ============================================================================
+
+def instrument_engine(engine):
+    """Count and time every statement run through a SQLAlchemy engine"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        record_query(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # Failed statements never reach after_cursor_execute
+        stack = context.connection.info.get("query_started") if context.connection is not None else None
+        if stack:
+            record_query(context.statement or "", time.perf_counter() - stack.pop())
+
+    return engine
+
+
+class _TimedCursorMixin:
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+
+_timed_cursor_classes: Dict[type, type] = {}
+
+
+def _timed_cursor_class(base: type) -> type:
+    cls = _timed_cursor_classes.get(base)
+    if cls is None:
+        cls = type(f"Timed{base.__name__}", (_TimedCursorMixin, base), {})
+        _timed_cursor_classes[base] = cls
+    return cls
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """
+    psycopg2 connection whose cursors report to record_query
+
+    Pass as connection_factory; caller-supplied cursor factories
+    (RealDictCursor etc.) keep working and are wrapped too.
+    """
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.pop("cursor_factory", None) or self.cursor_factory or psycopg2.extensions.cursor
+        return super().cursor(*args, cursor_factory=_timed_cursor_class(base), **kwargs)
+
+
+# ============================================================================
+# SLOW-REQUEST PROFILER
+# ============================================================================
+
+# Innermost frames of threads that are parked, not working
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+
+def _fold(frame, max_depth: int = 128) -> Optional[str]:
+    if frame.f_code.co_filename.endswith(_IDLE_FILES):
+        return None
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's stack into a rolling window while enabled
+
+    Samples are process-wide (the event loop interleaves requests), so a dump
+    shows everything the worker did while the slow request was in flight.
+    """
+
+    def __init__(self, interval_ms: int = PROFILE_INTERVAL_MS, window_seconds: int = PROFILE_WINDOW_SECONDS):
+        self.interval = interval_ms / 1000
+        self.window = window_seconds
+        self.enabled = False
+        self.profiles_written = 0
+        self._samples: deque = deque()  # (monotonic time, [folded stacks])
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        if enabled and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+        if not enabled:
+            with self._lock:
+                self._samples.clear()
+
+    def _run(self):
+        own = threading.get_ident()
+        while self.enabled:
+            now = time.monotonic()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                folded = _fold(frame)
+                if folded:
+                    stacks.append(f"{names.get(ident, ident)};{folded}")
+            with self._lock:
+                self._samples.append((now, stacks))
+                while self._samples and self._samples[0][0] < now - self.window:
+                    self._samples.popleft()
+            time.sleep(self.interval)
+
+    def dump(self, started: float, ended: float, label: str) -> Optional[str]:
+        """Write samples between two monotonic times as folded stacks; returns the path"""
+        with self._lock:
+            stacks = Counter(stack for at, sample in self._samples if started <= at <= ended for stack in sample)
+        if not stacks:
+            return None
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_") or "request"
+        path = os.path.join(PROFILE_DIR, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{name}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self.profiles_written += 1
+        PROFILES_WRITTEN.inc()
+        return path
+
+
+# Process-wide profiler; toggled by PROFILE_SLOW_REQUESTS or POST /metrics/profiling
+profiler = SamplingProfiler()
+if PROFILE_SLOW_REQUESTS:
+    profiler.set_enabled(True)
+
+
+# ============================================================================
+# OBSERVATION
+# ============================================================================
+
+def observe_request(method: str, route: str, status: int, stats: RequestStats,
+                    started_monotonic: float, streaming: bool = False):
+    """Record a finished request; flags N+1 and slow requests"""
+    elapsed = time.perf_counter() - stats.started
+    REQUESTS.labels(method, route, str(status)).inc()
+    REQUEST_LATENCY.labels(method, route).observe(elapsed)
+    REQUEST_QUERIES.labels(route).observe(stats.queries)
+    REQUEST_DB_TIME.labels(route).observe(stats.db_seconds)
+
+    repeated = stats.repeated_statement()
+    if repeated:
+        N_PLUS_ONE.labels(route).inc()
+        statement, count = repeated
+        print(f"[WARN] Possible N+1 on {method} {route}: {count}x {statement[:160]}")
+
+    # Long-lived streams (SSE) are slow by design
+    if streaming or elapsed * 1000 < METRICS_SLOW_REQUEST_MS:
+        return
+    summary = f"{method} {route} took {elapsed * 1000:.0f}ms ({stats.queries} queries, {stats.db_seconds * 1000:.0f}ms in SQL)"
+    path = profiler.dump(started_monotonic, time.monotonic(), f"{method} {route}") if profiler.enabled else None
+    print(f"[WARN] Slow request: {summary}" + (f" - profile {path}" if path else ""))
@@ -0,0 +1,339 @@
+"""
+Response Cache
+Read-through cache for hot public GET endpoints
+
+Usage:
+    @router.get("/categories")
+    @cached_response(ttl=60, tags=["agents", "categories"])
+    async def list_categories(...): ...
+
+    # on the write path
+    response_cache.invalidate("categories")
+
+- Keys are built from the endpoint name + its query/path parameters
+- Entries live in an in-process LRU (default) or a shared Redis backend
+  (RESPONSE_CACHE_BACKEND=redis, uses REDIS_URL)
+- Concurrent misses for the same key are coalesced: one request computes,
+  the rest await its result (single-flight)
+- Tags are versioned: invalidate(tag) bumps the tag version, which changes
+  the key of every entry carrying that tag. Stale entries age out via LRU/TTL.
+- Every write path for a tagged resource must invalidate its tag. A tag
+  with no API write path (e.g. "instruments", edited only by migrations and
+  seed scripts) is TTL-only: changes show up when its entries expire.
+- Responses carry ETag + Cache-Control; If-None-Match returns 304
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import enum
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+
+# ============================================================================
+# CACHE CONFIGURATION
+# ============================================================================
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # memory | redis
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))  # memory backend LRU bound
+RESPONSE_CACHE_KEY_PREFIX = os.getenv("RESPONSE_CACHE_KEY_PREFIX", "rc:")
+REDIS_URL = os.getenv("REDIS_URL")
+
+
+class MemoryBackend:
+    """Per-process LRU with per-entry TTL"""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tag_versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def tag_versions(self, tags: List[str]) -> List[int]:
+        with self._lock:
+            return [self._tag_versions.get(tag, 0) for tag in tags]
+
+    def bump_tag(self, tag: str):
+        with self._lock:
+            self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared across workers/instances; tag versions are Redis counters"""
+
+    blocking = True
+
+    def __init__(self, url: str):
+        import redis  # Optional dependency, only needed for RESPONSE_CACHE_BACKEND=redis
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._redis.get(RESPONSE_CACHE_KEY_PREFIX + key)
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self._redis.set(RESPONSE_CACHE_KEY_PREFIX + key, value, ex=ttl)
+
+    def tag_versions(self, tags: List[str]) -> List[int]:
+        if not tags:
+            return []
+        values = self._redis.mget([f"{RESPONSE_CACHE_KEY_PREFIX}tag:{tag}" for tag in tags])
+        return [int(v) if v else 0 for v in values]
+
+    def bump_tag(self, tag: str):
+        self._redis.incr(f"{RESPONSE_CACHE_KEY_PREFIX}tag:{tag}")
+
+    def size(self) -> int:
+        return -1  # Not tracked for the shared backend
+
+
+def _make_backend():
+    if RESPONSE_CACHE_BACKEND == "redis" and REDIS_URL:
+        try:
+            return RedisBackend(REDIS_URL)
+        except ImportError:
+            print("[WARN] redis package not installed - response cache falling back to memory")
+    return MemoryBackend()
+
+
+class ResponseCache:
+    """Backend + single-flight bookkeeping + counters"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or _make_backend()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    async def _call(self, fn, *args):
+        if self.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self._call(self.backend.get, key)
+        except Exception as e:
+            # A cache outage must never take the endpoint down
+            self.errors += 1
+            print(f"[WARN] Response cache get failed: {e}")
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        try:
+            await self._call(self.backend.set, key, value, ttl)
+        except Exception as e:
+            self.errors += 1
+            print(f"[WARN] Response cache set failed: {e}")
+
+    async def tag_versions(self, tags: List[str]) -> List[int]:
+        try:
+            return await self._call(self.backend.tag_versions, tags)
+        except Exception as e:
+            self.errors += 1
+            print(f"[WARN] Response cache tag lookup failed: {e}")
+            return [0] * len(tags)
+
+    def invalidate(self, *tags: str):
+        """
+        Invalidate every cached response carrying any of these tags
+
+        Safe to call from sync write paths; failures are logged, not raised.
+        """
+        for tag in tags:
+            try:
+                self.backend.bump_tag(tag)
+            except Exception as e:
+                self.errors += 1
+                print(f"[WARN] Response cache invalidate '{tag}' failed: {e}")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "not_modified": self.not_modified,
+            "evictions": self.backend.evictions,
+            "errors": self.errors,
+            "inflight": len(self._inflight)
+        }
+
+
+# Process-wide cache shared by all decorated endpoints
+response_cache = ResponseCache()
+
+
+# ============================================================================
+# DECORATOR
+# ============================================================================
+
+def _key_value(value: Any):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return [_key_value(v) for v in value]
+    return value
+
+
+def _key_params(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Request parameters that identify a response (skips db sessions etc.)"""
+    params = {}
+    for name, value in kwargs.items():
+        value = _key_value(value)
+        if value is None or isinstance(value, (str, int, float, bool, list)):
+            params[name] = value
+    return params
+
+
+def _encode_entry(etag: str, body: bytes) -> bytes:
+    return etag.encode() + b"\n" + body
+
+
+def _decode_entry(entry: bytes) -> Tuple[str, bytes]:
+    etag, _, body = entry.partition(b"\n")
+    return etag.decode(), body
+
+
+def _respond(request: Request, etag: str, body: bytes, ttl: int, cache_status: str) -> Response:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={ttl}",
+        "X-Cache": cache_status
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_response(ttl: int, tags: Iterable[str] = ()):
+    """
+    Cache a GET endpoint's JSON response for `ttl` seconds
+
+    tags may reference endpoint parameters, e.g. "category:{slug}".
+    Non-JSON results (Response objects) and errors are never cached.
+    """
+    tags = list(tags)
+
+    def decorator(func: Callable):
+        is_coroutine = asyncio.iscoroutinefunction(func)
+        name = f"{func.__module__}.{func.__name__}"
+
+        # Expose the original parameters plus the Request to FastAPI
+        signature = inspect.signature(func)
+        params = list(signature.parameters.values())
+        params.append(inspect.Parameter("_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        async def compute(kwargs):
+            if is_coroutine:
+                return await func(**kwargs)
+            return await run_in_threadpool(func, **kwargs)
+
+        @functools.wraps(func)
+        async def wrapper(*args, _cache_request: Request, **kwargs):
+            if not RESPONSE_CACHE_ENABLED:
+                return await compute(kwargs)
+
+            key_params = _key_params(kwargs)
+            entry_tags = [tag.format(**key_params) for tag in tags]
+            versions = await response_cache.tag_versions(entry_tags)
+            raw_key = json.dumps([name, key_params, versions], sort_keys=True, default=str)
+            key = hashlib.sha256(raw_key.encode()).hexdigest()
+
+            entry = await response_cache.get(key)
+            if entry is not None:
+                response_cache.hits += 1
+                etag, body = _decode_entry(entry)
+                return _respond(_cache_request, etag, body, ttl, "HIT")
+
+            response_cache.misses += 1
+
+            # Single-flight: one computation per key per process
+            inflight = response_cache._inflight.get(key)
+            if inflight is not None:
+                response_cache.coalesced += 1
+                try:
+                    result = await asyncio.shield(inflight)
+                except asyncio.CancelledError:
+                    if not inflight.cancelled():
+                        raise
+                    # Leader's client went away - compute for this request instead
+                    return await compute(kwargs)
+                if isinstance(result, Response):
+                    return result
+                etag, body = result
+                return _respond(_cache_request, etag, body, ttl, "COALESCED")
+
+            future = asyncio.get_event_loop().create_future()
+            response_cache._inflight[key] = future
+            try:
+                result = await compute(kwargs)
+                if isinstance(result, Response):
+                    future.set_result(result)
+                    return result
+
+                body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode()
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                await response_cache.set(key, _encode_entry(etag, body), ttl)
+                future.set_result((etag, body))
+                return _respond(_cache_request, etag, body, ttl, "MISS")
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                # Waiters see the same error (e.g. 404 HTTPException)
+                future.set_exception(e)
+                future.exception()  # Mark retrieved when nobody is waiting
+                raise
+            finally:
+                response_cache._inflight.pop(key, None)
+
+        wrapper.__signature__ = signature.replace(parameters=params)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,395 @@
+"""
+Stripe Webhook Queue
+Durable, idempotent processing for Stripe webhook events
+
+Flow:
+1. /webhooks/stripe verifies the signature, inserts the raw event and acks
+   (one indexed INSERT - latency does not depend on what the event triggers)
+2. The event id is the primary key, so Stripe retries and replays of an
+   already stored event are acked without being queued again
+3. Workers claim events with FOR UPDATE SKIP LOCKED, in Stripe order; an
+   event is only claimable once every earlier event for the same payment
+   intent (ordering_key) has been processed, so a payment intent's events
+   never run concurrently or out of order
+4. Failures retry with exponential backoff; exhausted events are dead-lettered
+
+Run standalone workers (scale throughput by adding processes):
+    python -m services.stripe_webhook_queue
+"""
+
+from typing import Dict, List, Optional
+import asyncio
+import json
+import os
+import random
+import socket
+
+from database.base import get_engine, get_session_local
+
+
+# ============================================================================
+# QUEUE CONFIGURATION
+# ============================================================================
+
+STRIPE_WEBHOOK_WORKER_CONCURRENCY = int(os.getenv("STRIPE_WEBHOOK_WORKER_CONCURRENCY", "4"))  # 0 disables the in-app worker
+STRIPE_WEBHOOK_MAX_ATTEMPTS = int(os.getenv("STRIPE_WEBHOOK_MAX_ATTEMPTS", "8"))
+STRIPE_WEBHOOK_BACKOFF_BASE_SECONDS = int(os.getenv("STRIPE_WEBHOOK_BACKOFF_BASE_SECONDS", "5"))
+STRIPE_WEBHOOK_BACKOFF_MAX_SECONDS = int(os.getenv("STRIPE_WEBHOOK_BACKOFF_MAX_SECONDS", "900"))
+STRIPE_WEBHOOK_LOCK_TIMEOUT_SECONDS = int(os.getenv("STRIPE_WEBHOOK_LOCK_TIMEOUT_SECONDS", "300"))  # Reclaim events from crashed workers
+STRIPE_WEBHOOK_POLL_INTERVAL_SECONDS = float(os.getenv("STRIPE_WEBHOOK_POLL_INTERVAL_SECONDS", "1"))
+
+
+class EventStatus:
+    """Webhook event lifecycle"""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    DEAD = "dead"
+
+
+def backoff_seconds(attempts: int) -> int:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped"""
+    delay = STRIPE_WEBHOOK_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1))
+    delay = min(delay, STRIPE_WEBHOOK_BACKOFF_MAX_SECONDS)
+    return int(delay * random.uniform(0.8, 1.2))
+
+
+def ordering_key(event: Dict) -> str:
+    """
+    Events sharing a key are applied one at a time, in order: the payment
+    intent for payment_intent.* and charge/refund/dispute events, else the
+    object itself (e.g. a transfer)
+    """
+    obj = event["data"]["object"]
+    if obj.get("object") == "payment_intent":
+        return obj["id"]
+    return obj.get("payment_intent") or obj.get("id") or event["id"]
+
+
+class StripeWebhookQueue:
+    """
+    Queue operations over the stripe_webhook_events table
+
+    Uses the pooled engine: intake runs on every webhook, so it must not pay
+    for a new connection per request.
+    """
+
+    def _execute(self, sql: str, params: dict):
+        from sqlalchemy import text
+        with get_engine().begin() as conn:
+            return conn.execute(text(sql), params)
+
+    def record(self, payload: bytes, event: Dict) -> bool:
+        """
+        Store a verified event for processing
+
+        Returns False if the event id was already stored (Stripe retry/replay).
+        """
+        result = self._execute("""
+            INSERT INTO stripe_webhook_events
+                (event_id, event_type, ordering_key, stripe_created_at, payload)
+            VALUES (:event_id, :event_type, :ordering_key, to_timestamp(:created), CAST(:payload AS jsonb))
+            ON CONFLICT (event_id) DO NOTHING
+        """, {
+            "event_id": event["id"],
+            "event_type": event["type"],
+            "ordering_key": ordering_key(event),
+            "created": event.get("created") or 0,
+            "payload": payload.decode("utf-8")
+        })
+        return result.rowcount > 0
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[Dict]:
+        """
+        Claim up to `limit` due events for this worker
+
+        Skips events whose payment intent still has an earlier pending or
+        processing event. Processing events whose lock is older than
+        STRIPE_WEBHOOK_LOCK_TIMEOUT_SECONDS (crashed worker) become claimable again.
+        """
+        rows = self._execute("""
+            WITH due AS (
+                SELECT e.event_id
+                FROM stripe_webhook_events e
+                WHERE (
+                    (e.status = 'pending' AND e.run_after <= NOW())
+                    OR (e.status = 'processing' AND e.locked_at <= NOW() - make_interval(secs => :lock_timeout))
+                )
+                AND NOT EXISTS (
+                    SELECT 1 FROM stripe_webhook_events earlier
+                    WHERE earlier.ordering_key = e.ordering_key
+                      AND earlier.status IN ('pending', 'processing')
+                      AND (earlier.stripe_created_at, earlier.seq) < (e.stripe_created_at, e.seq)
+                )
+                ORDER BY e.stripe_created_at, e.seq
+                LIMIT :limit
+                FOR UPDATE OF e SKIP LOCKED
+            )
+            UPDATE stripe_webhook_events e
+            SET status = 'processing',
+                attempts = e.attempts + 1,
+                locked_by = :worker_id,
+                locked_at = NOW()
+            FROM due
+            WHERE e.event_id = due.event_id
+            RETURNING e.event_id, e.event_type, e.payload, e.attempts
+        """, {
+            "lock_timeout": STRIPE_WEBHOOK_LOCK_TIMEOUT_SECONDS,
+            "limit": limit,
+            "worker_id": worker_id
+        }).fetchall()
+        return [
+            {"event_id": r[0], "event_type": r[1], "event": r[2], "attempts": r[3]}
+            for r in rows
+        ]
+
+    def complete(self, event_id: str, result: Dict):
+        """Mark event processed"""
+        self._execute("""
+            UPDATE stripe_webhook_events
+            SET status = 'processed', result = CAST(:result AS jsonb), last_error = NULL,
+                locked_by = NULL, processed_at = NOW()
+            WHERE event_id = :event_id
+        """, {"result": json.dumps(result, default=str), "event_id": event_id})
+
+    def retry_later(self, event_id: str, attempts: int, error: str):
+        """Release event back to the queue with exponential backoff (later events for its key wait)"""
+        self._execute("""
+            UPDATE stripe_webhook_events
+            SET status = 'pending', last_error = :error, locked_by = NULL, locked_at = NULL,
+                run_after = NOW() + make_interval(secs => :delay)
+            WHERE event_id = :event_id
+        """, {"error": error, "delay": backoff_seconds(attempts), "event_id": event_id})
+
+    def dead_letter(self, event_id: str, error: str):
+        """Move event to the dead-letter state (unblocks later events for its key)"""
+        self._execute("""
+            UPDATE stripe_webhook_events
+            SET status = 'dead', last_error = :error, locked_by = NULL, processed_at = NOW()
+            WHERE event_id = :event_id
+        """, {"error": error, "event_id": event_id})
+
+    def requeue_dead(self, event_id: str) -> bool:
+        """Give a dead-lettered event a fresh set of attempts"""
+        row = self._execute("""
+            UPDATE stripe_webhook_events
+            SET status = 'pending', attempts = 0, run_after = NOW(), processed_at = NULL
+            WHERE event_id = :event_id AND status = 'dead'
+            RETURNING event_id
+        """, {"event_id": event_id}).fetchone()
+        return row is not None
+
+    def list_dead(self, limit: int = 50) -> List[Dict]:
+        result = self._execute("""
+            SELECT event_id, event_type, ordering_key, attempts, last_error, received_at, processed_at
+            FROM stripe_webhook_events WHERE status = 'dead'
+            ORDER BY processed_at DESC LIMIT :limit
+        """, {"limit": limit})
+        return [dict(row._mapping) for row in result.fetchall()]
+
+    def stats(self) -> Dict:
+        """Event counts by status, and how far behind the oldest pending event is"""
+        result = self._execute("""
+            SELECT status, COUNT(*), EXTRACT(EPOCH FROM NOW() - MIN(received_at))
+            FROM stripe_webhook_events
+            WHERE status <> 'processed' OR processed_at > NOW() - INTERVAL '1 day'
+            GROUP BY status
+        """, {})
+        by_status = {}
+        oldest_pending_seconds = None
+        for status, n, age in result.fetchall():
+            by_status[status] = n
+            if status == EventStatus.PENDING and age is not None:
+                oldest_pending_seconds = float(age)
+        return {"by_status": by_status, "oldest_pending_seconds": oldest_pending_seconds}
+
+
+# ============================================================================
+# EVENT HANDLERS
+# ============================================================================
+
+def apply_event(db, event: Dict) -> Dict:
+    """
+    Apply one Stripe event to the marketplace (synchronous ORM work)
+
+    Safe to re-run for the same event: a worker that crashes after commit
+    leaves the event to be reclaimed, so handlers skip work already done.
+    """
+    from payments.stripe_handler import stripe_handler
+    from models.transaction import Transaction, TransactionStatus
+    from models.listing import Listing
+
+    result = stripe_handler.interpret_event(event)
+    transaction_id = result.get('transaction_id')
+
+    if result.get('action') == 'update_transaction_status' and transaction_id:
+        transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+        if not transaction:
+            return {**result, 'applied': False, 'reason': 'transaction not found'}
+
+        metadata = transaction.metadata or {}
+        if metadata.get('payment_confirmed_at'):
+            return {**result, 'applied': False, 'reason': 'already confirmed'}
+
+        # [WARN] CRITICAL: Payment confirmed by Stripe - NOW we can fulfill
+        transaction.status = TransactionStatus.PROCESSING  # Payment received, fulfilling...
+        transaction.metadata = {**metadata, 'payment_confirmed_at': result['processed_at']}
+
+        # Check if this is an arbitrage listing
+        listing = db.query(Listing).filter(Listing.id == transaction.listing_id).first()
+        if listing and listing.metadata and listing.metadata.get('arbitrage_listing'):
+            # ONLY NOW: Payment confirmed -> queue fulfillment (idempotent while a job is live)
+            from services.fulfillment_queue import FulfillmentJobQueue
+            print(f"[WEBHOOK] Payment confirmed for {transaction_id} - queueing fulfillment")
+            job = FulfillmentJobQueue().enqueue(str(transaction.id), listing.metadata.get('source_platform') or 'default')
+            result['fulfillment_job_id'] = job['job_id']
+
+        # After fulfillment completes, the fulfillment engine marks the
+        # transaction COMPLETED and transfers to the seller
+        db.commit()
+
+    elif result.get('action') == 'mark_transaction_failed' and transaction_id:
+        transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+        if transaction:
+            transaction.status = TransactionStatus.FAILED
+            transaction.status_message = result.get('error') or 'Payment failed'
+            db.commit()
+
+    return {**result, 'applied': True}
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+class StripeWebhookWorker:
+    """
+    Async worker that drains the webhook queue
+
+    Handlers are synchronous ORM code, so each event runs in a thread with
+    its own session; `concurrency` events (distinct payment intents) at a time.
+    """
+
+    def __init__(self, concurrency: int = STRIPE_WEBHOOK_WORKER_CONCURRENCY):
+        self.concurrency = max(1, concurrency)
+        self.queue = StripeWebhookQueue()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._stopping = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._in_flight = set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def wake(self):
+        """Claim now instead of at the next poll (called after intake)"""
+        self._wake.set()
+
+    async def run(self):
+        """Claim and process events until stop() is called"""
+        print(f"[WEBHOOK] Worker {self.worker_id} started (concurrency={self.concurrency})")
+
+        claim_failing = False
+        while not self._stopping.is_set():
+            self._wake.clear()
+            free_slots = self.concurrency - len(self._in_flight)
+            events = []
+            if free_slots > 0:
+                try:
+                    events = await asyncio.to_thread(self.queue.claim, self.worker_id, free_slots)
+                    claim_failing = False
+                except Exception as e:
+                    if not claim_failing:  # Log once per outage, not every poll
+                        print(f"[WEBHOOK] Claim failed: {e}")
+                    claim_failing = True
+
+            for event in events:
+                await self._slots.acquire()
+                task = asyncio.create_task(self._run_event(event))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+            if not events:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=STRIPE_WEBHOOK_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+        # Let in-flight events finish; unfinished ones are reclaimed after the lock timeout
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        print(f"[WEBHOOK] Worker {self.worker_id} stopped")
+
+    def _process(self, event: Dict) -> Dict:
+        db = get_session_local()()
+        try:
+            return apply_event(db, event)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run_event(self, claimed: Dict):
+        event_id = claimed["event_id"]
+        try:
+            result = await asyncio.to_thread(self._process, claimed["event"])
+            await asyncio.to_thread(self.queue.complete, event_id, result)
+        except Exception as e:
+            print(f"[WEBHOOK] Event {event_id} ({claimed['event_type']}) failed: {e}")
+            try:
+                if claimed["attempts"] >= STRIPE_WEBHOOK_MAX_ATTEMPTS:
+                    await asyncio.to_thread(self.queue.dead_letter, event_id, str(e))
+                else:
+                    await asyncio.to_thread(self.queue.retry_later, event_id, claimed["attempts"], str(e))
+            except Exception as e2:
+                print(f"[WEBHOOK] Could not release event {event_id}: {e2}")
+        finally:
+            self._slots.release()
+            self._wake.set()  # A finished event may unblock the next one for its payment intent
+
+
+# ============================================================================
+# IN-APP WORKER LIFECYCLE
+# ============================================================================
+
+_app_worker: Optional[StripeWebhookWorker] = None
+_app_worker_task: Optional[asyncio.Task] = None
+
+
+def start_webhook_worker() -> Optional[StripeWebhookWorker]:
+    """Start a worker inside the API process (STRIPE_WEBHOOK_WORKER_CONCURRENCY=0 disables)"""
+    global _app_worker, _app_worker_task
+    if STRIPE_WEBHOOK_WORKER_CONCURRENCY <= 0 or _app_worker is not None:
+        return _app_worker
+
+    _app_worker = StripeWebhookWorker()
+    _app_worker_task = asyncio.create_task(_app_worker.run())
+    return _app_worker
+
+
+def wake_webhook_worker():
+    """Nudge the in-app worker, if any (standalone workers pick events up on their next poll)"""
+    if _app_worker is not None:
+        _app_worker.wake()
+
+
+async def stop_webhook_worker():
+    global _app_worker, _app_worker_task
+    if _app_worker is None:
+        return
+    _app_worker.stop()
+    await _app_worker_task
+    _app_worker = None
+    _app_worker_task = None
+
+
+if __name__ == "__main__":
+    worker = StripeWebhookWorker()
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,123 @@
+"""
+Tool Response Cache
+Idempotent response cache for /api/v1/tools/{tool_id}/execute
+
+Tools opt in by setting cache_ttl_seconds > 0. Identical calls (same tool,
+same normalized parameters) inside the TTL are served from memory instead of
+being proxied to the tool's API endpoint again, and are metered at a reduced
+cache-hit price.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+# ============================================================================
+# CACHE CONFIGURATION
+# ============================================================================
+
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1000"))  # LRU size bound
+TOOL_CACHE_MAX_TTL_SECONDS = int(os.getenv("TOOL_CACHE_MAX_TTL_SECONDS", "86400"))  # Cap author-declared TTLs at 24h
+TOOL_CACHE_HIT_PRICE_RATIO = float(os.getenv("TOOL_CACHE_HIT_PRICE_RATIO", "0.2"))  # Cache hits cost 20% of per-call price
+
+
+def make_cache_key(tool_id: str, parameters: Optional[dict]) -> str:
+    """
+    Build cache key from tool_id + normalized parameters
+
+    Parameters are serialized with sorted keys and compact separators so
+    {"a": 1, "b": 2} and {"b": 2, "a": 1} hash to the same key.
+    """
+    normalized = json.dumps(parameters or {}, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(f"{tool_id}:{normalized}".encode()).hexdigest()
+    return f"{tool_id}:{digest}"
+
+
+def cache_hit_price(per_call_price_usd: float) -> float:
+    """Price charged for a call served from cache"""
+    return round(per_call_price_usd * TOOL_CACHE_HIT_PRICE_RATIO, 6)
+
+
+class ToolResponseCache:
+    """
+    Size-bounded LRU cache with per-entry TTL
+
+    Entries are (expires_at, result). Expired entries are dropped lazily on
+    lookup; when the cache is full the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached result or None (counts as hit/miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, result = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def set(self, key: str, result: Any, ttl_seconds: int):
+        """Store result for ttl_seconds (capped at TOOL_CACHE_MAX_TTL_SECONDS)"""
+        if ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+
+        ttl_seconds = min(ttl_seconds, TOOL_CACHE_MAX_TTL_SECONDS)
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, result)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_tool(self, tool_id: str) -> int:
+        """Drop every cached response for a tool (e.g. after it is updated)"""
+        prefix = f"{tool_id}:"
+        with self._lock:
+            keys = [k for k in self._entries if k.startswith(prefix)]
+            for k in keys:
+                del self._entries[k]
+        return len(keys)
+
+    def stats(self) -> Dict:
+        """Hit-ratio metrics for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_price_ratio": TOOL_CACHE_HIT_PRICE_RATIO
+            }
+
+
+# Process-wide cache shared by all requests in this worker
+tool_response_cache = ToolResponseCache()
@@ -0,0 +1,310 @@
+"""
+Wallet Pool
+Pre-generated Solana wallets so registration never generates one inline
+
+- Filler: when the pool drops below WALLET_POOL_LOW_WATERMARK it is topped up
+  to WALLET_POOL_TARGET_SIZE. Wallets are generated in chunks by a process
+  pool (key generation, encryption, USDC address derivation) and inserted
+  in one statement per chunk.
+- claim_wallet(db): one DELETE ... RETURNING on the oldest row (SKIP LOCKED),
+  inside the caller's transaction, so a failed agent insert returns the
+  wallet to the pool
+- provision_agents(db, n): bulk-assigns pooled wallets to agents that have
+  none (e.g. crawled agents registered in bulk)
+- The API process refills every WALLET_POOL_REFILL_INTERVAL_SECONDS; an
+  advisory lock keeps workers from filling at the same time
+
+CLI:
+    python -m services.wallet_pool status
+    python -m services.wallet_pool fill [count]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+import asyncio
+import multiprocessing
+import os
+import sys
+
+
+# ============================================================================
+# POOL CONFIGURATION
+# ============================================================================
+
+WALLET_POOL_TARGET_SIZE = int(os.getenv("WALLET_POOL_TARGET_SIZE", "1000"))
+WALLET_POOL_LOW_WATERMARK = int(os.getenv("WALLET_POOL_LOW_WATERMARK", "250"))
+WALLET_POOL_REFILL_INTERVAL_SECONDS = int(os.getenv("WALLET_POOL_REFILL_INTERVAL_SECONDS", "30"))  # 0 disables
+WALLET_POOL_PROCESSES = int(os.getenv("WALLET_POOL_PROCESSES", "2"))
+WALLET_POOL_CHUNK_SIZE = int(os.getenv("WALLET_POOL_CHUNK_SIZE", "500"))  # Wallets per process task / INSERT
+
+WALLET_POOL_LOCK_ID = 0x77616c6c  # pg_try_advisory_lock key shared by every worker
+
+_CLAIM_SQL = """
+    DELETE FROM wallet_pool
+    WHERE id IN (
+        SELECT id FROM wallet_pool
+        ORDER BY id
+        LIMIT :count
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING wallet_address, wallet_private_key_encrypted, usdc_address
+"""
+
+
+# ============================================================================
+# GENERATION (runs in pool processes)
+# ============================================================================
+
+_process_manager = None
+
+
+def generate_wallets(count: int) -> List[tuple]:
+    """(wallet_address, wallet_private_key_encrypted, usdc_address) x count"""
+    global _process_manager
+    if _process_manager is None:
+        payments_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "payments")
+        if payments_dir not in sys.path:
+            sys.path.insert(0, payments_dir)
+        from solana_wallet import SolanaWalletManager
+        _process_manager = SolanaWalletManager()
+    wallets = []
+    for _ in range(count):
+        wallet = _process_manager.generate_agent_wallet()
+        wallets.append((wallet["public_key"], wallet["private_key_encrypted"], wallet["usdc_address"]))
+    return wallets
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs an event loop and DB pool is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=max(WALLET_POOL_PROCESSES, 1),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def generate_wallets_parallel(count: int) -> List[tuple]:
+    """count wallets, generated in WALLET_POOL_CHUNK_SIZE chunks across the process pool"""
+    chunks = [min(WALLET_POOL_CHUNK_SIZE, count - start) for start in range(0, count, WALLET_POOL_CHUNK_SIZE)]
+    if len(chunks) <= 1:
+        return generate_wallets(count) if count else []
+    wallets = []
+    for chunk in _get_executor().map(generate_wallets, chunks):
+        wallets.extend(chunk)
+    return wallets
+
+
+# ============================================================================
+# POOL OPERATIONS
+# ============================================================================
+
+def _wallet_record(row) -> Dict:
+    """Same shape as api.wallet_integration.create_agent_wallet()"""
+    return {
+        "wallet_address": row[0],
+        "wallet_private_key_encrypted": row[1],
+        "usdc_address": row[2],
+        "wallet_created_at": datetime.utcnow()
+    }
+
+
+def claim_wallets(db, count: int) -> List[Dict]:
+    """
+    Take up to count wallets from the pool in the caller's transaction
+    (commit with the rows that use them)
+    """
+    from sqlalchemy import text
+    rows = db.execute(text(_CLAIM_SQL), {"count": count}).fetchall()
+    return [_wallet_record(row) for row in rows]
+
+
+def claim_wallet(db, generate_if_empty: bool = True) -> Optional[Dict]:
+    """
+    A ready wallet for one new agent. If the pool is empty (or missing),
+    generates one inline when generate_if_empty, else returns None.
+    """
+    try:
+        with db.begin_nested():  # A missing table must not poison the caller's transaction
+            wallets = claim_wallets(db, 1)
+    except Exception as e:
+        print(f"[WARN] Wallet pool unavailable: {e}")
+        wallets = []
+    if wallets:
+        return wallets[0]
+    if not generate_if_empty:
+        return None
+    from api.wallet_integration import create_agent_wallet
+    return create_agent_wallet()
+
+
+def provision_agents(db, limit: int, agent_ids: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Give pooled wallets to up to limit agents that have none (oldest first,
+    or only agent_ids). Returns [{"agent_id", "wallet_address", "usdc_address"}].
+    Commits.
+    """
+    from sqlalchemy import text
+    filters = "wallet_address IS NULL"
+    params = {"limit": limit}
+    if agent_ids:
+        filters += " AND id = ANY(CAST(:agent_ids AS uuid[]))"
+        params["agent_ids"] = list(agent_ids)
+
+    rows = db.execute(text(f"""
+        WITH agents_to_fill AS (
+            SELECT id, row_number() OVER (ORDER BY created_at, id) AS n
+            FROM (
+                SELECT id, created_at FROM agents
+                WHERE {filters}
+                ORDER BY created_at, id
+                LIMIT :limit
+                FOR UPDATE SKIP LOCKED
+            ) pending
+        ),
+        claimed AS (
+            DELETE FROM wallet_pool
+            WHERE id IN (
+                SELECT id FROM wallet_pool
+                ORDER BY id
+                LIMIT (SELECT COUNT(*) FROM agents_to_fill)
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING wallet_address, wallet_private_key_encrypted, usdc_address
+        ),
+        numbered AS (
+            SELECT *, row_number() OVER (ORDER BY wallet_address) AS n FROM claimed
+        )
+        UPDATE agents a
+        SET wallet_address = w.wallet_address,
+            wallet_private_key_encrypted = w.wallet_private_key_encrypted,
+            wallet_created_at = NOW()
+        FROM agents_to_fill f
+        JOIN numbered w ON w.n = f.n
+        WHERE a.id = f.id
+        RETURNING a.id, w.wallet_address, w.usdc_address
+    """), params).fetchall()
+    db.commit()
+    return [{"agent_id": str(row[0]), "wallet_address": row[1], "usdc_address": row[2]} for row in rows]
+
+
+def pool_size(db) -> int:
+    from sqlalchemy import text
+    return db.execute(text("SELECT COUNT(*) FROM wallet_pool")).scalar()
+
+
+def fill_pool(db, count: int) -> int:
+    """Generate count wallets into the pool; returns how many were inserted"""
+    from sqlalchemy import text
+    inserted = 0
+    for start in range(0, count, WALLET_POOL_CHUNK_SIZE * max(WALLET_POOL_PROCESSES, 1)):
+        batch = min(WALLET_POOL_CHUNK_SIZE * max(WALLET_POOL_PROCESSES, 1), count - start)
+        wallets = generate_wallets_parallel(batch)
+        result = db.execute(text("""
+            INSERT INTO wallet_pool (wallet_address, wallet_private_key_encrypted, usdc_address)
+            SELECT * FROM unnest(CAST(:addresses AS text[]), CAST(:keys AS text[]), CAST(:usdc AS text[]))
+            ON CONFLICT (wallet_address) DO NOTHING
+        """), {
+            "addresses": [w[0] for w in wallets],
+            "keys": [w[1] for w in wallets],
+            "usdc": [w[2] for w in wallets]
+        })
+        db.commit()
+        inserted += result.rowcount
+    return inserted
+
+
+def refill_if_low() -> Optional[int]:
+    """
+    Top the pool up to WALLET_POOL_TARGET_SIZE if below the low watermark.
+    Returns wallets added, or None if another worker holds the lock.
+    
+    The session advisory lock belongs to one connection, so the lock, the
+    fill and the unlock all run on a single Connection checked out for the
+    whole refill (a Session hands its connection back to the pool on commit).
+    """
+    from sqlalchemy import text
+    from database.base import get_engine
+    with get_engine().connect() as conn:
+        locked = conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": WALLET_POOL_LOCK_ID}).scalar()
+        conn.commit()
+        if not locked:
+            return None
+        try:
+            size = pool_size(conn)
+            conn.commit()
+            if size >= WALLET_POOL_LOW_WATERMARK:
+                return 0
+            return fill_pool(conn, WALLET_POOL_TARGET_SIZE - size)
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": WALLET_POOL_LOCK_ID})
+            conn.commit()
+
+
+# ============================================================================
+# IN-APP FILLER
+# ============================================================================
+
+_filler_task: Optional[asyncio.Task] = None
+
+
+async def _filler_loop():
+    failing = False
+    while True:
+        try:
+            added = await asyncio.to_thread(refill_if_low)
+            if added:
+                print(f"[OK] Wallet pool refilled with {added} wallets")
+            failing = False
+        except Exception as e:
+            if not failing:  # Log once per outage, not every interval
+                print(f"[WARN] Wallet pool refill failed: {e}")
+            failing = True
+        await asyncio.sleep(WALLET_POOL_REFILL_INTERVAL_SECONDS)
+
+
+def start_wallet_pool_filler() -> Optional[asyncio.Task]:
+    """Refill now and every interval (WALLET_POOL_REFILL_INTERVAL_SECONDS=0 disables)"""
+    global _filler_task
+    if WALLET_POOL_REFILL_INTERVAL_SECONDS <= 0 or _filler_task is not None:
+        return _filler_task
+    _filler_task = asyncio.create_task(_filler_loop())
+    return _filler_task
+
+
+async def stop_wallet_pool_filler():
+    global _filler_task, _executor
+    if _filler_task is not None:
+        _filler_task.cancel()
+        try:
+            await _filler_task
+        except asyncio.CancelledError:
+            pass
+        _filler_task = None
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+if __name__ == "__main__":
+    from database.base import get_session_local
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command not in ("status", "fill"):
+        sys.exit("usage: python -m services.wallet_pool [status|fill [count]]")
+
+    session = get_session_local()()
+    try:
+        if command == "fill":
+            count = int(sys.argv[2]) if len(sys.argv) > 2 else max(WALLET_POOL_TARGET_SIZE - pool_size(session), 0)
+            print(f"[OK] Added {fill_pool(session, count)} wallets")
+        print(f"Wallet pool: {pool_size(session)} ready (target {WALLET_POOL_TARGET_SIZE}, "
+              f"refill below {WALLET_POOL_LOW_WATERMARK})")
+    finally:
+        session.close()
@@ -0,0 +1,432 @@
+"""
+Instrument Workflow Engine
+Runs an instrument's workflow as a DAG of agent calls
+
+Workflow JSON (instruments.workflow):
+    {
+        "steps": [
+            {"id": "translate", "agent_id": "<uuid>", "capability": "translation",
+             "input": {"text": "$input.review"}},
+            {"id": "summarize", "agent_id": "<uuid>", "depends_on": ["translate"],
+             "input": {"text": "$steps.translate.translated_text"}},
+            {"id": "sentiment", "agent_id": "<uuid>", "depends_on": ["translate"],
+             "timeout_seconds": 20, "retries": 2},
+            {"id": "validate", "agent_id": "<uuid>", "depends_on": ["summarize", "sentiment"]}
+        ]
+    }
+
+Without a workflow, agent_ids run as a chain (each step gets the previous output).
+
+- A step starts as soon as its dependencies complete, so independent branches
+  run concurrently and a run takes critical-path time, not the sum of steps
+- "$input[.path]" and "$steps.<id>[.path]" resolve to the producing object
+  itself - outputs are handed between steps by reference, never copied
+- Each step has its own timeout and retry budget; a failed step only skips
+  its dependents, and a retry run re-executes just failed/skipped steps
+- Every attempt is recorded in agent_executions (timing, outcome, result hash)
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+
+import httpx
+
+from database.base import get_db_connection
+from services.activity_stream import activity_stream
+
+
+# ============================================================================
+# ENGINE CONFIGURATION
+# ============================================================================
+
+INSTRUMENT_STEP_TIMEOUT_SECONDS = float(os.getenv("INSTRUMENT_STEP_TIMEOUT_SECONDS", "60"))
+INSTRUMENT_STEP_RETRIES = int(os.getenv("INSTRUMENT_STEP_RETRIES", "1"))
+INSTRUMENT_RETRY_BACKOFF_SECONDS = float(os.getenv("INSTRUMENT_RETRY_BACKOFF_SECONDS", "1"))
+INSTRUMENT_MAX_PARALLEL_STEPS = int(os.getenv("INSTRUMENT_MAX_PARALLEL_STEPS", "8"))  # Per run
+INSTRUMENT_MAX_STEPS = 50
+
+
+class WorkflowError(ValueError):
+    """Workflow definition is invalid (unknown dependency, cycle, ...)"""
+
+
+class StepStatus:
+    """Workflow step outcome"""
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SKIPPED = "skipped"  # An upstream step failed
+
+
+class WorkflowStep:
+    """One agent call in the DAG"""
+
+    def __init__(self, step_id: str, agent_id: str, depends_on: List[str], input_spec: Any,
+                 capability: str, timeout_seconds: float, retries: int):
+        self.id = step_id
+        self.agent_id = agent_id
+        self.depends_on = depends_on
+        self.input_spec = input_spec
+        self.capability = capability
+        self.timeout_seconds = timeout_seconds
+        self.retries = retries
+
+
+# ============================================================================
+# PARSING
+# ============================================================================
+
+def _default_input(depends_on: List[str]):
+    if not depends_on:
+        return "$input"
+    if len(depends_on) == 1:
+        return f"$steps.{depends_on[0]}"
+    return {dep: f"$steps.{dep}" for dep in depends_on}
+
+
+def parse_workflow(workflow: Optional[Dict], agent_ids: List[str]) -> List[WorkflowStep]:
+    """
+    Steps of an instrument in topological order
+
+    Raises WorkflowError for duplicate ids, unknown dependencies or cycles.
+    """
+    raw_steps = (workflow or {}).get("steps") or []
+    if not raw_steps:
+        # Legacy instruments: agent_ids in execution order
+        raw_steps = [
+            {"id": f"step_{i + 1}", "agent_id": agent_id, "depends_on": [f"step_{i}"] if i else []}
+            for i, agent_id in enumerate(agent_ids)
+        ]
+    if not raw_steps:
+        raise WorkflowError("Instrument has no workflow steps or agents")
+    if len(raw_steps) > INSTRUMENT_MAX_STEPS:
+        raise WorkflowError(f"Workflow exceeds {INSTRUMENT_MAX_STEPS} steps")
+
+    steps: Dict[str, WorkflowStep] = {}
+    for i, raw in enumerate(raw_steps):
+        step_id = str(raw.get("id") or f"step_{i + 1}")
+        if step_id in steps:
+            raise WorkflowError(f"Duplicate step id '{step_id}'")
+        agent_id = raw.get("agent_id") or (agent_ids[i] if i < len(agent_ids) else None)
+        if not agent_id:
+            raise WorkflowError(f"Step '{step_id}' has no agent_id")
+        depends_on = [str(dep) for dep in raw.get("depends_on") or []]
+        steps[step_id] = WorkflowStep(
+            step_id=step_id,
+            agent_id=str(agent_id),
+            depends_on=depends_on,
+            input_spec=raw["input"] if "input" in raw else _default_input(depends_on),
+            capability=raw.get("capability") or "instrument_step",
+            timeout_seconds=float(raw.get("timeout_seconds") or INSTRUMENT_STEP_TIMEOUT_SECONDS),
+            retries=int(raw.get("retries", INSTRUMENT_STEP_RETRIES))
+        )
+
+    for step in steps.values():
+        for dep in step.depends_on:
+            if dep not in steps:
+                raise WorkflowError(f"Step '{step.id}' depends on unknown step '{dep}'")
+
+    # Kahn's algorithm: topological order, or a cycle
+    remaining = {step_id: len(step.depends_on) for step_id, step in steps.items()}
+    dependents: Dict[str, List[str]] = {step_id: [] for step_id in steps}
+    for step in steps.values():
+        for dep in step.depends_on:
+            dependents[dep].append(step.id)
+
+    order = []
+    ready = [step_id for step_id, count in remaining.items() if count == 0]
+    while ready:
+        step_id = ready.pop(0)
+        order.append(steps[step_id])
+        for child in dependents[step_id]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                ready.append(child)
+
+    if len(order) != len(steps):
+        cyclic = sorted(step_id for step_id, count in remaining.items() if count > 0)
+        raise WorkflowError(f"Workflow has a dependency cycle through: {', '.join(cyclic)}")
+    return order
+
+
+def _lookup(value: Any, path: List[str]):
+    for key in path:
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return None
+    return value
+
+
+def resolve_refs(spec: Any, inputs: Any, outputs: Dict[str, Any]):
+    """
+    Build a step input from its spec
+
+    Referenced objects are returned as-is (shared, not copied); only the
+    containers written in the spec itself are new.
+    """
+    if isinstance(spec, str) and spec.startswith("$"):
+        parts = spec[1:].split(".")
+        if parts[0] == "input":
+            return _lookup(inputs, parts[1:])
+        if parts[0] == "steps" and len(parts) >= 2:
+            return _lookup(outputs.get(parts[1]), parts[2:])
+        return spec
+    if isinstance(spec, dict):
+        return {key: resolve_refs(value, inputs, outputs) for key, value in spec.items()}
+    if isinstance(spec, list):
+        return [resolve_refs(value, inputs, outputs) for value in spec]
+    return spec
+
+
+# ============================================================================
+# EXECUTION
+# ============================================================================
+
+class WorkflowEngine:
+    """
+    Executes one instrument run
+
+    Agent calls share one pooled httpx.AsyncClient per run; database writes
+    (agent_executions rows) run in a thread so the event loop never blocks.
+    """
+
+    def __init__(self, instrument_id: str, steps: List[WorkflowStep],
+                 max_parallel: int = INSTRUMENT_MAX_PARALLEL_STEPS):
+        self.instrument_id = instrument_id
+        self.steps = steps
+        self._by_id = {step.id: step for step in steps}
+        self._slots = asyncio.Semaphore(max(1, max_parallel))
+        self.endpoints: Dict[str, Optional[str]] = {}
+
+    async def run(self, inputs: Any, previous: Optional[Dict] = None) -> Dict:
+        """
+        Run every step not already completed in `previous` (a prior run's results)
+
+        Returns the results document stored in instrument_executions.results.
+        """
+        records: Dict[str, Dict] = {}
+        outputs: Dict[str, Any] = {}
+        for step_id, record in ((previous or {}).get("steps") or {}).items():
+            if step_id in self._by_id and record.get("status") == StepStatus.COMPLETED:
+                records[step_id] = record
+                outputs[step_id] = record.get("output")
+
+        pending = [step for step in self.steps if step.id not in records]
+        self.endpoints = await asyncio.to_thread(_load_endpoints, [step.agent_id for step in pending])
+
+        started = time.perf_counter()
+        running: Dict[asyncio.Task, str] = {}
+        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=INSTRUMENT_MAX_PARALLEL_STEPS * 2)) as client:
+            while pending or running:
+                # Steps are in topological order, so one pass propagates skips down chains
+                for step in list(pending):
+                    statuses = [records[dep]["status"] if dep in records else None for dep in step.depends_on]
+                    if any(status in (StepStatus.FAILED, StepStatus.SKIPPED) for status in statuses):
+                        records[step.id] = {
+                            "status": StepStatus.SKIPPED,
+                            "agent_id": step.agent_id,
+                            "error": "Upstream step did not complete"
+                        }
+                        pending.remove(step)
+                    elif all(status == StepStatus.COMPLETED for status in statuses):
+                        task = asyncio.create_task(self._run_step(step, inputs, outputs, client))
+                        running[task] = step.id
+                        pending.remove(step)
+
+                if not running:
+                    continue
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step_id = running.pop(task)
+                    records[step_id] = task.result()
+                    if records[step_id]["status"] == StepStatus.COMPLETED:
+                        outputs[step_id] = records[step_id]["output"]
+
+        terminal = [step.id for step in self.steps
+                    if not any(step.id in other.depends_on for other in self.steps)]
+        return {
+            "status": "complete" if all(r["status"] == StepStatus.COMPLETED for r in records.values()) else "failed",
+            "steps": {step.id: records[step.id] for step in self.steps},
+            "terminal_steps": terminal,
+            "elapsed_ms": int((time.perf_counter() - started) * 1000),
+            "critical_path_ms": self._critical_path_ms(records),
+            "total_step_ms": sum(r.get("duration_ms", 0) for r in records.values())
+        }
+
+    def _critical_path_ms(self, records: Dict[str, Dict]) -> int:
+        finish: Dict[str, int] = {}
+        for step in self.steps:
+            upstream = max((finish[dep] for dep in step.depends_on), default=0)
+            finish[step.id] = upstream + records.get(step.id, {}).get("duration_ms", 0)
+        return max(finish.values(), default=0)
+
+    async def _run_step(self, step: WorkflowStep, inputs: Any, outputs: Dict[str, Any],
+                        client: httpx.AsyncClient) -> Dict:
+        """Run one step with its timeout/retry budget; never raises"""
+        step_input = resolve_refs(step.input_spec, inputs, outputs)
+        record = {"status": StepStatus.FAILED, "agent_id": step.agent_id, "attempts": 0}
+        step_started = time.perf_counter()
+
+        async with self._slots:
+            for attempt in range(step.retries + 1):
+                if attempt:
+                    await asyncio.sleep(INSTRUMENT_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+
+                record["attempts"] += 1
+                started_at = datetime.utcnow()
+                attempt_started = time.perf_counter()
+                try:
+                    output, body = await asyncio.wait_for(
+                        self._call_agent(step, step_input, client), step.timeout_seconds
+                    )
+                except asyncio.TimeoutError:
+                    error_code, error = "timeout", f"Timed out after {step.timeout_seconds:g}s"
+                except Exception as e:
+                    error_code, error = "agent_error", str(e) or type(e).__name__
+                else:
+                    elapsed_ms = int((time.perf_counter() - attempt_started) * 1000)
+                    record["execution_id"] = await self._record_attempt(
+                        step, started_at, elapsed_ms, "completed", body=body
+                    )
+                    record.update({
+                        "status": StepStatus.COMPLETED,
+                        "execution_time_ms": elapsed_ms,
+                        "output": output
+                    })
+                    record.pop("error", None)
+                    break
+
+                elapsed_ms = int((time.perf_counter() - attempt_started) * 1000)
+                record["execution_id"] = await self._record_attempt(
+                    step, started_at, elapsed_ms, "timeout" if error_code == "timeout" else "failed",
+                    error_code=error_code, error=error
+                )
+                record["error"] = error
+
+        record["duration_ms"] = int((time.perf_counter() - step_started) * 1000)
+        activity_stream.publish(
+            "execution",
+            execution_id=record.get("execution_id"),
+            status=record["status"],
+            capability=step.capability,
+            instrument_id=self.instrument_id
+        )
+        return record
+
+    async def _call_agent(self, step: WorkflowStep, step_input: Any, client: httpx.AsyncClient):
+        endpoint = self.endpoints.get(step.agent_id)
+        if not endpoint:
+            raise WorkflowError(f"Agent {step.agent_id} has no execution endpoint")
+
+        response = await client.post(endpoint, json={
+            "protocol_version": "1.0",
+            "requesting_agent": {"id": f"instrument:{self.instrument_id}"},
+            "task": {
+                "type": step.capability,
+                "input": step_input,
+                "requirements": {
+                    "max_execution_time_ms": int(step.timeout_seconds * 1000),
+                    "format": "json"
+                }
+            }
+        }, timeout=step.timeout_seconds)
+        response.raise_for_status()
+
+        data = response.json()
+        output = data.get("result", data) if isinstance(data, dict) else data
+        return output, response.content
+
+    async def _record_attempt(self, step: WorkflowStep, started_at: datetime, elapsed_ms: int,
+                              status: str, body: bytes = b"", error_code: Optional[str] = None,
+                              error: Optional[str] = None) -> Optional[str]:
+        try:
+            return await asyncio.to_thread(
+                _insert_execution, self.instrument_id, step, started_at, elapsed_ms,
+                status, body, error_code, error
+            )
+        except Exception as e:
+            # Tracking must not fail the workflow
+            print(f"[WARN] Could not record step '{step.id}' of instrument {self.instrument_id}: {e}")
+            return None
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+def _load_endpoints(agent_ids: List[str]) -> Dict[str, Optional[str]]:
+    if not agent_ids:
+        return {}
+    conn = get_db_connection()
+    if conn is None:
+        raise RuntimeError("Database not available")
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT id::text, api_endpoint FROM agents WHERE id::text = ANY(%s)",
+            (list(set(agent_ids)),)
+        )
+        endpoints = dict(cur.fetchall())
+        cur.close()
+        return endpoints
+    finally:
+        conn.close()
+
+
+def _insert_execution(instrument_id: str, step: WorkflowStep, started_at: datetime, elapsed_ms: int,
+                      status: str, body: bytes, error_code: Optional[str], error: Optional[str]) -> str:
+    execution_id = str(uuid.uuid4())
+    success = status == "completed"
+    conn = get_db_connection()
+    if conn is None:
+        raise RuntimeError("Database not available")
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO agent_executions (
+                id, requesting_agent_id, executing_agent_id,
+                capability_requested, task_type, status,
+                started_at, completed_at, execution_time_ms,
+                result_hash, result_size_bytes,
+                success, error_code, error_message
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            execution_id,
+            f"instrument:{instrument_id}",
+            step.agent_id,
+            step.capability,
+            "instrument_workflow",
+            status,
+            started_at,
+            datetime.utcnow(),
+            elapsed_ms,
+            hashlib.sha256(body).hexdigest() if success else None,
+            len(body) if success else None,
+            success,
+            error_code,
+            error
+        ))
+        conn.commit()
+        cur.close()
+        return execution_id
+    finally:
+        conn.close()
+
+
+# Background runs started by the API (kept referenced until they finish)
+_background_runs = set()
+
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    _background_runs.add(task)
+    task.add_done_callback(_background_runs.discard)
+    return task
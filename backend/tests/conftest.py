@@ -0,0 +1,35 @@
+"""
+Test configuration
+
+Modules are imported the way the app imports them: backend/ on sys.path
+(services.*, api.*) and backend/payments/ for the payment modules.
+
+Database tests need a disposable Postgres with the migrations applied:
+    TEST_DATABASE_URL=postgresql://localhost/agent_marketplace_test python -m pytest -q
+They are skipped when TEST_DATABASE_URL is unset or unreachable.
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, "payments")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def database_url(monkeypatch):
+    """TEST_DATABASE_URL, also set as DATABASE_URL for get_db_connection()"""
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    import psycopg2
+    try:
+        psycopg2.connect(url).close()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Test database unavailable: {e}")
+    monkeypatch.setenv("DATABASE_URL", url)
+    return url
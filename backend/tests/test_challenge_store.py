@@ -0,0 +1,61 @@
+"""MemoryChallengeStore: single use, expiry sweep and size bound"""
+
+import time
+
+from services.challenge_store import MemoryChallengeStore
+
+
+def entry(challenge: str, ttl: float = 60):
+    return {"challenge": challenge, "challenge_text": f"Sign {challenge}", "expires_at": time.time() + ttl}
+
+
+def test_put_get_delete_is_single_use():
+    store = MemoryChallengeStore()
+    store.put("wallet", entry("a"), 60)
+
+    assert store.get("wallet")["challenge"] == "a"
+    assert store.delete("wallet") is True
+    assert store.delete("wallet") is False
+    assert store.get("wallet") is None
+
+
+def test_sweep_removes_only_expired():
+    store = MemoryChallengeStore()
+    store.put("old", entry("a", ttl=-1), 60)
+    store.put("new", entry("b"), 60)
+
+    store.sweep()  # put("new") may already have swept "old"
+    assert store.get("old") is None
+    assert store.get("new") is not None
+    assert store.size() == 1
+
+
+def test_reissue_keeps_latest_and_stale_heap_items_are_harmless():
+    store = MemoryChallengeStore()
+    store.put("wallet", entry("a", ttl=-1), 60)
+    store.put("wallet", entry("b"), 60)
+
+    store.sweep()
+    assert store.get("wallet")["challenge"] == "b"
+
+
+def test_bounded_by_max_entries():
+    store = MemoryChallengeStore(max_entries=3)
+    for i in range(5):
+        store.put(f"wallet{i}", entry(str(i), ttl=60 + i), 60)
+
+    assert store.size() == 3
+    assert store.evictions == 2
+    # The challenges closest to expiring are the ones dropped
+    assert store.get("wallet0") is None and store.get("wallet1") is None
+    assert store.get("wallet4") is not None
+
+
+def test_delete_keeps_a_reissued_challenge():
+    store = MemoryChallengeStore()
+    store.put("wallet", entry("a"), 60)
+    store.put("wallet", entry("b"), 60)  # Re-issued between a verifier's get() and delete()
+
+    assert store.delete("wallet", "a") is False
+    assert store.get("wallet")["challenge"] == "b"
+    assert store.delete("wallet", "b") is True
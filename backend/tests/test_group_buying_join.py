@@ -0,0 +1,107 @@
+"""
+Group buying joins under concurrency (migration 020)
+
+Many threads join one pool at once; afterwards current_quantity must equal
+the accepted quantity and SUM(pool_members.quantity), never exceed the
+target, and exactly one join may report the trigger.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import uuid
+
+import psycopg2
+import pytest
+from fastapi import HTTPException
+
+from api.group_buying_endpoints import PoolCreate, PoolJoin, create_pool, join_pool
+
+THREADS = 16
+
+
+@pytest.fixture
+def db(database_url):
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def agents(db):
+    """Ten throwaway agents (pool_members.agent_id references agents)"""
+    ids = [str(uuid.uuid4()) for _ in range(10)]
+    with db.cursor() as cur:
+        for agent_id in ids:
+            cur.execute(
+                "INSERT INTO agents (id, name, agent_type) VALUES (%s, %s, 'HYBRID')",
+                (agent_id, f"pool-test-{agent_id[:8]}")
+            )
+    yield ids
+    with db.cursor() as cur:
+        cur.execute("DELETE FROM pool_members WHERE agent_id = ANY(%s::uuid[])", (ids,))
+        # creator_agent_id is UUID (007) or VARCHAR (ORM model) depending on how the table was built
+        cur.execute("DELETE FROM group_buying_pools WHERE creator_agent_id::text = ANY(%s)", (ids,))
+        cur.execute("DELETE FROM agents WHERE id = ANY(%s::uuid[])", (ids,))
+
+
+def pool_state(db, pool_id):
+    with db.cursor() as cur:
+        cur.execute("""
+            SELECT p.current_quantity, p.status,
+                   (SELECT COALESCE(SUM(quantity), 0) FROM pool_members WHERE pool_id = p.id)
+            FROM group_buying_pools p WHERE p.id = %s
+        """, (pool_id,))
+        return cur.fetchone()
+
+
+def run_joins(pool_id, agent_ids, joins):
+    """Join concurrently, agents reused round-robin; returns (accepted, triggered, rejected)"""
+    def join(i):
+        try:
+            return join_pool(pool_id, PoolJoin(agent_id=agent_ids[i % len(agent_ids)], quantity=1))
+        except HTTPException as e:
+            return e.status_code
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        results = list(executor.map(join, range(joins)))
+    accepted = [r for r in results if isinstance(r, dict)]
+    return len(accepted), sum(r["triggered"] for r in accepted), [r for r in results if not isinstance(r, dict)]
+
+
+def new_pool(agent_ids, target):
+    return create_pool(PoolCreate(
+        service_id="pool-test", creator_agent_id=agent_ids[0], target_quantity=target, discount_tier="10%"
+    ))["id"]
+
+
+def test_joins_below_target_are_all_counted(db, agents):
+    pool_id = new_pool(agents, target=500)
+    accepted, triggered, rejected = run_joins(pool_id, agents, 200)
+
+    current, status, member_total = pool_state(db, pool_id)
+    assert (accepted, rejected) == (200, [])
+    assert current == member_total == 200
+    assert triggered == 0
+    assert status == "active"
+
+
+def test_capped_pool_triggers_exactly_once(db, agents):
+    pool_id = new_pool(agents, target=50)
+    accepted, triggered, rejected = run_joins(pool_id, agents, 200)
+
+    current, status, member_total = pool_state(db, pool_id)
+    assert accepted == 50
+    assert current == member_total == 50
+    assert triggered == 1
+    assert status == "triggered"
+    # Joins racing the trigger see either a full pool (409) or a triggered one (400)
+    assert set(rejected) <= {400, 409}
+
+
+def test_rejoin_adds_to_member_quantity(db, agents):
+    pool_id = new_pool(agents, target=10)
+    join_pool(pool_id, PoolJoin(agent_id=agents[0], quantity=2))
+    response = join_pool(pool_id, PoolJoin(agent_id=agents[0], quantity=3))
+
+    assert response["your_quantity"] == 5
+    assert pool_state(db, pool_id)[0] == 5
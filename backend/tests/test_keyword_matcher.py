@@ -0,0 +1,59 @@
+"""KeywordMatcher: single-pass matching must agree with per-keyword search"""
+
+from services.keyword_matcher import KeywordMatcher, _trie_pattern
+
+
+CATEGORIES = {
+    "code": ["code", "code review", "coding"],
+    "speech": ["speech-to-text", "transcription"],
+    "review": ["review"],
+    "va": ["va"]
+}
+
+
+def test_labels_in_mapping_order():
+    matcher = KeywordMatcher(CATEGORIES)
+    assert matcher.match("Transcription and code review") == ["code", "speech", "review"]
+    assert matcher.first("Transcription and code review") == "code"
+
+
+def test_overlapping_and_prefix_keywords():
+    matcher = KeywordMatcher(CATEGORIES)
+    # "code review" is the longest match at its position; "code" and "review" still count
+    assert matcher.find_keywords("code review") == {"code", "code review", "review"}
+    assert matcher.find_keywords("coding") == {"coding"}
+
+
+def test_word_boundaries():
+    assert KeywordMatcher(CATEGORIES).match("evaluate") == []
+    assert KeywordMatcher(CATEGORIES, word_boundaries=False).match("evaluate") == ["va"]
+
+
+def test_case_and_whitespace_insensitive():
+    matcher = KeywordMatcher({"spam": ["  Buy Now "]})
+    assert matcher.match("BUY NOW!") == ["spam"]
+
+
+def test_regex_metacharacters_are_literal():
+    matcher = KeywordMatcher({"cpp": ["c++"], "net": [".net"]}, word_boundaries=False)
+    assert matcher.match("c++ and .net") == ["cpp", "net"]
+    assert matcher.match("cxx and xnet") == []
+
+
+def test_empty_matcher_and_text():
+    assert KeywordMatcher({}).match("anything") == []
+    assert KeywordMatcher(CATEGORIES).match("") == []
+    assert KeywordMatcher(CATEGORIES).first("nothing here") is None
+
+
+def test_agrees_with_substring_search():
+    keywords = {f"label{i}": [word] for i, word in enumerate(
+        ["api", "apis", "rapid", "data", "database", "base", "scrape", "scraper", "web scraper"]
+    )}
+    text = "A rapid web scraper that stores scraped data in a database via APIs"
+    expected = [label for label, words in keywords.items() if any(w in text.lower() for w in words)]
+    assert KeywordMatcher(keywords, word_boundaries=False).match(text) == expected
+
+
+def test_trie_pattern_shares_prefixes():
+    assert _trie_pattern(["code", "code review", "coding"]) == r"cod(?:e(?:\ review)?|ing)"
@@ -0,0 +1,69 @@
+"""
+Fractional call credits (migrations 022, 024)
+
+Cache hits are charged a fraction of a call; the fractions must add up to
+whole credits exactly and without losing updates under concurrency.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import uuid
+
+import psycopg2
+import pytest
+
+from api.rate_limiting import consume_partial_call_credit
+from models.agent import Agent
+
+PAID_CALLS = 10
+
+
+@pytest.fixture
+def agent_id(database_url):
+    agent_id = str(uuid.uuid4())
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(
+            """INSERT INTO agents (id, name, agent_type, paid_calls_remaining, partial_call_credit)
+               VALUES (%s, %s, 'HYBRID', %s, 0)""",
+            (agent_id, f"credit-test-{agent_id[:8]}", PAID_CALLS)
+        )
+    yield agent_id
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM agents WHERE id = %s", (agent_id,))
+    conn.close()
+
+
+def hit(agent_id, fraction):
+    from database.base import get_session_local
+    db = get_session_local()()
+    try:
+        consume_partial_call_credit(db.get(Agent, agent_id), fraction, 0.005, db)
+    finally:
+        db.close()
+
+
+def credit_state(agent_id):
+    from database.base import get_session_local
+    db = get_session_local()()
+    try:
+        agent = db.get(Agent, agent_id)
+        return agent.paid_calls_remaining, agent.partial_call_credit
+    finally:
+        db.close()
+
+
+def test_ten_tenths_consume_exactly_one_call(agent_id):
+    for _ in range(9):
+        hit(agent_id, 0.1)
+    assert credit_state(agent_id) == (PAID_CALLS, 900)
+
+    hit(agent_id, 0.1)
+    assert credit_state(agent_id) == (PAID_CALLS - 1, 0)
+
+
+def test_concurrent_hits_lose_nothing(agent_id):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: hit(agent_id, 0.1), range(40)))
+
+    assert credit_state(agent_id) == (PAID_CALLS - 4, 0)
@@ -0,0 +1,35 @@
+"""retention_cutoff: first month kept for a retention window; archiving needs an archive dir"""
+
+from datetime import date
+
+import pytest
+
+from services.partition_manager import archive_expired, archive_partition, retention_cutoff
+
+
+@pytest.mark.parametrize("months, today, expected", [
+    (0, date(2026, 3, 15), date(2026, 3, 1)),
+    (1, date(2026, 3, 15), date(2026, 2, 1)),
+    (3, date(2026, 3, 1), date(2025, 12, 1)),
+    (12, date(2026, 1, 31), date(2025, 1, 1)),
+    (14, date(2026, 2, 28), date(2024, 12, 1)),
+    (24, date(2026, 12, 31), date(2024, 12, 1)),
+])
+def test_retention_cutoff(months, today, expected):
+    assert retention_cutoff(months, today) == expected
+
+
+def test_defaults_to_today():
+    today = date.today()
+    assert retention_cutoff(0) == today.replace(day=1)
+
+
+class UnusedConnection:
+    def __getattr__(self, name):
+        raise AssertionError("archiving without an archive dir touched the database")
+
+
+def test_no_archive_dir_keeps_partitions():
+    assert archive_expired(UnusedConnection(), archive_dir="") == []
+    with pytest.raises(ValueError):
+        archive_partition(UnusedConnection(), "agent_executions", {"name": "agent_executions_p202401"}, archive_dir="")
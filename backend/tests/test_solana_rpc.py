@@ -0,0 +1,111 @@
+"""pack_instructions: transfers grouped into transactions that fit one packet; payment memos"""
+
+import asyncio
+
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.transaction import Transaction
+
+from solana_rpc import (
+    PACKET_DATA_SIZE,
+    SolanaRPC,
+    pack_instructions,
+    payment_instructions,
+    usdc_transfer_instruction,
+)
+
+
+def transfers(count: int):
+    treasury = Keypair().pubkey()
+    recipients = [str(Keypair().pubkey()) for _ in range(count)]
+    return treasury, [usdc_transfer_instruction(treasury, to, 1.5) for to in recipients]
+
+
+def transaction_size(payer, instructions) -> int:
+    message = Message.new_with_blockhash(instructions, payer, Hash.default())
+    return len(bytes(Transaction.new_unsigned(message)))
+
+
+def test_every_instruction_packed_once_in_order():
+    payer, instructions = transfers(40)
+    groups = pack_instructions(payer, instructions)
+
+    assert [i for group in groups for i in group] == list(range(40))
+    assert len(groups) > 1
+
+
+def test_groups_fit_in_a_packet_and_are_filled():
+    payer, instructions = transfers(40)
+    groups = pack_instructions(payer, instructions)
+
+    for group in groups:
+        assert transaction_size(payer, [instructions[i] for i in group]) <= PACKET_DATA_SIZE
+    # Greedy: adding the next transfer to any full group would overflow the packet
+    for group, following in zip(groups, groups[1:]):
+        candidate = [instructions[i] for i in group + following[:1]]
+        assert transaction_size(payer, candidate) > PACKET_DATA_SIZE
+
+
+def test_max_per_tx_caps_group_size():
+    payer, instructions = transfers(7)
+    assert pack_instructions(payer, instructions, max_per_tx=3) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_empty():
+    payer, _ = transfers(0)
+    assert pack_instructions(payer, []) == []
+
+
+def test_payment_transfer_and_memo_stay_together():
+    treasury = Keypair().pubkey()
+    payments = [payment_instructions(treasury, str(Keypair().pubkey()), 1.5, "payout") for _ in range(40)]
+    groups = pack_instructions(treasury, payments)
+
+    assert [i for group in groups for i in group] == list(range(40))
+    for group in groups:
+        assert transaction_size(treasury, [ix for i in group for ix in payments[i]]) <= PACKET_DATA_SIZE
+
+
+def offline_rpc(monkeypatch) -> SolanaRPC:
+    """SolanaRPC with a fixed blockhash that 'sends' by returning the signature"""
+    rpc = SolanaRPC()
+    blockhash = Hash.new_unique()
+
+    async def get_latest_blockhash():
+        return blockhash
+
+    async def get_multiple_accounts(addresses):
+        return [b"account" for _ in addresses]
+
+    async def send_transaction(transaction):
+        return str(transaction.signatures[0])
+
+    monkeypatch.setattr(rpc, "get_latest_blockhash", get_latest_blockhash)
+    monkeypatch.setattr(rpc, "get_multiple_accounts", get_multiple_accounts)
+    monkeypatch.setattr(rpc, "send_transaction", send_transaction)
+    return rpc
+
+
+def test_equal_payouts_get_distinct_signatures(monkeypatch):
+    rpc = offline_rpc(monkeypatch)
+    treasury, recipient = Keypair(), str(Keypair().pubkey())
+
+    async def pay_twice():
+        return [
+            await rpc.send_transfers(treasury, payment_instructions(treasury.pubkey(), recipient, 2.0, "payout"))
+            for _ in range(2)
+        ]
+
+    first, second = asyncio.run(pay_twice())
+    assert first != second
+
+
+def test_equal_payouts_in_one_batch_get_distinct_signatures(monkeypatch):
+    rpc = offline_rpc(monkeypatch)
+    treasury, recipient = Keypair(), str(Keypair().pubkey())
+    payments = [{"to": recipient, "amount": 2.0}] * 3
+
+    signatures = asyncio.run(rpc.send_usdc_batch(treasury, payments, max_transfers_per_tx=1))
+    assert None not in signatures
+    assert len(set(signatures)) == 3
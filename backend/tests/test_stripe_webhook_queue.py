@@ -0,0 +1,26 @@
+"""ordering_key: which Stripe events must be applied one at a time, in order"""
+
+from services.stripe_webhook_queue import ordering_key
+
+
+def event(obj: dict, event_id: str = "evt_1"):
+    return {"id": event_id, "type": "test", "data": {"object": obj}}
+
+
+def test_payment_intent_events_key_on_the_intent():
+    assert ordering_key(event({"object": "payment_intent", "id": "pi_1"})) == "pi_1"
+
+
+def test_charge_refund_and_dispute_events_share_their_intent_key():
+    for obj_type in ("charge", "refund", "dispute"):
+        obj = {"object": obj_type, "id": f"{obj_type}_1", "payment_intent": "pi_1"}
+        assert ordering_key(event(obj)) == "pi_1"
+
+
+def test_other_objects_key_on_themselves():
+    assert ordering_key(event({"object": "transfer", "id": "tr_1"})) == "tr_1"
+    assert ordering_key(event({"object": "charge", "id": "ch_1", "payment_intent": None})) == "ch_1"
+
+
+def test_falls_back_to_event_id():
+    assert ordering_key(event({"object": "balance"}, event_id="evt_9")) == "evt_9"
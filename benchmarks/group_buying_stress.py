@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Group Buying Stress Test
+Concurrent joins against one hot pool, checking no join is lost or
+double-counted and the pool triggers exactly once (migration 020)
+
+- Boots the app against the fixture database (agents from seed_fixture.py)
+- Open pool: target above the number of joins, so every join must succeed
+- Capped pool: more quantity requested than the target, so joins past the
+  target must be rejected (409) without overshooting
+- Some agents join twice, which must add to their existing member row
+- After each run, current_quantity must equal the accepted quantity and
+  SUM(pool_members.quantity), and exactly one response may report the trigger
+
+Usage:
+    python benchmarks/group_buying_stress.py                   # after seed_fixture.py
+    python benchmarks/group_buying_stress.py --joins 5000 --concurrency 128
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import BACKEND_DIR, DEFAULT_DATABASE_URL, agent_id  # noqa: E402
+from load_test import log, percentile, stop_stack, wait_ready  # noqa: E402
+
+APP_PORT = 8097
+REPEAT_EVERY = 10  # Every 10th join is an agent joining a second time
+
+
+async def run_joins(client: httpx.AsyncClient, base_url: str, pool_id: str, joins: int, concurrency: int):
+    """Fire joins concurrently; returns (accepted quantity, trigger responses, status counts, latencies, seconds)"""
+    slots = asyncio.Semaphore(concurrency)
+    statuses = {}
+    latencies = []
+    accepted = 0
+    triggers = 0
+
+    async def join(index: int):
+        nonlocal accepted, triggers
+        agent = agent_id(index - 1 if index % REPEAT_EVERY == 0 and index else index)
+        async with slots:
+            started = time.perf_counter()
+            response = await client.post(f"{base_url}/api/v1/pools/{pool_id}/join",
+                                         json={"agent_id": str(agent), "quantity": 1})
+            latencies.append((time.perf_counter() - started) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 200:
+            accepted += 1
+            triggers += response.json()["triggered"]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(join(i) for i in range(joins)))
+    return accepted, triggers, statuses, sorted(latencies), time.perf_counter() - started
+
+
+def pool_state(database_url: str, pool_id: str):
+    conn = psycopg2.connect(database_url)
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT p.current_quantity, p.status,
+                   (SELECT COALESCE(SUM(quantity), 0) FROM pool_members WHERE pool_id = p.id),
+                   (SELECT COUNT(*) FROM pool_members WHERE pool_id = p.id)
+            FROM group_buying_pools p WHERE p.id = %s
+        """, (pool_id,))
+        return cur.fetchone()
+    finally:
+        conn.close()
+
+
+async def scenario(base_url: str, database_url: str, name: str, target: int, joins: int, concurrency: int) -> bool:
+    async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=concurrency)) as client:
+        response = await client.post(f"{base_url}/api/v1/pools/", json={
+            "service_id": "bench-stress", "creator_agent_id": str(agent_id(0)),
+            "target_quantity": target, "discount_tier": "20%", "expires_in_hours": 1
+        })
+        response.raise_for_status()
+        pool_id = response.json()["id"]
+        accepted, triggers, statuses, latencies, elapsed = await run_joins(
+            client, base_url, pool_id, joins, concurrency
+        )
+
+    current, status, member_total, members = pool_state(database_url, pool_id)
+    expected = min(target, joins)
+    print(f"\n{name}: target {target}, {joins} joins at concurrency {concurrency}")
+    print(f"  {joins / elapsed:,.0f} joins/s   p50 {percentile(latencies, 50):.1f} ms   "
+          f"p99 {percentile(latencies, 99):.1f} ms   status codes {statuses}")
+    print(f"  accepted {accepted}   current_quantity {current}   member sum {member_total} "
+          f"({members} members)   status {status}   trigger responses {triggers}")
+
+    full = expected >= target
+    checks = [
+        (accepted == expected, f"accepted {accepted} joins, expected {expected}"),
+        (current == accepted, f"current_quantity {current} != accepted {accepted} (lost or phantom update)"),
+        (member_total == current, f"pool_members sum {member_total} != current_quantity {current}"),
+        (current <= target, f"pool overshot its target ({current} > {target})"),
+        (triggers == (1 if full else 0), f"{triggers} responses reported the trigger"),
+        (status == ("triggered" if full else "active"), f"pool status is {status}"),
+        (set(statuses) <= {200, 409, 400}, f"unexpected status codes {statuses}")
+    ]
+    failures = [message for ok, message in checks if not ok]
+    for message in failures:
+        print(f"  [FAIL] {message}")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress concurrent group buying pool joins")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--joins", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--base-url", help="Use a running app instead of booting one")
+    args = parser.parse_args()
+
+    processes = []
+    base_url = args.base_url
+    if not base_url:
+        env = dict(os.environ, DATABASE_URL=args.database_url, PYTHONUNBUFFERED="1",
+                   FULFILLMENT_WORKER_CONCURRENCY="0", STRIPE_WEBHOOK_WORKER_CONCURRENCY="0")
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(APP_PORT),
+             "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND_DIR, env=env
+        ))
+        base_url = f"http://127.0.0.1:{APP_PORT}"
+    try:
+        if processes:
+            wait_ready(f"{base_url}/health", processes)
+        log(f"Stressing pool joins against {base_url}")
+        ok = all([
+            asyncio.run(scenario(base_url, args.database_url, "Open pool", args.joins * 2, args.joins, args.concurrency)),
+            asyncio.run(scenario(base_url, args.database_url, "Capped pool", args.joins // 2, args.joins, args.concurrency))
+        ])
+    finally:
+        stop_stack(processes)
+    print("\n[OK] No lost or double-counted joins" if ok else "\n[FAIL] Pool join invariants violated")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
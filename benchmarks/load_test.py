@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Benchmark Load Driver
+Drives a realistic request mix at the API and reports latency/RPS per endpoint
+
+- Boots mock_protocol_server.py (tool execute upstream) and the FastAPI app
+  against the fixture database built by seed_fixture.py
+- Closed-loop workers: each keeps one request in flight, picking the next
+  operation from a weighted mix
+- Reports count, errors, RPS and p50/p95/p99 per endpoint, and compares
+  against benchmarks/baselines.json (exit code 1 on regression, or if no
+  baseline has been recorded)
+
+Usage:
+    python benchmarks/load_test.py                        # boot stack, 60s run, compare to baseline
+    python benchmarks/load_test.py --duration 20 --concurrency 16
+    python benchmarks/load_test.py --base-url http://localhost:8000 --no-baseline
+    python benchmarks/load_test.py --update-baseline      # record on the reference machine
+"""
+
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import (  # noqa: E402
+    BACKEND_DIR, BASELINE_FILE, BENCH_TOOL_ID, CAPABILITY_POOL, DEFAULT_DATABASE_URL,
+    MOCK_SERVER_PORT, REPO_ROOT, agent_id, api_key
+)
+
+APP_PORT = 8099
+BOOT_TIMEOUT_SECONDS = 60
+
+# Share of operations per worker iteration (execution_ingest is start + complete)
+DEFAULT_MIX = {
+    "discover": 30,
+    "search": 25,
+    "inbox": 20,
+    "tool_execute": 10,
+    "execution_ingest": 15
+}
+
+
+def log(message):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+# ============================================================================
+# OPERATIONS
+# ============================================================================
+# Each operation issues one or more requests via ctx.timed(label, ...)
+
+class Context:
+    """Per-run state shared by workers: client, fixture sizes, samples"""
+
+    def __init__(self, client: httpx.AsyncClient, agents: int, api_agents: int):
+        self.client = client
+        self.agents = agents
+        self.api_agents = api_agents
+        self.recording = False
+        self.samples = {}  # label -> [latency_ms]
+        self.errors = {}   # label -> count
+
+    async def timed(self, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if self.recording:
+            self.samples.setdefault(label, []).append(elapsed_ms)
+            if failed:
+                self.errors[label] = self.errors.get(label, 0) + 1
+        return response if not failed else None
+
+    def auth(self, rng: random.Random) -> dict:
+        return {"Authorization": f"Bearer {api_key(rng.randrange(self.api_agents))}"}
+
+
+async def op_discover(ctx: Context, rng: random.Random):
+    await ctx.timed("discover", "POST", "/api/v1/protocol/discover", json={
+        "requesting_agent_id": str(agent_id(rng.randrange(ctx.agents))),
+        "capabilities_needed": rng.sample(CAPABILITY_POOL[:8], rng.randint(1, 2)),
+        "constraints": {"max_cost": rng.choice([0.5, 1, 5, 10])}
+    })
+
+
+async def op_search(ctx: Context, rng: random.Random):
+    params = {"min_rating": rng.choice([0, 2, 3.5, 4.5]), "limit": 20, "count": "none"}
+    if rng.random() < 0.5:
+        params["agent_type"] = rng.choice(["capability", "api", "hybrid"])
+    await ctx.timed("search", "GET", "/api/v1/agents/search", params=params)
+
+
+async def op_inbox(ctx: Context, rng: random.Random):
+    await ctx.timed("inbox", "GET", "/api/v1/messaging/inbox",
+                    params={"limit": 50}, headers=ctx.auth(rng))
+
+
+async def op_tool_execute(ctx: Context, rng: random.Random):
+    await ctx.timed("tool_execute", "POST", f"/api/v1/tools/{BENCH_TOOL_ID}/execute", headers=ctx.auth(rng), json={
+        "parameters": {"capability": "math", "input_data": {"a": rng.randint(1, 100), "b": rng.randint(1, 100)}},
+        "timeout_seconds": 10
+    })
+
+
+async def op_execution_ingest(ctx: Context, rng: random.Random):
+    started = await ctx.timed("execution_start", "POST", "/api/v1/executions/start", json={
+        "requesting_agent_id": str(agent_id(rng.randrange(ctx.agents))),
+        "executing_agent_id": str(agent_id(rng.randrange(ctx.agents))),
+        "capability_requested": rng.choice(CAPABILITY_POOL),
+        "task_type": "bench",
+        "quoted_cost_usd": round(rng.uniform(0.01, 5), 2)
+    })
+    if started is None:
+        return
+    await ctx.timed("execution_complete", "POST", "/api/v1/executions/complete", json={
+        "execution_id": started.json()["execution_id"],
+        "success": rng.random() < 0.95,
+        "execution_time_ms": rng.randint(50, 5000),
+        "actual_cost_usd": round(rng.uniform(0.01, 5), 2),
+        "quality_rating": rng.randint(3, 5)
+    })
+
+
+OPERATIONS = {
+    "discover": op_discover,
+    "search": op_search,
+    "inbox": op_inbox,
+    "tool_execute": op_tool_execute,
+    "execution_ingest": op_execution_ingest
+}
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+async def worker(ctx: Context, mix: dict, deadline: float, seed: int):
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.monotonic() < deadline:
+        await OPERATIONS[rng.choices(names, weights=weights)[0]](ctx, rng)
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+async def run_load(base_url: str, mix: dict, duration: int, warmup: int, concurrency: int,
+                   agents: int, api_agents: int, seed: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        ctx = Context(client, agents, api_agents)
+        started = time.monotonic()
+        deadline = started + warmup + duration
+        tasks = [asyncio.create_task(worker(ctx, mix, deadline, seed + i)) for i in range(concurrency)]
+
+        if warmup:
+            log(f"Warming up for {warmup}s")
+            await asyncio.sleep(warmup)
+        ctx.recording = True
+        measured_from = time.monotonic()
+        log(f"Measuring for {duration}s with {concurrency} workers")
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - measured_from
+
+    endpoints = {}
+    for label, samples in sorted(ctx.samples.items()):
+        samples.sort()
+        errors = ctx.errors.get(label, 0)
+        endpoints[label] = {
+            "count": len(samples),
+            "errors": errors,
+            "error_rate": round(errors / len(samples), 4),
+            "rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2)
+        }
+    return {"elapsed_seconds": round(elapsed, 2), "endpoints": endpoints}
+
+
+# ============================================================================
+# STACK
+# ============================================================================
+
+def start_stack(database_url: str, app_port: int, workers: int):
+    """Boot mock_protocol_server.py and the app; returns the processes"""
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONUNBUFFERED="1",
+               FULFILLMENT_WORKER_CONCURRENCY="0")
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "mock_protocol_server:app",
+         "--port", str(MOCK_SERVER_PORT), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env
+    )
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env
+    )
+    processes = [mock, app]
+    try:
+        for url in (f"http://127.0.0.1:{MOCK_SERVER_PORT}/health", f"http://127.0.0.1:{app_port}/health"):
+            wait_ready(url, processes)
+    except Exception:
+        stop_stack(processes)
+        raise
+    return processes
+
+
+def wait_ready(url: str, processes):
+    deadline = time.monotonic() + BOOT_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if any(p.poll() is not None for p in processes):
+            raise RuntimeError("A benchmark server exited during startup")
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                log(f"[OK] {url} ready")
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} not ready after {BOOT_TIMEOUT_SECONDS}s")
+
+
+def stop_stack(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# ============================================================================
+# REPORTING / BASELINES
+# ============================================================================
+
+def print_report(result: dict):
+    header = f"{'endpoint':<20}{'count':>9}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print()
+    print(header)
+    print("-" * len(header))
+    for label, stats in result["endpoints"].items():
+        print(f"{label:<20}{stats['count']:>9}{stats['errors']:>8}{stats['rps']:>10.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    print()
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions vs baseline: p95 slower or RPS lower by more than tolerance, or new errors"""
+    regressions = []
+    for label, expected in (baseline.get("endpoints") or {}).items():
+        actual = result["endpoints"].get(label)
+        if actual is None:
+            regressions.append(f"{label}: no samples (baseline has {expected['count']})")
+            continue
+        if expected.get("p95_ms") and actual["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {actual['p95_ms']}ms vs baseline {expected['p95_ms']}ms")
+        if expected.get("rps") and actual["rps"] < expected["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: {actual['rps']} rps vs baseline {expected['rps']} rps")
+        if actual["error_rate"] > expected.get("error_rate", 0) + 0.01:
+            regressions.append(f"{label}: error rate {actual['error_rate']:.2%} vs baseline {expected.get('error_rate', 0):.2%}")
+    return regressions
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, baseline: dict, result: dict):
+    baseline = dict(baseline)
+    baseline["recorded_at"] = datetime.utcnow().isoformat() + "Z"
+    baseline["environment"] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+    baseline["endpoints"] = result["endpoints"]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+    log(f"[OK] Baseline written to {path}")
+
+
+def main():
+    baseline = load_baseline(BASELINE_FILE)
+    scenario = baseline.get("scenario", {})
+
+    parser = argparse.ArgumentParser(description="Run the API load benchmark")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--base-url", help="Benchmark an already running app instead of booting one")
+    parser.add_argument("--app-port", type=int, default=APP_PORT)
+    parser.add_argument("--app-workers", type=int, default=scenario.get("app_workers", 1))
+    parser.add_argument("--duration", type=int, default=scenario.get("duration", 60), help="Measured seconds")
+    parser.add_argument("--warmup", type=int, default=scenario.get("warmup", 10), help="Unmeasured seconds first")
+    parser.add_argument("--concurrency", type=int, default=scenario.get("concurrency", 32))
+    parser.add_argument("--mix", help='Operation weights as JSON, e.g. \'{"discover": 1}\'')
+    parser.add_argument("--agents", type=int, default=scenario.get("agents", 100000), help="Fixture size")
+    parser.add_argument("--api-agents", type=int, default=scenario.get("api_agents", 1000))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--tolerance", type=float, default=baseline.get("tolerance", 0.2))
+    parser.add_argument("--no-baseline", action="store_true", help="Skip the baseline comparison")
+    parser.add_argument("--update-baseline", action="store_true", help="Record this run as the baseline")
+    args = parser.parse_args()
+
+    mix = json.loads(args.mix) if args.mix else scenario.get("mix", DEFAULT_MIX)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    if not (args.no_baseline or args.update_baseline or baseline.get("endpoints")):
+        # Fail before the run: an empty baseline must not pass as "no regression"
+        log(f"[FAIL] No baseline numbers in {BASELINE_FILE} - record them on the reference machine "
+            "with --update-baseline, or pass --no-baseline for an exploratory run")
+        sys.exit(1)
+
+    processes = []
+    base_url = args.base_url
+    if not base_url:
+        processes = start_stack(args.database_url, args.app_port, args.app_workers)
+        base_url = f"http://127.0.0.1:{args.app_port}"
+    try:
+        result = asyncio.run(run_load(base_url, mix, args.duration, args.warmup, args.concurrency,
+                                      args.agents, args.api_agents, args.seed))
+    finally:
+        stop_stack(processes)
+
+    result["scenario"] = {
+        "duration": args.duration, "warmup": args.warmup, "concurrency": args.concurrency,
+        "app_workers": args.app_workers, "mix": mix, "agents": args.agents, "api_agents": args.api_agents
+    }
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        log(f"[OK] Results written to {args.output}")
+
+    if args.update_baseline:
+        save_baseline(BASELINE_FILE, {**baseline, "scenario": result["scenario"], "tolerance": args.tolerance}, result)
+        return
+
+    if args.no_baseline:
+        return
+
+    regressions = compare(result, baseline, args.tolerance)
+    if regressions:
+        for regression in regressions:
+            log(f"[WARN] Regression: {regression}")
+        sys.exit(1)
+    log(f"[OK] Within {args.tolerance:.0%} of baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark Fixture
+Builds a local Postgres database shaped like production, at scale
+
+- Schema: SQLAlchemy models (python -m database.init_schema) + every SQL migration
+- Agents: discovered_agents_v2.jsonl scaled up synthetically (default 100k)
+- Executions (default 2M), inbox messages and one tool served by mock_protocol_server.py
+- Rows are streamed with COPY, then ANALYZE so plans match a warm production DB
+
+Usage:
+    createdb agent_bench
+    python benchmarks/seed_fixture.py --database-url postgresql://localhost/agent_bench
+    python benchmarks/seed_fixture.py --agents 10000 --executions 200000   # quick run
+"""
+
+from datetime import datetime, timedelta
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import (  # noqa: E402
+    BACKEND_DIR, BENCH_TOOL_ID, CAPABILITY_POOL, DEFAULT_DATABASE_URL, MIGRATIONS_DIR,
+    MOCK_SERVER_PORT, SEED_FILE, agent_id, api_key
+)
+
+COPY_CHUNK_ROWS = 50000
+EPOCH = datetime(2026, 1, 1)
+
+
+def log(message):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+def create_schema(database_url: str):
+    """Models first (the deploy step), then SQL migrations in order"""
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, BACKEND_DIR)
+    from database.init_schema import main as init_schema
+    init_schema()
+    log("[OK] Model tables created")
+
+    numbered = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f[:3].isdigit())
+    unnumbered = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(".sql") and not f[:3].isdigit())
+    conn = psycopg2.connect(database_url)
+    for name in unnumbered + numbered:
+        with open(os.path.join(MIGRATIONS_DIR, name), encoding="utf-8") as f:
+            sql = f.read()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+            conn.commit()
+            log(f"[OK] {name}")
+        except Exception as e:
+            # Migrations overlap with model-created tables; production has the same history
+            conn.rollback()
+            log(f"[WARN] {name}: {str(e).splitlines()[0]}")
+
+    with conn.cursor() as cur:
+        # Read by /tools/{id}/execute; exists in production but not in the model/migrations
+        cur.execute("ALTER TABLE tools ADD COLUMN IF NOT EXISTS api_endpoint VARCHAR(500)")
+    conn.commit()
+    conn.close()
+
+
+# ============================================================================
+# ROWS
+# ============================================================================
+
+def load_templates():
+    with open(SEED_FILE, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def pick_capabilities(rng: random.Random):
+    # Zipf-like skew: a few capabilities are very common, most are rare
+    count = rng.randint(1, 4)
+    weights = [1.0 / (rank + 1) for rank in range(len(CAPABILITY_POOL))]
+    return sorted(set(rng.choices(CAPABILITY_POOL, weights=weights, k=count)))
+
+
+def agent_rows(count: int, api_agents: int, templates, rng: random.Random):
+    for i in range(count):
+        template = templates[i % len(templates)]
+        created = EPOCH + timedelta(seconds=rng.randint(0, 180 * 86400))
+        capabilities = sorted(set(template.get("capabilities") or []) | set(pick_capabilities(rng)))
+        has_key = i < api_agents
+        yield [
+            agent_id(i),
+            f"{template['name']} #{i}" if i >= len(templates) else template["name"],
+            template.get("description") or "",
+            rng.choice(["CAPABILITY", "API", "HYBRID", "OUTPUT"]),
+            api_key(i) if has_key else None,
+            True,
+            json.dumps(capabilities),
+            json.dumps({"price_usd": round(rng.uniform(0, 20), 2)}),
+            rng.randint(20, 100),
+            round(rng.uniform(0.7, 1.0), 3),
+            round(rng.uniform(0, 5), 2),
+            rng.randint(0, 500),
+            "UNVERIFIED",
+            False,
+            "crawler",
+            True,
+            f"{template.get('source_url', 'https://example.com')}#{i}",
+            json.dumps(capabilities[:2]),
+            "free",
+            f"http://127.0.0.1:{MOCK_SERVER_PORT}/api/v1/protocol/execute",
+            50, 50, 5, 0,
+            10 ** 9 if has_key else 0,  # Paid credits so tool execute is never rate limited
+            created, created, created, created
+        ]
+
+
+AGENT_COLUMNS = (
+    "id, name, description, agent_type, api_key, is_active, capabilities, pricing_model, "
+    "quality_score, success_rate, rating_avg, rating_count, verification_status, verified, "
+    "submission_source, auto_discovered, source_url, categories, subscription_tier, api_endpoint, "
+    "free_calls_total, free_calls_remaining, hourly_rate_limit, hourly_calls_count, "
+    "paid_calls_remaining, api_key_created_at, created_at, updated_at, last_active_at"
+)
+
+
+def execution_rows(count: int, agents: int, rng: random.Random):
+    for _ in range(count):
+        started = EPOCH + timedelta(seconds=rng.randint(0, 180 * 86400))
+        elapsed_ms = int(rng.lognormvariate(7.5, 0.8))
+        roll = rng.random()
+        status, success = ("completed", True) if roll < 0.92 else ("failed", False) if roll < 0.98 else ("timeout", False)
+        cost = round(rng.uniform(0.01, 5), 2)
+        yield [
+            uuid.uuid4(),
+            str(agent_id(rng.randrange(agents))),
+            agent_id(int(rng.paretovariate(1.2)) % agents),  # Popular agents get most executions
+            rng.choice(CAPABILITY_POOL),
+            "bench",
+            status,
+            started,
+            started + timedelta(milliseconds=elapsed_ms),
+            elapsed_ms,
+            cost,
+            cost if success else None,
+            success,
+            started
+        ]
+
+
+EXECUTION_COLUMNS = (
+    "id, requesting_agent_id, executing_agent_id, capability_requested, task_type, status, "
+    "started_at, completed_at, execution_time_ms, quoted_cost_usd, actual_cost_usd, success, created_at"
+)
+
+
+def message_rows(count: int, agents: int, api_agents: int, rng: random.Random):
+    for _ in range(count):
+        created = EPOCH + timedelta(seconds=rng.randint(0, 180 * 86400))
+        yield [
+            uuid.uuid4(),
+            agent_id(rng.randrange(agents)),
+            agent_id(rng.randrange(api_agents)),  # Inboxes the load driver polls
+            rng.choice(["CHAT_MESSAGE", "PING", "WORK_ORDER", "CONTACT_REQUEST"]),
+            rng.choice(["PENDING", "PENDING", "READ", "DELIVERED"]),
+            "Benchmark message",
+            "Synthetic inbox traffic for load testing",
+            0,
+            created
+        ]
+
+
+MESSAGE_COLUMNS = "id, from_agent_id, to_agent_id, message_type, status, subject, body, priority, created_at"
+
+
+def copy_rows(conn, table: str, columns: str, rows, total: int):
+    """Stream rows into table with COPY in COPY_CHUNK_ROWS chunks"""
+    started = time.time()
+    written = 0
+    while True:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        chunk = 0
+        for row in rows:
+            writer.writerow(["\\N" if value is None else value for value in row])
+            chunk += 1
+            if chunk >= COPY_CHUNK_ROWS:
+                break
+        if not chunk:
+            break
+        buffer.seek(0)
+        with conn.cursor() as cur:
+            cur.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+        conn.commit()
+        written += chunk
+        log(f"  {table}: {written:,}/{total:,} ({written / max(time.time() - started, 0.001):,.0f} rows/s)")
+
+
+def create_partitions(conn):
+    """Monthly partitions (migration 016) back to EPOCH, so COPY has somewhere to route old rows"""
+    with conn.cursor() as cur:
+        for table in ("agent_executions", "agent_messages", "agent_reputation_history", "agent_performance_history"):
+            cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", (table,))
+            if cur.fetchone():
+                cur.execute("SELECT ensure_monthly_partitions(%s, %s, NOW()::timestamp)", (table, EPOCH))
+    conn.commit()
+
+
+def seed(database_url: str, agents: int, api_agents: int, executions: int, messages: int, seed_value: int):
+    rng = random.Random(seed_value)
+    templates = load_templates()
+    api_agents = min(api_agents, agents)
+    conn = psycopg2.connect(database_url)
+
+    log(f"Seeding {agents:,} agents from {len(templates)} templates")
+    copy_rows(conn, "agents", AGENT_COLUMNS, agent_rows(agents, api_agents, templates, rng), agents)
+
+    create_partitions(conn)
+
+    log(f"Seeding {executions:,} executions")
+    copy_rows(conn, "agent_executions", EXECUTION_COLUMNS, execution_rows(executions, agents, rng), executions)
+
+    log(f"Seeding {messages:,} inbox messages")
+    copy_rows(conn, "agent_messages", MESSAGE_COLUMNS, message_rows(messages, agents, api_agents, rng), messages)
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO tools (id, name, author_agent_id, package_name, pricing_model,
+                               per_call_price_usd, protocol, is_active, api_endpoint)
+            VALUES (%s, 'Benchmark Echo Tool', %s, 'bench-echo-tool', 'per_call', 0.001, 'mcp', true, %s)
+            ON CONFLICT (id) DO UPDATE SET api_endpoint = EXCLUDED.api_endpoint
+        """, (BENCH_TOOL_ID, str(agent_id(0)), f"http://127.0.0.1:{MOCK_SERVER_PORT}/api/v1/protocol/execute"))
+    conn.commit()
+
+    log("Refreshing derived data and statistics")
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for statement in ("SELECT refresh_category_counts()", "ANALYZE"):
+            try:
+                cur.execute(statement)
+            except Exception as e:
+                log(f"[WARN] {statement}: {str(e).splitlines()[0]}")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local benchmark database")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--agents", type=int, default=100000)
+    parser.add_argument("--api-agents", type=int, default=1000, help="Agents with API keys (inbox/tool callers)")
+    parser.add_argument("--executions", type=int, default=2000000)
+    parser.add_argument("--messages", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed (same seed = same fixture)")
+    parser.add_argument("--skip-schema", action="store_true", help="Seed into an existing schema")
+    args = parser.parse_args()
+
+    started = time.time()
+    if not args.skip_schema:
+        create_schema(args.database_url)
+    seed(args.database_url, args.agents, args.api_agents, args.executions, args.messages, args.seed)
+    log(f"[OK] Fixture ready in {time.time() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
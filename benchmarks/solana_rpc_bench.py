@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Solana RPC Benchmark
+Balance reads and payouts against the local stand-in RPC server, per-wallet
+calls vs the batched access layer (backend/payments/solana_rpc.py)
+
+- Balances: one getTokenAccountBalance per wallet (the old path) vs
+  getMultipleAccounts in chunks of 100
+- Payouts: one transaction and one blockhash fetch per transfer (the old
+  path) vs transfers packed per transaction with a cached blockhash
+- Boots payments/mock_solana_rpc.py with simulated latency; no cluster needed
+
+Usage:
+    python benchmarks/solana_rpc_bench.py
+    python benchmarks/solana_rpc_bench.py --wallets 5000 --payouts 500 --latency-ms 100
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import BACKEND_DIR  # noqa: E402
+
+PAYMENTS_DIR = os.path.join(BACKEND_DIR, "payments")
+sys.path.insert(0, PAYMENTS_DIR)
+from solders.keypair import Keypair  # noqa: E402
+from solana_rpc import SolanaRPC, payment_instructions, usdc_token_account  # noqa: E402
+
+MOCK_SOLANA_PORT = 8899
+
+
+def start_mock(port: int, latency_ms: float):
+    env = dict(os.environ, MOCK_SOLANA_LATENCY_MS=str(latency_ms))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "mock_solana_rpc:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PAYMENTS_DIR, env=env
+    )
+    deadline = time.time() + 30
+    with httpx.Client(timeout=1) as client:
+        while time.time() < deadline:
+            try:
+                if client.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                    return process
+            except httpx.HTTPError:
+                time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("mock_solana_rpc did not start")
+
+
+async def per_wallet_balances(rpc: SolanaRPC, wallets):
+    """Old path: getTokenAccountBalance per wallet, one after another"""
+    balances = {}
+    for wallet in wallets:
+        try:
+            result = await rpc.call("getTokenAccountBalance", [str(usdc_token_account(wallet))])
+            balances[wallet] = int(result["value"]["amount"]) / 1e6
+        except Exception:
+            balances[wallet] = 0.0
+    return balances
+
+
+async def per_transfer_payouts(rpc: SolanaRPC, treasury: Keypair, payments):
+    """Old path: fresh blockhash and one transaction per transfer, sequential"""
+    signatures = []
+    for payment in payments:
+        rpc.invalidate_blockhash()
+        try:
+            instructions = payment_instructions(treasury.pubkey(), payment["to"], payment["amount"])
+            signatures.append(await rpc.send_transfers(treasury, instructions))
+        except Exception:
+            signatures.append(None)
+    return signatures
+
+
+async def timed(label: str, rpc: SolanaRPC, operation):
+    requests_before = rpc.requests
+    started = time.perf_counter()
+    result = await operation
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<28}{elapsed:>9.2f}s{rpc.requests - requests_before:>9} RPC calls")
+    return result
+
+
+async def run(rpc_url: str, wallet_count: int, payout_count: int, requests_per_second: float):
+    wallets = [str(Keypair().pubkey()) for _ in range(wallet_count)]
+    treasury = Keypair()
+    payments = [{"to": wallet, "amount": 0.25} for wallet in wallets[:payout_count]]
+
+    async with SolanaRPC(rpc_url, requests_per_second=requests_per_second) as rpc:
+        print(f"\nBalances for {wallet_count:,} wallets")
+        old = await timed("per wallet", rpc, per_wallet_balances(rpc, wallets))
+        new = await timed("getMultipleAccounts", rpc, rpc.get_usdc_balances(wallets))
+        if old != new:
+            raise SystemExit("[FAIL] Batched balances differ from per-wallet balances")
+
+        print(f"\nPayouts to {payout_count:,} wallets")
+        old = await timed("transaction per transfer", rpc, per_transfer_payouts(rpc, treasury, payments))
+        new = await timed("packed transactions", rpc, rpc.send_usdc_batch(treasury, payments))
+        print(f"  packed: {len(set(filter(None, new)))} transactions, "
+              f"{sum(1 for sig in new if sig)}/{payout_count} paid "
+              f"(per transfer: {sum(1 for sig in old if sig)}/{payout_count})")
+        if [sig is None for sig in old] != [sig is None for sig in new]:
+            raise SystemExit("[FAIL] Packed payouts failed for different recipients")
+    print("\n[OK] Batched results match the per-call path")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched Solana RPC against a local stand-in")
+    parser.add_argument("--wallets", type=int, default=2000)
+    parser.add_argument("--payouts", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50, help="Simulated RPC latency")
+    parser.add_argument("--requests-per-second", type=float, default=0, help="Client rate limit (0 = none)")
+    parser.add_argument("--port", type=int, default=MOCK_SOLANA_PORT)
+    args = parser.parse_args()
+
+    mock = start_mock(args.port, args.latency_ms)
+    try:
+        asyncio.run(run(f"http://127.0.0.1:{args.port}", args.wallets, args.payouts, args.requests_per_second))
+    finally:
+        mock.terminate()
+        mock.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
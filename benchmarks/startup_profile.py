@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Startup Profile
+Import-time breakdown of the app and measured cold start, with a budget
+
+- Import report: `python -X importtime -c "import main"` in a fresh
+  interpreter, summarized per app module (api/services/payments/...) and
+  per third-party package, sorted by cumulative time
+- Cold start: boots `uvicorn main:app` and times until /health answers
+  (median of --runs); no database is needed for either measurement
+- Exits 1 when the median cold start exceeds --max-seconds, so CI can
+  gate on it
+
+Usage:
+    python benchmarks/startup_profile.py
+    python benchmarks/startup_profile.py --runs 5 --max-seconds 3 --top 25
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import BACKEND_DIR  # noqa: E402
+
+APP_PACKAGES = {"main", "api", "services", "payments", "models", "database", "middleware", "solana_wallet"}
+COLD_START_PORT = 8098
+DEFAULT_MAX_SECONDS = 3.0  # Cold-start budget for CI; tighten as startup work is removed
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times():
+    """[(module, self_us, cumulative_us, depth)] from -X importtime, in import order"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("DATABASE_URL", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def summarize(rows, top: int) -> dict:
+    total_us = next((cumulative for module, _, cumulative, _ in rows if module == "main"), 0)
+    app_modules = sorted(
+        ((module, cumulative) for module, _, cumulative, _ in rows if module.split(".")[0] in APP_PACKAGES),
+        key=lambda item: -item[1]
+    )
+    # A package's root line is its first (and only) import; its cumulative covers its submodules
+    stdlib = set(sys.stdlib_module_names)
+    packages = sorted(
+        ((module, cumulative) for module, _, cumulative, _ in rows
+         if "." not in module and module not in APP_PACKAGES and module not in stdlib
+         and not module.startswith("_")),
+        key=lambda item: -item[1]
+    )
+    return {
+        "import_main_ms": round(total_us / 1000, 1),
+        "app_modules": [{"module": m, "cumulative_ms": round(c / 1000, 1)} for m, c in app_modules[:top]],
+        "third_party": [{"package": m, "cumulative_ms": round(c / 1000, 1)} for m, c in packages[:top]]
+    }
+
+
+def cold_start(port: int, timeout: float = 60) -> float:
+    """Seconds from spawning uvicorn until /health returns 200"""
+    env = dict(os.environ, FULFILLMENT_WORKER_CONCURRENCY="0")
+    env.pop("DATABASE_URL", None)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        # One client reused across polls: building a client per poll costs enough
+        # CPU to slow the server being measured
+        with httpx.Client(timeout=1) as client:
+            while time.perf_counter() - started < timeout:
+                if process.poll() is not None:
+                    raise RuntimeError("uvicorn exited during startup")
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError(f"/health not ready after {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile app import time and cold start")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts to time (median is gated)")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS, help="Cold-start budget")
+    parser.add_argument("--top", type=int, default=15, help="Rows per report section")
+    parser.add_argument("--port", type=int, default=COLD_START_PORT)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = summarize(import_times(), args.top)
+    print(f"\nimport main: {report['import_main_ms']:.0f} ms\n")
+    print(f"{'app module':<44}{'cumulative ms':>14}")
+    for row in report["app_modules"]:
+        print(f"{row['module']:<44}{row['cumulative_ms']:>14.1f}")
+    print(f"\n{'third-party package':<44}{'cumulative ms':>14}")
+    for row in report["third_party"]:
+        print(f"{row['package']:<44}{row['cumulative_ms']:>14.1f}")
+
+    timings = [cold_start(args.port) for _ in range(args.runs)]
+    report["cold_start_seconds"] = [round(t, 3) for t in timings]
+    report["cold_start_median_seconds"] = round(statistics.median(timings), 3)
+    report["budget_seconds"] = args.max_seconds
+    print(f"\ncold start (to /health): median {report['cold_start_median_seconds']:.2f}s "
+          f"over {args.runs} runs, budget {args.max_seconds:.2f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if report["cold_start_median_seconds"] > args.max_seconds:
+        print("[WARN] Cold start over budget")
+        sys.exit(1)
+    print("[OK] Cold start within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Stripe Webhook Benchmark
+Fires bursts of signed Stripe events at /webhooks/stripe and checks the
+queue applied each one exactly once, in order per payment intent (migration 019)
+
+- Boots the app against the fixture database with a test webhook secret
+- Each burst sends `size` events concurrently (created, then succeeded or
+  failed for the same payment intent) plus redeliveries of some of them
+- Reports ack latency per burst size: it should stay flat as bursts grow,
+  because intake is one INSERT regardless of what the event triggers
+- Waits for the workers to drain, then checks every event id is stored once,
+  processed, and that each intent's events were processed in Stripe order
+
+Usage:
+    python benchmarks/stripe_webhook_bench.py                      # after seed_fixture.py
+    python benchmarks/stripe_webhook_bench.py --bursts 50,200,1000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import BACKEND_DIR, DEFAULT_DATABASE_URL  # noqa: E402
+from load_test import log, percentile, stop_stack, wait_ready  # noqa: E402
+
+APP_PORT = 8098
+WEBHOOK_SECRET = "whsec_benchmark"
+DRAIN_TIMEOUT_SECONDS = 120
+
+
+def sign(payload: bytes, secret: str = WEBHOOK_SECRET) -> str:
+    """Stripe-Signature header for payload (scheme v1: HMAC-SHA256 of "t.payload")"""
+    timestamp = int(time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def intent_events(run_id: str, index: int, created: int):
+    """Two events for one payment intent, in the order Stripe created them"""
+    intent_id = f"pi_bench_{run_id}_{index}"
+    outcome = "payment_intent.succeeded" if index % 4 else "payment_intent.payment_failed"
+    obj = {
+        "id": intent_id, "object": "payment_intent", "amount": 1999,
+        "metadata": {"transaction_id": str(uuid.UUID(int=index))},
+        "last_payment_error": {"message": "card_declined"} if outcome.endswith("failed") else None
+    }
+    return [
+        {"id": f"evt_bench_{run_id}_{index}_{step}", "object": "event", "type": event_type,
+         "created": created + step, "data": {"object": obj}}
+        for step, event_type in enumerate(("payment_intent.created", outcome))
+    ]
+
+
+async def send_burst(client: httpx.AsyncClient, url: str, events, concurrency: int):
+    """POST events concurrently; returns (sorted ack latencies in ms, status code counts)"""
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+
+    async def send(event):
+        payload = json.dumps(event).encode()
+        async with slots:
+            started = time.perf_counter()
+            response = await client.post(url, content=payload, headers={
+                "stripe-signature": sign(payload), "content-type": "application/json"
+            })
+            latencies.append((time.perf_counter() - started) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(send(event) for event in events))
+    return sorted(latencies), statuses
+
+
+async def run(base_url: str, bursts, concurrency: int, run_id: str):
+    url = f"{base_url}/api/v1/webhooks/stripe"
+    created = int(time.time())
+    index = 0
+    sent_ids = set()
+    print(f"\n{'burst':>8}{'requests':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  status codes")
+    async with httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=concurrency)) as client:
+        for size in bursts:
+            events = []
+            for _ in range(size // 2):
+                events.extend(intent_events(run_id, index, created))
+                index += 1
+            redeliveries = events[::10]  # Stripe retries: same event id again
+            sent_ids.update(event["id"] for event in events)
+            latencies, statuses = await send_burst(client, url, events + redeliveries, concurrency)
+            print(f"{size:>8}{len(latencies):>10}{percentile(latencies, 50):>10.1f}"
+                  f"{percentile(latencies, 95):>10.1f}{percentile(latencies, 99):>10.1f}  {statuses}")
+    return sent_ids
+
+
+def check_processing(database_url: str, run_id: str, expected: int) -> bool:
+    """Wait for the queue to drain, then check exactly-once and per-intent order"""
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    cur = conn.cursor()
+    like = f"evt_bench_{run_id}_%"
+    deadline = time.monotonic() + DRAIN_TIMEOUT_SECONDS
+    while True:
+        cur.execute("""
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE status = 'processed')
+            FROM stripe_webhook_events WHERE event_id LIKE %s
+        """, (like,))
+        stored, processed = cur.fetchone()
+        if processed == stored or time.monotonic() > deadline:
+            break
+        time.sleep(0.5)
+
+    cur.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT ordering_key FROM stripe_webhook_events
+            WHERE event_id LIKE %s
+            GROUP BY ordering_key
+            HAVING array_agg(event_id ORDER BY processed_at, seq) <> array_agg(event_id ORDER BY stripe_created_at, seq)
+        ) out_of_order
+    """, (like,))
+    out_of_order = cur.fetchone()[0]
+    conn.close()
+
+    print(f"\nEvents sent: {expected}  stored: {stored}  processed: {processed}  "
+          f"intents out of order: {out_of_order}")
+    ok = stored == expected and processed == expected and out_of_order == 0
+    print("[OK] Every event stored once and applied in order" if ok else "[FAIL] Webhook queue check failed")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Stripe webhook intake and queue processing")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--bursts", default="50,200,1000", help="Comma-separated events per burst")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight")
+    parser.add_argument("--base-url", help="Use a running app (started with STRIPE_WEBHOOK_SECRET=whsec_benchmark)")
+    args = parser.parse_args()
+    bursts = [int(size) for size in args.bursts.split(",")]
+
+    processes = []
+    base_url = args.base_url
+    if not base_url:
+        env = dict(os.environ, DATABASE_URL=args.database_url, STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET,
+                   PYTHONUNBUFFERED="1", FULFILLMENT_WORKER_CONCURRENCY="0")
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(APP_PORT),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND_DIR, env=env
+        ))
+        base_url = f"http://127.0.0.1:{APP_PORT}"
+    try:
+        if processes:
+            wait_ready(f"{base_url}/health", processes)
+        run_id = uuid.uuid4().hex[:8]
+        log(f"Run {run_id}: bursts {bursts}, concurrency {args.concurrency}")
+        sent_ids = asyncio.run(run(base_url, bursts, args.concurrency, run_id))
+        ok = check_processing(args.database_url, run_id, len(sent_ids))
+    finally:
+        stop_stack(processes)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
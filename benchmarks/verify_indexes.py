@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Index Verification
+EXPLAINs every hot query against the benchmark fixture and asserts the
+planner uses the index meant for it (migrations 014/015, the expiry
+sweeps' deadline indexes from 021, the request ranking index from 023 and
+the listing/request sort indexes from 025)
+
+Queries mirror the SQL the endpoints issue. Tables the fixture does not
+seed at scale (tools, work_orders, transactions, requests, listings, pools) are planned with
+enable_seqscan off: that proves the index matches the query shape, which
+is all a small table can show.
+
+Usage:
+    python benchmarks/verify_indexes.py                     # after seed_fixture.py
+    python benchmarks/verify_indexes.py --verbose           # print every plan
+"""
+
+from datetime import datetime, timedelta
+import argparse
+import json
+import os
+import sys
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import DEFAULT_DATABASE_URL, agent_id  # noqa: E402
+
+# Below this many rows the planner rightly prefers a seq scan
+MIN_ROWS_FOR_NATURAL_PLAN = 10000
+
+
+def hot_queries(seller_column: str):
+    """(name, table, sql, params, acceptable index names)"""
+    agent = str(agent_id(1))
+    month_ago = datetime.now() - timedelta(days=30)
+    return [
+        ("crawler dedup", "agents",
+         "SELECT * FROM agents WHERE source_url = %s LIMIT 1",
+         ("https://example.com#1",), {"idx_agents_source_url"}),
+        ("reviewer batch dedup", "agents",
+         "SELECT id, source_url FROM agents WHERE source_url IN %s",
+         (tuple(f"https://example.com#{i}" for i in range(50)),), {"idx_agents_source_url"}),
+        ("agents newest page", "agents",
+         "SELECT * FROM agents WHERE is_active = true ORDER BY created_at DESC, id DESC LIMIT 21",
+         (), {"idx_agents_active_created"}),
+        ("agents search by rating", "agents",
+         "SELECT * FROM agents WHERE is_active = true "
+         "ORDER BY coalesce(rating_avg, 0.0) DESC, coalesce(transaction_count, 0) DESC, id DESC LIMIT 21",
+         (), {"idx_agents_active_rating"}),
+        ("protocol discover", "agents",
+         "SELECT id FROM agents WHERE is_active = true AND capabilities::jsonb ?| ARRAY['speech-to-text', 'web-scraping']",
+         (), {"idx_agents_capabilities_gin"}),
+        ("reputation executions", "agent_executions",
+         "SELECT status, success, execution_time_ms FROM agent_executions "
+         "WHERE executing_agent_id = %s AND status IN ('completed', 'failed', 'timeout')",
+         (agent,), {"idx_executions_agent_status_completed"}),
+        ("market rate (30d)", "agent_executions",
+         "SELECT AVG(actual_cost_usd), COUNT(*) FROM agent_executions "
+         "WHERE executing_agent_id = %s AND completed_at >= %s AND started_at >= %s "
+         "AND actual_cost_usd IS NOT NULL",
+         (agent, month_ago, month_ago - timedelta(days=1)),
+         {"idx_executions_agent_status_completed", "idx_executions_agent_started"}),
+        ("execution history", "agent_executions",
+         "SELECT * FROM agent_executions WHERE executing_agent_id = %s ORDER BY started_at DESC LIMIT 50",
+         (agent,), {"idx_executions_agent_started"}),
+        ("inbox", "agent_messages",
+         "SELECT * FROM agent_messages WHERE to_agent_id = %s ORDER BY created_at DESC LIMIT 50",
+         (agent,), {"idx_messages_to_agent", "idx_messages_to_agent_status"}),
+        ("inbox pending count", "agent_messages",
+         "SELECT COUNT(*) FROM agent_messages WHERE to_agent_id = %s AND status = 'PENDING'",
+         (agent,), {"idx_messages_to_agent_status"}),
+        ("worker queue count", "work_orders",
+         "SELECT COUNT(*) FROM work_orders WHERE worker_agent_id = %s AND status = 'PENDING'",
+         (agent,), {"idx_workorders_worker"}),
+        ("seller sales", "transactions",
+         f"SELECT * FROM transactions WHERE {seller_column} = %s AND status = 'completed' "
+         "AND created_at >= %s ORDER BY created_at DESC",
+         (agent, month_ago), {"idx_transactions_seller_status_created"}),
+        ("featured tools", "tools",
+         "SELECT * FROM tools WHERE is_active = true ORDER BY total_installs DESC, avg_rating DESC LIMIT 10",
+         (), {"idx_tools_active_installs"}),
+        ("tool listing", "tools",
+         "SELECT * FROM tools WHERE is_active = true ORDER BY created_at DESC LIMIT 20 OFFSET 0",
+         (), {"idx_tools_active_created"}),
+        ("requests by attractiveness", "requests",
+         "SELECT * FROM requests WHERE status = 'OPEN' "
+         "ORDER BY coalesce(attractiveness_score, 0.0) DESC, id DESC LIMIT 21",
+         (), {"idx_requests_status_attractiveness_coalesced"}),
+        ("requests by budget", "requests",
+         "SELECT * FROM requests WHERE status = 'OPEN' "
+         "ORDER BY coalesce(budget_max_usd, 0.0) DESC, id DESC LIMIT 21",
+         (), {"idx_requests_status_budget_coalesced"}),
+        ("requests by deadline", "requests",
+         "SELECT * FROM requests WHERE status = 'OPEN' "
+         "ORDER BY coalesce(deadline, %s) ASC, id ASC LIMIT 21",
+         (datetime.max,), {"idx_requests_status_deadline_coalesced"}),
+        ("listings search by rating", "listings",
+         "SELECT * FROM listings WHERE status = 'ACTIVE' "
+         "ORDER BY coalesce(rating_avg, 0.0) DESC, coalesce(purchase_count, 0) DESC, id DESC LIMIT 21",
+         (), {"idx_listings_active_rating"}),
+        # Expiry scheduler sweeps (services/expiry_scheduler.py)
+        ("expire requests", "requests",
+         "SELECT id FROM requests WHERE status = 'OPEN' "
+         "AND COALESCE(expires_at, deadline + INTERVAL '24 hours') <= %s "
+         "ORDER BY COALESCE(expires_at, deadline + INTERVAL '24 hours') LIMIT 1000",
+         (datetime.utcnow(),), {"idx_requests_open_expiry"}),
+        ("expire pools", "group_buying_pools",
+         "SELECT id FROM group_buying_pools WHERE status = 'active' AND expires_at <= NOW() "
+         "ORDER BY expires_at LIMIT 1000",
+         (), {"idx_pools_active_expires"}),
+        ("trigger filled pools", "group_buying_pools",
+         "SELECT id FROM group_buying_pools WHERE status = 'active' AND current_quantity >= target_quantity LIMIT 1000",
+         (), {"idx_pools_active_filled"}),
+        ("expire work orders", "work_orders",
+         "SELECT id FROM work_orders WHERE status IN ('PENDING', 'ACCEPTED') AND deadline_at <= %s "
+         "ORDER BY deadline_at LIMIT 1000",
+         (datetime.utcnow(),), {"idx_workorders_live_deadline"}),
+    ]
+
+
+def plan_indexes(node) -> set:
+    """Index names used anywhere in an EXPLAIN (FORMAT JSON) plan tree"""
+    names = {node["Index Name"]} if "Index Name" in node else set()
+    for child in node.get("Plans", []):
+        names |= plan_indexes(child)
+    return names
+
+
+def parent_indexes(cur, names: set) -> set:
+    """Map indexes on partitions (migration 016) to the parent index they were created from"""
+    if not names:
+        return names
+    cur.execute("""
+        SELECT COALESCE(parent.relname, child.relname)
+        FROM pg_class child
+        LEFT JOIN pg_inherits i ON i.inhrelid = child.oid
+        LEFT JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE child.relname = ANY(%s)
+    """, (list(names),))
+    return {row[0] for row in cur.fetchall()}
+
+
+def seller_column(cur) -> str:
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'transactions' AND column_name IN ('seller_agent_id', 'recipient_agent_id')
+        ORDER BY column_name DESC
+    """)
+    row = cur.fetchone()
+    return row[0] if row else "seller_agent_id"
+
+
+def table_rows(cur, table: str) -> int:
+    # Leaf partitions carry the statistics of a partitioned table (migration 016)
+    cur.execute("""
+        SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint
+        FROM pg_partition_tree(to_regclass(%s)) t
+        JOIN pg_class c ON c.oid = t.relid
+        WHERE t.isleaf
+    """, (table,))
+    return cur.fetchone()[0]
+
+
+def verify(database_url: str, verbose: bool) -> bool:
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    cur = conn.cursor()
+    ok = True
+
+    for name, table, sql, params, expected in hot_queries(seller_column(cur)):
+        small = table_rows(cur, table) < MIN_ROWS_FOR_NATURAL_PLAN
+        cur.execute(f"SET enable_seqscan = {'off' if small else 'on'}")
+        try:
+            cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        except psycopg2.Error as e:
+            print(f"[FAIL] {name}: {str(e).splitlines()[0]}")
+            ok = False
+            continue
+        plan = cur.fetchone()[0]
+        plan = plan[0]["Plan"] if isinstance(plan, list) else json.loads(plan)[0]["Plan"]
+        used = parent_indexes(cur, plan_indexes(plan))
+        passed = bool(used & expected)
+        ok = ok and passed
+        mode = " (small table, seqscan off)" if small else ""
+        print(f"[{'OK' if passed else 'FAIL'}] {name}{mode}: "
+              f"uses {', '.join(sorted(used)) or 'no index'}"
+              + ("" if passed else f" - expected {' or '.join(sorted(expected))}"))
+        if verbose or not passed:
+            print(json.dumps(plan, indent=2))
+
+    cur.close()
+    conn.close()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assert hot queries use their indexes")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--verbose", action="store_true", help="Print every plan")
+    args = parser.parse_args()
+
+    if not verify(args.database_url, args.verbose):
+        sys.exit(1)
+    print("[OK] All hot queries use their indexes")
+
+
+if __name__ == "__main__":
+    main()
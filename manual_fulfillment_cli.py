@@ -2,32 +2,52 @@
 """
 Manual Fulfillment CLI Tool
 Manage manual arbitrage fulfillment tasks
+
+Reads the manual_fulfillment_tasks / fulfillment_log tables (migration 010).
+Requires DATABASE_URL.
 """
 import json
 import os
 import sys
-from datetime import datetime
 from typing import List, Dict
 
+import psycopg2
+
 
-QUEUE_FILE = 'data/manual_fulfillment_queue.jsonl'
-LOG_FILE = 'data/fulfillment_log.jsonl'
+def get_connection():
+    """Connect using DATABASE_URL"""
+    DATABASE_URL = os.getenv("DATABASE_URL")
+    if not DATABASE_URL:
+        print("ERROR: DATABASE_URL not set")
+        sys.exit(1)
+    return psycopg2.connect(DATABASE_URL)
 
 
 def load_queue() -> List[Dict]:
     """Load pending manual tasks"""
-    if not os.path.exists(QUEUE_FILE):
-        return []
-    
-    tasks = []
-    with open(QUEUE_FILE, 'r') as f:
-        for line in f:
-            if line.strip():
-                task = json.loads(line)
-                if task.get('status') == 'pending_human_action':
-                    tasks.append(task)
-    
-    return tasks
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT transaction_id, buyer_agent_id, listing_id, service_name,
+                   source_platform, source_url, source_price, buyer_paid,
+                   buyer_input, instructions, status, created_at
+            FROM manual_fulfillment_tasks
+            WHERE status = 'pending_human_action'
+            ORDER BY created_at
+        """)
+        cols = [desc[0] for desc in cur.description]
+        tasks = []
+        for row in cur.fetchall():
+            task = dict(zip(cols, row))
+            task['created_at'] = task['created_at'].isoformat() if task['created_at'] else None
+            task['buyer_input'] = task['buyer_input'] or {}
+            task['buyer_paid'] = task['buyer_paid'] or 0.0
+            task['source_price'] = task['source_price'] or 0.0
+            tasks.append(task)
+        return tasks
+    finally:
+        conn.close()
 
 
 def display_task(task: Dict, index: int):
@@ -151,34 +171,25 @@ def mark_complete(task_num: int):
     
     notes = input("\nOptional notes: ").strip()
     
-    # Update task status
-    task['status'] = 'completed'
-    task['completed_at'] = datetime.utcnow().isoformat()
-    task['delivery'] = delivery_data
-    task['notes'] = notes
-    
-    # Rewrite queue without this task
-    remaining_tasks = [t for t in tasks if t['transaction_id'] != task['transaction_id']]
-    
-    with open(QUEUE_FILE, 'w') as f:
-        for t in remaining_tasks:
-            f.write(json.dumps(t) + '\n')
-    
-    # Log completion
-    log_entry = {
-        'timestamp': datetime.utcnow().isoformat(),
-        'transaction_id': task['transaction_id'],
-        'action': 'manual_complete',
-        'delivery': delivery_data,
-        'notes': notes
-    }
-    
-    os.makedirs('data', exist_ok=True)
-    with open(LOG_FILE, 'a') as f:
-        f.write(json.dumps(log_entry) + '\n')
+    # Update task status + log completion
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE manual_fulfillment_tasks
+            SET status = 'completed', delivery = %s, notes = %s, completed_at = NOW()
+            WHERE transaction_id = %s AND status = 'pending_human_action'
+        """, (json.dumps(delivery_data), notes, task['transaction_id']))
+        cur.execute("""
+            INSERT INTO fulfillment_log (transaction_id, status, details)
+            VALUES (%s, 'manual_complete', %s)
+        """, (task['transaction_id'], json.dumps({'delivery': delivery_data, 'notes': notes})))
+        conn.commit()
+    finally:
+        conn.close()
     
     print(f"\n✅ Task marked complete!")
-    print(f"Remaining tasks: {len(remaining_tasks)}")
+    print(f"Remaining tasks: {len(tasks) - 1}")
     
     # Now need to call API to update transaction
     print(f"\n⚠️  IMPORTANT: Update transaction via API:")
@@ -188,22 +199,18 @@ def mark_complete(task_num: int):
 
 def stats():
     """Show fulfillment statistics"""
-    if not os.path.exists(LOG_FILE):
-        print("No fulfillment history yet")
-        return
-    
-    completed = 0
-    failed = 0
-    total_profit = 0.0
-    
-    with open(LOG_FILE, 'r') as f:
-        for line in f:
-            if line.strip():
-                entry = json.loads(line)
-                if entry.get('action') == 'manual_complete':
-                    completed += 1
-    
-    pending = len(load_queue())
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'completed'),
+                COUNT(*) FILTER (WHERE status = 'pending_human_action')
+            FROM manual_fulfillment_tasks
+        """)
+        completed, pending = cur.fetchone()
+    finally:
+        conn.close()
     
     print(f"\n📊 Fulfillment Statistics")
     print(f"{'='*40}")
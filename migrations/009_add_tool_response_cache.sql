@@ -0,0 +1,6 @@
+-- Migration 009: Idempotent response cache for tool executions
+-- Tools opt in by declaring a TTL; 0 keeps caching disabled
+
+ALTER TABLE tools ADD COLUMN IF NOT EXISTS cache_ttl_seconds INTEGER NOT NULL DEFAULT 0;
+
+COMMENT ON COLUMN tools.cache_ttl_seconds IS 'Author-declared TTL for cached /execute responses (0 = disabled)';
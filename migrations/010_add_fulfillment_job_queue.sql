@@ -0,0 +1,76 @@
+-- Migration 010: Durable job queue for arbitrage fulfillment
+-- Replaces inline fulfillment + data/*.jsonl files with Postgres queue tables.
+-- Workers claim jobs with FOR UPDATE SKIP LOCKED, so throughput scales with worker count.
+
+-- Fulfillment jobs (one per transaction attempt chain)
+CREATE TABLE IF NOT EXISTS fulfillment_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    transaction_id VARCHAR(64) NOT NULL,
+    platform VARCHAR(50) NOT NULL DEFAULT 'default',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, succeeded, dead
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    locked_by VARCHAR(100),
+    locked_at TIMESTAMPTZ,
+    last_error TEXT,
+    result JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    completed_at TIMESTAMPTZ
+);
+
+-- Only one live job per transaction (re-triggering is idempotent)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fulfillment_jobs_live_txn
+    ON fulfillment_jobs(transaction_id) WHERE status IN ('queued', 'running');
+
+-- Claim path: due queued jobs in FIFO order
+CREATE INDEX IF NOT EXISTS idx_fulfillment_jobs_due
+    ON fulfillment_jobs(run_after, id) WHERE status = 'queued';
+
+-- Per-platform concurrency check + stale lock recovery
+CREATE INDEX IF NOT EXISTS idx_fulfillment_jobs_running
+    ON fulfillment_jobs(platform, locked_at) WHERE status = 'running';
+
+-- Dead-letter inspection
+CREATE INDEX IF NOT EXISTS idx_fulfillment_jobs_dead
+    ON fulfillment_jobs(updated_at DESC) WHERE status = 'dead';
+
+-- Manual fulfillment tasks (replaces data/manual_fulfillment_queue.jsonl)
+CREATE TABLE IF NOT EXISTS manual_fulfillment_tasks (
+    id BIGSERIAL PRIMARY KEY,
+    transaction_id VARCHAR(64) NOT NULL UNIQUE,
+    buyer_agent_id VARCHAR(64),
+    listing_id VARCHAR(64),
+    service_name VARCHAR(500),
+    source_platform VARCHAR(50),
+    source_url TEXT,
+    source_price FLOAT,
+    buyer_paid FLOAT,
+    buyer_input JSONB DEFAULT '{}'::jsonb,
+    instructions TEXT,
+    status VARCHAR(30) NOT NULL DEFAULT 'pending_human_action',  -- pending_human_action, completed
+    delivery JSONB,
+    notes TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    completed_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_manual_tasks_pending
+    ON manual_fulfillment_tasks(created_at) WHERE status = 'pending_human_action';
+
+-- Fulfillment event log (replaces data/fulfillment_log.jsonl)
+CREATE TABLE IF NOT EXISTS fulfillment_log (
+    id BIGSERIAL PRIMARY KEY,
+    transaction_id VARCHAR(64) NOT NULL,
+    status VARCHAR(30) NOT NULL,
+    details JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_fulfillment_log_txn ON fulfillment_log(transaction_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_fulfillment_log_status ON fulfillment_log(status, created_at DESC);
+
+COMMENT ON TABLE fulfillment_jobs IS 'Arbitrage fulfillment job queue - claimed with FOR UPDATE SKIP LOCKED';
+COMMENT ON TABLE manual_fulfillment_tasks IS 'Tasks requiring human purchase on source platform (Fiverr, Upwork)';
+COMMENT ON TABLE fulfillment_log IS 'Append-only fulfillment events for analytics';
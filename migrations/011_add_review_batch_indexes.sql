@@ -0,0 +1,8 @@
+-- Migration 011: Indexes for batch agentic review
+-- Batch duplicate detection looks up lower(name) for a whole batch at once
+
+CREATE INDEX IF NOT EXISTS idx_agents_lower_name ON agents (lower(name));
+
+-- Pending-review queue (oldest first)
+CREATE INDEX IF NOT EXISTS idx_agents_pending_review
+    ON agents (created_at) WHERE pending_review = TRUE AND is_active = FALSE;
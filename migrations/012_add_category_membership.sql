@@ -0,0 +1,62 @@
+-- Migration 012: Precomputed agent <-> category membership
+-- Replaces the primary_use_case ILIKE '%' || name || '%' joins in
+-- category_endpoints with an indexed membership table and cached counts.
+-- Rows are written at ingest (crawler, submissions, registration) and by the
+-- auto-tagging job (services/category_tagger.py).
+
+CREATE TABLE IF NOT EXISTS agent_category_members (
+    category_slug VARCHAR(255) NOT NULL REFERENCES agent_categories(slug) ON DELETE CASCADE ON UPDATE CASCADE,
+    agent_id UUID NOT NULL REFERENCES agents(id) ON DELETE CASCADE,
+    is_primary BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (category_slug, agent_id)
+);
+
+-- Category page: agents in a category; (category_slug, agent_id) is the PK
+-- Re-tagging an agent: delete its memberships by agent_id
+CREATE INDEX IF NOT EXISTS idx_category_members_agent ON agent_category_members(agent_id);
+
+-- Cached per-category counts (active agents only)
+ALTER TABLE agent_categories ADD COLUMN IF NOT EXISTS agent_count INT NOT NULL DEFAULT 0;
+ALTER TABLE agent_categories ADD COLUMN IF NOT EXISTS agent_count_updated_at TIMESTAMP;
+
+-- One-time backfill using the previous matching rules (primary_use_case equal
+-- to slug/name or containing the name) plus use_case_tags
+INSERT INTO agent_category_members (category_slug, agent_id, is_primary)
+SELECT ac.slug, a.id, (a.primary_use_case = ac.slug OR a.primary_use_case = ac.name)
+FROM agents a
+JOIN agent_categories ac ON (
+    a.primary_use_case = ac.slug
+    OR a.primary_use_case = ac.name
+    OR a.primary_use_case ILIKE '%' || ac.name || '%'
+    OR ac.slug = ANY(a.use_case_tags)
+)
+ON CONFLICT DO NOTHING;
+
+-- Recompute cached counts in one grouped pass over the membership table.
+-- Concurrent callers skip instead of queueing behind the row locks.
+CREATE OR REPLACE FUNCTION refresh_category_counts() RETURNS void AS $$
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_category_counts')) THEN
+        RETURN;
+    END IF;
+
+    UPDATE agent_categories ac
+    SET agent_count = COALESCE(c.agent_count, 0),
+        agent_count_updated_at = NOW()
+    FROM agent_categories ac2
+    LEFT JOIN (
+        SELECT m.category_slug, COUNT(*) AS agent_count
+        FROM agent_category_members m
+        JOIN agents a ON a.id = m.agent_id
+        WHERE a.is_active = TRUE
+        GROUP BY m.category_slug
+    ) c ON c.category_slug = ac2.slug
+    WHERE ac.id = ac2.id;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT refresh_category_counts();
+
+COMMENT ON TABLE agent_category_members IS 'Agent <-> category membership, maintained at ingest/tagging time';
+COMMENT ON COLUMN agent_categories.agent_count IS 'Cached count of active member agents (refresh_category_counts())';
@@ -0,0 +1,110 @@
+-- Migration 013: SQL-side attractiveness ranking for request search
+-- Mirrors Request.calculate_attractiveness_score() so search_requests can
+-- ORDER BY + keyset-paginate in the database instead of sorting one page in Python.
+--
+-- Stored column maintained by:
+--   * trigger on INSERT/UPDATE (budget, urgency, bid_count, inputs change)
+--   * refresh_request_attractiveness() for open requests nearing their deadline
+--     (the time-remaining component changes at 24h / 6h / 1h)
+
+CREATE OR REPLACE FUNCTION request_attractiveness(
+    budget_max_usd FLOAT,
+    urgency TEXT,
+    bid_count INT,
+    deadline TIMESTAMP,
+    input_data TEXT,
+    expected_output TEXT,
+    as_of TIMESTAMP
+) RETURNS FLOAT AS $$
+    SELECT
+        -- Budget (0-40)
+        CASE WHEN COALESCE(budget_max_usd, 0) <> 0 THEN LEAST(budget_max_usd / 50 * 40, 40) ELSE 0 END
+        -- Urgency (0-20)
+        + CASE upper(urgency)
+            WHEN 'CRITICAL' THEN 20
+            WHEN 'HIGH' THEN 18
+            WHEN 'MEDIUM' THEN 15
+            ELSE 10
+          END
+        -- Competition (0-20)
+        + CASE
+            WHEN COALESCE(bid_count, 0) = 0 THEN 20
+            WHEN bid_count < 3 THEN 15
+            WHEN bid_count < 5 THEN 10
+            ELSE 5
+          END
+        -- Time remaining (0-10)
+        + CASE
+            WHEN deadline IS NULL THEN 0
+            WHEN deadline - as_of > INTERVAL '24 hours' THEN 10
+            WHEN deadline - as_of > INTERVAL '6 hours' THEN 7
+            WHEN deadline - as_of > INTERVAL '1 hour' THEN 4
+            ELSE 2
+          END
+        -- Clarity (0-10)
+        + CASE WHEN length(input_data) > 100 THEN 5 ELSE 0 END
+        + CASE WHEN length(expected_output) > 50 THEN 5 ELSE 0 END
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE requests ADD COLUMN IF NOT EXISTS attractiveness_score FLOAT;
+
+CREATE OR REPLACE FUNCTION requests_set_attractiveness() RETURNS trigger AS $$
+BEGIN
+    NEW.attractiveness_score := request_attractiveness(
+        NEW.budget_max_usd, NEW.urgency::text, NEW.bid_count, NEW.deadline,
+        NEW.input_data::text, NEW.expected_output, (NOW() AT TIME ZONE 'UTC')::timestamp
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_requests_attractiveness ON requests;
+CREATE TRIGGER trg_requests_attractiveness
+    BEFORE INSERT OR UPDATE OF budget_max_usd, urgency, bid_count, deadline, input_data, expected_output, status
+    ON requests
+    FOR EACH ROW EXECUTE FUNCTION requests_set_attractiveness();
+
+-- Re-score open requests whose time-remaining band may have changed.
+-- Only rows within 25h of their deadline can move; concurrent callers skip.
+CREATE OR REPLACE FUNCTION refresh_request_attractiveness() RETURNS INT AS $$
+DECLARE
+    updated INT;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_request_attractiveness')) THEN
+        RETURN 0;
+    END IF;
+
+    UPDATE requests r
+    SET attractiveness_score = s.score
+    FROM (
+        SELECT id, request_attractiveness(
+            budget_max_usd, urgency::text, bid_count, deadline,
+            input_data::text, expected_output, (NOW() AT TIME ZONE 'UTC')::timestamp
+        ) AS score
+        FROM requests
+        WHERE status = 'OPEN'  -- SQLAlchemy Enum stores member names
+          AND deadline IS NOT NULL
+          AND deadline <= (NOW() AT TIME ZONE 'UTC') + INTERVAL '25 hours'
+    ) s
+    WHERE r.id = s.id
+      AND r.attractiveness_score IS DISTINCT FROM s.score;
+
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill existing rows
+UPDATE requests SET attractiveness_score = request_attractiveness(
+    budget_max_usd, urgency::text, bid_count, deadline,
+    input_data::text, expected_output, (NOW() AT TIME ZONE 'UTC')::timestamp
+);
+
+-- Ranking + keyset pagination within a status
+CREATE INDEX IF NOT EXISTS idx_requests_status_attractiveness
+    ON requests (status, attractiveness_score DESC, id DESC);
+
+-- Refresh scan: open requests approaching their deadline
+CREATE INDEX IF NOT EXISTS idx_requests_open_deadline ON requests (deadline) WHERE status = 'OPEN';
+
+COMMENT ON COLUMN requests.attractiveness_score IS 'Seller-facing rank; mirrors Request.calculate_attractiveness_score()';
@@ -0,0 +1,10 @@
+-- Migration 014: GIN index for protocol discovery
+-- /protocol/discover and /protocol/discover/batch match agents with
+-- capabilities::jsonb ?| ARRAY[...]; the expression must match the query's
+-- cast exactly for the planner to use this index.
+
+CREATE INDEX IF NOT EXISTS idx_agents_capabilities_gin
+    ON agents USING GIN ((capabilities::jsonb))
+    WHERE is_active = true;
+
+COMMENT ON INDEX idx_agents_capabilities_gin IS 'Capability lookup for protocol discovery (single and batch)';
@@ -0,0 +1,90 @@
+-- Migration 015: Indexes for the hot query paths
+-- Each index is matched to the predicates/ordering of a query in the code;
+-- benchmarks/verify_indexes.py EXPLAINs those queries against the seeded
+-- fixture and fails if the planner stops using them.
+-- On a large production database run each CREATE INDEX with CONCURRENTLY
+-- (outside a transaction) to avoid blocking writes.
+
+-- ============================================================================
+-- agents
+-- ============================================================================
+
+-- Crawler dedup (crawler_endpoints) and batch reviewer dedup (source_url IN (...)).
+-- Originally from 002; restated for databases built by create_all only.
+CREATE INDEX IF NOT EXISTS idx_agents_source_url ON agents (source_url);
+
+-- GET /api/v1/agents and category "newest": WHERE is_active ORDER BY created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_agents_active_created
+    ON agents (created_at DESC, id DESC)
+    WHERE is_active = true;
+
+-- GET /api/v1/agents/search and category "rating": keyset on
+-- (COALESCE(rating_avg, 0), COALESCE(transaction_count, 0), id), all DESC
+CREATE INDEX IF NOT EXISTS idx_agents_active_rating
+    ON agents ((COALESCE(rating_avg, 0)) DESC, (COALESCE(transaction_count, 0)) DESC, id DESC)
+    WHERE is_active = true;
+
+-- (capabilities GIN for protocol discovery is idx_agents_capabilities_gin, migration 014)
+
+-- ============================================================================
+-- agent_executions
+-- ============================================================================
+
+-- Reputation (executing_agent_id + status IN (...)) and market rate
+-- (executing_agent_id + completed_at range)
+CREATE INDEX IF NOT EXISTS idx_executions_agent_status_completed
+    ON agent_executions (executing_agent_id, status, completed_at);
+
+-- Execution history (ORDER BY started_at DESC) and first/last execution lookups
+CREATE INDEX IF NOT EXISTS idx_executions_agent_started
+    ON agent_executions (executing_agent_id, started_at DESC);
+
+-- Leading column of both indexes above; dropping it saves a write per execution
+DROP INDEX IF EXISTS idx_executions_executing_agent;
+
+-- ============================================================================
+-- agent_messages / work_orders
+-- ============================================================================
+
+-- Inbox filtered by status and the pending-message count on the dashboard
+CREATE INDEX IF NOT EXISTS idx_messages_to_agent_status
+    ON agent_messages (to_agent_id, status, created_at DESC);
+
+-- Worker queue counts by status. Originally from 006 (without IF NOT EXISTS,
+-- so it may be missing where 006 failed part way); restated here.
+CREATE INDEX IF NOT EXISTS idx_workorders_worker
+    ON work_orders (worker_agent_id, status, created_at DESC);
+
+-- ============================================================================
+-- transactions
+-- ============================================================================
+
+-- Seller earnings/history (seller + status + created_at range). The seller
+-- column is seller_agent_id in the marketplace schema and recipient_agent_id
+-- in the USDC payments schema (004); index whichever this database has.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'transactions' AND column_name = 'seller_agent_id') THEN
+        CREATE INDEX IF NOT EXISTS idx_transactions_seller_status_created
+            ON transactions (seller_agent_id, status, created_at DESC);
+    ELSIF EXISTS (SELECT 1 FROM information_schema.columns
+                  WHERE table_name = 'transactions' AND column_name = 'recipient_agent_id') THEN
+        CREATE INDEX IF NOT EXISTS idx_transactions_seller_status_created
+            ON transactions (recipient_agent_id, status, created_at DESC);
+    END IF;
+END $$;
+
+-- ============================================================================
+-- tools
+-- ============================================================================
+
+-- Featured tools: WHERE is_active ORDER BY total_installs DESC, avg_rating DESC
+CREATE INDEX IF NOT EXISTS idx_tools_active_installs
+    ON tools (total_installs DESC, avg_rating DESC)
+    WHERE is_active = true;
+
+-- Tool listing: WHERE is_active [AND ...] ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_tools_active_created
+    ON tools (created_at DESC)
+    WHERE is_active = true;
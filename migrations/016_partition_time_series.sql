@@ -0,0 +1,160 @@
+-- Migration 016: Monthly range partitioning for the time-series tables
+-- agent_executions (started_at), agent_messages (created_at),
+-- agent_reputation_history (recorded_at), agent_performance_history (snapshot_at)
+--
+-- Windowed queries (valuation, reputation history, performance charts) then
+-- scan only the months in their window. services/partition_manager.py keeps
+-- partitions created ahead of time and archives expired months to gzip files;
+-- benchmarks/verify_partitions.py checks pruning on the hot queries.
+--
+-- Notes:
+-- - The primary key becomes (id, <time column>): a unique constraint on a
+--   partitioned table must include the partition key. id alone stays unique
+--   in practice (UUIDs) but is no longer enforced across partitions.
+-- - Foreign keys that REFERENCE these tables by id are dropped (Postgres cannot
+--   reference a partitioned table without the partition key):
+--   agent_messages.reply_to_id, work_orders.message_id and
+--   agent_reputation_history.execution_id. Foreign keys FROM these tables
+--   (to agents etc.) are kept.
+-- - No DEFAULT partition: rows outside the created months fail loudly instead
+--   of piling up unpruned, and ORDER BY <time column> LIMIT n stays an ordered
+--   append over the partitions.
+-- - Conversion copies each table inside this migration's transaction; on a
+--   large database run it in a maintenance window.
+
+-- ============================================================================
+-- Partition helpers
+-- ============================================================================
+
+-- Create the monthly partitions of p_parent covering [p_from, p_until].
+-- Partitions are named <parent>_pYYYYMM. Returns how many were created.
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(
+    p_parent TEXT,
+    p_from TIMESTAMP,
+    p_until TIMESTAMP
+) RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::DATE;
+    last_month DATE := date_trunc('month', p_until)::DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := p_parent || '_p' || to_char(month_start, 'YYYYMM');
+        -- An existing table of that name is either attached already or an
+        -- archived month the partition manager has not dropped yet
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, p_parent, month_start, (month_start + INTERVAL '1 month')::DATE
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Convert a plain table into one range-partitioned by month on p_column,
+-- keeping its rows, defaults, indexes, triggers and outgoing foreign keys.
+-- No-op when the table is missing or already partitioned.
+CREATE OR REPLACE FUNCTION partition_table_by_month(
+    p_table TEXT,
+    p_column TEXT,
+    p_months_ahead INTEGER DEFAULT 3
+) RETURNS VOID AS $$
+DECLARE
+    old_table TEXT := p_table || '_unpartitioned';
+    r RECORD;
+    def TEXT;
+    index_defs TEXT[];
+    trigger_defs TEXT[];
+    foreign_key_defs TEXT[];
+    first_key TIMESTAMP;
+    last_key TIMESTAMP;
+BEGIN
+    IF to_regclass(p_table) IS NULL THEN
+        RAISE NOTICE '% does not exist, skipped', p_table;
+        RETURN;
+    END IF;
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = p_table::regclass) THEN
+        RAISE NOTICE '% is already partitioned', p_table;
+        RETURN;
+    END IF;
+
+    -- Foreign keys referencing this table by id (including self references)
+    FOR r IN
+        SELECT conrelid::regclass AS referencing, conname
+        FROM pg_constraint
+        WHERE confrelid = p_table::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', r.referencing, r.conname);
+        RAISE NOTICE 'Dropped foreign key % on % (references %)', r.conname, r.referencing, p_table;
+    END LOOP;
+
+    -- Definitions to recreate on the partitioned table (they name p_table, which
+    -- the new table takes over); the primary key is replaced by (id, p_column)
+    SELECT array_agg(indexdef) INTO index_defs
+    FROM pg_indexes
+    WHERE schemaname = current_schema() AND tablename = p_table
+      AND indexname NOT IN (SELECT conname FROM pg_constraint
+                            WHERE conrelid = p_table::regclass AND contype = 'p');
+    SELECT array_agg(pg_get_triggerdef(oid)) INTO trigger_defs
+    FROM pg_trigger
+    WHERE tgrelid = p_table::regclass AND NOT tgisinternal;
+    SELECT array_agg(format('ALTER TABLE %I ADD CONSTRAINT %I %s', p_table, conname, pg_get_constraintdef(oid)))
+    INTO foreign_key_defs
+    FROM pg_constraint
+    WHERE conrelid = p_table::regclass AND contype = 'f';
+
+    -- Move the old table and its index names out of the way
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', p_table, old_table);
+    FOR r IN SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = old_table LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', r.indexname, left(r.indexname, 50) || '_unpartitioned');
+    END LOOP;
+
+    -- The partition key must be NOT NULL; rows written without one get NOW()
+    EXECUTE format('UPDATE %I SET %I = NOW() WHERE %I IS NULL', old_table, p_column, p_column);
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS) PARTITION BY RANGE (%I)',
+        p_table, old_table, p_column
+    );
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN %I SET NOT NULL', p_table, p_column);
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, %I)', p_table, p_column);
+
+    EXECUTE format('SELECT MIN(%I), MAX(%I) FROM %I', p_column, p_column, old_table) INTO first_key, last_key;
+    PERFORM ensure_monthly_partitions(
+        p_table,
+        COALESCE(first_key, NOW()::TIMESTAMP),
+        GREATEST(COALESCE(last_key, NOW()::TIMESTAMP), (NOW() + make_interval(months => p_months_ahead))::TIMESTAMP)
+    );
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', p_table, old_table);
+    EXECUTE format('DROP TABLE %I', old_table);
+
+    -- Unique indexes without the partition key cannot exist on a partitioned
+    -- table; those (and anything else that fails) are reported and skipped
+    FOREACH def IN ARRAY COALESCE(index_defs, '{}') || COALESCE(foreign_key_defs, '{}') || COALESCE(trigger_defs, '{}') LOOP
+        BEGIN
+            EXECUTE def;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE NOTICE 'Not recreated on partitioned %: % (%)', p_table, def, SQLERRM;
+        END;
+    END LOOP;
+
+    EXECUTE format('ANALYZE %I', p_table);
+    RAISE NOTICE 'Partitioned % by month on %', p_table, p_column;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- Convert the tables
+-- ============================================================================
+
+-- agent_executions first: agent_reputation_history.execution_id references it
+SELECT partition_table_by_month('agent_executions', 'started_at');
+SELECT partition_table_by_month('agent_messages', 'created_at');
+SELECT partition_table_by_month('agent_reputation_history', 'recorded_at');
+SELECT partition_table_by_month('agent_performance_history', 'snapshot_at');
@@ -0,0 +1,16 @@
+-- Migration 017: Shared store for wallet-auth challenges
+-- Used with WALLET_CHALLENGE_BACKEND=postgres (services/challenge_store.py) so a
+-- challenge issued by one API worker can be verified by any other.
+-- UNLOGGED: writes skip the WAL and the table is emptied after a crash, which
+-- only means affected wallets request a new challenge.
+
+CREATE UNLOGGED TABLE IF NOT EXISTS wallet_auth_challenges (
+    wallet_address VARCHAR(64) PRIMARY KEY,
+    challenge_hash VARCHAR(64) NOT NULL,
+    challenge_text TEXT NOT NULL,
+    expires_at BIGINT NOT NULL  -- Unix seconds
+);
+
+-- Background sweep: DELETE ... WHERE expires_at <= now
+CREATE INDEX IF NOT EXISTS idx_wallet_auth_challenges_expires
+    ON wallet_auth_challenges (expires_at);
@@ -0,0 +1,27 @@
+-- Migration 018: Pre-generated Solana wallets for agent registration
+-- services/wallet_pool.py keeps this table topped up in the background;
+-- registration claims one row (DELETE ... RETURNING on the oldest id, SKIP
+-- LOCKED) inside the transaction that inserts the agent, so a failed insert
+-- puts the wallet back.
+-- Private keys are encrypted exactly as on agents.wallet_private_key_encrypted.
+
+CREATE TABLE IF NOT EXISTS wallet_pool (
+    id BIGSERIAL PRIMARY KEY,
+    wallet_address VARCHAR(44) NOT NULL UNIQUE,
+    wallet_private_key_encrypted TEXT NOT NULL,
+    usdc_address VARCHAR(44) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Wallet columns from 003, restated for databases built by create_all only
+ALTER TABLE agents
+ADD COLUMN IF NOT EXISTS wallet_address VARCHAR(44),
+ADD COLUMN IF NOT EXISTS wallet_private_key_encrypted TEXT,
+ADD COLUMN IF NOT EXISTS wallet_created_at TIMESTAMP,
+ADD COLUMN IF NOT EXISTS usdc_balance FLOAT DEFAULT 0.0,
+ADD COLUMN IF NOT EXISTS last_balance_check TIMESTAMP;
+
+-- Bulk provisioning finds agents still without a wallet
+CREATE INDEX IF NOT EXISTS idx_agents_without_wallet
+    ON agents (created_at)
+    WHERE wallet_address IS NULL;
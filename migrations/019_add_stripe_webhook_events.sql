@@ -0,0 +1,40 @@
+-- Migration 019: Durable Stripe webhook intake
+-- The webhook endpoint verifies the signature, stores the raw event and acks;
+-- workers apply it later. Stripe retries and replays hit the event_id primary key
+-- and are acked without being processed twice.
+
+CREATE TABLE IF NOT EXISTS stripe_webhook_events (
+    event_id VARCHAR(255) PRIMARY KEY,          -- Stripe evt_... id (idempotency key)
+    seq BIGSERIAL NOT NULL,                     -- Intake order, tie-break within one Stripe second
+    event_type VARCHAR(100) NOT NULL,
+    ordering_key VARCHAR(255) NOT NULL,         -- Payment intent (or transfer) id; one event per key runs at a time
+    stripe_created_at TIMESTAMPTZ NOT NULL,     -- event.created
+    payload JSONB NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending, processing, processed, dead
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_after TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    locked_by VARCHAR(100),
+    locked_at TIMESTAMPTZ,
+    last_error TEXT,
+    result JSONB,
+    received_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    processed_at TIMESTAMPTZ
+);
+
+-- Claim path: due events in Stripe order
+CREATE INDEX IF NOT EXISTS idx_stripe_webhook_events_due
+    ON stripe_webhook_events(stripe_created_at, seq) WHERE status = 'pending';
+
+-- Per-payment-intent ordering check: is an earlier event for this key still open?
+CREATE INDEX IF NOT EXISTS idx_stripe_webhook_events_open_key
+    ON stripe_webhook_events(ordering_key, stripe_created_at, seq) WHERE status IN ('pending', 'processing');
+
+-- Stale lock recovery
+CREATE INDEX IF NOT EXISTS idx_stripe_webhook_events_processing
+    ON stripe_webhook_events(locked_at) WHERE status = 'processing';
+
+-- Dead-letter inspection
+CREATE INDEX IF NOT EXISTS idx_stripe_webhook_events_dead
+    ON stripe_webhook_events(processed_at DESC) WHERE status = 'dead';
+
+COMMENT ON TABLE stripe_webhook_events IS 'Verified Stripe webhook events, processed by services/stripe_webhook_queue.py workers';
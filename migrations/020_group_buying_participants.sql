@@ -0,0 +1,77 @@
+-- Migration 020: Group buying participants in their own table
+-- Joins used to read the pool row FOR UPDATE, append to its participants JSON
+-- and write the whole row back. Now a join is one statement: a conditional
+-- increment of current_quantity plus an upsert into pool_members, and the
+-- increment that fills the pool also triggers it.
+
+-- Restated from 007 for databases whose pools table came from the ORM model
+CREATE TABLE IF NOT EXISTS pool_members (
+    id VARCHAR PRIMARY KEY,
+    pool_id VARCHAR NOT NULL REFERENCES group_buying_pools(id),
+    agent_id UUID NOT NULL REFERENCES agents(id),
+    quantity INTEGER DEFAULT 1,
+    joined_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE(pool_id, agent_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_pool_members_agent ON pool_members(agent_id, joined_at DESC);
+
+-- current_quantity + n must never be NULL + n
+UPDATE group_buying_pools SET current_quantity = 0 WHERE current_quantity IS NULL;
+ALTER TABLE group_buying_pools ALTER COLUMN current_quantity SET DEFAULT 0;
+ALTER TABLE group_buying_pools ALTER COLUMN current_quantity SET NOT NULL;
+
+-- Move existing participants JSON into pool_members (one row per pool and agent).
+-- Entries whose agent_id is not a known agent cannot be moved: they are
+-- reported with RAISE NOTICE, and pools still taking joins get
+-- current_quantity recomputed from the rows that were moved, so the
+-- "current_quantity = SUM(pool_members.quantity)" invariant holds from here on.
+DO $$
+DECLARE
+    pool RECORD;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'group_buying_pools' AND column_name = 'participants'
+    ) THEN
+        -- CASE, not AND: only cast agent_ids that look like UUIDs
+        CREATE TEMP TABLE pool_participants_backfill AS
+        SELECT p.id AS pool_id,
+               entry,
+               CASE WHEN (entry ->> 'agent_id') ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+                    THEN EXISTS (SELECT 1 FROM agents a WHERE a.id = (entry ->> 'agent_id')::uuid)
+                    ELSE false
+               END AS known_agent
+        FROM group_buying_pools p
+        CROSS JOIN LATERAL jsonb_array_elements(COALESCE(p.participants::jsonb, '[]'::jsonb)) entry;
+
+        INSERT INTO pool_members (id, pool_id, agent_id, quantity, joined_at)
+        SELECT md5(pool_id || ':' || (entry ->> 'agent_id')),
+               pool_id,
+               (entry ->> 'agent_id')::uuid,
+               SUM(COALESCE((entry ->> 'quantity')::int, 1)),
+               MIN((entry ->> 'joined_at')::timestamptz)
+        FROM pool_participants_backfill
+        WHERE known_agent
+        GROUP BY pool_id, entry ->> 'agent_id'
+        ON CONFLICT (pool_id, agent_id) DO NOTHING;
+
+        FOR pool IN
+            SELECT pool_id, string_agg(entry::text, ', ') AS entries
+            FROM pool_participants_backfill
+            WHERE NOT known_agent
+            GROUP BY pool_id
+        LOOP
+            RAISE NOTICE 'Pool %: participants not migrated (unknown agent_id): %', pool.pool_id, pool.entries;
+        END LOOP;
+
+        UPDATE group_buying_pools p
+        SET current_quantity = COALESCE((SELECT SUM(m.quantity) FROM pool_members m WHERE m.pool_id = p.id), 0)
+        WHERE p.status IN ('active', 'open')
+          AND p.id IN (SELECT pool_id FROM pool_participants_backfill);
+
+        DROP TABLE pool_participants_backfill;
+    END IF;
+END $$;
+
+COMMENT ON TABLE pool_members IS 'Group buying participation - one row per pool and agent; group_buying_pools.current_quantity is their sum';
@@ -0,0 +1,30 @@
+-- Migration 021: Deadline indexes for the expiry scheduler
+-- services/expiry_scheduler.py moves live rows past their deadline to a
+-- terminal status in bulk, so listings filtered on the live status stop
+-- reading dead rows. Each sweep walks one of these partial indexes, which only
+-- hold rows that are still live.
+-- Status literals are SQLAlchemy Enum member names, except group_buying_pools
+-- (plain strings written by the pools API).
+
+-- Work orders can now expire (MessageStatus.EXPIRED). Only needed when the
+-- table was built by create_all with a native enum type.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_type WHERE typname = 'messagestatus') THEN
+        ALTER TYPE messagestatus ADD VALUE IF NOT EXISTS 'EXPIRED';
+    END IF;
+END $$;
+
+-- Pools: expire at expires_at; trigger pools that are full but still active
+CREATE INDEX IF NOT EXISTS idx_pools_active_expires
+    ON group_buying_pools (expires_at) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_pools_active_filled
+    ON group_buying_pools (id) WHERE status = 'active' AND current_quantity >= target_quantity;
+
+-- Requests: expire when the selection window closes (expires_at, else deadline + 24h)
+CREATE INDEX IF NOT EXISTS idx_requests_open_expiry
+    ON requests ((COALESCE(expires_at, deadline + INTERVAL '24 hours'))) WHERE status = 'OPEN';
+
+-- Work orders: pending or accepted past deadline_at
+CREATE INDEX IF NOT EXISTS idx_workorders_live_deadline
+    ON work_orders (deadline_at) WHERE status IN ('PENDING', 'ACCEPTED');
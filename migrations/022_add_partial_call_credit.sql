@@ -0,0 +1,6 @@
+-- Migration 022: Fractional call credits
+-- Discounted calls (tool response cache hits) consume a fraction of one call
+-- credit. Fractions accumulate here; each time they add up to a whole call,
+-- one paid or free call credit is consumed (api/rate_limiting.py).
+
+ALTER TABLE agents ADD COLUMN IF NOT EXISTS partial_call_credit FLOAT DEFAULT 0.0;
@@ -0,0 +1,10 @@
+-- Migration 023: Keyset index for the NULL-safe attractiveness sort
+-- GET /api/v1/requests/search?sort_by=attractiveness now orders and pages on
+-- (COALESCE(attractiveness_score, 0), id), both DESC, so a NULL score
+-- (row not yet scored) ranks as 0 instead of first and cursors compare
+-- NULL-free values. The plain-column index from 013 no longer matches it.
+
+CREATE INDEX IF NOT EXISTS idx_requests_status_attractiveness_coalesced
+    ON requests (status, (COALESCE(attractiveness_score, 0)) DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_requests_status_attractiveness;
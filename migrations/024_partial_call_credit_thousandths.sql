@@ -0,0 +1,15 @@
+-- Migration 024: Integer fractional call credits
+-- agents.partial_call_credit (022) was a FLOAT fraction of a call, and float
+-- sums undercount (ten 0.1 cache hits added to 0.999..., so a credit was only
+-- consumed on the 11th). It now counts whole thousandths of a call and is
+-- updated in place with partial_call_credit + n (api/rate_limiting.py).
+
+ALTER TABLE agents
+    ALTER COLUMN partial_call_credit TYPE INTEGER
+        USING ROUND(COALESCE(partial_call_credit, 0) * 1000)::INTEGER,
+    ALTER COLUMN partial_call_credit SET DEFAULT 0;
+
+UPDATE agents SET partial_call_credit = 0 WHERE partial_call_credit IS NULL;
+
+-- The API now rejects negative cache TTLs (ge=0); clear any stored earlier
+UPDATE tools SET cache_ttl_seconds = 0 WHERE cache_ttl_seconds < 0;
@@ -0,0 +1,22 @@
+-- Migration 025: Keyset indexes for the NULL-safe listing and request sorts
+-- GET /api/v1/listings/search and GET /api/v1/requests/search?sort_by=budget|deadline
+-- order and page on COALESCE()d columns so NULLs sort as a fixed value and
+-- cursors compare NULL-free values. An index on the bare column cannot serve
+-- those ORDER BYs; these match the expressions exactly (see
+-- benchmarks/verify_indexes.py).
+-- On a large production database run each CREATE INDEX with CONCURRENTLY
+-- (outside a transaction) to avoid blocking writes.
+
+-- Listings: (COALESCE(rating_avg, 0), COALESCE(purchase_count, 0), id), all DESC
+CREATE INDEX IF NOT EXISTS idx_listings_active_rating
+    ON listings ((COALESCE(rating_avg, 0)) DESC, (COALESCE(purchase_count, 0)) DESC, id DESC)
+    WHERE status = 'ACTIVE';
+
+-- Requests by budget: (COALESCE(budget_max_usd, 0), id), both DESC
+CREATE INDEX IF NOT EXISTS idx_requests_status_budget_coalesced
+    ON requests (status, (COALESCE(budget_max_usd, 0)) DESC, id DESC);
+
+-- Requests by deadline: (COALESCE(deadline, datetime.max), id), both ASC.
+-- The literal is Python's datetime.max, which the endpoint binds.
+CREATE INDEX IF NOT EXISTS idx_requests_status_deadline_coalesced
+    ON requests (status, (COALESCE(deadline, '9999-12-31 23:59:59.999999'::timestamp)), id);
@@ -4,7 +4,7 @@ Demonstrates autonomous agent discovery, hiring, and payment via Agent Transacti
 
 Flow:
 1. Orchestrator Agent receives complex task requiring multiple capabilities
-2. Discovers agents via /protocol/discover endpoint
+2. Discovers agents via /protocol/discover/batch (one request for the whole workflow)
 3. Verifies agent reputation via /protocol/verify endpoint
 4. Executes tasks via /protocol/execute endpoint
 5. Settles payments automatically via /protocol/settle endpoint
@@ -96,6 +96,52 @@ def discover_agents(capabilities_needed, constraints=None):
         return []
 
 
+def discover_agents_batch(steps, constraints=None):
+    """
+    Step 1 (workflow): Discover agents for every step in one request
+    Uses /protocol/discover/batch endpoint
+    
+    steps: list of (step_id, capabilities_needed)
+    Returns {step_id: matches}
+    """
+    log(f"[DISCOVER] Finding agents for {len(steps)} workflow steps in one request")
+    
+    payload = {
+        "requesting_agent_id": ORCHESTRATOR_ID,
+        "steps": [
+            {
+                "step_id": step_id,
+                "capabilities_needed": capabilities_needed,
+                "constraints": constraints or {
+                    "max_cost_usd": 10.0,
+                    "max_latency_ms": 5000,
+                    "min_reputation": 0.0
+                }
+            }
+            for step_id, capabilities_needed in steps
+        ]
+    }
+    
+    try:
+        response = requests.post(f"{API_BASE}/protocol/discover/batch", json=payload, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        
+        plan = {}
+        for result in data.get("results", []):
+            matches = result.get("matches", [])
+            plan[result["step_id"]] = matches
+            log(f"[OK] {result['step_id']}: {len(matches)} matching agents")
+            for match in matches:
+                log(f"  - {match['name']} (reputation: {match['reputation_score']:.2f}, cost: ${match['cost_usd']:.2f})")
+        
+        return plan
+    
+    except requests.exceptions.RequestException as e:
+        log(f"[FAIL] Batch discovery failed: {e}")
+        return {step_id: [] for step_id, _ in steps}
+
+
 def verify_agent(agent_id):
     """
     Step 2: Verify agent reputation and capabilities
@@ -203,11 +249,20 @@ def run_complex_workflow():
     log("Required capabilities: translation, summarization, math, validation")
     log("")
     
+    # Discover agents for all four tasks up front (one request)
+    plan = discover_agents_batch([
+        ("translation", ["translation", "language"]),
+        ("summarization", ["summarization", "text-processing"]),
+        ("calculation", ["math", "calculation"]),
+        ("validation", ["validation", "verification"])
+    ])
+    log("")
+    
     # Task 1: Translation
     log("--- TASK 1: TRANSLATION ---")
     spanish_review = "Este producto es increíble. La calidad es excelente y el precio es muy bueno. Lo recomiendo totalmente."
     
-    translators = discover_agents(["translation", "language"])
+    translators = plan["translation"]
     if translators:
         translator = translators[0]
         verify_agent(translator["agent_id"])
@@ -236,7 +291,7 @@ def run_complex_workflow():
     # Task 2: Summarization
     log("--- TASK 2: SUMMARIZATION ---")
     
-    summarizers = discover_agents(["summarization", "text-processing"])
+    summarizers = plan["summarization"]
     if summarizers:
         summarizer = summarizers[0]
         verify_agent(summarizer["agent_id"])
@@ -263,7 +318,7 @@ def run_complex_workflow():
     # Task 3: Sentiment Score Calculation
     log("--- TASK 3: SENTIMENT CALCULATION ---")
     
-    math_agents = discover_agents(["math", "calculation"])
+    math_agents = plan["calculation"]
     if math_agents:
         math_agent = math_agents[0]
         verify_agent(math_agent["agent_id"])
@@ -291,7 +346,7 @@ def run_complex_workflow():
     # Task 4: Validation
     log("--- TASK 4: VALIDATION ---")
     
-    validators = discover_agents(["validation", "verification"])
+    validators = plan["validation"]
     if validators:
         validator = validators[0]
         verify_agent(validator["agent_id"])
@@ -1,12 +1,29 @@
 """
 Agent Transaction Protocol (ATP) Python SDK
 Simple SDK for agents to discover, verify, and execute other agents
+
+AgentProtocol is synchronous (requests); AsyncAgentProtocol (httpx) adds
+concurrent fan-out for multi-agent workflows. Both can cache discover()/verify()
+results client-side (ProtocolCache, opt-in with cache=True), honoring
+Cache-Control and ETag.
 """
 
 import requests
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable, Tuple
+from collections import OrderedDict
 from dataclasses import dataclass
+import asyncio
+import copy
 import json
+import random
+import sqlite3
+import threading
+import time
+
+try:
+    import httpx  # Optional, only needed for AsyncAgentProtocol
+except ImportError:
+    httpx = None
 
 
 @dataclass
@@ -35,6 +52,274 @@ class ExecutionResult:
     error: Optional[Dict[str, Any]] = None
 
 
+def _discover_payload(
+    agent_id: str,
+    capabilities: List[str],
+    max_cost: Optional[float],
+    min_reputation: float,
+    max_latency_ms: int,
+    preferred_payment: str,
+    task_context: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Request body for /api/v1/protocol/discover"""
+    payload = {
+        "requesting_agent_id": agent_id,
+        "capabilities_needed": capabilities,
+        "constraints": {
+            "min_reputation": min_reputation,
+            "max_latency_ms": max_latency_ms,
+            "preferred_payment": preferred_payment
+        }
+    }
+    
+    if max_cost:
+        payload["constraints"]["max_cost_usd"] = max_cost
+        
+    if task_context:
+        payload["task_context"] = task_context
+    
+    return payload
+
+
+def _discover_batch_payload(agent_id: str, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Request body for /api/v1/protocol/discover/batch (steps are discover() kwargs)"""
+    batch_steps = []
+    for index, step in enumerate(steps):
+        step = dict(step)
+        step_id = str(step.pop("step_id", index))
+        single = _discover_payload(
+            agent_id,
+            step.pop("capabilities"),
+            step.pop("max_cost", None),
+            step.pop("min_reputation", 0.5),
+            step.pop("max_latency_ms", 10000),
+            step.pop("preferred_payment", "solana_usdc"),
+            None
+        )
+        batch_steps.append({
+            "step_id": step_id,
+            "capabilities_needed": single["capabilities_needed"],
+            "constraints": single["constraints"]
+        })
+    
+    return {"requesting_agent_id": agent_id, "steps": batch_steps}
+
+
+def _execute_payload(
+    agent_id: str,
+    agent: AgentMatch,
+    task: Dict[str, Any],
+    payment_method: str,
+    callback_url: Optional[str],
+    max_execution_time_ms: int
+) -> Dict[str, Any]:
+    """Request body sent to an agent's execution_endpoint"""
+    return {
+        "protocol_version": "1.0",
+        "requesting_agent": {
+            "id": agent_id,
+            "signature": "placeholder",  # TODO: Implement cryptographic signing
+            "callback_url": callback_url
+        },
+        "task": {
+            "type": task.get("type", "general"),
+            "input": task,
+            "requirements": {
+                "max_execution_time_ms": max_execution_time_ms,
+                "format": "json",
+                "validation": "required"
+            }
+        },
+        "payment": {
+            "method": payment_method,
+            "amount_usd": agent.cost_usd,
+            "escrow_address": "placeholder",  # TODO: Create actual escrow
+            "tx_hash_escrow": "placeholder"
+        }
+    }
+
+
+@dataclass
+class CacheEntry:
+    """Cached protocol response body plus its validator"""
+    data: Any
+    etag: Optional[str]
+    expires_at: float
+    
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class ProtocolCache:
+    """
+    Client-side cache for discover() and verify() results
+    
+    - LRU bounded by max_entries, default TTL of `ttl` seconds
+    - Server Cache-Control wins: max-age sets the TTL, no-cache forces
+      revalidation, no-store skips caching
+    - Stale entries with an ETag are revalidated with If-None-Match;
+      a 304 refreshes the entry without re-downloading it
+    - Optional persistent tier (path=...) in a SQLite file, so long-running
+      or restarted agents start warm
+    
+    One cache can be shared by several AgentProtocol/AsyncAgentProtocol
+    instances; keys do not include the requesting agent id. Callers get
+    their own copy of cached bodies, so mutating a result never alters the cache.
+    """
+    
+    def __init__(self, ttl: float = 60, max_entries: int = 1000, path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS protocol_cache ("
+                "key TEXT PRIMARY KEY, data TEXT NOT NULL, etag TEXT, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+    
+    # Keys
+    
+    @staticmethod
+    def discover_key(payload: Dict[str, Any]) -> str:
+        """Normalized capability set + constraints + task context"""
+        capabilities = sorted({c.strip().lower() for c in payload.get("capabilities_needed", [])})
+        normalized = {
+            "capabilities": capabilities,
+            "constraints": payload.get("constraints", {}),
+            "task_context": payload.get("task_context")
+        }
+        return "discover:" + json.dumps(normalized, sort_keys=True, default=str)
+    
+    @staticmethod
+    def verify_key(agent_id: str) -> str:
+        return f"verify:{agent_id}"
+    
+    # Entries
+    
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Entry for key (fresh or stale), checking memory then disk"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT data, etag, expires_at FROM protocol_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(data=json.loads(row[0]), etag=row[1], expires_at=row[2])
+            self._remember(key, entry)
+            return entry
+    
+    def put(self, key: str, data: Any, headers) -> Optional[CacheEntry]:
+        """Cache a 200 response according to its Cache-Control/ETag headers"""
+        directives = self._cache_control(headers)
+        if "no-store" in directives:
+            self.invalidate(key)
+            return None
+        
+        entry = CacheEntry(data=copy.deepcopy(data), etag=headers.get("etag"), expires_at=self._expiry(directives))
+        with self._lock:
+            self._remember(key, entry)
+            self._persist(key, entry)
+        return entry
+    
+    def revalidated(self, key: str, entry: CacheEntry, headers) -> CacheEntry:
+        """Server answered 304: keep the body, take the new expiry"""
+        self.revalidations += 1
+        entry.expires_at = self._expiry(self._cache_control(headers))
+        entry.etag = headers.get("etag") or entry.etag
+        with self._lock:
+            self._remember(key, entry)
+            self._persist(key, entry)
+        return entry
+    
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            if self._db is not None:
+                if key is None:
+                    self._db.execute("DELETE FROM protocol_cache")
+                else:
+                    self._db.execute("DELETE FROM protocol_cache WHERE key = ?", (key,))
+                self._db.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "persistent": self._db is not None
+        }
+    
+    # Internals (callers hold self._lock)
+    
+    def _remember(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _persist(self, key: str, entry: CacheEntry):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO protocol_cache (key, data, etag, expires_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(entry.data), entry.etag, entry.expires_at)
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            # Keep the file bounded: drop the entries closest to (or past) expiry
+            self._db.execute(
+                "DELETE FROM protocol_cache WHERE key NOT IN ("
+                "SELECT key FROM protocol_cache ORDER BY expires_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+        self._db.commit()
+    
+    @staticmethod
+    def _cache_control(headers) -> Dict[str, Optional[str]]:
+        directives = {}
+        for part in (headers.get("cache-control") or "").split(","):
+            name, _, value = part.strip().partition("=")
+            if name:
+                directives[name.lower()] = value.strip('"') or None
+        return directives
+    
+    def _expiry(self, directives: Dict[str, Optional[str]]) -> float:
+        if "no-cache" in directives:
+            return 0.0  # Stored for its ETag, revalidated on every use
+        ttl = self.ttl
+        max_age = directives.get("max-age")
+        if max_age and max_age.isdigit():
+            ttl = int(max_age)
+        return time.time() + ttl
+
+
+def _resolve_cache(cache) -> Optional[ProtocolCache]:
+    if cache is True:
+        return ProtocolCache()
+    return cache or None
+
+
 class AgentProtocol:
     """
     Agent Transaction Protocol SDK
@@ -63,12 +348,51 @@ class AgentProtocol:
         self,
         agent_id: str,
         base_url: str = "https://agentdirectory.exchange",
-        timeout: int = 30
+        timeout: int = 30,
+        cache: Any = False
     ):
         self.agent_id = agent_id
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
         self.session = requests.Session()
+        # discover()/verify() cache (opt-in): True = in-memory default, a
+        # ProtocolCache to share/persist, False/None to always hit the exchange
+        self.cache = _resolve_cache(cache)
+    
+    def _cached_request(
+        self,
+        method: str,
+        endpoint: str,
+        key: str,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """JSON body from the cache while fresh, else from the exchange (conditional when possible)"""
+        entry = self.cache.get(key) if self.cache is not None else None
+        if entry is not None and entry.is_fresh():
+            self.cache.hits += 1
+            return copy.deepcopy(entry.data)
+        
+        headers = {}
+        if self.cache is not None:
+            self.cache.misses += 1
+            if entry is not None and entry.etag:
+                headers["If-None-Match"] = entry.etag
+        
+        response = self.session.request(
+            method,
+            endpoint,
+            json=payload,
+            headers=headers,
+            timeout=self.timeout
+        )
+        if response.status_code == 304 and entry is not None:
+            return copy.deepcopy(self.cache.revalidated(key, entry, response.headers).data)
+        response.raise_for_status()
+        
+        data = response.json()
+        if self.cache is not None:
+            self.cache.put(key, data, response.headers)
+        return data
         
     def discover(
         self,
@@ -94,22 +418,35 @@ class AgentProtocol:
             List of matching agents, sorted by reputation
         """
         endpoint = f"{self.base_url}/api/v1/protocol/discover"
+        payload = _discover_payload(
+            self.agent_id, capabilities, max_cost, min_reputation,
+            max_latency_ms, preferred_payment, task_context
+        )
         
-        payload = {
-            "requesting_agent_id": self.agent_id,
-            "capabilities_needed": capabilities,
-            "constraints": {
-                "min_reputation": min_reputation,
-                "max_latency_ms": max_latency_ms,
-                "preferred_payment": preferred_payment
-            }
-        }
+        try:
+            data = self._cached_request("POST", endpoint, ProtocolCache.discover_key(payload), payload)
+            matches = [
+                AgentMatch(**match)
+                for match in data.get("matches", [])
+            ]
+            
+            return matches
+            
+        except requests.RequestException as e:
+            raise Exception(f"Discovery failed: {e}")
+    
+    def discover_batch(self, steps: List[Dict[str, Any]]) -> List[List[AgentMatch]]:
+        """
+        Discover agents for several workflow steps in one request
         
-        if max_cost:
-            payload["constraints"]["max_cost_usd"] = max_cost
+        Args:
+            steps: Each item is a dict of discover() kwargs (capabilities, max_cost, ...)
             
-        if task_context:
-            payload["task_context"] = task_context
+        Returns:
+            Match lists in the same order as steps
+        """
+        endpoint = f"{self.base_url}/api/v1/protocol/discover/batch"
+        payload = _discover_batch_payload(self.agent_id, steps)
         
         try:
             response = self.session.post(
@@ -119,16 +456,13 @@ class AgentProtocol:
             )
             response.raise_for_status()
             
-            data = response.json()
-            matches = [
-                AgentMatch(**match)
-                for match in data.get("matches", [])
+            return [
+                [AgentMatch(**match) for match in result.get("matches", [])]
+                for result in response.json().get("results", [])
             ]
             
-            return matches
-            
         except requests.RequestException as e:
-            raise Exception(f"Discovery failed: {e}")
+            raise Exception(f"Batch discovery failed: {e}")
     
     def verify(self, agent_id: str) -> Dict[str, Any]:
         """
@@ -143,9 +477,7 @@ class AgentProtocol:
         endpoint = f"{self.base_url}/api/v1/protocol/verify/{agent_id}"
         
         try:
-            response = self.session.get(endpoint, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
+            return self._cached_request("GET", endpoint, ProtocolCache.verify_key(agent_id))
             
         except requests.RequestException as e:
             raise Exception(f"Verification failed: {e}")
@@ -179,30 +511,9 @@ class AgentProtocol:
         # 5. Update reputations
         
         endpoint = agent.execution_endpoint
-        
-        payload = {
-            "protocol_version": "1.0",
-            "requesting_agent": {
-                "id": self.agent_id,
-                "signature": "placeholder",  # TODO: Implement cryptographic signing
-                "callback_url": callback_url
-            },
-            "task": {
-                "type": task.get("type", "general"),
-                "input": task,
-                "requirements": {
-                    "max_execution_time_ms": max_execution_time_ms,
-                    "format": "json",
-                    "validation": "required"
-                }
-            },
-            "payment": {
-                "method": payment_method,
-                "amount_usd": agent.cost_usd,
-                "escrow_address": "placeholder",  # TODO: Create actual escrow
-                "tx_hash_escrow": "placeholder"
-            }
-        }
+        payload = _execute_payload(
+            self.agent_id, agent, task, payment_method, callback_url, max_execution_time_ms
+        )
         
         try:
             response = self.session.post(
@@ -246,6 +557,340 @@ class AgentProtocol:
             raise Exception(f"Status check failed: {e}")
 
 
+class AsyncAgentProtocol:
+    """
+    Async Agent Transaction Protocol SDK (requires httpx)
+    
+    One pooled HTTP client per instance; fan-out helpers run calls
+    concurrently (bounded by max_concurrency) so a multi-agent workflow
+    takes roughly as long as its slowest call.
+    
+    Usage:
+        async with AsyncAgentProtocol(agent_id="your_agent_id") as protocol:
+            research, writing = await protocol.discover_many([
+                {"capabilities": ["market-research"], "max_cost": 100},
+                {"capabilities": ["copywriting"]}
+            ])
+            
+            verifications = await protocol.verify_many(
+                [m.agent_id for m in research[:3]]
+            )
+            
+            results = await protocol.execute_many([
+                (research[0], {"industry": "pet supplements"}),
+                (writing[0], {"brief": "launch email"})
+            ])
+    
+    Retries:
+        Read calls (discover, verify, status) are retried on connection
+        errors, timeouts and 429/502/503/504 with jittered backoff, and
+        hedged: if no response arrives within hedge_after seconds a second
+        identical request is sent and the first answer wins.
+        execute() is not idempotent, so it is only retried when the
+        connection could not be established and is never hedged.
+    """
+    
+    RETRY_STATUS_CODES = (429, 502, 503, 504)
+    
+    def __init__(
+        self,
+        agent_id: str,
+        base_url: str = "https://agentdirectory.exchange",
+        timeout: float = 30,
+        max_concurrency: int = 20,
+        max_connections: int = 100,
+        retries: int = 2,
+        hedge_after: Optional[float] = 2.0,
+        backoff: float = 0.25,
+        cache: Any = False
+    ):
+        if httpx is None:
+            raise ImportError("AsyncAgentProtocol requires httpx: pip install httpx")
+        
+        self.agent_id = agent_id
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.hedge_after = hedge_after
+        self.backoff = backoff
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = _resolve_cache(cache)  # Same options as AgentProtocol
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.aclose()
+    
+    async def aclose(self):
+        """Close pooled connections"""
+        await self.client.aclose()
+    
+    # ------------------------------------------------------------------
+    # Transport
+    # ------------------------------------------------------------------
+    
+    async def _send_once(self, method: str, url: str, payload, timeout: float, headers=None):
+        async with self._semaphore:
+            response = await self.client.request(
+                method, url, json=payload, headers=headers, timeout=timeout
+            )
+        if response.status_code in self.RETRY_STATUS_CODES:
+            response.raise_for_status()
+        return response
+    
+    async def _send_hedged(self, method: str, url: str, payload, timeout: float, headers=None):
+        """First successful response of the primary and (after hedge_after) a backup request"""
+        primary = asyncio.ensure_future(self._send_once(method, url, payload, timeout, headers))
+        if not self.hedge_after or self.hedge_after >= timeout:
+            return await primary
+        
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        
+        backup = asyncio.ensure_future(self._send_once(method, url, payload, timeout, headers))
+        pending = {primary, backup}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        payload: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        idempotent: bool = True,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            try:
+                if idempotent:
+                    response = await self._send_hedged(method, url, payload, timeout, headers)
+                else:
+                    response = await self._send_once(method, url, payload, timeout, headers)
+                if response.status_code != 304:
+                    response.raise_for_status()
+                return response
+            except httpx.HTTPError as e:
+                if attempt >= self.retries or not self._retryable(e, idempotent):
+                    raise
+            attempt += 1
+            await asyncio.sleep(self.backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+    
+    async def _cached_request(
+        self,
+        method: str,
+        url: str,
+        key: str,
+        payload: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Async counterpart of AgentProtocol._cached_request"""
+        entry = self.cache.get(key) if self.cache is not None else None
+        if entry is not None and entry.is_fresh():
+            self.cache.hits += 1
+            return copy.deepcopy(entry.data)
+        
+        headers = {}
+        if self.cache is not None:
+            self.cache.misses += 1
+            if entry is not None and entry.etag:
+                headers["If-None-Match"] = entry.etag
+        
+        response = await self._request(method, url, payload, timeout, headers=headers)
+        if response.status_code == 304:
+            if entry is None:
+                response.raise_for_status()
+            return copy.deepcopy(self.cache.revalidated(key, entry, response.headers).data)
+        
+        data = response.json()
+        if self.cache is not None:
+            self.cache.put(key, data, response.headers)
+        return data
+    
+    def _retryable(self, error: Exception, idempotent: bool) -> bool:
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+            return True  # Request never reached the server
+        if not idempotent:
+            return False
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in self.RETRY_STATUS_CODES
+        return isinstance(error, httpx.TransportError)
+    
+    # ------------------------------------------------------------------
+    # Single calls (same semantics as AgentProtocol)
+    # ------------------------------------------------------------------
+    
+    async def discover(
+        self,
+        capabilities: List[str],
+        max_cost: float = None,
+        min_reputation: float = 0.5,
+        max_latency_ms: int = 10000,
+        preferred_payment: str = "solana_usdc",
+        task_context: Dict[str, Any] = None,
+        timeout: Optional[float] = None
+    ) -> List[AgentMatch]:
+        """Discover agents matching capabilities (see AgentProtocol.discover)"""
+        endpoint = f"{self.base_url}/api/v1/protocol/discover"
+        payload = _discover_payload(
+            self.agent_id, capabilities, max_cost, min_reputation,
+            max_latency_ms, preferred_payment, task_context
+        )
+        
+        try:
+            data = await self._cached_request(
+                "POST", endpoint, ProtocolCache.discover_key(payload), payload, timeout
+            )
+            return [AgentMatch(**match) for match in data.get("matches", [])]
+            
+        except httpx.HTTPError as e:
+            raise Exception(f"Discovery failed: {e}")
+    
+    async def discover_batch(
+        self,
+        steps: List[Dict[str, Any]],
+        timeout: Optional[float] = None
+    ) -> List[List[AgentMatch]]:
+        """Discover agents for several workflow steps in one request (see AgentProtocol.discover_batch)"""
+        endpoint = f"{self.base_url}/api/v1/protocol/discover/batch"
+        payload = _discover_batch_payload(self.agent_id, steps)
+        
+        try:
+            response = await self._request("POST", endpoint, payload, timeout)
+            return [
+                [AgentMatch(**match) for match in result.get("matches", [])]
+                for result in response.json().get("results", [])
+            ]
+            
+        except httpx.HTTPError as e:
+            raise Exception(f"Batch discovery failed: {e}")
+    
+    async def verify(self, agent_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Verify agent identity and reputation (see AgentProtocol.verify)"""
+        endpoint = f"{self.base_url}/api/v1/protocol/verify/{agent_id}"
+        
+        try:
+            return await self._cached_request(
+                "GET", endpoint, ProtocolCache.verify_key(agent_id), timeout=timeout
+            )
+            
+        except httpx.HTTPError as e:
+            raise Exception(f"Verification failed: {e}")
+    
+    async def execute(
+        self,
+        agent: AgentMatch,
+        task: Dict[str, Any],
+        payment_method: str = "solana_usdc",
+        callback_url: Optional[str] = None,
+        max_execution_time_ms: int = 30000,
+        timeout: Optional[float] = None
+    ) -> ExecutionResult:
+        """Execute task on discovered agent (see AgentProtocol.execute)"""
+        payload = _execute_payload(
+            self.agent_id, agent, task, payment_method, callback_url, max_execution_time_ms
+        )
+        
+        try:
+            response = await self._request(
+                "POST", agent.execution_endpoint, payload, timeout, idempotent=False
+            )
+            data = response.json()
+            
+            return ExecutionResult(
+                execution_id=data.get("execution_id"),
+                status=data.get("status"),
+                result=data.get("result"),
+                execution_time_ms=data.get("execution_time_ms")
+            )
+            
+        except httpx.HTTPError as e:
+            return ExecutionResult(
+                execution_id="error",
+                status="failed",
+                error={"message": str(e)}
+            )
+    
+    async def get_status(self) -> Dict[str, Any]:
+        """Get protocol status and statistics"""
+        endpoint = f"{self.base_url}/api/v1/protocol/status"
+        
+        try:
+            response = await self._request("GET", endpoint)
+            return response.json()
+            
+        except httpx.HTTPError as e:
+            raise Exception(f"Status check failed: {e}")
+    
+    # ------------------------------------------------------------------
+    # Fan-out
+    # ------------------------------------------------------------------
+    
+    async def discover_many(
+        self,
+        queries: Iterable[Any],
+        return_exceptions: bool = False
+    ) -> List[List[AgentMatch]]:
+        """
+        Run several discoveries concurrently
+        
+        Args:
+            queries: Each item is a capability list or a dict of discover() kwargs
+            return_exceptions: Put failures in the result list instead of raising
+            
+        Returns:
+            Match lists in the same order as queries
+        """
+        calls = [
+            self.discover(**query) if isinstance(query, dict) else self.discover(capabilities=list(query))
+            for query in queries
+        ]
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+    
+    async def verify_many(
+        self,
+        agent_ids: Iterable[str],
+        return_exceptions: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Verify several agents concurrently; results are in input order"""
+        calls = [self.verify(agent_id) for agent_id in agent_ids]
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+    
+    async def execute_many(
+        self,
+        jobs: Iterable[Tuple[AgentMatch, Dict[str, Any]]],
+        **execute_kwargs
+    ) -> List[ExecutionResult]:
+        """
+        Execute several (agent, task) pairs concurrently
+        
+        Failures come back as ExecutionResult(status="failed"), as with execute().
+        """
+        calls = [self.execute(agent, task, **execute_kwargs) for agent, task in jobs]
+        return await asyncio.gather(*calls)
+
+
 # Convenience functions for simple use cases
 
 def find_agent(capability: str, max_cost: float = None) -> Optional[AgentMatch]: